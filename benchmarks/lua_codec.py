@@ -0,0 +1,63 @@
+"""
+Throughput of the JSON and MessagePack codecs in lua/mcp_bridge.lua
+
+Runs the bridge script in an embedded Lua 5.4 interpreter (pip install -e .[dev])
+and times decode + encode of MIDI-event-sized payloads.
+
+    python benchmarks/lua_codec.py [--events 1000 10000 100000]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from server import msgpack_codec  # noqa: E402
+from testing.lua_bridge import LuaBridgeHarness  # noqa: E402
+
+
+def make_payload(events: int):
+    return {"ok": True, "events": [
+        {"ppq": i * 120.0, "flags": 1, "msg": "\x90\x3c\x64", "chan": i % 16}
+        for i in range(events)
+    ]}
+
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, nargs="+", default=[1000, 10000, 100000])
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        codec = LuaBridgeHarness(Path(tmp), encoding=None).lua.globals().MCP_CODEC
+        print(f"{'events':>8} {'codec':>8} {'bytes':>10} {'decode ms':>10} {'encode ms':>10} {'MB/s':>8}")
+        for events in options.events:
+            payload = make_payload(events)
+            for name, data, decode, encode in (
+                ("json", json.dumps(payload).encode(), codec.decode_json, codec.encode_json),
+                ("msgpack", msgpack_codec.packb(payload), codec.decode_msgpack, codec.encode_msgpack),
+            ):
+                value = decode(data)
+                decode_s = best_of(lambda: decode(data))
+                encode_s = best_of(lambda: encode(value))
+                mb_s = len(data) / (decode_s + encode_s) / 1e6
+                print(f"{events:>8} {name:>8} {len(data):>10} {decode_s * 1e3:>10.2f} "
+                      f"{encode_s * 1e3:>10.2f} {mb_s:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Bytes on the wire and throughput of the relay WebSocket protocol
+
+Connects an MCPWebSocketClient to a local relay stand-in (testing.fake_relay),
+has the relay send a burst of commands and measures, per protocol variant,
+the frames and payload bytes the relay receives and responses per second.
+Results alternate between a large MIDI event dump and a short string.
+
+Payload bytes are counted after WebSocket framing is removed, with
+permessage-deflate off, so explicit compression is what is measured.
+
+    python benchmarks/relay_protocol.py [--commands 500]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from server.relay_protocol import available_compression  # noqa: E402
+from server.websocket_client import MCPWebSocketClient  # noqa: E402
+from testing.fake_relay import FakeRelay  # noqa: E402
+
+MIDI_DUMP = json.dumps({"events": [{"ppq": i * 240, "msg": [0x90, 36 + i % 24, 100]}
+                                   for i in range(400)]})
+
+
+def variants():
+    yield "legacy", None
+    yield "batch", {"batch": True}
+    for compression in available_compression():
+        yield f"batch+{compression}", {"batch": True, "compression": compression}
+    yield f"binary+msgpack+{available_compression()[0]}", {
+        "batch": True, "binary": True, "codec": "msgpack",
+        "compression": available_compression()[0]}
+
+
+async def run(accept, commands: int):
+    relay = FakeRelay(accept=accept)
+    url = await relay.start()
+
+    async def handler(method, params):
+        return MIDI_DUMP if params["i"] % 2 else "Track 1 volume set to -6.0 dB"
+
+    client = MCPWebSocketClient(url, "token", handler)
+    client.scheduler.max_in_flight = 16
+    client.scheduler.max_queue = commands  # measure framing, not overload handling
+    connect = asyncio.create_task(client.connect())
+    start = time.perf_counter()
+    try:
+        await relay.send_commands([{"request_id": i, "method": "get_midi_events",
+                                    "params": {"i": i}, "session_id": f"s{i % 8}"}
+                                   for i in range(commands)])
+        await relay.wait_for_responses(commands, timeout=120)
+        elapsed = time.perf_counter() - start
+    finally:
+        await client.disconnect()
+        await connect
+        await relay.stop()
+    return relay.frames, relay.bytes_received, commands / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commands", type=int, default=500)
+    options = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{'protocol':<28} {'frames':>7} {'bytes':>10} {'bytes/msg':>10} {'msgs/s':>9}")
+    for name, accept in variants():
+        frames, size, rate = asyncio.run(run(accept, options.commands))
+        print(f"{name:<28} {frames:>7} {size:>10} {size / options.commands:>10.0f} {rate:>9.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Cold start time of the MCP server per tool profile
+
+A server process is spawned per chat session, so its start-up is
+user-visible. For each profile this runs `python -m server.app --profile P`
+several times over stdio and reports the median time until:
+
+- initialize: the server answered the MCP initialize request
+- list_tools: the tool list has been received (the server is usable)
+
+No REAPER is needed; tools are only registered, never called. The servers
+share a temporary tool-schema manifest (see server/tool_manifest.py) that an
+unmeasured first start fills; --no-tool-cache measures uncached starts.
+
+    python benchmarks/startup.py [--profiles dsl-production full] [--runs 5] [--no-tool-cache]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from mcp import ClientSession  # noqa: E402
+from mcp.client.stdio import StdioServerParameters, stdio_client  # noqa: E402
+
+from server.tool_profiles import TOOL_PROFILES  # noqa: E402
+
+
+async def start_once(profile: str, bridge_dir: str, tool_cache: str):
+    """Seconds to initialize and to list tools, plus the tool count"""
+    env = {k: v for k, v in os.environ.items() if k not in ("MCP_RELAY_URL", "MCP_AUTH_TOKEN")}
+    env["REAPER_MCP_BRIDGE_DIR"] = bridge_dir
+    env["REAPER_MCP_TOOL_CACHE"] = tool_cache
+    params = StdioServerParameters(command=sys.executable,
+                                   args=["-m", "server.app", "--profile", profile],
+                                   env=env, cwd=str(ROOT))
+    with open(os.devnull, "w") as errlog:
+        start = time.perf_counter()
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                initialized = time.perf_counter() - start
+                tools = await session.list_tools()
+                listed = time.perf_counter() - start
+    return initialized, listed, len(tools.tools)
+
+
+async def run_profile(profile: str, runs: int, bridge_dir: str, tool_cache: str):
+    if tool_cache != "0":
+        await start_once(profile, bridge_dir, tool_cache)  # fill the manifest
+    samples = [await start_once(profile, bridge_dir, tool_cache) for _ in range(runs)]
+    return {
+        "initialize_ms": statistics.median(s[0] for s in samples) * 1000,
+        "list_tools_ms": statistics.median(s[1] for s in samples) * 1000,
+        "tools": samples[0][2],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", choices=list(TOOL_PROFILES),
+                        default=list(TOOL_PROFILES))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-tool-cache", action="store_true",
+                        help="start without the tool-schema manifest")
+    options = parser.parse_args()
+
+    print(f"{'profile':<20} {'tools':>6} {'initialize ms':>14} {'list_tools ms':>14}")
+    with tempfile.TemporaryDirectory() as bridge_dir:
+        tool_cache = "0" if options.no_tool_cache else str(Path(bridge_dir) / "tool_manifest.json")
+        for profile in options.profiles:
+            result = asyncio.run(run_profile(profile, options.runs, bridge_dir, tool_cache))
+            print(f"{profile:<20} {result['tools']:>6} {result['initialize_ms']:>14.1f} "
+                  f"{result['list_tools_ms']:>14.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
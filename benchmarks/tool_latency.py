@@ -0,0 +1,172 @@
+"""
+Latency and bridge traffic of representative tools against a fake REAPER
+
+Each case runs through the real MCP tool layer and the file transport
+(request_N.json / response_N.json) against testing.fake_reaper, whose defer
+tick stands in for REAPER's. Reported per case and project size:
+
+- round trips: bridge requests per tool call (a batch counts once)
+- api calls:   ReaScript functions executed per tool call
+- p50 / p99:   tool call latency in milliseconds
+
+Results are compared with a stored baseline. More round trips or API calls
+than the baseline, or a p50 slower by more than --tolerance, is reported as
+a regression and the script exits with status 1.
+
+    python benchmarks/tool_latency.py [--tracks 10 100 1000] [--update-baseline]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from mcp.server.fastmcp import FastMCP  # noqa: E402
+
+from server.bridge import bridge  # noqa: E402
+from server.dsl import resolvers  # noqa: E402
+from server.dsl.name_index import fx_param_cache  # noqa: E402
+from server.dsl.snapshot import snapshot_cache  # noqa: E402
+from server.dsl.tools import register_dsl_tools  # noqa: E402
+from server.tools.bus_routing import register_bus_routing_tools  # noqa: E402
+from server.tools.tempo_time_signature import register_tempo_time_signature_tools  # noqa: E402
+from server.transport import FileTransport  # noqa: E402
+from testing.fake_reaper import FileBridgeServer, make_project  # noqa: E402
+
+BASELINE = Path(__file__).resolve().parent / "tool_latency_baseline.json"
+
+# REAPER's defer loop runs at ~30 Hz; the default keeps runs short while
+# still charging every round trip a scheduling delay
+DEFAULT_TICK = 0.002
+
+
+def build_server() -> FastMCP:
+    mcp = FastMCP("reaper-mcp-benchmark")
+    register_dsl_tools(mcp)
+    register_bus_routing_tools(mcp)
+    register_tempo_time_signature_tools(mcp)
+    return mcp
+
+
+def cases(mcp: FastMCP, reaper):
+    """(name, coroutine factory) pairs; each factory call is one tool call"""
+    names = [track["name"] for track in reaper.tracks]
+    last = names[-1]
+
+    return [
+        ("resolve_track", lambda: resolvers.resolve_track(bridge, last)),
+        ("dsl_track_volume", lambda: mcp.call_tool(
+            "dsl_track_volume", {"track": last, "volume": -6})),
+        ("analyze_routing_matrix", lambda: mcp.call_tool("analyze_routing_matrix", {})),
+        ("export_tempo_map", lambda: mcp.call_tool("export_tempo_map", {})),
+    ]
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    rank = max(1, int(math.ceil(len(ordered) * q / 100.0)))
+    return ordered[rank - 1]
+
+
+async def run_case(reaper, factory, iterations: int):
+    await factory()  # warm-up: imports, first snapshot
+    requests, api_calls = reaper.requests, len(reaper.calls)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await factory()
+        samples.append(time.perf_counter() - start)
+    return {
+        "round_trips": (reaper.requests - requests) / iterations,
+        "api_calls": (len(reaper.calls) - api_calls) / iterations,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+async def run_size(mcp: FastMCP, track_count: int, iterations: int, tick: float):
+    reaper = make_project(track_count)
+    with tempfile.TemporaryDirectory() as tmp, FileBridgeServer(Path(tmp), reaper, tick):
+        bridge.bridge_dir = Path(tmp)
+        bridge.transport = FileTransport(Path(tmp))
+        snapshot_cache.invalidate()
+        fx_param_cache.clear()
+        resolvers.reset_context()
+        results = {}
+        try:
+            for name, factory in cases(mcp, reaper):
+                results[name] = await run_case(reaper, factory, iterations)
+        finally:
+            await bridge.transport.close()
+    return results
+
+
+def compare(results, baseline, tolerance: float):
+    """Regression messages for results that are worse than the baseline"""
+    problems = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in ("round_trips", "api_calls"):
+            if result[metric] > base[metric] + 1e-9:
+                problems.append(f"{key}: {metric} {base[metric]:g} -> {result[metric]:g}")
+        if result["p50_ms"] > base["p50_ms"] * tolerance:
+            problems.append(f"{key}: p50 {base['p50_ms']:.2f} ms -> {result['p50_ms']:.2f} ms")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tracks", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--tick", type=float, default=DEFAULT_TICK,
+                        help="fake REAPER defer interval in seconds")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="allowed p50 slowdown factor before reporting a regression")
+    options = parser.parse_args()
+
+    mcp = build_server()
+    results = {}
+    print(f"{'tool':<24} {'tracks':>6} {'round trips':>12} {'api calls':>10} "
+          f"{'p50 ms':>9} {'p99 ms':>9}")
+    for track_count in options.tracks:
+        size_results = asyncio.run(run_size(mcp, track_count, options.iterations, options.tick))
+        for name, result in size_results.items():
+            results[f"{name}@{track_count}"] = result
+            print(f"{name:<24} {track_count:>6} {result['round_trips']:>12g} "
+                  f"{result['api_calls']:>10g} {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f}")
+
+    if options.update_baseline:
+        baseline = json.loads(options.baseline.read_text()) if options.baseline.exists() else {}
+        baseline.update({key: {metric: round(value, 3) for metric, value in result.items()}
+                         for key, result in results.items()})
+        options.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"\nBaseline written to {options.baseline}")
+        return 0
+
+    if not options.baseline.exists():
+        print("\nNo baseline stored; run with --update-baseline to create one")
+        return 0
+    problems = compare(results, json.loads(options.baseline.read_text()), options.tolerance)
+    if problems:
+        print("\nRegressions against baseline:")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+    print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,177 +11,391 @@ local function ensure_dir()
     reaper.RecursiveCreateDirectory(bridge_dir, 0)
 end
 
--- Simple JSON encoding (minimal implementation)
-local function encode_json(v)
-    if type(v) == "nil" then
+-- ============================================================================
+-- JSON / MESSAGEPACK CODEC
+-- ============================================================================
+-- Single-pass encoders write into a buffer table that is concatenated once;
+-- the decoders walk the input with a position index instead of copying
+-- substrings, so both run in linear time on large payloads (MIDI event
+-- lists, state chunks).
+
+local json_escapes = {
+    ['"'] = '\\"', ['\\'] = '\\\\', ['\b'] = '\\b', ['\f'] = '\\f',
+    ['\n'] = '\\n', ['\r'] = '\\r', ['\t'] = '\\t',
+}
+
+local function escape_json_char(c)
+    return json_escapes[c] or string.format("\\u%04x", c:byte())
+end
+
+local function encode_json_number(v)
+    if v ~= v or v == math.huge or v == -math.huge then
         return "null"
-    elseif type(v) == "boolean" then
+    elseif math.type(v) == "integer" then
         return tostring(v)
-    elseif type(v) == "number" then
-        return tostring(v)
-    elseif type(v) == "string" then
-        -- IMPORTANT: backslash MUST be escaped first, otherwise the
-        -- subsequent gsubs that introduce \" \n \r will themselves get
-        -- doubled. Tabs and control chars are also added; any unescaped
-        -- backslash in a returned string (e.g. Windows path C:\Users\...)
-        -- previously broke strict JSON parsers on the client side.
-        local s = v:gsub('\\', '\\\\')
-                   :gsub('"',  '\\"')
-                   :gsub('\n', '\\n')
-                   :gsub('\r', '\\r')
-                   :gsub('\t', '\\t')
-        return string.format('"%s"', s)
-    elseif type(v) == "table" then
-        local parts = {}
-        local is_array = #v > 0
-        if is_array then
-            for i, item in ipairs(v) do
-                table.insert(parts, encode_json(item))
+    end
+    -- Shortest form that reads back as the same double
+    local s = string.format("%.14g", v)
+    if tonumber(s) ~= v then s = string.format("%.17g", v) end
+    return s
+end
+
+local base64_encode  -- defined with the base64 helpers below
+
+-- Placeholder for nil inside a list: trailing nils do not count towards a
+-- table's length, so they would be dropped (or an all-nil list sent as {})
+local json_null = setmetatable({}, {__tostring = function() return "null" end})
+
+local function encode_json_value(v, buf)
+    local t = type(v)
+    if v == json_null then
+        buf[#buf + 1] = "null"
+    elseif t == "string" and utf8.len(v) == nil then
+        -- Binary strings (not valid UTF-8) would make the whole document
+        -- invalid JSON; send them base64-encoded, marked like pointers
+        encode_json_value({__base64 = base64_encode(v)}, buf)
+    elseif t == "string" then
+        -- IMPORTANT: every backslash, quote and control character is
+        -- escaped; an unescaped backslash (e.g. Windows path C:\Users\...)
+        -- breaks strict JSON parsers on the client side.
+        buf[#buf + 1] = '"' .. v:gsub('[%c"\\]', escape_json_char) .. '"'
+    elseif t == "number" then
+        buf[#buf + 1] = encode_json_number(v)
+    elseif t == "boolean" then
+        buf[#buf + 1] = v and "true" or "false"
+    elseif t == "table" then
+        if #v > 0 then
+            buf[#buf + 1] = "["
+            for i = 1, #v do
+                if i > 1 then buf[#buf + 1] = "," end
+                encode_json_value(v[i], buf)
             end
-            return "[" .. table.concat(parts, ",") .. "]"
+            buf[#buf + 1] = "]"
         else
+            buf[#buf + 1] = "{"
+            local first = true
             for k, item in pairs(v) do
-                -- Keys also need escaping; previously a key containing
-                -- a quote, backslash, or control char would corrupt
-                -- the output.
-                table.insert(parts, encode_json(tostring(k)) .. ":" .. encode_json(item))
+                if not first then buf[#buf + 1] = "," end
+                first = false
+                encode_json_value(tostring(k), buf)
+                buf[#buf + 1] = ":"
+                encode_json_value(item, buf)
             end
-            return "{" .. table.concat(parts, ",") .. "}"
+            buf[#buf + 1] = "}"
         end
-    elseif type(v) == "userdata" then
+    elseif t == "userdata" then
         -- Handle userdata (pointers) by converting to a handle ID
-        return encode_json({__ptr = tostring(v)})
+        encode_json_value({__ptr = tostring(v)}, buf)
     else
-        return "null"
+        buf[#buf + 1] = "null"
     end
 end
 
--- Better JSON decoding that handles arrays properly
-local function decode_json(str)
-    if not str or str == "" then return nil end
-    
-    -- Remove whitespace
-    str = str:gsub("^%s*(.-)%s*$", "%1")
-    
-    -- Very basic JSON decoder
-    if str == "null" then return nil
-    elseif str == "true" then return true
-    elseif str == "false" then return false
-    elseif tonumber(str) ~= nil then
-        -- tonumber() handles ints, floats, AND scientific notation
-        -- (e.g. "1.5e-3", "2E+4") — the previous regex `%-?%d+%.?%d*`
-        -- did not, breaking automation values and other normalized floats.
-        return tonumber(str)
-    elseif str:match('^"(.*)"$') then
-        -- Unescape string. The order matters: unescape \\ LAST so that
-        -- a literal backslash from "\\\\n" doesn't get mistaken for a
-        -- newline escape. Use a placeholder for double-backslash.
-        local s = str:match('^"(.*)"$')
-        s = s:gsub('\\\\', '\0')          -- protect literal backslash
-              :gsub('\\n', '\n')
-              :gsub('\\r', '\r')
-              :gsub('\\t', '\t')
-              :gsub('\\"', '"')
-              :gsub('\\/', '/')
-              :gsub('\0',  '\\')           -- restore literal backslash
-        return s
-    elseif str:match("^%[.*%]$") then
-        -- Array - improved parsing
-        local arr = {}
-        local content = str:sub(2, -2)
-        if content ~= "" then
-            -- Handle nested structures better
-            local i = 1
-            local pos = 1
-            local depth = 0
-            local start = 1
-            
-            while pos <= #content do
-                local char = content:sub(pos, pos)
-                if char == '[' or char == '{' then
-                    depth = depth + 1
-                elseif char == ']' or char == '}' then
-                    depth = depth - 1
-                elseif char == ',' and depth == 0 then
-                    -- Found a top-level comma
-                    local value = content:sub(start, pos - 1)
-                    arr[i] = decode_json(value:match("^%s*(.-)%s*$"))
-                    i = i + 1
-                    start = pos + 1
+local function encode_json(v)
+    local buf = {}
+    encode_json_value(v, buf)
+    return table.concat(buf)
+end
+
+local json_unescapes = {
+    ['"'] = '"', ['\\'] = '\\', ['/'] = '/', b = '\b', f = '\f',
+    n = '\n', r = '\r', t = '\t',
+}
+
+local decode_json_value
+
+local function json_error(str, pos, what)
+    error(string.format("JSON: %s at position %d", what, pos), 0)
+end
+
+local function skip_ws(str, pos)
+    return str:find("[^ \t\r\n]", pos) or #str + 1
+end
+
+local function decode_json_string(str, pos)
+    -- pos is just after the opening quote
+    local buf = {}
+    while true do
+        local stop = str:find('["\\]', pos)
+        if not stop then json_error(str, pos, "unterminated string") end
+        buf[#buf + 1] = str:sub(pos, stop - 1)
+        if str:byte(stop) == 34 then  -- '"'
+            return table.concat(buf), stop + 1
+        end
+        local esc = str:sub(stop + 1, stop + 1)
+        if esc == "u" then
+            local code = tonumber(str:sub(stop + 2, stop + 5), 16)
+            if not code then json_error(str, stop, "bad \\u escape") end
+            pos = stop + 6
+            -- Combine UTF-16 surrogate pairs
+            if code >= 0xD800 and code <= 0xDBFF and str:sub(pos, pos + 1) == "\\u" then
+                local low = tonumber(str:sub(pos + 2, pos + 5), 16)
+                if low and low >= 0xDC00 and low <= 0xDFFF then
+                    code = 0x10000 + (code - 0xD800) * 0x400 + (low - 0xDC00)
+                    pos = pos + 6
                 end
-                pos = pos + 1
-            end
-            
-            -- Don't forget the last element
-            if start <= #content then
-                local value = content:sub(start)
-                arr[i] = decode_json(value:match("^%s*(.-)%s*$"))
             end
+            buf[#buf + 1] = utf8.char(code)
+        else
+            local c = json_unescapes[esc]
+            if not c then json_error(str, stop, "bad escape") end
+            buf[#buf + 1] = c
+            pos = stop + 2
         end
-        return arr
-    elseif str:match("^{.*}$") then
-        -- Object - improved parsing
+    end
+end
+
+decode_json_value = function(str, pos)
+    pos = skip_ws(str, pos)
+    local c = str:byte(pos)
+    if c == 123 then  -- '{'
         local obj = {}
-        local content = str:sub(2, -2)
-        
-        -- Better object parsing that handles nested values
-        local pos = 1
-        while pos <= #content do
-            -- Find key
-            local key_start = content:find('"', pos)
-            if not key_start then break end
-            local key_end = content:find('"', key_start + 1)
-            if not key_end then break end
-            local key = content:sub(key_start + 1, key_end - 1)
-            
-            -- Find colon
-            local colon = content:find(':', key_end + 1)
-            if not colon then break end
-            
-            -- Find value (handle nested structures)
-            local value_start = colon + 1
-            while value_start <= #content and content:sub(value_start, value_start):match("%s") do
-                value_start = value_start + 1
+        pos = skip_ws(str, pos + 1)
+        if str:byte(pos) == 125 then return obj, pos + 1 end
+        while true do
+            if str:byte(pos) ~= 34 then json_error(str, pos, "expected key") end
+            local key
+            key, pos = decode_json_string(str, pos + 1)
+            pos = skip_ws(str, pos)
+            if str:byte(pos) ~= 58 then json_error(str, pos, "expected ':'") end
+            obj[key], pos = decode_json_value(str, pos + 1)
+            pos = skip_ws(str, pos)
+            c = str:byte(pos)
+            if c == 125 then return obj, pos + 1 end
+            if c ~= 44 then json_error(str, pos, "expected ',' or '}'") end
+            pos = skip_ws(str, pos + 1)
+        end
+    elseif c == 91 then  -- '['
+        local arr = {}
+        local n = 0
+        pos = skip_ws(str, pos + 1)
+        if str:byte(pos) == 93 then return arr, pos + 1 end
+        while true do
+            n = n + 1
+            arr[n], pos = decode_json_value(str, pos)
+            pos = skip_ws(str, pos)
+            c = str:byte(pos)
+            if c == 93 then return arr, pos + 1 end
+            if c ~= 44 then json_error(str, pos, "expected ',' or ']'") end
+            pos = pos + 1
+        end
+    elseif c == 34 then  -- '"'
+        return decode_json_string(str, pos + 1)
+    elseif c == 116 and str:sub(pos, pos + 3) == "true" then
+        return true, pos + 4
+    elseif c == 102 and str:sub(pos, pos + 4) == "false" then
+        return false, pos + 5
+    elseif c == 110 and str:sub(pos, pos + 3) == "null" then
+        return nil, pos + 4
+    end
+    -- tonumber() handles ints, floats AND scientific notation ("1.5e-3")
+    local num_end = select(2, str:find("^-?[%d%.eE+-]+", pos))
+    local num = num_end and tonumber(str:sub(pos, num_end))
+    if not num then json_error(str, pos, "unexpected character") end
+    return num, num_end + 1
+end
+
+local function decode_json(str)
+    if not str or str == "" then return nil end
+    local value, pos = decode_json_value(str, 1)
+    pos = skip_ws(str, pos)
+    if pos <= #str then json_error(str, pos, "trailing data") end
+    return value
+end
+
+-- MessagePack: compact binary alternative to JSON for the socket transport.
+-- Tables with a positive length are arrays, others maps (same rule as JSON).
+local function encode_msgpack_value(v, buf)
+    local t = type(v)
+    if t == "nil" or v == json_null then
+        buf[#buf + 1] = "\192"
+    elseif t == "boolean" then
+        buf[#buf + 1] = v and "\195" or "\194"
+    elseif t == "number" then
+        if math.type(v) == "integer" then
+            if v >= 0 then
+                if v < 128 then buf[#buf + 1] = string.char(v)
+                elseif v < 0x100 then buf[#buf + 1] = string.pack(">B B", 0xcc, v)
+                elseif v < 0x10000 then buf[#buf + 1] = string.pack(">B I2", 0xcd, v)
+                elseif v < 0x100000000 then buf[#buf + 1] = string.pack(">B I4", 0xce, v)
+                else buf[#buf + 1] = string.pack(">B i8", 0xcf, v) end
+            else
+                if v >= -32 then buf[#buf + 1] = string.pack(">b", v)
+                elseif v >= -128 then buf[#buf + 1] = string.pack(">B b", 0xd0, v)
+                elseif v >= -32768 then buf[#buf + 1] = string.pack(">B i2", 0xd1, v)
+                elseif v >= -2147483648 then buf[#buf + 1] = string.pack(">B i4", 0xd2, v)
+                else buf[#buf + 1] = string.pack(">B i8", 0xd3, v) end
             end
-            
-            local value_end = value_start
-            local depth = 0
-            local in_string = false
-            local escape = false
-            
-            while value_end <= #content do
-                local char = content:sub(value_end, value_end)
-                
-                if escape then
-                    escape = false
-                elseif char == '\\' then
-                    escape = true
-                elseif char == '"' and not escape then
-                    in_string = not in_string
-                elseif not in_string then
-                    if char == '[' or char == '{' then
-                        depth = depth + 1
-                    elseif char == ']' or char == '}' then
-                        depth = depth - 1
-                    elseif (char == ',' or char == '}') and depth == 0 then
-                        break
-                    end
-                end
-                
-                value_end = value_end + 1
+        else
+            buf[#buf + 1] = string.pack(">B d", 0xcb, v)
+        end
+    elseif t == "string" and utf8.len(v) == nil then
+        -- Not valid UTF-8: bin type, so clients decode it as bytes
+        local n = #v
+        if n < 0x100 then buf[#buf + 1] = string.pack(">B B", 0xc4, n)
+        elseif n < 0x10000 then buf[#buf + 1] = string.pack(">B I2", 0xc5, n)
+        else buf[#buf + 1] = string.pack(">B I4", 0xc6, n) end
+        buf[#buf + 1] = v
+    elseif t == "string" then
+        local n = #v
+        if n < 32 then buf[#buf + 1] = string.char(0xa0 + n)
+        elseif n < 0x100 then buf[#buf + 1] = string.pack(">B B", 0xd9, n)
+        elseif n < 0x10000 then buf[#buf + 1] = string.pack(">B I2", 0xda, n)
+        else buf[#buf + 1] = string.pack(">B I4", 0xdb, n) end
+        buf[#buf + 1] = v
+    elseif t == "table" then
+        local n = #v
+        if n > 0 then
+            if n < 16 then buf[#buf + 1] = string.char(0x90 + n)
+            elseif n < 0x10000 then buf[#buf + 1] = string.pack(">B I2", 0xdc, n)
+            else buf[#buf + 1] = string.pack(">B I4", 0xdd, n) end
+            for i = 1, n do encode_msgpack_value(v[i], buf) end
+        else
+            local count = 0
+            for _ in pairs(v) do count = count + 1 end
+            if count < 16 then buf[#buf + 1] = string.char(0x80 + count)
+            elseif count < 0x10000 then buf[#buf + 1] = string.pack(">B I2", 0xde, count)
+            else buf[#buf + 1] = string.pack(">B I4", 0xdf, count) end
+            for k, item in pairs(v) do
+                encode_msgpack_value(tostring(k), buf)
+                encode_msgpack_value(item, buf)
             end
-            
-            local value = content:sub(value_start, value_end - 1)
-            obj[key] = decode_json(value:match("^%s*(.-)%s*$"))
-            
-            pos = value_end + 1
         end
-        
-        return obj
+    elseif t == "userdata" then
+        encode_msgpack_value({__ptr = tostring(v)}, buf)
+    else
+        buf[#buf + 1] = "\192"
+    end
+end
+
+local function encode_msgpack(v)
+    local buf = {}
+    encode_msgpack_value(v, buf)
+    return table.concat(buf)
+end
+
+local decode_msgpack_value
+
+local function decode_msgpack_array(str, pos, n)
+    local arr = {}
+    for i = 1, n do
+        arr[i], pos = decode_msgpack_value(str, pos)
+    end
+    return arr, pos
+end
+
+local function decode_msgpack_map(str, pos, n)
+    local obj = {}
+    local key
+    for _ = 1, n do
+        key, pos = decode_msgpack_value(str, pos)
+        obj[key], pos = decode_msgpack_value(str, pos)
+    end
+    return obj, pos
+end
+
+-- Fixed-size formats: tag -> string.unpack format
+local msgpack_formats = {
+    [0xca] = ">f", [0xcb] = ">d",
+    [0xcc] = ">B", [0xcd] = ">I2", [0xce] = ">I4", [0xcf] = ">i8",
+    [0xd0] = ">b", [0xd1] = ">i2", [0xd2] = ">i4", [0xd3] = ">i8",
+}
+-- Length-prefixed formats: tag -> length format
+local msgpack_strings = {[0xc4] = ">B", [0xc5] = ">I2", [0xc6] = ">I4",
+                         [0xd9] = ">B", [0xda] = ">I2", [0xdb] = ">I4"}
+
+decode_msgpack_value = function(str, pos)
+    local tag = str:byte(pos)
+    if not tag then error("MessagePack: truncated input", 0) end
+    pos = pos + 1
+    if tag < 0x80 then return tag, pos
+    elseif tag >= 0xe0 then return tag - 256, pos
+    elseif tag < 0x90 then return decode_msgpack_map(str, pos, tag - 0x80)
+    elseif tag < 0xa0 then return decode_msgpack_array(str, pos, tag - 0x90)
+    elseif tag < 0xc0 then
+        local n = tag - 0xa0
+        return str:sub(pos, pos + n - 1), pos + n
+    elseif tag == 0xc0 then return nil, pos
+    elseif tag == 0xc2 then return false, pos
+    elseif tag == 0xc3 then return true, pos
+    elseif msgpack_formats[tag] then
+        return string.unpack(msgpack_formats[tag], str, pos)
+    elseif msgpack_strings[tag] then
+        local n
+        n, pos = string.unpack(msgpack_strings[tag], str, pos)
+        return str:sub(pos, pos + n - 1), pos + n
+    elseif tag == 0xdc or tag == 0xdd then
+        local n
+        n, pos = string.unpack(tag == 0xdc and ">I2" or ">I4", str, pos)
+        return decode_msgpack_array(str, pos, n)
+    elseif tag == 0xde or tag == 0xdf then
+        local n
+        n, pos = string.unpack(tag == 0xde and ">I2" or ">I4", str, pos)
+        return decode_msgpack_map(str, pos, n)
+    end
+    error(string.format("MessagePack: unsupported type 0x%02x", tag), 0)
+end
+
+local function decode_msgpack(str)
+    if not str or str == "" then return nil end
+    return (decode_msgpack_value(str, 1))
+end
+
+-- Base64, for binary payloads inside JSON (MIDI event buffers)
+local base64_alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+local base64_chars = {}
+local base64_values = {}
+for i = 1, 64 do
+    local c = base64_alphabet:sub(i, i)
+    base64_chars[i - 1] = c
+    base64_values[c:byte()] = i - 1
+end
+
+base64_encode = function(data)
+    local out = {}
+    local n = #data
+    for i = 1, n - 2, 3 do
+        local a, b, c = data:byte(i, i + 2)
+        local v = a * 65536 + b * 256 + c
+        out[#out + 1] = base64_chars[v >> 18] .. base64_chars[(v >> 12) & 63]
+            .. base64_chars[(v >> 6) & 63] .. base64_chars[v & 63]
+    end
+    local rest = n % 3
+    if rest == 1 then
+        local v = data:byte(n) * 65536
+        out[#out + 1] = base64_chars[v >> 18] .. base64_chars[(v >> 12) & 63] .. "=="
+    elseif rest == 2 then
+        local a, b = data:byte(n - 1, n)
+        local v = a * 65536 + b * 256
+        out[#out + 1] = base64_chars[v >> 18] .. base64_chars[(v >> 12) & 63]
+            .. base64_chars[(v >> 6) & 63] .. "="
+    end
+    return table.concat(out)
+end
+
+local function base64_decode(text)
+    local out = {}
+    text = text:gsub("[^%w%+/]", "")
+    for i = 1, #text, 4 do
+        local a, b, c, d = text:byte(i, i + 3)
+        local v = (base64_values[a] or 0) << 18 | (base64_values[b] or 0) << 12
+            | (base64_values[c] or 0) << 6 | (base64_values[d] or 0)
+        local bytes = string.char(v >> 16, (v >> 8) & 255, v & 255)
+        out[#out + 1] = d and bytes or bytes:sub(1, c and 2 or 1)
     end
-    return nil
+    return table.concat(out)
 end
 
+-- Codec functions for other scripts (and the Python test harness)
+MCP_CODEC = {
+    encode_json = encode_json,
+    decode_json = decode_json,
+    encode_msgpack = encode_msgpack,
+    decode_msgpack = decode_msgpack,
+    base64_encode = base64_encode,
+    base64_decode = base64_decode,
+}
+
 -- Read file contents
 local function read_file(filepath)
     local file = io.open(filepath, "r")
@@ -200,14 +414,30 @@ local function write_file(filepath, content)
     return true
 end
 
--- Check if file exists
-local function file_exists(filepath)
-    local file = io.open(filepath, "r")
-    if file then
-        file:close()
-        return true
+-- Write a file under a temporary name, then rename it into place, so a
+-- reader never sees a partially written file
+local function write_file_atomic(filepath, content)
+    local tmp_path = filepath .. '.tmp'
+    if not write_file(tmp_path, content) then return false end
+    os.remove(filepath)
+    return os.rename(tmp_path, filepath) ~= nil
+end
+
+-- Ids of pending request_N.json files, oldest first. Costs one directory
+-- scan per tick, however many (or few) requests are waiting.
+local function pending_request_ids()
+    local ids = {}
+    reaper.EnumerateFiles(bridge_dir, -1)  -- drop REAPER's cached listing
+    local index = 0
+    while true do
+        local name = reaper.EnumerateFiles(bridge_dir, index)
+        if not name then break end
+        local id = name:match("^request_(%d+)%.json$")
+        if id then ids[#ids + 1] = math.tointeger(tonumber(id)) or tonumber(id) end
+        index = index + 1
     end
-    return false
+    table.sort(ids)
+    return ids
 end
 
 -- Delete file
@@ -359,6 +589,20 @@ local function BarsToTime(bars, start_pos)
     return {ok = true, ret = duration}
 end
 
+-- Every tempo/time signature marker plus the project default tempo, in one call
+local function GetTempoMap()
+    local markers = {}
+    for i = 0, reaper.CountTempoTimeSigMarkers(0) - 1 do
+        local retval, time, measure, beat, bpm, num, denom, linear = reaper.GetTempoTimeSigMarker(0, i)
+        if retval then
+            markers[#markers + 1] = {time = time, measure = measure, beat = beat, bpm = bpm,
+                                     num = num, denom = denom, linear = linear}
+        end
+    end
+    local bpm, bpi = reaper.GetProjectTimeSignature2(0)
+    return {ok = true, markers = markers, bpm = bpm, num = bpi}
+end
+
 -- Find region by name
 local function FindRegion(name)
     local retval, num_markers, num_regions = reaper.CountProjectMarkers(0)
@@ -790,12 +1034,38 @@ local function CopyItemsToPosition(track_index, src_start, src_end, dest_start,
     return {ok = true, ret = copied}
 end
 
+-- All parameter names of one track FX in a single call. If the FX GUID
+-- equals known_guid the caller's cached list is still valid, and the names
+-- are left out of the response.
+local function GetFXParamNames(track_index, fx_index, known_guid)
+    local track = reaper.GetTrack(0, track_index)
+    if not track then
+        return {ok = false, error = "Track not found at index " .. tostring(track_index)}
+    end
+    local guid = reaper.TrackFX_GetFXGUID(track, fx_index)
+    if not guid then
+        return {ok = false, error = "FX not found at index " .. tostring(fx_index)}
+    end
+    local _, fx_name = reaper.TrackFX_GetFXName(track, fx_index, "")
+    if known_guid and known_guid == guid then
+        return {ok = true, guid = guid, fx_name = fx_name, unchanged = true}
+    end
+    
+    local names = {}
+    for i = 0, reaper.TrackFX_GetNumParams(track, fx_index) - 1 do
+        local _, param_name = reaper.TrackFX_GetParamName(track, fx_index, i, "")
+        names[#names + 1] = param_name
+    end
+    return {ok = true, guid = guid, fx_name = fx_name, names = names}
+end
+
 -- Export function table for DSL
 DSL_FUNCTIONS = {
     -- Track info
     GetTrackInfo = GetTrackInfo,
     GetAllTracksInfo = GetAllTracksInfo,
     SetTrackNotes = SetTrackNotes,
+    GetFXParamNames = GetFXParamNames,
     
     -- Time operations
     GetCursorPosition = GetCursorPosition,
@@ -803,6 +1073,7 @@ DSL_FUNCTIONS = {
     SetTimeSelection = SetTimeSelection,
     GetLoopTimeRange = GetLoopTimeRange,
     BarsToTime = BarsToTime,
+    GetTempoMap = GetTempoMap,
     FindRegion = FindRegion,
     FindMarker = FindMarker,
     
@@ -836,31 +1107,11 @@ DSL_FUNCTIONS = {
     CopyItemsToPosition = CopyItemsToPosition
 }
 
--- Main processing function
-local function process_request()
-    -- Look for any request files with numbered pattern
-    for i = 1, 1000 do
-        local numbered_request_file = bridge_dir .. 'request_' .. i .. '.json'
-        local numbered_response_file = bridge_dir .. 'response_' .. i .. '.json'
-        
-        if file_exists(numbered_request_file) then
-            -- Wrap in pcall to catch any errors
-            local ok, err = pcall(function()
-                -- Read and process request
-                local request_data = read_file(numbered_request_file)
-                if request_data then
-                    reaper.ShowConsoleMsg("Processing request " .. i .. ": " .. request_data .. "\n")
-                    
-                    -- Parse the request
-                    local request = decode_json(request_data)
-                    if request and request.func then
-                        local fname = request.func
-                        local args = request.args or {}
-                    
-                    -- Call the REAPER function
-                    local response = {ok = false}
-                    
-                    -- Handle all API functions
+-- Execute one API call and build its response table
+local function dispatch(fname, args)
+    local response = {ok = false}
+    
+    -- Handle all API functions
                                         if DSL_FUNCTIONS[fname] then
                         local result = DSL_FUNCTIONS[fname](table.unpack(args))
                         -- Copy all fields from result to response
@@ -2060,10 +2311,11 @@ local function process_request()
                                     response.error = "Failed to find take at index " .. tostring(take_index)
                                     response.ok = false
                                 else
-                                    -- Get all events
+                                    -- Get all events, with the notes hash they correspond to
                                     local retval, events = reaper.MIDI_GetAllEvts(take, "")
                                     response.ok = retval
                                     response.ret = events
+                                    response.hash = select(2, reaper.MIDI_GetHash(take, true, ""))
                                     if not retval then
                                         response.error = "Failed to get MIDI events"
                                     end
@@ -2073,6 +2325,125 @@ local function process_request()
                             response.error = "GetAllMIDIEventsFromItemTake requires 2 arguments"
                         end
                     
+                    elseif fname == "GetMIDIHashFromItemTake" then
+                        -- Hash of a take's MIDI (notes only unless args[3] is false), a cheap
+                        -- probe for whether cached analysis of the take is still valid
+                        local item = reaper.GetMediaItem(0, args[1] or 0)
+                        local take = item and reaper.GetMediaItemTake(item, args[2] or 0)
+                        if not take then
+                            response.error = "Failed to find take " .. tostring(args[2]) .. " of item " .. tostring(args[1])
+                        else
+                            local retval, hash = reaper.MIDI_GetHash(take, args[3] ~= false, "")
+                            response.ok = retval
+                            response.ret = hash
+                            if not retval then
+                                response.error = "Take has no MIDI"
+                            end
+                        end
+                    
+                    elseif fname == "SetAllMIDIEventsFromItemTake" then
+                        -- Write a packed MIDI_SetAllEvts buffer (base64, built by
+                        -- server/midi_events.py) with one sort and one undo point.
+                        -- args: item index and take index (or a take and 0), buffer,
+                        -- {mode = "append"|"replace", last_ppq = ppq of the buffer's last event}
+                        local take = args[1]
+                        if type(args[1]) == "number" then
+                            local item = reaper.GetMediaItem(0, args[1])
+                            take = item and reaper.GetMediaItemTake(item, args[2] or 0)
+                        end
+                        local options = args[4] or {}
+                        if not take then
+                            response.error = "Failed to find take"
+                        elseif type(args[3]) ~= "string" then
+                            response.error = "SetAllMIDIEventsFromItemTake requires a packed event buffer"
+                        else
+                            local events = base64_decode(args[3])
+                            local last_ppq = options.last_ppq or 0
+                            local ok, existing = reaper.MIDI_GetAllEvts(take, "")
+                            if ok and #existing > 0 then
+                                if options.mode == "replace" then
+                                    -- Keep only the final event (all-notes-off at the end of
+                                    -- the source), which marks the take's length
+                                    local pos, ppq, offset, flags, msg = 1, 0
+                                    while pos <= #existing do
+                                        offset, flags, msg, pos = string.unpack("<i4Bs4", existing, pos)
+                                        ppq = ppq + offset
+                                    end
+                                    if ppq >= last_ppq then
+                                        events = events .. string.pack("<i4Bs4", ppq - last_ppq, flags, msg)
+                                    end
+                                else
+                                    -- Rewind to ppq 0 with an empty event, then the existing
+                                    -- events; MIDI_Sort puts everything in order
+                                    events = events .. string.pack("<i4Bs4", -last_ppq, 0, "") .. existing
+                                end
+                            end
+                            if reaper.MIDI_SetAllEvts(take, events) then
+                                reaper.MIDI_Sort(take)
+                                reaper.Undo_OnStateChange_Item(0, options.undo or "Insert MIDI events",
+                                                               reaper.GetMediaItemTake_Item(take))
+                                response.ok = true
+                                response.ret = #events
+                            else
+                                response.error = "MIDI_SetAllEvts failed"
+                            end
+                        end
+                    
+                    elseif fname == "SetTrackSubChunks" then
+                        -- Set changed items and envelopes of a track one by one instead of
+                        -- rewriting the whole track chunk (which re-creates its FX).
+                        -- args: track index, {{kind = "ITEM"|"ENV", guid = IGUID/EGUID, chunk = text}, ...},
+                        -- isundo (passed to each setter, as SetTrackStateChunk takes it).
+                        -- Nothing is set unless every GUID is found.
+                        local track = type(args[1]) == "number" and reaper.GetTrack(0, args[1]) or nil
+                        local patches = args[2] or {}
+                        if not track then
+                            response.error = "Track not found"
+                        else
+                            local targets, wants_env = {}, false
+                            for _, patch in ipairs(patches) do
+                                if patch.kind == "ENV" then wants_env = true end
+                            end
+                            for i = 0, reaper.CountTrackMediaItems(track) - 1 do
+                                local item = reaper.GetTrackMediaItem(track, i)
+                                local _, guid = reaper.GetSetMediaItemInfo_String(item, "GUID", "", false)
+                                targets[guid] = item
+                            end
+                            if wants_env then
+                                for i = 0, reaper.CountTrackEnvelopes(track) - 1 do
+                                    local env = reaper.GetTrackEnvelope(track, i)
+                                    local _, env_chunk = reaper.GetEnvelopeStateChunk(env, "", false)
+                                    local guid = env_chunk:match("EGUID%s+({[^}]*})")
+                                    if guid then targets[guid] = env end
+                                end
+                            end
+                            local missing = {}
+                            for _, patch in ipairs(patches) do
+                                if not targets[patch.guid] then missing[#missing + 1] = tostring(patch.guid) end
+                            end
+                            if #missing > 0 then
+                                response.error = "Sub-chunk not found: " .. table.concat(missing, ", ")
+                            else
+                                reaper.PreventUIRefresh(1)
+                                local applied = 0
+                                for _, patch in ipairs(patches) do
+                                    local set = patch.kind == "ITEM" and reaper.SetItemStateChunk
+                                        or reaper.SetEnvelopeStateChunk
+                                    if set(targets[patch.guid], patch.chunk, args[3] == true) then
+                                        applied = applied + 1
+                                    end
+                                end
+                                reaper.PreventUIRefresh(-1)
+                                reaper.UpdateArrange()
+                                response.ret = applied
+                                if applied == #patches then
+                                    response.ok = true
+                                else
+                                    response.error = string.format("Set %d of %d sub-chunks", applied, #patches)
+                                end
+                            end
+                        end
+                    
                     elseif fname == "TrackFX_AddByName" then
                         -- Add FX to track by name
                         if #args >= 3 then
@@ -4221,35 +4592,386 @@ local function process_request()
                     else
                         -- Try generic function call
                         if reaper[fname] then
-                            local ok, result = pcall(reaper[fname], table.unpack(args))
-                            if ok then
+                            local results = table.pack(pcall(reaper[fname], table.unpack(args)))
+                            if results[1] then
                                 response.ok = true
-                                response.ret = result
+                                if results.n > 2 then
+                                    -- Multiple return values come back as a list; nil
+                                    -- values keep their slot so positions stay stable
+                                    local ret = {}
+                                    for i = 2, results.n do
+                                        if results[i] == nil then
+                                            ret[i - 1] = json_null
+                                        else
+                                            ret[i - 1] = results[i]
+                                        end
+                                    end
+                                    response.ret = ret
+                                else
+                                    response.ret = results[2]
+                                end
                             else
-                                response.error = "Error calling " .. fname .. ": " .. tostring(result)
+                                response.error = "Error calling " .. fname .. ": " .. tostring(results[2])
                             end
                         else
                             response.error = "Unknown function: " .. fname
                         end
                     end
-                    
-                    -- Write response
-                    local response_json = encode_json(response)
-                    reaper.ShowConsoleMsg("Sending response " .. i .. ": " .. response_json .. "\n")
-                    write_file(numbered_response_file, response_json)
-                end
-            end
+    
+    return response
+end
+
+-- Replace {"$ref": n, "field": f, "item": i} placeholders in batch arguments
+-- with the raw value returned by call n (0-based) of the same batch, so
+-- handles (MediaTrack*, MediaItem* ...) stay usable between calls.
+local function resolve_batch_refs(value, results)
+    if type(value) ~= "table" then return value end
+    local ref = value["$ref"]
+    if ref ~= nil then
+        local target = results[ref + 1]
+        if not target then
+            error("Batch reference to call #" .. tostring(ref) .. " which has not run yet")
+        end
+        local resolved = target[value.field or "ret"]
+        if value.item ~= nil and type(resolved) == "table" then
+            resolved = resolved[value.item + 1]
+        end
+        return resolved
+    end
+    local copy = {}
+    for k, v in pairs(value) do
+        copy[k] = resolve_batch_refs(v, results)
+    end
+    return copy
+end
+
+-- Run a list of {func = ..., args = {...}} calls inside one defer tick and
+-- return every response in order
+local function run_batch(calls, options)
+    options = options or {}
+    local results = {}
+    local failed_at = nil
+    for idx, call in ipairs(calls or {}) do
+        local response
+        if failed_at and options.stop_on_error then
+            response = {ok = false, error = "Skipped: call #" .. failed_at .. " failed"}
+        elseif type(call) ~= "table" or not call.func or call.func == "Batch" then
+            response = {ok = false, error = "Invalid batch entry"}
+        else
+            local ok, result = pcall(function()
+                local args = resolve_batch_refs(call.args or {}, results)
+                return dispatch(call.func, args)
             end)
-            
-            if not ok then
-                -- Error occurred, write error response
-                reaper.ShowConsoleMsg("ERROR processing request " .. i .. ": " .. tostring(err) .. "\n")
-                local error_response = {ok = false, error = "Bridge error: " .. tostring(err)}
-                write_file(numbered_response_file, encode_json(error_response))
+            response = ok and result or {ok = false, error = "Bridge error: " .. tostring(result)}
+        end
+        if not response.ok and not failed_at then
+            failed_at = idx - 1
+        end
+        results[idx] = response
+    end
+    return {ok = true, results = results, count = #results}
+end
+
+-- ============================================================================
+-- STREAMED RESULTS
+-- ============================================================================
+-- StreamOpen runs a call once and keeps one large field of its response
+-- (a MIDI_GetAllEvts buffer, a state chunk, the GetAllItems list) in the
+-- bridge; StreamRead hands it out page by page through a cursor, so no
+-- multi-megabyte response is ever encoded, written or parsed in one piece.
+-- Strings are paged by bytes (base64 when they are not valid UTF-8), lists
+-- by items. Reads name their offset, so a retried read is harmless. Streams
+-- are dropped once fully read, on StreamClose, or after STREAM_IDLE_TIMEOUT.
+
+local STREAM_IDLE_TIMEOUT = 60
+local STREAM_PAGE_BYTES = 65536
+local STREAM_PAGE_ITEMS = 256
+
+local streams = {}
+local next_stream_id = 0
+
+local function expire_streams()
+    local now = reaper.time_precise()
+    for id, stream in pairs(streams) do
+        if now - stream.touched > STREAM_IDLE_TIMEOUT then
+            streams[id] = nil
+        end
+    end
+end
+
+-- args: function name, its arguments, {field = "ret", item = n, page_size = n}
+-- `item` (0-based) picks one value of a multi-value return such as
+-- GetTrackStateChunk's {retval, chunk}. The response is the call's own
+-- response without the streamed field, plus the cursor and its size.
+local function stream_open(func, args, options)
+    options = options or {}
+    expire_streams()
+    if type(func) ~= "string" or func == "Batch" or func:sub(1, 6) == "Stream" then
+        return {ok = false, error = "Invalid stream function: " .. tostring(func)}
+    end
+    local response = dispatch(func, args or {})
+    if not response.ok then return response end
+
+    local field = options.field or "ret"
+    local value = response[field]
+    response[field] = nil
+    if options.item ~= nil and type(value) == "table" then
+        value = value[options.item + 1]
+    end
+    local kind
+    if type(value) == "string" then
+        kind = "bytes"
+    elseif type(value) == "table" then
+        kind = "items"
+    else
+        return {ok = false, error = func .. " returned no " .. field .. " to stream"}
+    end
+
+    next_stream_id = next_stream_id + 1
+    response.cursor = next_stream_id
+    response.kind = kind
+    response.total = #value
+    if #value == 0 then return response end  -- nothing to read, nothing to keep
+    local stream = {
+        value = value,
+        kind = kind,
+        total = #value,
+        page_size = options.page_size or (kind == "bytes" and STREAM_PAGE_BYTES or STREAM_PAGE_ITEMS),
+        base64 = kind == "bytes" and utf8.len(value) == nil,
+        touched = reaper.time_precise(),
+    }
+    streams[next_stream_id] = stream
+    response.encoding = stream.base64 and "base64" or nil
+    return response
+end
+
+-- args: cursor, offset (bytes or items already read), optional page size
+local function stream_read(cursor, offset, count)
+    local stream = streams[cursor]
+    if not stream then
+        return {ok = false, error = "Unknown or expired stream: " .. tostring(cursor)}
+    end
+    stream.touched = reaper.time_precise()
+    offset = offset or 0
+    local stop = math.min(stream.total, offset + (count or stream.page_size))
+    local data
+    if stream.kind == "bytes" then
+        if not stream.base64 then
+            -- Never split a UTF-8 sequence between two pages
+            while stop > offset and stop < stream.total do
+                local b = stream.value:byte(stop + 1)
+                if b < 0x80 or b >= 0xC0 then break end
+                stop = stop - 1
             end
-            
-            -- Always clean up request file
-            delete_file(numbered_request_file)
+        end
+        data = stream.value:sub(offset + 1, stop)
+        if stream.base64 then data = base64_encode(data) end
+    else
+        data = {table.unpack(stream.value, offset + 1, stop)}
+    end
+    local done = stop >= stream.total
+    if done then streams[cursor] = nil end
+    return {ok = true, data = data, offset = offset, next = stop, done = done}
+end
+
+local function stream_close(cursor)
+    local open = streams[cursor] ~= nil
+    streams[cursor] = nil
+    return {ok = true, ret = open}
+end
+
+-- Highest request id seen so far, reported by the handshake so a restarted
+-- server continues above every id this bridge has answered
+local last_request_id = 0
+
+-- Handshake a (re)started server sends before its first file request.
+-- args: session label, the server's current id counter
+local function bridge_handshake(session, client_last_id)
+    if type(client_last_id) == "number" and client_last_id > last_request_id then
+        last_request_id = math.tointeger(client_last_id) or last_request_id
+    end
+    reaper.ShowConsoleMsg("MCP server session " .. tostring(session) .. " connected\n")
+    return {ok = true, last_id = last_request_id, session = session}
+end
+
+-- Decode a raw request (JSON unless another decoder is given) and dispatch
+-- it. Returns the response table and the request id (nil when the payload
+-- could not be decoded).
+local function execute_request(request_data, decode)
+    local request_id = nil
+    local ok, response = pcall(function()
+        local request = (decode or decode_json)(request_data)
+        if type(request) ~= "table" or not request.func then
+            return {ok = false, error = "Invalid request"}
+        end
+        request_id = request.id
+        -- Handshake ids are per session, not part of the request sequence
+        if request.func ~= "BridgeHandshake" and type(request_id) == "number"
+                and request_id > last_request_id then
+            last_request_id = math.tointeger(request_id) or last_request_id
+        end
+        local args = request.args or {}
+        if request.func == "Batch" then
+            return run_batch(args[1], args[2])
+        elseif request.func == "BridgeHandshake" then
+            return bridge_handshake(args[1], args[2])
+        elseif request.func == "StreamOpen" then
+            return stream_open(args[1], args[2], args[3])
+        elseif request.func == "StreamRead" then
+            return stream_read(args[1], args[2], args[3])
+        elseif request.func == "StreamClose" then
+            return stream_close(args[1])
+        end
+        return dispatch(request.func, args)
+    end)
+    if not ok then
+        reaper.ShowConsoleMsg("ERROR processing request: " .. tostring(response) .. "\n")
+        response = {ok = false, error = "Bridge error: " .. tostring(response)}
+    end
+    return response, request_id
+end
+
+-- Encode a response table (JSON unless another encoder is given), turning
+-- encoder failures into an error response
+local function encode_response(response, encode)
+    encode = encode or encode_json
+    local ok, encoded = pcall(encode, response)
+    if not ok then
+        encoded = encode({ok = false, error = "Bridge error: " .. tostring(encoded)})
+    end
+    return encoded
+end
+
+-- Upper bound on requests served per defer tick (file and socket combined),
+-- so a burst of pipelined calls cannot stall REAPER's UI thread
+local MAX_REQUESTS_PER_TICK = 64
+
+-- Main processing function. Returns the number of requests served.
+-- Request ids are unbounded; whatever request files exist are served in id
+-- order, up to the per-tick budget.
+local function process_request(budget)
+    local served = 0
+    for _, id in ipairs(pending_request_ids()) do
+        if served >= budget then break end
+        local request_file = bridge_dir .. 'request_' .. id .. '.json'
+        local response_file = bridge_dir .. 'response_' .. id .. '.json'
+        
+        local request_data = read_file(request_file)
+        if request_data then
+            reaper.ShowConsoleMsg("Processing request " .. id .. ": " .. request_data .. "\n")
+            local response = execute_request(request_data)
+            local response_json = encode_response(response)
+            reaper.ShowConsoleMsg("Sending response " .. id .. ": " .. response_json .. "\n")
+            write_file_atomic(response_file, response_json)
+        end
+        
+        -- Always clean up request file
+        delete_file(request_file)
+        served = served + 1
+    end
+    return served
+end
+
+-- ============================================================================
+-- SOCKET TRANSPORT
+-- ============================================================================
+-- Optional persistent loopback connection (needs LuaSocket, see
+-- scripts/install_luasocket.sh). Frames are a 4-byte big-endian length
+-- followed by a JSON request; responses carry the request id back. If the
+-- top bit of the length is set the payload is MessagePack instead, and the
+-- response is sent back the same way.
+
+local MSGPACK_FLAG = 0x80000000
+
+local socket_port = tonumber(os.getenv("REAPER_MCP_SOCKET_PORT") or "") or 9877
+local socket_server = nil
+local socket_clients = {}
+
+local function start_socket_server()
+    local scripts_dir = reaper.GetResourcePath() .. '/Scripts/'
+    package.path = scripts_dir .. '?.lua;' .. package.path
+    package.cpath = scripts_dir .. '?.so;' .. scripts_dir .. '?.dll;' .. package.cpath
+
+    local ok, socket = pcall(require, "socket")
+    if not ok then
+        reaper.ShowConsoleMsg("LuaSocket not found, socket transport disabled\n")
+        return
+    end
+    local server, err = socket.bind("127.0.0.1", socket_port)
+    if not server then
+        reaper.ShowConsoleMsg("Socket transport disabled: " .. tostring(err) .. "\n")
+        return
+    end
+    server:settimeout(0)
+    socket_server = server
+    reaper.ShowConsoleMsg("Socket transport listening on 127.0.0.1:" .. socket_port .. "\n")
+end
+
+-- Push as much pending output as the socket accepts without blocking
+local function flush_socket_client(client)
+    if client.outbox == "" then return true end
+    local sent, err, partial = client.sock:send(client.outbox)
+    local last = sent or partial or 0
+    client.outbox = client.outbox:sub(last + 1)
+    return err == nil or err == "timeout"
+end
+
+-- Serve up to `budget` complete frames from one client. Pipelined requests
+-- beyond the budget stay in the inbox for the next tick. Returns the number
+-- of requests served and whether the connection is still usable.
+local function serve_socket_client(client, budget)
+    local data, err, partial = client.sock:receive(65536)
+    local chunk = data or partial
+    if chunk and #chunk > 0 then
+        client.inbox = client.inbox .. chunk
+    end
+    if err == "closed" then
+        return 0, false
+    end
+
+    local served = 0
+    local pos = 1
+    local inbox = client.inbox
+    local out = {client.outbox}
+    while served < budget and #inbox - pos + 1 >= 4 do
+        local header = string.unpack(">I4", inbox, pos)
+        local msgpack = header >= MSGPACK_FLAG
+        local length = msgpack and header - MSGPACK_FLAG or header
+        if #inbox - pos + 1 < 4 + length then break end
+        local payload = inbox:sub(pos + 4, pos + 3 + length)
+        pos = pos + 4 + length
+
+        local response, request_id = execute_request(payload, msgpack and decode_msgpack or nil)
+        response.id = request_id
+        local encoded = encode_response(response, msgpack and encode_msgpack or nil)
+        out[#out + 1] = string.pack(">I4", #encoded + (msgpack and MSGPACK_FLAG or 0))
+        out[#out + 1] = encoded
+        served = served + 1
+    end
+    -- Trim consumed frames once per tick rather than once per frame
+    client.inbox = inbox:sub(pos)
+    client.outbox = table.concat(out)
+    return served, flush_socket_client(client)
+end
+
+local function process_socket_requests(budget)
+    if not socket_server then return end
+
+    while true do
+        local sock = socket_server:accept()
+        if not sock then break end
+        sock:settimeout(0)
+        sock:setoption("tcp-nodelay", true)
+        table.insert(socket_clients, {sock = sock, inbox = "", outbox = ""})
+    end
+
+    for idx = #socket_clients, 1, -1 do
+        local client = socket_clients[idx]
+        local served, alive = serve_socket_client(client, budget)
+        budget = budget - served
+        if not alive then
+            client.sock:close()
+            table.remove(socket_clients, idx)
         end
     end
 end
@@ -4258,9 +4980,11 @@ end
 ensure_dir()
 reaper.ShowConsoleMsg("REAPER MCP Bridge (File-based, Full API) started\n")
 reaper.ShowConsoleMsg("Bridge directory: " .. bridge_dir .. "\n")
+start_socket_server()
 
 function main()
-    process_request()
+    local served = process_request(MAX_REQUESTS_PER_TICK)
+    process_socket_requests(MAX_REQUESTS_PER_TICK - served)
     reaper.defer(main)
 end
 
@@ -19,123 +19,87 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# MCP imports
-from mcp.server.fastmcp import FastMCP
+# MCP server with per-tool metrics
+from .metered_mcp import MeteredFastMCP
+from .tool_manifest import ToolManifest
 
 # Import bridge
 from .bridge import bridge, BRIDGE_DIR
 
-# Import WebSocket client for relay
-from .websocket_client import create_relay_client
-
 # Import tool profiles
 from .tool_profiles import TOOL_PROFILES, get_profile_categories
+from .tool_registry import LazyRegister
 
 # Initialize MCP server
-mcp = FastMCP("reaper-mcp")
+mcp = MeteredFastMCP("reaper-mcp", manifest=ToolManifest.from_env())
 
 # Global reference to WebSocket client
 relay_client = None
 
-# Import all tool modules (we'll selectively register based on profile)
-from .tools.tracks import register_track_tools
-from .tools.core_api import register_core_api_tools
-from .tools.media_items import register_media_items_tools
-from .tools.midi import register_midi_tools
-from .tools.fx import register_fx_tools
-from .tools.project import register_project_tools
-from .tools.transport import register_transport_tools
-from .tools.time_selection import register_time_selection_tools
-from .tools.markers import register_markers_tools
-from .tools.automation import register_automation_tools
-from .dsl.tools import register_dsl_tools
-from .tools.rendering import register_rendering_tools
-from .tools.gui import register_gui_tools
-from .tools.fx_take import register_fx_take_tools
-from .tools.fx_track_extended import register_fx_track_extended_tools
-from .tools.project_state import register_project_state_tools
-from .tools.media_items_extended import register_media_items_extended_tools
-from .tools.routing_sends import register_routing_sends_tools
-from .tools.audio_accessor import register_audio_accessor_tools
-from .tools.midi_editor import register_midi_editor_tools
-from .tools.color_management import register_color_management_tools
-from .tools.tempo_time_signature import register_tempo_time_signature_tools
-from .tools.recording import register_recording_tools
-from .tools.envelope_extended import register_envelope_extended_tools
-from .tools.time_tempo_extended import register_time_tempo_extended_tools
-from .tools.track_management_extended import register_track_management_extended_tools
-from .tools.action_management import register_action_management_tools
-from .tools.file_io import register_file_io_tools
-from .tools.layouts import register_layouts_tools
-from .tools.take_management import register_take_management_tools
-from .tools.regions_markers_extended import register_regions_markers_extended_tools
-from .tools.analysis_tools import register_analysis_tools
-from .tools.video_media import register_video_media_tools
-from .tools.peaks_waveform import register_peaks_waveform_tools
-from .tools.script_extensions import register_script_extensions_tools
-from .tools.project_tabs import register_project_tabs_tools
-from .tools.midi_advanced import register_midi_advanced_tools
-from .tools.loop_management import register_loop_management_tools
-from .tools.bounce_render import register_bounce_render_tools
-from .tools.groove_quantization import register_groove_quantization_tools
-from .tools.bus_routing import register_bus_routing_tools
-from .tools.tempo_time_management import register_tempo_time_tools
-from .tools.advanced_midi_generation import register_advanced_midi_tools
-
 # Import DSL health check
 from .dsl.health_check import verify_dsl_installation
 
 # Import capability gate meta-tools
 from .dsl.capability_tools import register_capability_tools
 
+# Import server metrics tool (always registered)
+from .tools.server_metrics import register_server_metrics_tools
+
 # Tracks which categories are loaded in this session (mutable set shared with capability_tools)
 _loaded_categories: set = set()
 
-# Category mapping
+
+def _lazy(module: str, func_name: str) -> LazyRegister:
+    return LazyRegister(module, func_name, package=__package__)
+
+
+# Category mapping. Tool modules are imported only when their category is
+# registered (by profile or enable_capability), so startup does not pay for
+# the categories a profile leaves out.
 CATEGORY_REGISTRY = {
-    "DSL": register_dsl_tools,
-    "Core API": register_core_api_tools,
-    "Tracks": register_track_tools,
-    "Media Items": register_media_items_tools,
-    "MIDI": register_midi_tools,
-    "FX": register_fx_tools,
-    "Project": register_project_tools,
-    "Transport": register_transport_tools,
-    "Time Selection": register_time_selection_tools,
-    "Markers": register_markers_tools,
-    "Automation & Envelopes": register_automation_tools,
-    "Rendering & Freezing": register_rendering_tools,
-    "GUI & Interface": register_gui_tools,
-    "Take FX": register_fx_take_tools,
-    "Track FX Extended": register_fx_track_extended_tools,
-    "Project State Management": register_project_state_tools,
-    "Media Items Extended": register_media_items_extended_tools,
-    "Routing & Sends": register_routing_sends_tools,
-    "Audio Accessor & Analysis": register_audio_accessor_tools,
-    "MIDI Editor & Piano Roll": register_midi_editor_tools,
-    "Color Management": register_color_management_tools,
-    "Tempo & Time Signature": register_tempo_time_signature_tools,
-    "Recording Operations": register_recording_tools,
-    "Envelope Extended": register_envelope_extended_tools,
-    "Time/Tempo Extended": register_time_tempo_extended_tools,
-    "Track Management Extended": register_track_management_extended_tools,
-    "Action Management": register_action_management_tools,
-    "File I/O & Project Management": register_file_io_tools,
-    "Layouts & Screensets": register_layouts_tools,
-    "Take Management Extended": register_take_management_tools,
-    "Regions & Markers Extended": register_regions_markers_extended_tools,
-    "Analysis Tools": register_analysis_tools,
-    "Video & Visual Media": register_video_media_tools,
-    "Peak & Waveform Display": register_peaks_waveform_tools,
-    "Script Extension Management": register_script_extensions_tools,
-    "Project Tab Management": register_project_tabs_tools,
-    "Advanced MIDI Analysis & Generation": register_midi_advanced_tools,
-    "Loop & Time Selection Management": register_loop_management_tools,
-    "Bounce & Render Operations": register_bounce_render_tools,
-    "Groove & Quantization Tools": register_groove_quantization_tools,
-    "Bus Routing & Mixing Workflows": register_bus_routing_tools,
-    "Tempo & Time Management": register_tempo_time_tools,
-    "Advanced MIDI Generation": register_advanced_midi_tools,
+    "DSL": _lazy(".dsl.tools", "register_dsl_tools"),
+    "Core API": _lazy(".tools.core_api", "register_core_api_tools"),
+    "Tracks": _lazy(".tools.tracks", "register_track_tools"),
+    "Media Items": _lazy(".tools.media_items", "register_media_items_tools"),
+    "MIDI": _lazy(".tools.midi", "register_midi_tools"),
+    "FX": _lazy(".tools.fx", "register_fx_tools"),
+    "Project": _lazy(".tools.project", "register_project_tools"),
+    "Transport": _lazy(".tools.transport", "register_transport_tools"),
+    "Time Selection": _lazy(".tools.time_selection", "register_time_selection_tools"),
+    "Markers": _lazy(".tools.markers", "register_markers_tools"),
+    "Automation & Envelopes": _lazy(".tools.automation", "register_automation_tools"),
+    "Rendering & Freezing": _lazy(".tools.rendering", "register_rendering_tools"),
+    "GUI & Interface": _lazy(".tools.gui", "register_gui_tools"),
+    "Take FX": _lazy(".tools.fx_take", "register_fx_take_tools"),
+    "Track FX Extended": _lazy(".tools.fx_track_extended", "register_fx_track_extended_tools"),
+    "Project State Management": _lazy(".tools.project_state", "register_project_state_tools"),
+    "Media Items Extended": _lazy(".tools.media_items_extended", "register_media_items_extended_tools"),
+    "Routing & Sends": _lazy(".tools.routing_sends", "register_routing_sends_tools"),
+    "Audio Accessor & Analysis": _lazy(".tools.audio_accessor", "register_audio_accessor_tools"),
+    "MIDI Editor & Piano Roll": _lazy(".tools.midi_editor", "register_midi_editor_tools"),
+    "Color Management": _lazy(".tools.color_management", "register_color_management_tools"),
+    "Tempo & Time Signature": _lazy(".tools.tempo_time_signature", "register_tempo_time_signature_tools"),
+    "Recording Operations": _lazy(".tools.recording", "register_recording_tools"),
+    "Envelope Extended": _lazy(".tools.envelope_extended", "register_envelope_extended_tools"),
+    "Time/Tempo Extended": _lazy(".tools.time_tempo_extended", "register_time_tempo_extended_tools"),
+    "Track Management Extended": _lazy(".tools.track_management_extended", "register_track_management_extended_tools"),
+    "Action Management": _lazy(".tools.action_management", "register_action_management_tools"),
+    "File I/O & Project Management": _lazy(".tools.file_io", "register_file_io_tools"),
+    "Layouts & Screensets": _lazy(".tools.layouts", "register_layouts_tools"),
+    "Take Management Extended": _lazy(".tools.take_management", "register_take_management_tools"),
+    "Regions & Markers Extended": _lazy(".tools.regions_markers_extended", "register_regions_markers_extended_tools"),
+    "Analysis Tools": _lazy(".tools.analysis_tools", "register_analysis_tools"),
+    "Video & Visual Media": _lazy(".tools.video_media", "register_video_media_tools"),
+    "Peak & Waveform Display": _lazy(".tools.peaks_waveform", "register_peaks_waveform_tools"),
+    "Script Extension Management": _lazy(".tools.script_extensions", "register_script_extensions_tools"),
+    "Project Tab Management": _lazy(".tools.project_tabs", "register_project_tabs_tools"),
+    "Advanced MIDI Analysis & Generation": _lazy(".tools.midi_advanced", "register_midi_advanced_tools"),
+    "Loop & Time Selection Management": _lazy(".tools.loop_management", "register_loop_management_tools"),
+    "Bounce & Render Operations": _lazy(".tools.bounce_render", "register_bounce_render_tools"),
+    "Groove & Quantization Tools": _lazy(".tools.groove_quantization", "register_groove_quantization_tools"),
+    "Bus Routing & Mixing Workflows": _lazy(".tools.bus_routing", "register_bus_routing_tools"),
+    "Tempo & Time Management": _lazy(".tools.tempo_time_management", "register_tempo_time_tools"),
+    "Advanced MIDI Generation": _lazy(".tools.advanced_midi_generation", "register_advanced_midi_tools"),
 }
 
 def register_tools_by_profile(profile_name):
@@ -171,6 +135,9 @@ def register_tools_by_profile(profile_name):
     total_tools += cap_count
     logger.info(f"✓ Capability gates: {cap_count} tools (list_capabilities, enable_capability)")
 
+    total_tools += register_server_metrics_tools(mcp)
+    mcp.manifest.save()
+
     return total_tools
 
 def register_all_tools():
@@ -191,6 +158,9 @@ def register_all_tools():
     cap_count = register_capability_tools(mcp, CATEGORY_REGISTRY, _loaded_categories)
     total_tools += cap_count
 
+    total_tools += register_server_metrics_tools(mcp)
+    mcp.manifest.save()
+
     return total_tools
 
 async def main_async(args):
@@ -223,6 +193,8 @@ async def main_async(args):
     
     if relay_url and auth_token:
         logger.info(f"Connecting to MCP relay at {relay_url}")
+        # Only relay mode needs websockets
+        from .websocket_client import create_relay_client
         global relay_client
         relay_client = await create_relay_client(relay_url, auth_token, mcp)
         
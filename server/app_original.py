@@ -169,7 +169,7 @@ async def main_async():
         
         # Create relay client
         global relay_client
-        relay_client = await create_relay_client(mcp)
+        relay_client = await create_relay_client(relay_url, auth_token, mcp)
         
         if relay_client:
             logger.info("WebSocket relay client started")
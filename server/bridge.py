@@ -1,17 +1,26 @@
 """
 REAPER File Bridge - Shared communication module
 
-This module provides the file-based bridge for communicating with REAPER.
+This module provides the bridge for communicating with REAPER.
 It's shared across all tool modules to maintain a single connection point.
+Requests travel over the file or socket transport (see transport.py).
 """
 
 import os
-import json
 import asyncio
+import contextvars
 import logging
+import re
 import time
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+
+from .call_policy import HALF_OPEN, OPEN, CircuitBreaker, TimeoutPolicy
+from .dsl.snapshot import invalidate_snapshot
+from .liveness import BridgeLiveness
+from .metrics import LatencyHistogram, measure_io, server_metrics
+from .tracing import tracer
+from .transport import create_transport
 
 logger = logging.getLogger(__name__)
 
@@ -22,197 +31,243 @@ BRIDGE_DIR = Path(os.environ.get(
 ))
 BRIDGE_DIR.mkdir(parents=True, exist_ok=True)
 
-# ReaScript logging configuration
-REASCRIPT_LOGGING_ENABLED = os.environ.get('REASCRIPT_LOGGING', '').lower() in ('1', 'true', 'yes')
-REASCRIPT_LOG_FILE = Path(os.environ.get(
-    'REASCRIPT_LOG_FILE',
-    '/tmp/reascript_calls.jsonl'
-))
+# Calls collected by start_tracking(), per task so concurrent tools stay apart
+_tracked_calls: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = \
+    contextvars.ContextVar("reaper_tracked_calls", default=None)
+
+
+# ReaScript getters (TrackFX_GetFXName, CountTracks, EnumProjectMarkers, ...);
+# GetSet* functions can write and do not count as reads
+_READ_ONLY_FUNCTION = re.compile(r"^(?:\w+_)?(?:Get(?!Set)|Count|Enum|Is|Has|Validate|TimeMap)")
+
+
+def is_read_only_call(func_name: str, args: Optional[List[Any]] = None) -> bool:
+    """
+    Whether a bridge call only reads the project.
+    
+    Anything else may change it without REAPER bumping the project state
+    change count (no undo point), so the DSL snapshot is dropped after it.
+    """
+    if func_name == "Batch":
+        calls = args[0] if args else []
+        return all(is_read_only_call(call.get("func", ""), call.get("args")) for call in calls)
+    if func_name == "StreamOpen":
+        return bool(args) and is_read_only_call(args[0], args[1] if len(args) > 1 else None)
+    if func_name in ("StreamRead", "StreamClose"):
+        return True
+    return bool(_READ_ONLY_FUNCTION.match(func_name))
+
+
+def batch_ref(call_index: int, field: str = "ret", item: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Placeholder argument for call_batch that the bridge replaces with a value
+    returned by an earlier call of the same batch (0-based `call_index`).
+    
+    `field` selects the response key (default "ret"); `item` picks one
+    element when that value is a list of multiple return values.
+    """
+    ref = {"$ref": call_index, "field": field}
+    if item is not None:
+        ref["item"] = item
+    return ref
+
+
+def _resolve_refs(value: Any, results: List[Dict[str, Any]]) -> Any:
+    """Python-side equivalent of resolve_batch_refs() in mcp_bridge.lua"""
+    if isinstance(value, list):
+        return [_resolve_refs(v, results) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if "$ref" in value:
+        resolved = results[value["$ref"]].get(value.get("field", "ret"))
+        if value.get("item") is not None and isinstance(resolved, list):
+            resolved = resolved[value["item"]]
+        return resolved
+    return {k: _resolve_refs(v, results) for k, v in value.items()}
+
 
 class ReaperFileBridge:
     """File-based bridge for communicating with REAPER"""
     
-    def __init__(self):
-        self.bridge_dir = BRIDGE_DIR
+    def __init__(self, bridge_dir: Optional[Path] = None, transport=None):
+        self.bridge_dir = Path(bridge_dir) if bridge_dir else BRIDGE_DIR
         self.request_id = 0
-        self.call_tracking = []  # Track calls during operations
-        self.tracking_enabled = False
+        self.latency = LatencyHistogram()  # Round-trip time of answered calls
+        self.liveness = BridgeLiveness(self)  # Up/down state from the calls made
+        self.timeouts = TimeoutPolicy.from_env()  # Per-function timeouts
+        self.breaker = CircuitBreaker.from_env()  # Fails fast while REAPER is not answering
+        self.transport = transport or create_transport(self.bridge_dir)
+        
+    async def call_lua(self, func_name: str, args: Optional[List[Any]] = None,
+                       timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Call a Lua function and wait for response.
         
-    async def call_lua(self, func_name: str, args: Optional[List[Any]] = None) -> Dict[str, Any]:
-        """Call a Lua function and wait for response"""
+        `timeout` defaults to the function's timeout from self.timeouts. While
+        the circuit breaker is open the call fails at once without a request.
+        Calls that may change the project drop the DSL project snapshot.
+        """
+        args = args or []
+        response = await self._gated_call(func_name, args, timeout)
+        if not is_read_only_call(func_name, args):
+            # Dropped once the call is answered, so a lookup racing it cannot
+            # cache what it read before the change
+            invalidate_snapshot()
+        return response
+    
+    async def _gated_call(self, func_name: str, args: List[Any],
+                          timeout: Optional[float]) -> Dict[str, Any]:
+        if timeout is None:
+            timeout = self.timeouts.timeout_for(func_name)
+        
+        gate = self.breaker.before_call()
+        if gate == OPEN:
+            return self._reject(func_name, args)
+        if gate == HALF_OPEN and func_name != self.liveness.probe_function:
+            # Half-open: one cheap probe decides whether the real call is sent
+            probe = await self._call(self.liveness.probe_function, [], self.liveness.probe_timeout)
+            if self.breaker.state == OPEN:
+                return self._reject(func_name, args, probe.get("error"))
+        return await self._call(func_name, args, timeout)
+    
+    async def _call(self, func_name: str, args: List[Any], timeout: float) -> Dict[str, Any]:
         self.request_id += 1
-        request_file = self.bridge_dir / f"request_{self.request_id}.json"
-        response_file = self.bridge_dir / f"response_{self.request_id}.json"
+        request_id = self.request_id
         
-        # Write request
+        # Build request
         request_data = {
-            "id": self.request_id,
+            "id": request_id,
             "func": func_name,
-            "args": args or []
+            "args": args
         }
         
-        # Track call start time for performance logging
         call_start_time = time.time()
-        
-        # Log ReaScript call if enabled
-        if REASCRIPT_LOGGING_ENABLED:
-            log_entry = {
-                "timestamp": call_start_time,
-                "request_id": self.request_id,
-                "type": "call",
-                "function": func_name,
-                "args": args or [],
-                "dsl_tool": os.environ.get('CURRENT_DSL_TOOL', 'unknown')
-            }
-            try:
-                with open(REASCRIPT_LOG_FILE, 'a') as f:
-                    f.write(json.dumps(log_entry) + '\n')
-            except Exception as e:
-                logger.debug(f"Failed to log ReaScript call: {e}")
-        
+        kind = "response"
+        self.liveness.call_started()
         try:
-            with open(request_file, 'w') as f:
-                json.dump(request_data, f)
-            
             # Wait for response (with timeout)
-            start_time = asyncio.get_event_loop().time()
-            timeout = 5.0  # 5 second timeout
-            
-            while asyncio.get_event_loop().time() - start_time < timeout:
-                if response_file.exists():
-                    try:
-                        with open(response_file, 'r') as f:
-                            response = json.load(f)
-                        # Clean up files
-                        request_file.unlink(missing_ok=True)
-                        response_file.unlink(missing_ok=True)
-                        
-                        # Track call if tracking is enabled
-                        if self.tracking_enabled:
-                            duration_ms = (time.time() - call_start_time) * 1000
-                            self.call_tracking.append({
-                                "timestamp": call_start_time,
-                                "function": func_name,
-                                "args": args or [],
-                                "response": response,
-                                "duration_ms": duration_ms,
-                                "success": response.get("ok", False)
-                            })
-                        
-                        # Log ReaScript response if enabled
-                        if REASCRIPT_LOGGING_ENABLED:
-                            duration_ms = (time.time() - call_start_time) * 1000
-                            log_entry = {
-                                "timestamp": time.time(),
-                                "request_id": self.request_id,
-                                "type": "response",
-                                "function": func_name,
-                                "response": response,
-                                "duration_ms": duration_ms,
-                                "success": response.get("ok", False),
-                                "dsl_tool": os.environ.get('CURRENT_DSL_TOOL', 'unknown')
-                            }
-                            try:
-                                with open(REASCRIPT_LOG_FILE, 'a') as f:
-                                    f.write(json.dumps(log_entry) + '\n')
-                            except Exception as e:
-                                logger.debug(f"Failed to log ReaScript response: {e}")
-                        
-                        return response
-                    except json.JSONDecodeError:
-                        # File might be partially written, wait a bit
-                        await asyncio.sleep(0.01)
-                await asyncio.sleep(0.1)
-            
-            # Timeout
-            request_file.unlink(missing_ok=True)
-            logger.error("Timeout waiting for REAPER response")
-            timeout_response = {"ok": False, "error": "Timeout waiting for REAPER response"}
+            with measure_io() as io:
+                response = await self.transport.request(request_data, timeout)
             
-            # Track timeout if tracking is enabled
-            if self.tracking_enabled:
-                duration_ms = (time.time() - call_start_time) * 1000
-                self.call_tracking.append({
-                    "timestamp": call_start_time,
-                    "function": func_name,
-                    "args": args or [],
-                    "response": timeout_response,
-                    "duration_ms": duration_ms,
-                    "success": False,
-                    "timeout": True
-                })
-            
-            # Log timeout if enabled
-            if REASCRIPT_LOGGING_ENABLED:
-                duration_ms = (time.time() - call_start_time) * 1000
-                log_entry = {
-                    "timestamp": time.time(),
-                    "request_id": self.request_id,
-                    "type": "timeout",
-                    "function": func_name,
-                    "duration_ms": duration_ms,
-                    "dsl_tool": os.environ.get('CURRENT_DSL_TOOL', 'unknown')
-                }
-                try:
-                    with open(REASCRIPT_LOG_FILE, 'a') as f:
-                        f.write(json.dumps(log_entry) + '\n')
-                except Exception as e:
-                    logger.debug(f"Failed to log ReaScript timeout: {e}")
-            
-            return timeout_response
+            if response is not None:
+                self.latency.record(time.time() - call_start_time)
+                self.timeouts.record(func_name, time.time() - call_start_time)
+            else:
+                logger.error("Timeout waiting for REAPER response")
+                kind = "timeout"
+                response = {"ok": False, "error": "Timeout waiting for REAPER response"}
             
         except Exception as e:
             logger.error(f"Bridge error: {e}")
-            error_response = {"ok": False, "error": str(e)}
-            
-            # Track error if tracking is enabled
-            if self.tracking_enabled:
-                duration_ms = (time.time() - call_start_time) * 1000
-                self.call_tracking.append({
-                    "timestamp": call_start_time,
-                    "function": func_name,
-                    "args": args or [],
-                    "response": error_response,
-                    "duration_ms": duration_ms,
-                    "success": False,
-                    "error": str(e)
-                })
-            
-            # Log error if enabled
-            if REASCRIPT_LOGGING_ENABLED:
-                duration_ms = (time.time() - call_start_time) * 1000
-                log_entry = {
-                    "timestamp": time.time(),
-                    "request_id": self.request_id,
-                    "type": "error",
-                    "function": func_name,
-                    "error": str(e),
-                    "duration_ms": duration_ms,
-                    "dsl_tool": os.environ.get('CURRENT_DSL_TOOL', 'unknown')
-                }
-                try:
-                    with open(REASCRIPT_LOG_FILE, 'a') as f:
-                        f.write(json.dumps(log_entry) + '\n')
-                except Exception as e:
-                    logger.debug(f"Failed to log ReaScript error: {e}")
+            kind = "error"
+            response = {"ok": False, "error": str(e)}
+        # The file transport numbers its own request files
+        request_id = request_data["id"]
+        
+        duration = time.time() - call_start_time
+        if kind == "response":
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+            if kind == "timeout":
+                self.timeouts.record_timeout(func_name)
+        self.liveness.call_finished(kind == "response", response.get("error"))
+        tracer.record_call(request_id, func_name, args, response, duration, kind)
+        server_metrics.record_call(func_name, duration, ok=response.get("ok", False),
+                                   timeout=kind == "timeout", sent=io[0], received=io[1])
+        
+        tracked = _tracked_calls.get()
+        if tracked is not None:
+            tracked.append({
+                "timestamp": call_start_time,
+                "function": func_name,
+                "args": args,
+                "duration_ms": duration * 1000,
+                "success": response.get("ok", False)
+            })
+        
+        return response
+    
+    def _reject(self, func_name: str, args: List[Any], reason: Optional[str] = None) -> Dict[str, Any]:
+        """Fail-fast response while the circuit breaker is open"""
+        response = {
+            "ok": False,
+            "error": (f"REAPER bridge unavailable ({reason or 'not responding'}); "
+                      f"retrying in {self.breaker.retry_in():.1f}s")
+        }
+        tracer.record_call(0, func_name, args, response, 0.0, "rejected")
+        server_metrics.record_call(func_name, 0.0, ok=False)
+        return response
+    
+    async def call_batch(self, calls: List[Tuple[str, Optional[List[Any]]]],
+                         stop_on_error: bool = False) -> List[Dict[str, Any]]:
+        """
+        Execute several ReaScript calls in a single bridge round trip.
+        
+        Args:
+            calls: (func_name, args) pairs, run in order inside one defer tick.
+                Arguments may contain batch_ref(n) placeholders to reuse what
+                call n returned (e.g. a track handle from GetTrack).
+            stop_on_error: Skip the remaining calls after the first failure
             
-            return error_response
+        Returns:
+            One response dict per call, in the same order
+        """
+        if not calls:
+            return []
+        payload = [{"func": func, "args": list(args or [])} for func, args in calls]
+        timeout = max(self.timeouts.timeout_for(func) for func, _ in calls)
+        response = await self.call_lua("Batch", [payload, {"stop_on_error": stop_on_error}],
+                                       timeout=timeout)
+        
+        if response.get("ok"):
+            server_metrics.record_batched(func for func, _ in calls)
+            results = response.get("results") or []
+            # An empty Lua table is encoded as {}
+            return results if isinstance(results, list) else []
+        
+        if "Unknown function: Batch" in str(response.get("error", "")):
+            # Older bridge script: fall back to one round trip per call
+            return await self._call_batch_sequential(payload, stop_on_error)
+        
+        return [dict(response) for _ in calls]
+    
+    async def _call_batch_sequential(self, payload: List[Dict[str, Any]],
+                                     stop_on_error: bool) -> List[Dict[str, Any]]:
+        results = []
+        failed_at = None
+        for call in payload:
+            if failed_at is not None and stop_on_error:
+                results.append({"ok": False, "error": f"Skipped: call #{failed_at} failed"})
+                continue
+            try:
+                args = _resolve_refs(call["args"], results)
+            except (IndexError, KeyError, TypeError) as e:
+                result = {"ok": False, "error": f"Bridge error: invalid batch reference ({e})"}
+            else:
+                result = await self.call_lua(call["func"], args)
+            if not result.get("ok") and failed_at is None:
+                failed_at = len(results)
+            results.append(result)
+        return results
     
     def start_tracking(self):
-        """Start tracking ReaScript calls"""
-        self.tracking_enabled = True
-        self.call_tracking = []
+        """Start collecting the ReaScript calls made by the current task"""
+        _tracked_calls.set([])
     
     def stop_tracking(self):
-        """Stop tracking and return collected calls"""
-        self.tracking_enabled = False
-        calls = self.call_tracking.copy()
-        self.call_tracking = []
+        """Stop collecting and return the calls made since start_tracking()"""
+        calls = _tracked_calls.get() or []
+        _tracked_calls.set(None)
         return calls
     
     def get_tracked_calls(self):
         """Get tracked calls without clearing"""
-        return self.call_tracking.copy()
+        return list(_tracked_calls.get() or [])
+    
+    def get_latency_stats(self) -> Dict[str, float]:
+        """Round-trip latency summary (count, p50/p90/p99 in ms) for answered calls"""
+        return self.latency.snapshot()
 
 # Singleton instance
 bridge = ReaperFileBridge()
\ No newline at end of file
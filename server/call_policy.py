@@ -0,0 +1,174 @@
+"""
+Per-call timeouts and a circuit breaker for the bridge
+
+TimeoutPolicy picks the timeout of each ReaScript call instead of one
+fixed 5 s for everything:
+
+- Every function belongs to a class (quick getters, normal calls, slow
+  renders/analysis/actions) with a default timeout.
+- Once a function has `min_samples` answered calls, its timeout shrinks
+  to `headroom` times its observed p99 (never below `min_timeout` nor
+  above its class default), so a stalled GetPlayState gives up in about
+  a second. A timeout drops what was learned for that function.
+- REAPER_MCP_TIMEOUTS overrides classes or single functions, e.g.
+  "slow=120,CalcMediaSrcLoudness=300,GetPlayState=0.5".
+
+CircuitBreaker makes a dead bridge cost microseconds per call. After
+`failure_threshold` consecutive timeouts it opens and calls fail at once.
+After `cooldown` seconds it half-opens: the next call is preceded by one
+cheap probe, which closes the breaker if REAPER answers or re-opens it
+with a doubled cooldown (up to `max_cooldown`) if not.
+"""
+
+import os
+import time
+from typing import Dict, Optional
+
+from .metrics import LatencyHistogram
+
+QUICK, NORMAL, SLOW = "quick", "normal", "slow"
+
+DEFAULT_CLASS_TIMEOUTS = {QUICK: 3.0, NORMAL: 5.0, SLOW: 60.0}
+
+QUICK_PREFIXES = ("Get", "Count", "Enum", "Is", "Has", "Validate", "TimeMap", "Master_Get")
+
+# Renders, analysis, file I/O and actions that may run for a long time
+SLOW_MARKERS = ("Render", "Loudness", "Calc", "Glue", "Apply", "Freeze", "Bounce",
+                "Main_OnCommand", "Main_openProject", "Main_SaveProject", "Peaks",
+                "Normalize", "Batch")
+
+
+def timeout_class(func_name: str) -> str:
+    """Static timeout class of a bridge function, from its name"""
+    if any(marker in func_name for marker in SLOW_MARKERS):
+        return SLOW
+    if func_name.startswith(QUICK_PREFIXES):
+        return QUICK
+    return NORMAL
+
+
+def _parse_overrides(value: str) -> Dict[str, float]:
+    overrides = {}
+    for item in value.split(","):
+        name, _, seconds = item.partition("=")
+        if name.strip() and seconds.strip():
+            overrides[name.strip()] = float(seconds)
+    return overrides
+
+
+class TimeoutPolicy:
+    """Timeout per bridge function: overrides, then learned latency, then class"""
+
+    def __init__(self, class_timeouts: Optional[Dict[str, float]] = None,
+                 overrides: Optional[Dict[str, float]] = None, min_samples: int = 20,
+                 headroom: float = 4.0, min_timeout: float = 1.0):
+        self.class_timeouts = dict(DEFAULT_CLASS_TIMEOUTS)
+        self.overrides = {}
+        for name, seconds in (overrides or {}).items():
+            if name in self.class_timeouts:
+                self.class_timeouts[name] = seconds
+            else:
+                self.overrides[name] = seconds
+        if class_timeouts:
+            self.class_timeouts.update(class_timeouts)
+        self.min_samples = min_samples
+        self.headroom = headroom
+        self.min_timeout = min_timeout
+        self._latency: Dict[str, LatencyHistogram] = {}
+
+    @classmethod
+    def from_env(cls) -> "TimeoutPolicy":
+        return cls(overrides=_parse_overrides(os.environ.get("REAPER_MCP_TIMEOUTS", "")))
+
+    def timeout_for(self, func_name: str) -> float:
+        override = self.overrides.get(func_name)
+        if override is not None:
+            return override
+        ceiling = self.class_timeouts[timeout_class(func_name)]
+        latency = self._latency.get(func_name)
+        if latency is None or latency.count < self.min_samples:
+            return ceiling
+        learned = latency.percentile(99) * self.headroom
+        return min(ceiling, max(self.min_timeout, learned))
+
+    def record(self, func_name: str, seconds: float):
+        """An answered call and its round-trip time"""
+        latency = self._latency.get(func_name)
+        if latency is None:
+            latency = self._latency[func_name] = LatencyHistogram()
+        latency.record(seconds)
+
+    def record_timeout(self, func_name: str):
+        """Forget what was learned; the function may be slower than observed"""
+        self._latency.pop(func_name, None)
+
+    def snapshot(self, top: int = 20) -> Dict[str, float]:
+        """Current timeouts of the most called functions, in seconds"""
+        names = sorted(self._latency, key=lambda n: -self._latency[n].count)[:top]
+        return {name: round(self.timeout_for(name), 3) for name in names}
+
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    """Fails calls fast while the bridge is not answering"""
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 1.0,
+                 max_cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.retry_at = 0.0
+        self.rejected = 0
+        self.opened = 0
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreaker":
+        return cls(
+            failure_threshold=int(os.environ.get("REAPER_MCP_BREAKER_THRESHOLD", "3")),
+            cooldown=float(os.environ.get("REAPER_MCP_BREAKER_COOLDOWN", "1.0")),
+        )
+
+    def before_call(self) -> str:
+        """CLOSED: go ahead; HALF_OPEN: probe first; OPEN: fail fast"""
+        if self.state == CLOSED:
+            return CLOSED
+        if self.state == OPEN and time.monotonic() >= self.retry_at:
+            self.state = HALF_OPEN
+            return HALF_OPEN
+        self.rejected += 1
+        return OPEN
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.cooldown = self.base_cooldown
+        self.state = CLOSED
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            self._open()
+        elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened += 1
+        self.retry_at = time.monotonic() + self.cooldown
+
+    def retry_in(self) -> float:
+        return max(0.0, self.retry_at - time.monotonic())
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in_s": round(self.retry_in(), 3) if self.state == OPEN else 0.0,
+            "rejected": self.rejected,
+            "opened": self.opened,
+        }
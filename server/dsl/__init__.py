@@ -1,10 +1,20 @@
 """
 DSL/Macro layer for natural language REAPER control
+
+Submodules are imported on first attribute access, so that loading a light
+module such as dsl.health_check does not pull in every DSL tool.
 """
 
-from .tools import register_dsl_tools
-from .resolvers import ResolverError, DisambiguationNeeded, get_context, reset_context
-from .wrappers import OperationResult
+import importlib
+
+_EXPORTS = {
+    'register_dsl_tools': '.tools',
+    'ResolverError': '.resolvers',
+    'DisambiguationNeeded': '.resolvers',
+    'get_context': '.resolvers',
+    'reset_context': '.resolvers',
+    'OperationResult': '.wrappers',
+}
 
 __all__ = [
     'register_dsl_tools',
@@ -13,4 +23,13 @@ __all__ = [
     'OperationResult',
     'get_context',
     'reset_context'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
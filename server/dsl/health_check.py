@@ -70,6 +70,14 @@ async def verify_dsl_installation(bridge, profile_name: str, categories: List[st
     
     logger.info("Checking DSL functions availability...")
     
+    # One short probe first, so a missing REAPER costs ~1 s rather than a
+    # 5 s timeout per checked function
+    liveness = getattr(bridge, "liveness", None)
+    if liveness is not None and not await liveness.ensure_alive():
+        logger.warning("REAPER bridge is not responding - skipping DSL function check")
+        logger.warning("Make sure REAPER is running with the bridge loaded")
+        return
+    
     try:
         all_available, missing = await check_dsl_functions(bridge)
         
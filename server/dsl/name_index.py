@@ -0,0 +1,161 @@
+"""
+Fast fuzzy name matching for tracks, FX and FX parameters
+
+NameIndex pre-computes normalised names, word tokens and character
+trigrams, and keeps an inverted trigram index. A query only scores the
+names it shares a trigram with, and a bounded heap keeps the top k, so
+finding "cutoff" among 600 synth parameters is a few dictionary lookups
+rather than 600 difflib comparisons.
+
+Trigrams only narrow the candidates. Scores follow the resolvers'
+conventions: 1.0 for an exact match, a fixed score when one name contains
+the other, otherwise the difflib SequenceMatcher ratio, so thresholds tuned
+against fuzzy_match_score keep their meaning.
+"""
+
+import heapq
+import re
+from collections import Counter, OrderedDict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# Score when one name is a substring of the other (e.g. "cutoff" / "Cutoff Freq")
+CONTAINS_SCORE = 0.85
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(name: str) -> str:
+    """Lowercase and reduce punctuation to single spaces"""
+    return _NON_WORD.sub(' ', (name or '').lower()).strip()
+
+
+@lru_cache(maxsize=4096)
+def trigrams(name: str) -> FrozenSet[str]:
+    """Character trigrams of a normalised name, padded at the word edges"""
+    padded = f"  {name} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a: str, b: str) -> float:
+    """Dice coefficient of the trigram sets of two names (0..1)"""
+    ga, gb = trigrams(normalize(a)), trigrams(normalize(b))
+    if not ga or not gb:
+        return 0.0
+    return 2.0 * len(ga & gb) / (len(ga) + len(gb))
+
+
+class NameIndex:
+    """Inverted trigram index over a fixed list of names"""
+
+    def __init__(self, names: Iterable[str], contains_score: float = CONTAINS_SCORE):
+        self.names: List[str] = list(names)
+        self.contains_score = contains_score
+        self._normalized = [normalize(n) for n in self.names]
+        self._grams = [trigrams(n) for n in self._normalized]
+        self._tokens = [frozenset(n.split()) for n in self._normalized]
+        self._exact: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = {}
+        for i, (norm, grams) in enumerate(zip(self._normalized, self._grams)):
+            self._exact.setdefault(norm, i)
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(i)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _score(self, query: str, i: int) -> float:
+        name = self._normalized[i]
+        if query == name:
+            return 1.0
+        if query in name or (name and name in query):
+            return self.contains_score
+        return SequenceMatcher(None, query, name).ratio()
+
+    def search(self, query: str, k: int = 5,
+               min_score: float = 0.0) -> List[Tuple[float, int, str]]:
+        """Best matches as (score, position, name), highest score first"""
+        query = normalize(query)
+        if not query or not self.names:
+            return []
+
+        exact = self._exact.get(query)
+        if exact is not None and k == 1:
+            return [(1.0, exact, self.names[exact])]
+
+        query_grams = trigrams(query)
+        shared = Counter()
+        for gram in query_grams:
+            for i in self._postings.get(gram, ()):
+                shared[i] += 1
+        if len(query) < 3:
+            # Very short queries may hide inside a word without sharing a padded trigram
+            for i, name in enumerate(self._normalized):
+                if query in self._tokens[i] or query in name:
+                    shared.setdefault(i, 0)
+
+        scored = (
+            (self._score(query, i), -i)
+            for i in shared
+        )
+        best = heapq.nlargest(k, (s for s in scored if s[0] >= min_score and s[0] > 0))
+        return [(score, -neg_i, self.names[-neg_i]) for score, neg_i in best]
+
+    def best(self, query: str, min_score: float = 0.0) -> Optional[Tuple[float, int, str]]:
+        """Single best match or None"""
+        matches = self.search(query, k=1, min_score=min_score)
+        return matches[0] if matches else None
+
+
+class FXParamCache:
+    """
+    Parameter-name indexes keyed by FX identity (plugin name + FX GUID).
+
+    The GUID last seen in each (track, fx) slot is remembered as a hint, so
+    the bridge can confirm the slot still holds the same FX instead of
+    sending every parameter name again.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._indexes: "OrderedDict[Tuple[str, str], NameIndex]" = OrderedDict()
+        self._slot_guids: Dict[Tuple[int, int], str] = {}
+
+    def clear(self):
+        self._indexes.clear()
+        self._slot_guids.clear()
+
+    def _store(self, key: Tuple[str, str], index: NameIndex):
+        self._indexes[key] = index
+        self._indexes.move_to_end(key)
+        while len(self._indexes) > self.max_entries:
+            self._indexes.popitem(last=False)
+
+    async def get(self, bridge, track_index: int, fx_index: int) -> Optional[NameIndex]:
+        """Parameter-name index of one track FX, fetched at most once per identity"""
+        slot = (track_index, fx_index)
+        hint = self._slot_guids.get(slot)
+        args = [track_index, fx_index] + ([hint] if hint else [])
+        result = await bridge.call_lua("GetFXParamNames", args)
+        if result.get("ok") and result.get("unchanged"):
+            key = (result.get("fx_name", ""), result.get("guid", ""))
+            if key in self._indexes:
+                self._indexes.move_to_end(key)
+                return self._indexes[key]
+            # Evicted meanwhile: ask again for the names
+            result = await bridge.call_lua("GetFXParamNames", [track_index, fx_index])
+        if not result.get("ok"):
+            self._slot_guids.pop(slot, None)
+            return None
+
+        names = result.get("names") or []
+        key = (result.get("fx_name", ""), result.get("guid", ""))
+        index = NameIndex(names if isinstance(names, list) else [])
+        self._store(key, index)
+        self._slot_guids[slot] = key[1]
+        return index
+
+
+# Shared by the DSL tools
+fx_param_cache = FXParamCache()
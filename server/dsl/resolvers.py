@@ -12,6 +12,10 @@ from dataclasses import dataclass
 from difflib import SequenceMatcher
 import logging
 
+from .snapshot import ProjectSnapshot, get_snapshot, get_markers
+from ..result_stream import StreamError, stream_result
+from ..tempo_map import TempoMapError, current_tempo_map
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -142,6 +146,84 @@ def parse_role_from_name(name: str) -> Optional[str]:
     
     return None
 
+class TrackIndex:
+    """
+    In-memory index over every track of the project, built from one bulk
+    GetAllTracksInfo call. Lowercase names and name/role tokens are computed
+    once, so matching a selector never goes back to REAPER.
+    """
+    
+    def __init__(self, tracks: List[TrackRef]):
+        self.tracks = tracks
+        self.by_index: Dict[int, TrackRef] = {t.index: t for t in tracks}
+        self.lower_names: Dict[int, str] = {}
+        self.tokens: Dict[int, set] = {}
+        self.by_name: Dict[str, List[TrackRef]] = {}
+        self.by_token: Dict[str, List[TrackRef]] = {}
+        for track in tracks:
+            lower = (track.name or "").lower()
+            self.lower_names[track.index] = lower
+            # Name words plus the inferred role ("Kit 2" -> kit, 2, drums)
+            tokens = set(re.findall(r'[a-z0-9]+', lower))
+            if track.role:
+                tokens.add(track.role)
+            self.tokens[track.index] = tokens
+            self.by_name.setdefault(lower, []).append(track)
+            for token in tokens:
+                self.by_token.setdefault(token, []).append(track)
+    
+    def __len__(self):
+        return len(self.tracks)
+    
+    def get(self, index: int) -> Optional[TrackRef]:
+        return self.by_index.get(index)
+    
+    def exact(self, name: str) -> List[TrackRef]:
+        """Tracks whose name equals `name`, ignoring case"""
+        return self.by_name.get(name.lower(), [])
+    
+    def with_token(self, token: str) -> List[TrackRef]:
+        """Tracks with `token` as a name word or as their role"""
+        return self.by_token.get(token.lower(), [])
+    
+    def containing(self, patterns: List[str]) -> List[TrackRef]:
+        """Tracks whose lowercase name contains any of the patterns, in order"""
+        return [
+            track for track in self.tracks
+            if any(p in self.lower_names[track.index] for p in patterns)
+        ]
+
+def _track_from_info(info: Dict[str, Any], index: int) -> TrackRef:
+    """Build a TrackRef from GetTrackInfo/GetAllTracksInfo data"""
+    track = TrackRef(
+        index=index,
+        guid=info.get("guid", ""),
+        name=info.get("name", f"Track {index + 1}"),
+        has_midi=info.get("has_midi", False),
+        has_audio=info.get("has_audio", False),
+        fx_names=info.get("fx_names", []),
+        confidence=1.0
+    )
+    
+    # Try to infer role from name
+    track.role = parse_role_from_name(track.name)
+    return track
+
+async def get_track_index(bridge, snapshot: Optional[ProjectSnapshot] = None) -> TrackIndex:
+    """Index of all tracks, loaded with one bridge call per project change"""
+    snapshot = snapshot or await get_snapshot(bridge)
+    
+    async def load():
+        result = await bridge.call_lua("GetAllTracksInfo", [])
+        if not result.get("ok"):
+            return TrackIndex([])
+        tracks = result.get("tracks") or []
+        return TrackIndex([
+            _track_from_info(info, info.get("index", i)) for i, info in enumerate(tracks)
+        ])
+    
+    return await snapshot.section("tracks", load)
+
 async def resolve_track(bridge, selector: Union[str, int, Dict[str, Any]]) -> TrackRef:
     """
     Resolve a flexible track reference to a specific track
@@ -174,14 +256,17 @@ async def resolve_track(bridge, selector: Union[str, int, Dict[str, Any]]) -> Tr
         selector = {"name": selector}
     
     # Build candidate list
-    track_count = await _get_track_count(bridge)
-    candidates = []
+    index = await get_track_index(bridge)
     
-    for i in range(track_count):
-        track_info = await _get_track_info(bridge, i)
-        if not track_info:
-            continue
-            
+    # An exact (case-insensitive) name is the best possible match
+    if set(selector) == {"name"} and isinstance(selector["name"], str):
+        exact = index.exact(selector["name"])
+        if exact:
+            _context.update_track(exact[0])
+            return exact[0]
+    
+    candidates = []
+    for track_info in index.tracks:
         score = _score_track(track_info, selector)
         if score > 0:
             candidates.append((track_info, score))
@@ -248,14 +333,9 @@ def _score_track(track: TrackRef, selector: Dict[str, Any]) -> float:
     
     return max(scores) if scores else 0.0
 
-async def _get_track_count(bridge) -> int:
+async def _get_track_count(bridge, snapshot: Optional[ProjectSnapshot] = None) -> int:
     """Get the number of tracks in the project"""
-    # Use GetAllTracksInfo which we know works
-    result = await bridge.call_lua("GetAllTracksInfo", [])
-    if result.get("ok"):
-        tracks = result.get("tracks", [])
-        return len(tracks)
-    return 0
+    return len(await get_track_index(bridge, snapshot))
 
 async def _get_track_by_index(bridge, index: int) -> TrackRef:
     """Get track info by index"""
@@ -264,28 +344,19 @@ async def _get_track_by_index(bridge, index: int) -> TrackRef:
         return track_info
     raise ResolverError(f"Track at index {index} not found")
 
-async def _get_track_info(bridge, index: int) -> Optional[TrackRef]:
-    """Get detailed track information"""
+async def _get_track_info(bridge, index: int,
+                          snapshot: Optional[ProjectSnapshot] = None) -> Optional[TrackRef]:
+    """Get detailed track information (cached until the project changes)"""
+    snapshot = snapshot or await get_snapshot(bridge)
+    track = (await get_track_index(bridge, snapshot)).get(index)
+    if track is not None or index >= 0:
+        return track
+    
+    # The master track (-1) is not part of the bulk listing
     result = await bridge.call_lua("GetTrackInfo", [index])
     if not result.get("ok"):
         return None
-    
-    info = result.get("info", {})
-    
-    track = TrackRef(
-        index=index,
-        guid=info.get("guid", ""),
-        name=info.get("name", f"Track {index + 1}"),
-        has_midi=info.get("has_midi", False),
-        has_audio=info.get("has_audio", False),
-        fx_names=info.get("fx_names", []),
-        confidence=1.0
-    )
-    
-    # Try to infer role from name
-    track.role = parse_role_from_name(track.name)
-    
-    return track
+    return _track_from_info(result.get("info", {}), index)
 
 async def resolve_tracks_pattern(bridge, pattern: str) -> List[TrackRef]:
     """
@@ -316,18 +387,15 @@ async def resolve_tracks_pattern(bridge, pattern: str) -> List[TrackRef]:
     # Get patterns to search for
     search_patterns = role_patterns.get(pattern, [pattern])
     
-    # Get all tracks
-    track_count = await _get_track_count(bridge)
+    # Match against the precomputed lowercase names of all tracks
+    index = await get_track_index(bridge)
+    matched = {t.index for t in index.containing(search_patterns)}
     
-    for i in range(track_count):
-        track_info = await _get_track_info(bridge, i)
-        if track_info:
-            track_name = track_info.name.lower()
-            # Check if any pattern matches
-            for p in search_patterns:
-                if p in track_name:
-                    tracks.append(track_info)
-                    break
+    # Also take tracks whose role matches ("Kit" is drums) and plurals ("cellos")
+    tokens = [pattern] + ([pattern[:-1]] if pattern.endswith('s') else [])
+    for token in tokens:
+        matched.update(t.index for t in index.with_token(token))
+    tracks.extend(t for t in index.tracks if t.index in matched)
     
     return tracks
 
@@ -444,28 +512,25 @@ async def _get_loop_region(bridge) -> TimeRef:
     raise ResolverError("Failed to get loop region")
 
 async def _bars_to_time(bridge, bars: int, start_pos: float = 0.0) -> float:
-    """Convert bars to time duration"""
-    result = await bridge.call_lua("BarsToTime", [bars, start_pos])
-    if result.get("ok"):
-        return result.get("ret", 0.0)
-    # Fallback: assume 120 BPM, 4/4
-    return bars * 4 * 60 / 120
+    """Convert bars to time duration, following tempo and time signature changes"""
+    try:
+        tempo_map = await current_tempo_map(bridge)
+    except TempoMapError as e:
+        raise ResolverError(f"Cannot read the tempo map: {e}")
+    return tempo_map.bars_duration(bars, start_pos)
 
 async def _get_region_time(bridge, region_name: str) -> TimeRef:
     """Get time range for a named region"""
-    result = await bridge.call_lua("FindRegion", [region_name])
-    if result.get("ok") and result.get("found"):
-        return TimeRef(
-            start=result.get("start", 0.0),
-            end=result.get("end", 0.0)
-        )
+    for marker in await get_markers(bridge):
+        if marker["is_region"] and marker["name"] == region_name:
+            return TimeRef(start=marker["position"], end=marker["end"])
     raise ResolverError(f"Region not found: {region_name}")
 
 async def _get_marker_position(bridge, marker_name: str) -> float:
     """Get position of a named marker"""
-    result = await bridge.call_lua("FindMarker", [marker_name])
-    if result.get("ok") and result.get("found"):
-        return result.get("position", 0.0)
+    for marker in await get_markers(bridge):
+        if not marker["is_region"] and marker["name"] == marker_name:
+            return marker["position"]
     raise ResolverError(f"Marker not found: {marker_name}")
 
 async def resolve_items(bridge, selector: Union[str, Dict[str, Any]]) -> List[ItemRef]:
@@ -521,24 +586,34 @@ async def _get_selected_items(bridge) -> List[ItemRef]:
     return []
 
 async def _get_all_items(bridge) -> List[ItemRef]:
-    """Get all items in project"""
-    result = await bridge.call_lua("GetAllItems", [])
-    if result.get("ok"):
+    """Get all items in project (cached until the project changes)"""
+    snapshot = await get_snapshot(bridge)
+    
+    async def load():
+        # Streamed: large projects have thousands of items
         items = []
-        for item_data in result.get("items", []):
-            items.append(_parse_item_data(item_data))
+        try:
+            async for page in stream_result(bridge, "GetAllItems", field="items"):
+                items.extend(_parse_item_data(item_data) for item_data in page)
+        except StreamError:
+            return []
         return items
-    return []
+    
+    return list(await snapshot.section("items", load))
 
 async def _get_track_items(bridge, track_index: int) -> List[ItemRef]:
-    """Get all items on a specific track"""
-    result = await bridge.call_lua("GetTrackItems", [track_index])
-    if result.get("ok"):
-        items = []
-        for item_data in result.get("items", []):
-            items.append(_parse_item_data(item_data))
-        return items
-    return []
+    """Get all items on a specific track (cached until the project changes)"""
+    snapshot = await get_snapshot(bridge)
+    if snapshot.has("items"):
+        return [item for item in snapshot.get("items") if item.track_index == track_index]
+    
+    async def load():
+        result = await bridge.call_lua("GetTrackItems", [track_index])
+        if result.get("ok"):
+            return [_parse_item_data(item_data) for item_data in result.get("items", [])]
+        return []
+    
+    return list(await snapshot.section(f"track_items:{track_index}", load))
 
 def _parse_item_data(data: Dict[str, Any]) -> ItemRef:
     """Parse item data from Lua response"""
@@ -0,0 +1,153 @@
+"""
+Project snapshot cache for the DSL resolvers
+
+Resolving "the bass track" used to re-read every track from REAPER on every
+tool call. A ProjectSnapshot keeps what the resolvers fetched (tracks, items,
+FX names, markers, tempo map) until REAPER's project state change count
+moves, so an unchanged project costs one GetProjectStateChangeCount probe
+per lookup instead of N+1 bridge calls. Edits without an undo point need not
+move that count, so the bridge also drops the snapshot after every call that
+is not read-only (see bridge.is_read_only_call).
+
+Sections are filled lazily: a tool that only resolves tracks never pays for
+the item list or the tempo map.
+"""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectSnapshot:
+    """Cached project data, valid for one project state change count"""
+
+    def __init__(self, change_count: Optional[int]):
+        self.change_count = change_count
+        self._sections: Dict[str, Any] = {}
+
+    def has(self, name: str) -> bool:
+        return name in self._sections
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self._sections.get(name, default)
+
+    def put(self, name: str, value: Any) -> Any:
+        self._sections[name] = value
+        return value
+
+    async def section(self, name: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a cached section, loading it on first use"""
+        if name in self._sections:
+            return self._sections[name]
+        return self.put(name, await loader())
+
+
+class SnapshotCache:
+    """Hands out the current ProjectSnapshot, replacing it when the project changes"""
+
+    def __init__(self):
+        self._snapshot: Optional[ProjectSnapshot] = None
+        self.probes = 0
+        self.refreshes = 0
+
+    async def current(self, bridge) -> ProjectSnapshot:
+        """Probe the change count and return a snapshot that matches it"""
+        self.probes += 1
+        result = await bridge.call_lua("GetProjectStateChangeCount", [0])
+        count = result.get("ret") if result.get("ok") else None
+        if not isinstance(count, (int, float)):
+            # Cannot tell whether cached data is stale: use a throwaway snapshot
+            logger.debug(f"Project change count unavailable: {result.get('error')}")
+            return ProjectSnapshot(None)
+
+        count = int(count)
+        if self._snapshot is None or self._snapshot.change_count != count:
+            self._snapshot = ProjectSnapshot(count)
+            self.refreshes += 1
+        return self._snapshot
+
+    def invalidate(self):
+        """Forget cached data, e.g. after the server changed the project itself"""
+        self._snapshot = None
+
+
+# Shared by all resolvers
+snapshot_cache = SnapshotCache()
+
+
+async def get_snapshot(bridge) -> ProjectSnapshot:
+    """Current snapshot of the project open in REAPER"""
+    return await snapshot_cache.current(bridge)
+
+
+def invalidate_snapshot():
+    """Drop the cached snapshot; the bridge calls this after each project edit"""
+    snapshot_cache.invalidate()
+
+
+async def load_markers(bridge) -> List[Dict[str, Any]]:
+    """All markers and regions: {index, is_region, position, end, name, number}"""
+    result = await bridge.call_lua("CountProjectMarkers", [0])
+    counts = result.get("ret") if result.get("ok") else None
+    if not isinstance(counts, list) or len(counts) < 2:
+        return []
+    total = int(counts[0]) + int(counts[1])
+
+    markers = []
+    results = await bridge.call_batch([("EnumProjectMarkers", [i]) for i in range(total)])
+    for i, marker_result in enumerate(results):
+        ret = marker_result.get("ret")
+        if not marker_result.get("ok") or not isinstance(ret, list) or len(ret) < 6:
+            continue
+        _, is_region, position, region_end, name, number = ret[:6]
+        markers.append({
+            "index": i,
+            "is_region": bool(is_region),
+            "position": position,
+            "end": region_end if is_region else position,
+            "name": name or "",
+            "number": number
+        })
+    return markers
+
+
+async def load_tempo_map(bridge) -> List[Dict[str, Any]]:
+    """Tempo/time signature markers: {time, measure, beat, bpm, num, denom, linear}"""
+    result = await bridge.call_lua("CountTempoTimeSigMarkers", [0])
+    count = result.get("ret") if result.get("ok") else 0
+    if not isinstance(count, (int, float)) or count <= 0:
+        return []
+
+    tempo_map = []
+    results = await bridge.call_batch(
+        [("GetTempoTimeSigMarker", [0, i]) for i in range(int(count))]
+    )
+    for marker_result in results:
+        ret = marker_result.get("ret")
+        if not marker_result.get("ok") or not isinstance(ret, list) or len(ret) < 8:
+            continue
+        retval, timepos, measurepos, beatpos, bpm, num, denom, linear = ret[:8]
+        if retval:
+            tempo_map.append({
+                "time": timepos,
+                "measure": measurepos,
+                "beat": beatpos,
+                "bpm": bpm,
+                "num": num,
+                "denom": denom,
+                "linear": bool(linear)
+            })
+    return tempo_map
+
+
+async def get_markers(bridge, snapshot: Optional[ProjectSnapshot] = None) -> List[Dict[str, Any]]:
+    """Markers and regions, from the snapshot when it is still current"""
+    snapshot = snapshot or await get_snapshot(bridge)
+    return await snapshot.section("markers", lambda: load_markers(bridge))
+
+
+async def get_tempo_map(bridge, snapshot: Optional[ProjectSnapshot] = None) -> List[Dict[str, Any]]:
+    """Tempo map, from the snapshot when it is still current"""
+    snapshot = snapshot or await get_snapshot(bridge)
+    return await snapshot.section("tempo_map", lambda: load_tempo_map(bridge))
@@ -9,6 +9,7 @@ disambiguation when needed.
 from typing import Optional, Union, Dict, Any, List
 import math
 from ..bridge import bridge
+from ..tracing import tracer
 from .wrappers import (
     track_create, track_set_volume, track_set_pan, track_mute, track_solo,
     time_select, loop_create,
@@ -18,7 +19,8 @@ from .wrappers import (
     OperationResult
 )
 from .resolvers import reset_context, _context as dsl_context
-from difflib import SequenceMatcher
+from .name_index import NameIndex, fx_param_cache
+from .snapshot import invalidate_snapshot
 
 # Shared effect name mapping for DSL functions
 EFFECT_MAP = {
@@ -38,66 +40,66 @@ EFFECT_MAP = {
 }
 
 
-async def _find_fx_on_track(bridge, track_index: int, effect_name: str):
-    """Find an FX on a track by friendly name. Returns 0-based FX index or None."""
-    canonical = EFFECT_MAP.get(effect_name.lower(), effect_name)
+def _match_fx(fx_names: List[str], canonical: str):
+    """Index of the FX whose name contains or best matches `canonical`, or None"""
+    for i, fx_name in enumerate(fx_names):
+        if canonical.lower() in fx_name.lower():
+            return i
 
-    count_result = await bridge.call_lua("TrackFX_GetCount", [track_index])
-    if not count_result.get("ok"):
-        return None
-    fx_count = count_result.get("ret", 0)
+    match = NameIndex(fx_names).best(canonical, min_score=0.6)
+    return match[1] if match else None
 
-    for i in range(fx_count):
-        name_result = await bridge.call_lua("TrackFX_GetFXName", [track_index, i, "", 256])
-        if name_result.get("ok"):
-            fx_name = name_result.get("ret", "")
-            if canonical.lower() in fx_name.lower():
-                return i
 
-    return None
+async def _get_live_fx_names(bridge, track_index: int) -> List[str]:
+    """FX names read from REAPER now, bypassing the snapshot"""
+    count_result = await bridge.call_lua("TrackFX_GetCount", [track_index])
+    count = count_result.get("ret") if count_result.get("ok") else 0
+    if not isinstance(count, (int, float)) or count <= 0:
+        return []
+    results = await bridge.call_batch(
+        [("TrackFX_GetFXName", [track_index, i, "", 256]) for i in range(int(count))]
+    )
+    return [result.get("ret", "") if result.get("ok") else "" for result in results]
 
 
-async def _fuzzy_match_param(bridge, track_index: int, fx_index: int, setting: str):
-    """Find the best-matching parameter index for a setting name. Returns param index or None."""
-    num_result = await bridge.call_lua("TrackFX_GetNumParams", [track_index, fx_index])
-    if not num_result.get("ok"):
-        return None
-    param_count = num_result.get("ret", 0)
-
-    setting_lower = setting.lower()
-    best_index = None
-    best_score = 0.0
+async def _find_fx_on_track(bridge, track_index: int, effect_name: str):
+    """Find an FX on a track by friendly name. Returns 0-based FX index or None."""
+    from .resolvers import _get_track_info
 
-    for i in range(param_count):
-        name_result = await bridge.call_lua("TrackFX_GetParamName", [track_index, fx_index, i, "", 256])
-        if not name_result.get("ok"):
-            continue
-        param_name = name_result.get("ret", "")
-        param_lower = param_name.lower()
+    canonical = EFFECT_MAP.get(effect_name.lower(), effect_name)
 
-        if setting_lower == param_lower:
-            return i
+    # FX names come with the cached track info, no per-FX round trips
+    track_info = await _get_track_info(bridge, track_index)
+    fx_names = (track_info.fx_names or []) if track_info is not None else []
+    fx_index = _match_fx(fx_names, canonical)
+    if fx_index is None:
+        # The cached list may predate an FX added since: ask REAPER itself
+        fx_index = _match_fx(await _get_live_fx_names(bridge, track_index), canonical)
+    return fx_index
 
-        if setting_lower in param_lower or param_lower in setting_lower:
-            score = 0.85
-        else:
-            score = SequenceMatcher(None, setting_lower, param_lower).ratio()
 
-        if score > best_score:
-            best_score = score
-            best_index = i
+async def _fuzzy_match_param(bridge, track_index: int, fx_index: int, setting: str):
+    """Find the best-matching parameter index for a setting name. Returns param index or None."""
+    params = await fx_param_cache.get(bridge, track_index, fx_index)
+    if params is None:
+        return None
 
-    if best_score >= 0.4:
-        return best_index
-    return None
+    match = params.best(setting, min_score=0.4)
+    return match[1] if match else None
 
 
 def register_dsl_tools(mcp):
     """Register DSL/Macro tools for natural language control"""
     
+    def dsl_tool():
+        """mcp.tool() that traces each call of the tool as one span"""
+        def decorator(func):
+            return mcp.tool()(tracer.traced(func))
+        return decorator
+    
     # Track Management Tools
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_track_create(
         name: Optional[str] = None,
         role: Optional[str] = None,
@@ -150,7 +152,7 @@ def register_dsl_tools(mcp):
         
         return response
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_track_volume(
         track: Union[str, int, Dict[str, Any]],
         volume: Union[float, str, Dict[str, Any]]
@@ -192,7 +194,7 @@ def register_dsl_tools(mcp):
         
         return response
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_track_pan(
         track: Union[str, int, Dict[str, Any]],
         pan: Union[float, str, Dict[str, Any]]
@@ -221,7 +223,7 @@ def register_dsl_tools(mcp):
             
         return result.to_string()
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_track_mute(
         track: Union[str, int, Dict[str, Any]],
         mute: bool = True
@@ -247,7 +249,7 @@ def register_dsl_tools(mcp):
             
         return result.to_string()
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_track_solo(
         track: Union[str, int, Dict[str, Any]],
         solo: bool = True
@@ -275,7 +277,7 @@ def register_dsl_tools(mcp):
     
     # Time and Loop Tools
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_time_select(
         time: Union[str, float, Dict[str, Any]]
     ) -> str:
@@ -304,7 +306,7 @@ def register_dsl_tools(mcp):
             
         return result.to_string()
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_loop_create(
         track: Union[str, int, Dict[str, Any]],
         time: Union[str, float, Dict[str, Any]],
@@ -334,7 +336,7 @@ def register_dsl_tools(mcp):
     
     # Item and MIDI Tools
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_midi_insert(
         track: Union[str, int, Dict[str, Any]],
         time: Union[str, float, Dict[str, Any]],
@@ -364,7 +366,7 @@ def register_dsl_tools(mcp):
             
         return result.to_string()
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_quantize(
         items: Union[str, Dict[str, Any]] = "selected",
         strength: float = 1.0,
@@ -398,7 +400,7 @@ def register_dsl_tools(mcp):
     
     # Transport Tools
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_play() -> str:
         """
         Start playing your music. Use for any variation of play, start, go, listen, or hear.
@@ -417,7 +419,7 @@ def register_dsl_tools(mcp):
             
         return result.to_string()
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_stop() -> str:
         """
         Stop the music. Use for stop, pause, halt, wait, or cease playback.
@@ -436,7 +438,7 @@ def register_dsl_tools(mcp):
             
         return result.to_string()
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_set_tempo(bpm: float) -> str:
         """
         Change the speed of your song. Use for faster, slower, BPM changes, or energy adjustments.
@@ -460,7 +462,7 @@ def register_dsl_tools(mcp):
     
     # Context and Query Tools
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_list_tracks() -> str:
         """
         Show what's in your project. Use when users ask what tracks exist or want an overview.
@@ -479,7 +481,7 @@ def register_dsl_tools(mcp):
             
         return result.to_string()
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_get_tempo_info() -> str:
         """
         Check current speed and time signature. Use when users ask about tempo, BPM, or timing.
@@ -498,7 +500,7 @@ def register_dsl_tools(mcp):
             
         return result.to_string()
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_reset_context() -> str:
         """
         Start fresh with a clean slate. Use when users want to begin again or clear previous references.
@@ -510,7 +512,7 @@ def register_dsl_tools(mcp):
     
     # Track Management Extensions
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_track_rename(
         track: Union[str, int, Dict[str, Any]],
         name: str
@@ -543,7 +545,7 @@ def register_dsl_tools(mcp):
         except Exception as e:
             return f"Failed to rename track: {str(e)}"
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_track_delete(
         track: Union[str, int, Dict[str, Any]]
     ) -> str:
@@ -576,7 +578,7 @@ def register_dsl_tools(mcp):
         except Exception as e:
             return f"Failed to delete track: {str(e)}"
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_track_delete_all() -> str:
         """
         Delete all tracks in the project. Use for 'delete all tracks', 'remove everything', 'clear the session', 'start over'.
@@ -617,7 +619,7 @@ def register_dsl_tools(mcp):
         except Exception as e:
             return f"Failed to delete all tracks: {str(e)}"
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_track_arm(
         track: Union[str, int, Dict[str, Any]],
         armed: bool = True
@@ -653,7 +655,7 @@ def register_dsl_tools(mcp):
     
     # Edit and Project Operations
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_undo() -> str:
         """
         Undo the last action. Use for 'undo', 'undo that', 'go back', 'revert'.
@@ -670,7 +672,7 @@ def register_dsl_tools(mcp):
         except Exception as e:
             return f"Failed to undo: {str(e)}"
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_save(
         name: Optional[str] = None
     ) -> str:
@@ -702,7 +704,7 @@ def register_dsl_tools(mcp):
     
     # Transport and Navigation
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_go_to(
         position: Union[str, float, Dict[str, Any]]
     ) -> str:
@@ -749,7 +751,7 @@ def register_dsl_tools(mcp):
         except Exception as e:
             return f"Failed to move position: {str(e)}"
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_record() -> str:
         """
         Start recording. Use for 'record', 'start recording', 'rec'.
@@ -768,7 +770,7 @@ def register_dsl_tools(mcp):
     
     # Markers
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_marker(
         action: str = "add",
         name: Optional[str] = None,
@@ -856,7 +858,7 @@ def register_dsl_tools(mcp):
     
     # Generative AI Tools (Premium)
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_generate(
         what: str,
         style: Optional[str] = None
@@ -879,7 +881,7 @@ def register_dsl_tools(mcp):
         # Premium feature stub
         return "🔒 Premium Feature: AI generation requires authentication. Please log in to use generative features at https://signalsandsorcery.com/auth"
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_enhance(
         target: Optional[str] = "selected"
     ) -> str:
@@ -899,7 +901,7 @@ def register_dsl_tools(mcp):
         # Premium feature stub
         return "🔒 Premium Feature: AI enhancement requires authentication. Please log in to use generative features at https://signalsandsorcery.com/auth"
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_continue(
         from_where: Optional[str] = "end"
     ) -> str:
@@ -921,7 +923,7 @@ def register_dsl_tools(mcp):
     
     # Editing Operations
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_split(
         position: Optional[str] = "cursor"
     ) -> str:
@@ -962,7 +964,7 @@ def register_dsl_tools(mcp):
         except Exception as e:
             return f"Failed to split items: {str(e)}"
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_fade(
         type: str,
         duration: Optional[float] = 0.1
@@ -1011,7 +1013,7 @@ def register_dsl_tools(mcp):
         except Exception as e:
             return f"Failed to add fade: {str(e)}"
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_normalize(
         target: Optional[str] = "selected"
     ) -> str:
@@ -1036,7 +1038,7 @@ def register_dsl_tools(mcp):
         except Exception as e:
             return f"Failed to normalize: {str(e)}"
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_reverse(
         target: Optional[str] = "selected"
     ) -> str:
@@ -1063,7 +1065,7 @@ def register_dsl_tools(mcp):
     
     # Project Operations
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_render(
         format: Optional[str] = "wav",
         what: Optional[str] = "project"
@@ -1093,7 +1095,7 @@ def register_dsl_tools(mcp):
     
     # Track Duplication
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_track_duplicate(
         track: Union[str, int, Dict[str, Any]]
     ) -> str:
@@ -1129,7 +1131,7 @@ def register_dsl_tools(mcp):
     
     # Selection Tools
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_select(
         what: Union[str, Dict[str, Any]]
     ) -> str:
@@ -1165,7 +1167,7 @@ def register_dsl_tools(mcp):
     
     # Track Organization
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_track_color(
         track: Union[str, int, Dict[str, Any]],
         color: str
@@ -1215,7 +1217,7 @@ def register_dsl_tools(mcp):
         except Exception as e:
             return f"Failed to color track: {str(e)}"
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_group_tracks(
         tracks: Optional[List[Union[str, int]]] = None,
         name: Optional[str] = None
@@ -1248,7 +1250,7 @@ def register_dsl_tools(mcp):
     
     # Regions and Markers Extended
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_region(
         action: str = "create",
         name: Optional[str] = None,
@@ -1303,7 +1305,7 @@ def register_dsl_tools(mcp):
     
     # Routing/Sends
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_send(
         from_track: Union[str, int, Dict[str, Any]],
         to_track: Union[str, int, Dict[str, Any]],
@@ -1342,7 +1344,7 @@ def register_dsl_tools(mcp):
     
     # FX/Effects Tools
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_add_effect(
         track: Union[str, int, Dict[str, Any]],
         effect: str,
@@ -1364,6 +1366,8 @@ def register_dsl_tools(mcp):
             
             # Add the effect
             result = await track_fx_add_by_name(track_index, fx_name)
+            # The cached FX names no longer match the track
+            invalidate_snapshot()
             
             dsl_context.update_track(resolved_track)
             
@@ -1375,7 +1379,7 @@ def register_dsl_tools(mcp):
         except Exception as e:
             return f"Failed to add effect: {str(e)}"
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_adjust_effect(
         track: Union[str, int, Dict[str, Any]],
         effect: str,
@@ -1450,7 +1454,7 @@ def register_dsl_tools(mcp):
         except Exception as e:
             return f"Failed to adjust effect: {str(e)}"
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_effect_bypass(
         track: Union[str, int, Dict[str, Any]],
         effect: str,
@@ -1486,7 +1490,7 @@ def register_dsl_tools(mcp):
     
     # Routing Tools
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_create_send(
         from_track: Union[str, int, Dict[str, Any]],
         to_track: Union[str, int, Dict[str, Any]],
@@ -1531,7 +1535,7 @@ def register_dsl_tools(mcp):
         except Exception as e:
             return f"Failed to create send: {str(e)}"
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_create_bus(
         name: str,
         source_tracks: Union[str, List[str]],
@@ -1591,7 +1595,7 @@ def register_dsl_tools(mcp):
     
     # Automation Tools
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_automate(
         track: Union[str, int, Dict[str, Any]],
         parameter: str,
@@ -1661,7 +1665,7 @@ def register_dsl_tools(mcp):
         except Exception as e:
             return f"Failed to create automation: {str(e)}"
     
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_automate_section(
         section: str,
         changes: Dict[str, Any]
@@ -1684,7 +1688,7 @@ def register_dsl_tools(mcp):
     
     # Item Copy/Paste Tools
 
-    @mcp.tool()
+    @dsl_tool()
     async def dsl_item_copy_paste(
         track: Union[str, int, Dict[str, Any]],
         src_start: float,
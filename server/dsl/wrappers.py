@@ -10,6 +10,7 @@ import logging
 from typing import Dict, List, Optional, Union, Any
 from dataclasses import dataclass
 
+from ..tempo_map import edit_tempo_map
 from .resolvers import (
     resolve_track, resolve_time, resolve_items,
     TrackRef, TimeRef, ItemRef,
@@ -573,7 +574,7 @@ async def transport_set_tempo(bridge, bpm: float) -> OperationResult:
         old_tempo = result.get("ret", 120.0) if result.get("ok") else 120.0
         
         # Set new tempo
-        result = await bridge.call_lua("SetTempo", [bpm])
+        result = await edit_tempo_map(bridge, "SetTempo", [bpm])
         if not result.get("ok"):
             raise Exception("Failed to set tempo")
         
@@ -0,0 +1,165 @@
+"""
+Response file waiting for the REAPER file bridge
+
+On Linux the bridge directory is watched with inotify, so a waiter wakes up
+as soon as REAPER closes the response file. Everywhere else (and whenever
+inotify is unavailable) we fall back to polling with an adaptive exponential
+back-off that starts in the sub-millisecond range.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Polling back-off: first probe after 0.25 ms, doubling up to 20 ms
+POLL_INITIAL_DELAY = 0.00025
+POLL_MAX_DELAY = 0.02
+
+# inotify constants (linux/inotify.h)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """
+    Watches one directory and resolves futures when files in it are written.
+
+    A watcher serves the one event loop it was started on; code running on
+    several loops keeps one watcher per loop.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._libc = None
+        self._fd = -1
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+
+    @staticmethod
+    def supported() -> bool:
+        """True if the platform offers inotify"""
+        return sys.platform.startswith("linux") and ctypes.util.find_library("c") is not None
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> bool:
+        """Open the inotify descriptor and attach it to `loop` (False if that fails)"""
+        if self._fd >= 0:
+            return self._loop is loop
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+            wd = libc.inotify_add_watch(fd, os.fsencode(str(self.directory)),
+                                        _IN_CLOSE_WRITE | _IN_MOVED_TO)
+            if wd < 0:
+                err = ctypes.get_errno()
+                os.close(fd)
+                raise OSError(err, "inotify_add_watch failed")
+            loop.add_reader(fd, self._on_readable)
+        except (OSError, AttributeError, NotImplementedError) as e:
+            logger.debug(f"inotify unavailable, using polling: {e}")
+            return False
+        self._libc = libc
+        self._fd = fd
+        self._loop = loop
+        return True
+
+    def close(self):
+        """Detach from the loop and release the descriptor"""
+        if self._fd < 0:
+            return
+        try:
+            self._loop.remove_reader(self._fd)
+        except Exception:
+            pass
+        os.close(self._fd)
+        self._fd = -1
+        self._loop = None
+        for futures in self._waiters.values():
+            for future in futures:
+                if not future.done():
+                    future.cancel()
+        self._waiters.clear()
+
+    def register(self, name: str) -> asyncio.Future:
+        """Create a future resolved when `name` is closed after writing"""
+        future = self._loop.create_future()
+        self._waiters.setdefault(name, []).append(future)
+        return future
+
+    def unregister(self, name: str, future: asyncio.Future):
+        """Forget a waiter (after completion or timeout)"""
+        futures = self._waiters.get(name)
+        if not futures:
+            return
+        if future in futures:
+            futures.remove(future)
+        if not futures:
+            del self._waiters[name]
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except OSError as e:
+            if e.errno != errno.EAGAIN:
+                logger.debug(f"inotify read failed: {e}")
+            return
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "replace")
+            offset += length
+            for future in self._waiters.pop(name, []):
+                if not future.done():
+                    future.set_result(True)
+
+
+async def _poll_for_file(path: Path, timeout: float) -> bool:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    delay = POLL_INITIAL_DELAY
+    while True:
+        if path.exists():
+            return True
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, POLL_MAX_DELAY)
+
+
+async def wait_for_file(path: Path, timeout: float,
+                        watcher: Optional[InotifyWatcher] = None) -> bool:
+    """
+    Wait until `path` exists (and, with inotify, has been closed after writing).
+
+    Returns False if the timeout expires first.
+    """
+    if watcher is None or watcher._loop is not asyncio.get_running_loop():
+        return await _poll_for_file(path, timeout)
+
+    future = watcher.register(path.name)
+    try:
+        # The file may have been written before we registered
+        if path.exists():
+            return True
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return path.exists()
+    finally:
+        watcher.unregister(path.name, future)
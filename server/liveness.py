@@ -0,0 +1,162 @@
+"""
+Bridge liveness monitor
+
+Tracks whether REAPER answers the bridge from the calls tools already make:
+every answered call (even one returning a Lua error) proves the bridge is
+alive, every timeout or transport error counts against it. A probe call is
+only made when the bridge has been idle for `idle_interval` and nothing is
+in flight, so health checking never competes with real traffic, and the
+probe runs in the background with a short timeout instead of stalling a
+request for the bridge's full 5 s.
+
+States are "unknown" (no call yet), "up" and "down" (`failure_threshold`
+consecutive failures). Listeners are told about every transition, which is
+how the relay client publishes health events.
+"""
+
+import asyncio
+import contextvars
+import inspect
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN, UP, DOWN = "unknown", "up", "down"
+
+# Outcomes of the calls made by the current probe(); other tasks' calls
+# finishing meanwhile are not recorded here
+_probe_outcome: contextvars.ContextVar[Optional[List[bool]]] = contextvars.ContextVar(
+    "liveness_probe_outcome", default=None)
+
+
+class BridgeLiveness:
+    """Bridge health derived from normal traffic, with idle-only probes"""
+
+    def __init__(self, bridge=None, idle_interval: float = 30.0, probe_timeout: float = 1.0,
+                 failure_threshold: int = 2, probe_function: str = "GetAppVersion"):
+        self.bridge = bridge
+        self.idle_interval = idle_interval
+        self.probe_timeout = probe_timeout
+        self.failure_threshold = failure_threshold
+        self.probe_function = probe_function
+        self.state = UNKNOWN
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.last_ok: Optional[float] = None  # time.time() of the last answered call
+        self.last_activity = time.monotonic()
+        self.last_error: Optional[str] = None
+        self.last_answered = False
+        self.last_change: Optional[float] = None
+        self.probes = 0
+        self._listeners: List[Callable[[Dict[str, Any]], Any]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    # -- fed by the bridge ----------------------------------------------------
+
+    def call_started(self):
+        self.in_flight += 1
+
+    def call_finished(self, answered: bool, error: Optional[str] = None):
+        """Record one bridge call; `answered` is False for timeouts and transport errors"""
+        self.in_flight = max(0, self.in_flight - 1)
+        self.last_activity = time.monotonic()
+        self.last_answered = answered
+        outcome = _probe_outcome.get()
+        if outcome is not None:
+            outcome.append(answered)
+        if answered:
+            self.last_ok = time.time()
+            self.consecutive_failures = 0
+            self._set_state(UP)
+        else:
+            self.consecutive_failures += 1
+            self.last_error = error
+            if self.consecutive_failures >= self.failure_threshold:
+                self._set_state(DOWN)
+
+    # -- transitions ----------------------------------------------------------
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], Any]):
+        """Call `callback(event)` (plain or async) on every state change"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[Dict[str, Any]], Any]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _set_state(self, state: str):
+        if state == self.state:
+            return
+        previous, self.state = self.state, state
+        self.last_change = time.time()
+        logger.log(logging.WARNING if state == DOWN else logging.INFO,
+                   f"REAPER bridge is {state} (was {previous})")
+        event = dict(self.snapshot(), previous=previous)
+        for callback in list(self._listeners):
+            try:
+                result = callback(event)
+                if inspect.isawaitable(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                logger.error(f"Liveness listener failed: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "last_ok_age_s": round(time.time() - self.last_ok, 3) if self.last_ok else None,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "in_flight": self.in_flight,
+            "probes": self.probes,
+        }
+
+    # -- probing --------------------------------------------------------------
+
+    def idle_for(self) -> float:
+        return time.monotonic() - self.last_activity
+
+    def needs_probe(self) -> bool:
+        return self.in_flight == 0 and (self.state == UNKNOWN
+                                        or self.idle_for() >= self.idle_interval)
+
+    async def probe(self) -> bool:
+        """One cheap call with a short timeout; True if REAPER answered"""
+        self.probes += 1
+        outcome: List[bool] = []
+        token = _probe_outcome.set(outcome)
+        try:
+            await self.bridge.call_lua(self.probe_function, [], timeout=self.probe_timeout)
+        finally:
+            _probe_outcome.reset(token)
+        # Nothing recorded means the call was never sent (circuit breaker open)
+        return bool(outcome) and outcome[-1]
+
+    async def ensure_alive(self) -> bool:
+        """Answer from recent traffic, probing only if the bridge has been idle"""
+        if self.state == UP and self.idle_for() < self.idle_interval:
+            return True
+        return await self.probe()
+
+    async def run(self, check_interval: Optional[float] = None):
+        """Probe whenever the bridge has been idle for idle_interval"""
+        interval = check_interval or min(self.idle_interval, 5.0)
+        while True:
+            try:
+                if self.needs_probe():
+                    await self.probe()
+            except Exception as e:
+                logger.error(f"Liveness probe error: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, check_interval: Optional[float] = None) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run(check_interval))
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
@@ -0,0 +1,40 @@
+"""
+FastMCP server that records per-tool call metrics
+
+Every tools/call request passes through call_tool, so one override counts
+calls, errors and latency for all ~600 tools without touching their
+registration code. Given a ToolManifest (and an mcp it supports), tools
+are also registered from cached schemas (see tool_manifest.py).
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+from mcp.server.fastmcp import FastMCP
+
+from .metrics import ServerMetrics, server_metrics
+from .tool_manifest import MANIFEST_SUPPORTED, ManifestToolManager, ToolManifest
+
+
+class MeteredFastMCP(FastMCP):
+    """FastMCP that reports each tool call to a ServerMetrics"""
+
+    def __init__(self, *args, metrics: Optional[ServerMetrics] = None,
+                 manifest: Optional[ToolManifest] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics or server_metrics
+        self.manifest = manifest
+        if manifest is not None and MANIFEST_SUPPORTED:
+            self._tool_manager = ManifestToolManager(
+                manifest, warn_on_duplicate_tools=self.settings.warn_on_duplicate_tools)
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]):
+        start = time.perf_counter()
+        error = False
+        try:
+            return await super().call_tool(name, arguments)
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.metrics.record_tool(name, time.perf_counter() - start, error)
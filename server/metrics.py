@@ -0,0 +1,293 @@
+"""
+Lightweight latency metrics for the REAPER bridge
+
+Histograms use fixed log-spaced buckets so recording a sample is O(log n)
+and memory stays constant no matter how long the server runs.
+
+ServerMetrics keeps one histogram plus counters per MCP tool and per bridge
+function; get_server_metrics exposes them, and REAPER_MCP_METRICS_FILE
+mirrors them to a Prometheus text file.
+"""
+
+import bisect
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _log_buckets(lowest: float, highest: float, per_decade: int) -> List[float]:
+    """Build upper bucket bounds spaced evenly on a log scale"""
+    bounds = []
+    decades = math.log10(highest / lowest)
+    steps = int(math.ceil(decades * per_decade))
+    for i in range(steps + 1):
+        bounds.append(lowest * 10 ** (i / per_decade))
+    return bounds
+
+
+# 50 µs .. 120 s, 12 buckets per decade (~21% resolution)
+DEFAULT_BUCKETS = _log_buckets(0.00005, 120.0, 12)
+
+
+class LatencyHistogram:
+    """Thread-safe log-bucketed latency histogram (values in seconds)"""
+
+    def __init__(self, buckets: Optional[List[float]] = None):
+        self.bounds = list(buckets or DEFAULT_BUCKETS)
+        self.counts = [0] * (len(self.bounds) + 1)  # last slot is overflow
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """Record one sample"""
+        slot = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[slot] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds < self.min:
+                self.min = seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Estimate the q-th percentile (0-100) from the bucket counts"""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = max(1, int(math.ceil(self.count * q / 100.0)))
+            seen = 0
+            for slot, n in enumerate(self.counts):
+                seen += n
+                if seen >= rank:
+                    if slot >= len(self.bounds):
+                        return self.max
+                    # Report the bucket's upper bound, clamped to what was observed
+                    return min(max(self.bounds[slot], self.min), self.max)
+            return self.max
+
+    def reset(self):
+        """Drop all samples"""
+        with self._lock:
+            self.counts = [0] * (len(self.bounds) + 1)
+            self.count = 0
+            self.total = 0.0
+            self.min = math.inf
+            self.max = 0.0
+
+    def snapshot(self) -> Dict[str, float]:
+        """Summary in milliseconds"""
+        count = self.count
+        return {
+            "count": count,
+            "mean_ms": (self.total / count * 1000) if count else 0.0,
+            "min_ms": (self.min * 1000) if count else 0.0,
+            "p50_ms": self.percentile(50) * 1000,
+            "p90_ms": self.percentile(90) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+# Bytes moved by the transport for the bridge request running in this context
+_request_io: contextvars.ContextVar[Optional[List[int]]] = \
+    contextvars.ContextVar("reaper_request_io", default=None)
+
+
+@contextmanager
+def measure_io() -> Iterator[List[int]]:
+    """Collect [bytes sent, bytes received] reported by count_io() in the block"""
+    io = [0, 0]
+    token = _request_io.set(io)
+    try:
+        yield io
+    finally:
+        _request_io.reset(token)
+
+
+def count_io(sent: int = 0, received: int = 0):
+    """Called by transports for the request being measured, if any"""
+    io = _request_io.get()
+    if io is not None:
+        io[0] += sent
+        io[1] += received
+
+
+class CallStats:
+    """Counters and latency histogram for one tool or bridge function"""
+
+    __slots__ = ("count", "errors", "timeouts", "batched", "bytes_sent", "bytes_received",
+                 "latency")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.batched = 0  # calls made inside a Batch request (no own timing)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = LatencyHistogram()
+
+    def snapshot(self) -> Dict[str, float]:
+        latency = self.latency.snapshot()
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "batched": self.batched,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "mean_ms": latency["mean_ms"],
+            "p50_ms": latency["p50_ms"],
+            "p95_ms": latency["p95_ms"],
+            "p99_ms": latency["p99_ms"],
+            "max_ms": latency["max_ms"],
+        }
+
+
+class ServerMetrics:
+    """
+    Per-MCP-tool and per-bridge-function call statistics.
+
+    Tools are recorded by the MCP server's call_tool, bridge functions by
+    ReaperFileBridge.call_lua. Optionally mirrored to a Prometheus text
+    file, rewritten at most every `export_interval` seconds.
+    """
+
+    def __init__(self, export_path: Optional[Path] = None, export_interval: float = 10.0):
+        self.tools: Dict[str, CallStats] = {}
+        self.functions: Dict[str, CallStats] = {}
+        self.started = time.time()
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self._next_export = 0.0
+        self._lock = threading.Lock()
+
+    def _stats(self, table: Dict[str, CallStats], name: str) -> CallStats:
+        stats = table.get(name)
+        if stats is None:
+            with self._lock:
+                stats = table.setdefault(name, CallStats())
+        return stats
+
+    def record_tool(self, name: str, seconds: float, error: bool = False):
+        stats = self._stats(self.tools, name)
+        stats.count += 1
+        stats.errors += error
+        stats.latency.record(seconds)
+        self.maybe_export()
+
+    def record_call(self, func_name: str, seconds: float, ok: bool = True,
+                    timeout: bool = False, sent: int = 0, received: int = 0):
+        stats = self._stats(self.functions, func_name)
+        stats.count += 1
+        stats.errors += not ok
+        stats.timeouts += timeout
+        stats.bytes_sent += sent
+        stats.bytes_received += received
+        if not timeout:
+            stats.latency.record(seconds)
+
+    def record_batched(self, func_names: Iterable[str]):
+        """Count the calls carried inside one Batch request"""
+        for name in func_names:
+            self._stats(self.functions, name).batched += 1
+
+    def reset(self):
+        with self._lock:
+            self.tools = {}
+            self.functions = {}
+            self.started = time.time()
+
+    def snapshot(self, top: Optional[int] = None, sort_by: str = "count") -> Dict[str, Any]:
+        """Statistics of the `top` busiest tools and functions, ordered by `sort_by`"""
+        def table(entries: Dict[str, CallStats]):
+            rows = [dict(stats.snapshot(), name=name) for name, stats in list(entries.items())]
+            rows.sort(key=lambda row: row.get(sort_by, 0), reverse=True)
+            return rows[:top] if top else rows
+
+        return {
+            "uptime_s": time.time() - self.started,
+            "tools": table(self.tools),
+            "functions": table(self.functions),
+        }
+
+    def prometheus_text(self) -> str:
+        """Counters and latency quantiles in the Prometheus text format"""
+        lines = []
+        for kind, entries in (("tool", self.tools), ("function", self.functions)):
+            prefix = f"reaper_mcp_{kind}"
+            lines.append(f"# TYPE {prefix}_calls_total counter")
+            lines.append(f"# TYPE {prefix}_errors_total counter")
+            lines.append(f"# TYPE {prefix}_latency_seconds summary")
+            for name, stats in sorted(list(entries.items())):
+                label = f'{kind}="{_escape_label(name)}"'
+                lines.append(f"{prefix}_calls_total{{{label}}} {stats.count}")
+                lines.append(f"{prefix}_errors_total{{{label}}} {stats.errors}")
+                if kind == "function":
+                    lines.append(f"{prefix}_timeouts_total{{{label}}} {stats.timeouts}")
+                    lines.append(f"{prefix}_batched_total{{{label}}} {stats.batched}")
+                    lines.append(f"{prefix}_bytes_sent_total{{{label}}} {stats.bytes_sent}")
+                    lines.append(f"{prefix}_bytes_received_total{{{label}}} {stats.bytes_received}")
+                for q in (50, 95, 99):
+                    value = stats.latency.percentile(q)
+                    lines.append(f'{prefix}_latency_seconds{{{label},quantile="{q / 100}"}} {value:.6f}')
+                lines.append(f"{prefix}_latency_seconds_sum{{{label}}} {stats.latency.total:.6f}")
+                lines.append(f"{prefix}_latency_seconds_count{{{label}}} {stats.latency.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Optional[Path] = None):
+        """Atomically replace the Prometheus text file"""
+        path = Path(path or self.export_path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def maybe_export(self):
+        """Rewrite the Prometheus file if it is enabled and due"""
+        if self.export_path is None:
+            return
+        now = time.monotonic()
+        if now < self._next_export:
+            return
+        self._next_export = now + self.export_interval
+        try:
+            self.write_prometheus()
+        except OSError as e:
+            logger.debug(f"Failed to write metrics file: {e}")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _export_path_from_env() -> Optional[Path]:
+    """REAPER_MCP_METRICS_FILE: a path, or 1/true for metrics.prom in the bridge directory"""
+    value = os.environ.get("REAPER_MCP_METRICS_FILE", "")
+    if value.lower() in ("", "0", "false", "no"):
+        return None
+    if value.lower() in ("1", "true", "yes"):
+        bridge_dir = os.environ.get(
+            'REAPER_MCP_BRIDGE_DIR',
+            os.path.expanduser('~/Library/Application Support/REAPER/Scripts/mcp_bridge_data'))
+        return Path(bridge_dir) / "metrics.prom"
+    return Path(value)
+
+
+# Shared by the bridge and the MCP server
+server_metrics = ServerMetrics(
+    export_path=_export_path_from_env(),
+    export_interval=float(os.environ.get("REAPER_MCP_METRICS_INTERVAL", "10")),
+)
@@ -0,0 +1,283 @@
+"""
+MIDI analysis over whole takes, cached by MIDI hash
+
+The analyses work on the columnar notes from midi_events.decode_midi():
+
+- key:          Krumhansl-Kessler key profiles correlated with the
+                duration-weighted pitch-class histogram (24 keys)
+- chords:       pitch classes sounding in each window (a quarter note by
+                default) matched against chord templates; repeated chords
+                are merged into one span
+- rhythm:       histogram of inter-onset intervals (16th ... whole)
+- distribution: note count per pitch and average velocity
+- pattern:      pitch range, melodic contour and average velocity
+
+midi_analysis.get() first asks the bridge for the take's MIDI_GetHash
+(one small call). If a take with that hash was analysed before, the cached
+TakeAnalysis is returned and nothing else crosses the bridge; otherwise
+the take's events are streamed, decoded once and every analysis is
+computed on first use.
+"""
+
+import math
+from collections import Counter, OrderedDict
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Sequence
+
+from .midi_events import PPQ_PER_QUARTER, DecodedMidi, MidiNotes, read_midi_events
+
+NOTE_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+
+# Krumhansl & Kessler (1982) probe-tone ratings, tonic first
+MAJOR_PROFILE = [6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88]
+MINOR_PROFILE = [6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17]
+
+# Intervals above the root; triads are listed first and win ties
+CHORD_TEMPLATES = {
+    "major": (0, 4, 7),
+    "minor": (0, 3, 7),
+    "dim": (0, 3, 6),
+    "aug": (0, 4, 8),
+    "sus2": (0, 2, 7),
+    "sus4": (0, 5, 7),
+    "7": (0, 4, 7, 10),
+    "maj7": (0, 4, 7, 11),
+    "min7": (0, 3, 7, 10),
+}
+
+MIN_CHORD_SCORE = 0.6
+
+RHYTHM_BINS = (("16th", 0.3), ("8th", 0.6), ("quarter", 1.5), ("half", 3.0), ("whole", math.inf))
+
+
+class MidiAnalysisError(Exception):
+    """The take could not be read for analysis"""
+
+
+def note_name(pitch: int) -> str:
+    return f"{NOTE_NAMES[pitch % 12]}{pitch // 12 - 1}"
+
+
+def _pearson(x: Sequence[float], y: Sequence[float]) -> float:
+    n = len(x)
+    mean_x, mean_y = sum(x) / n, sum(y) / n
+    cov = sum((a - mean_x) * (b - mean_y) for a, b in zip(x, y))
+    var_x = sum((a - mean_x) ** 2 for a in x)
+    var_y = sum((b - mean_y) ** 2 for b in y)
+    if var_x == 0 or var_y == 0:
+        return 0.0
+    return cov / math.sqrt(var_x * var_y)
+
+
+def pitch_class_histogram(notes: MidiNotes, weighted: bool = True) -> List[float]:
+    """Time (in quarter notes) or note count per pitch class"""
+    histogram = [0.0] * 12
+    if weighted:
+        for start, end, pitch in zip(notes.start_ppq, notes.end_ppq, notes.pitch):
+            histogram[pitch % 12] += (end - start) / PPQ_PER_QUARTER
+    else:
+        for pitch in notes.pitch:
+            histogram[pitch % 12] += 1
+    return histogram
+
+
+def detect_key(notes: MidiNotes) -> Dict[str, Any]:
+    """Best of the 24 major/minor keys, with its correlation as confidence"""
+    histogram = pitch_class_histogram(notes)
+    scores = []
+    for mode, profile in (("major", MAJOR_PROFILE), ("minor", MINOR_PROFILE)):
+        for tonic in range(12):
+            rotated = [histogram[(tonic + i) % 12] for i in range(12)]
+            scores.append((_pearson(rotated, profile), tonic, mode))
+    scores.sort(reverse=True)
+    if not notes or scores[0][0] <= 0:
+        return {"key": "Unknown", "tonic": None, "mode": None, "confidence": 0.0,
+                "notes_analyzed": len(notes), "alternatives": []}
+    best, tonic, mode = scores[0]
+    return {
+        "key": f"{NOTE_NAMES[tonic]} {mode}",
+        "tonic": tonic,
+        "mode": mode,
+        "confidence": round(best * 100, 1),
+        "notes_analyzed": len(notes),
+        "alternatives": [f"{NOTE_NAMES[t]} {m}" for _, t, m in scores[1:3]],
+    }
+
+
+def _match_chord(vector: Sequence[float], bass: Optional[int]) -> Optional[Dict[str, Any]]:
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm == 0 or sum(1 for v in vector if v > 0) < 2:
+        return None
+    best = None
+    for quality, intervals in CHORD_TEMPLATES.items():
+        template_norm = math.sqrt(len(intervals))
+        for root in range(12):
+            score = sum(vector[(root + i) % 12] for i in intervals) / (norm * template_norm)
+            if bass == root:
+                score += 0.05  # prefer root position
+            if best is None or score > best[0] + 1e-9:
+                best = (score, root, quality)
+    score, root, quality = best
+    if score < MIN_CHORD_SCORE:
+        return None
+    return {"root": root, "quality": quality, "name": f"{NOTE_NAMES[root]} {quality}",
+            "score": round(min(score, 1.0), 3)}
+
+
+def detect_chords(notes: MidiNotes, window_ppq: int = PPQ_PER_QUARTER) -> List[Dict[str, Any]]:
+    """Chord per window, consecutive equal chords merged into one span"""
+    if not notes:
+        return []
+    last = max(notes.end_ppq)
+    windows = int(math.ceil(last / window_ppq)) or 1
+    vectors = [[0.0] * 12 for _ in range(windows)]
+    basses: List[Optional[int]] = [None] * windows
+    for start, end, pitch in zip(notes.start_ppq, notes.end_ppq, notes.pitch):
+        for w in range(start // window_ppq, min(windows, (end - 1) // window_ppq + 1)):
+            w_start = w * window_ppq
+            overlap = min(end, w_start + window_ppq) - max(start, w_start)
+            if overlap > 0:
+                vectors[w][pitch % 12] += overlap
+                if basses[w] is None or pitch < basses[w]:
+                    basses[w] = pitch
+    chords: List[Dict[str, Any]] = []
+    for w, vector in enumerate(vectors):
+        chord = _match_chord(vector, basses[w] % 12 if basses[w] is not None else None)
+        if chord is None:
+            continue
+        start = w * window_ppq
+        if chords and chords[-1]["name"] == chord["name"] and chords[-1]["end_ppq"] == start:
+            chords[-1]["end_ppq"] = start + window_ppq
+            continue
+        chords.append(dict(chord, start_ppq=start, end_ppq=start + window_ppq))
+    return chords
+
+
+def rhythm_histogram(notes: MidiNotes) -> Dict[str, Any]:
+    """Inter-onset intervals between distinct onsets, binned by note value"""
+    onsets = sorted(set(notes.start_ppq))
+    intervals = [b - a for a, b in zip(onsets, onsets[1:])]
+    bins = {name: 0 for name, _ in RHYTHM_BINS}
+    for interval in intervals:
+        for name, limit in RHYTHM_BINS:
+            if interval < PPQ_PER_QUARTER * limit:
+                bins[name] += 1
+                break
+    dominant = max(bins.items(), key=lambda x: x[1])[0] if intervals else None
+    common = Counter(intervals).most_common(1)
+    return {
+        "notes": len(notes),
+        "onsets": len(onsets),
+        "bins": bins,
+        "dominant": dominant,
+        "most_common_ioi_ppq": common[0][0] if common else None,
+    }
+
+
+def note_distribution(notes: MidiNotes) -> Dict[str, Any]:
+    """Notes per pitch (most used first) and average velocity"""
+    counts = Counter(notes.pitch)
+    velocities = notes.velocity
+    return {
+        "notes_total": len(notes),
+        "distribution": [{"pitch": pitch, "count": count}
+                         for pitch, count in sorted(counts.items(), key=lambda x: (-x[1], x[0]))],
+        "avg_velocity": sum(velocities) / len(velocities) if velocities else 0.0,
+    }
+
+
+def pattern_summary(notes: MidiNotes) -> Dict[str, Any]:
+    """Pitch range, contour (ascending, descending or mixed) and velocity"""
+    if not notes:
+        return {"notes_analyzed": 0}
+    pitches = notes.pitch
+    steps = [b - a for a, b in zip(pitches, pitches[1:])]
+    if steps and all(step > 0 for step in steps):
+        contour = "ascending"
+    elif steps and all(step < 0 for step in steps):
+        contour = "descending"
+    else:
+        contour = "mixed"
+    return {
+        "notes_analyzed": len(notes),
+        "lowest": min(pitches),
+        "highest": max(pitches),
+        "pitch_range": max(pitches) - min(pitches),
+        "pattern_type": contour,
+        "avg_velocity": sum(notes.velocity) / len(notes),
+    }
+
+
+class TakeAnalysis:
+    """Every analysis of one decoded take, each computed on first use"""
+
+    def __init__(self, midi: DecodedMidi):
+        self.midi = midi
+
+    @property
+    def notes(self) -> MidiNotes:
+        return self.midi.notes
+
+    @cached_property
+    def key(self) -> Dict[str, Any]:
+        return detect_key(self.notes)
+
+    @cached_property
+    def chords(self) -> List[Dict[str, Any]]:
+        return detect_chords(self.notes)
+
+    @cached_property
+    def rhythm(self) -> Dict[str, Any]:
+        return rhythm_histogram(self.notes)
+
+    @cached_property
+    def distribution(self) -> Dict[str, Any]:
+        return note_distribution(self.notes)
+
+    @cached_property
+    def pattern(self) -> Dict[str, Any]:
+        return pattern_summary(self.notes)
+
+
+class MidiAnalysisCache:
+    """TakeAnalysis per MIDI hash, least recently used dropped first"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, TakeAnalysis]" = OrderedDict()
+
+    async def get(self, bridge, item_index: int, take_index: int) -> TakeAnalysis:
+        probe = await bridge.call_lua("GetMIDIHashFromItemTake", [item_index, take_index])
+        take_hash = probe.get("ret") if probe.get("ok") else None
+        if not probe.get("ok") and "Unknown function" not in str(probe.get("error", "")):
+            raise MidiAnalysisError(probe.get("error", "Unknown error"))
+
+        if take_hash is not None and take_hash in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(take_hash)
+            return self._entries[take_hash]
+
+        self.misses += 1
+        try:
+            midi = await read_midi_events(bridge, item_index, take_index)
+        except Exception as e:
+            raise MidiAnalysisError(str(e)) from e
+        analysis = TakeAnalysis(midi)
+        # The hash read with the events wins: the take may have changed since the probe
+        take_hash = midi.hash or take_hash
+        if take_hash is not None:
+            self._entries[take_hash] = analysis
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return analysis
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+midi_analysis = MidiAnalysisCache()
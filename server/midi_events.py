@@ -0,0 +1,314 @@
+"""
+Packed MIDI event buffers (REAPER's MIDI_GetAllEvts / MIDI_SetAllEvts format)
+
+A buffer is a sequence of events, each packed little-endian as
+
+    int32 offset   ticks (PPQ) since the previous event
+    uint8 flags    1 selected, 2 muted, CC shape in bits 4-7
+    int32 length   of the MIDI message
+    bytes message  e.g. 0x90 pitch velocity
+
+MidiEventBuffer collects notes and CCs at absolute PPQ positions and packs
+them in one pass, so a generator writes thousands of events with a single
+SetAllMIDIEventsFromItemTake bridge call (one MIDI_Sort, one undo point)
+instead of one MIDI_InsertNote round trip per note:
+
+    events = MidiEventBuffer()
+    for step in range(64):
+        events.add_note(step * 240, step * 240 + 120, pitch=42, channel=9)
+    await write_midi_events(bridge, item_index, take_index, events)
+
+decode_midi() goes the other way: a MIDI_GetAllEvts buffer becomes
+columnar notes (start/end PPQ, pitch, velocity, channel, selected, muted
+as parallel array.array columns, note-ons paired with their note-offs)
+and CCs, so analysis runs over whole takes without a bridge call per
+note. read_midi_events() streams the buffer from a take and decodes it.
+The columns support the buffer protocol, so numpy.frombuffer() can wrap
+them without copying.
+"""
+
+import base64
+import struct
+from array import array
+from collections import deque
+from itertools import accumulate
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .result_stream import stream_result
+
+PPQ_PER_QUARTER = 960  # REAPER's default ticks per quarter note
+
+FLAG_SELECTED = 0x01
+FLAG_MUTED = 0x02
+
+NOTE_OFF, NOTE_ON, CONTROL_CHANGE = 0x80, 0x90, 0xB0
+
+_EVENT_HEADER = struct.Struct("<iBi")
+
+# Order of events at the same position: note-offs first, so a note ending
+# where the next one starts never swallows it; note-ons last
+_ORDER_NOTE_OFF, _ORDER_OTHER, _ORDER_NOTE_ON = 0, 1, 2
+
+
+def _flags(selected: bool, muted: bool, shape: int = 0) -> int:
+    return (FLAG_SELECTED if selected else 0) | (FLAG_MUTED if muted else 0) | (shape & 0x0F) << 4
+
+
+def _data_byte(name: str, value: int) -> int:
+    value = int(value)
+    if not 0 <= value <= 127:
+        raise ValueError(f"{name} must be 0-127, got {value}")
+    return value
+
+
+def _channel(channel: int) -> int:
+    channel = int(channel)
+    if not 0 <= channel <= 15:
+        raise ValueError(f"channel must be 0-15, got {channel}")
+    return channel
+
+
+class MidiEventBuffer:
+    """Notes, CCs and raw events at absolute PPQ positions, packed on demand"""
+
+    def __init__(self):
+        # (ppq, order, sequence, flags, message)
+        self._events: List[Tuple[int, int, int, int, bytes]] = []
+        self.notes = 0
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def _add(self, ppq: float, order: int, flags: int, message: bytes):
+        self._events.append((int(round(ppq)), order, len(self._events), flags, message))
+
+    def add_note(self, start_ppq: float, end_ppq: float, pitch: int, velocity: int = 100,
+                 channel: int = 0, selected: bool = False, muted: bool = False):
+        """A note-on/note-off pair"""
+        pitch = _data_byte("pitch", pitch)
+        channel = _channel(channel)
+        velocity = max(1, _data_byte("velocity", velocity))  # velocity 0 would be a note-off
+        if end_ppq <= start_ppq:
+            raise ValueError(f"Note must end after it starts ({start_ppq} -> {end_ppq})")
+        flags = _flags(selected, muted)
+        self._add(start_ppq, _ORDER_NOTE_ON, flags, bytes((NOTE_ON | channel, pitch, velocity)))
+        self._add(end_ppq, _ORDER_NOTE_OFF, flags, bytes((NOTE_OFF | channel, pitch, 0)))
+        self.notes += 1
+
+    def add_cc(self, ppq: float, controller: int, value: int, channel: int = 0,
+               selected: bool = False, muted: bool = False, shape: int = 0):
+        """A control change; `shape` is REAPER's CC curve shape (0 square ... 5 bezier)"""
+        message = bytes((CONTROL_CHANGE | _channel(channel), _data_byte("controller", controller),
+                         _data_byte("value", value)))
+        self._add(ppq, _ORDER_OTHER, _flags(selected, muted, shape), message)
+
+    def add_event(self, ppq: float, message: bytes, selected: bool = False, muted: bool = False):
+        """Any other MIDI message (pitch bend, program change, sysex, text)"""
+        self._add(ppq, _ORDER_OTHER, _flags(selected, muted), bytes(message))
+
+    @property
+    def last_ppq(self) -> int:
+        """Position of the last event once sorted"""
+        return max((event[0] for event in self._events), default=0)
+
+    def encode(self) -> bytes:
+        """The packed buffer, events sorted by position"""
+        parts = []
+        previous = 0
+        pack = _EVENT_HEADER.pack
+        for ppq, _order, _seq, flags, message in sorted(self._events):
+            parts.append(pack(ppq - previous, flags, len(message)))
+            parts.append(message)
+            previous = ppq
+        return b"".join(parts)
+
+
+def beats_to_ppq(beats: float, ppq_per_quarter: int = PPQ_PER_QUARTER) -> int:
+    return int(round(beats * ppq_per_quarter))
+
+
+def bridge_args(events: MidiEventBuffer, mode: str = "append",
+                undo: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """Buffer and options arguments for SetAllMIDIEventsFromItemTake"""
+    if mode not in ("append", "replace"):
+        raise ValueError(f"mode must be 'append' or 'replace', got {mode!r}")
+    options: Dict[str, Any] = {"mode": mode, "last_ppq": events.last_ppq}
+    if undo:
+        options["undo"] = undo
+    return base64.b64encode(events.encode()).decode("ascii"), options
+
+
+async def write_midi_events(bridge, item_index: int, take_index: int, events: MidiEventBuffer,
+                            mode: str = "append", undo: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Write every event of `events` into a take in one bridge call.
+
+    mode "append" keeps the take's existing events, "replace" drops them
+    (the take keeps its length). Returns the bridge response.
+    """
+    packed, options = bridge_args(events, mode, undo)
+    return await bridge.call_lua("SetAllMIDIEventsFromItemTake",
+                                 [item_index, take_index, packed, options])
+
+
+# -- decoding -----------------------------------------------------------------
+
+_SHORT_EVENT = struct.Struct("<iBiBBB")  # header plus a 3-byte message
+
+
+class MidiNotes:
+    """Notes as parallel columns, in note-on order (sorted by start)"""
+
+    COLUMNS = ("start_ppq", "end_ppq", "pitch", "velocity", "channel", "selected", "muted")
+
+    def __init__(self):
+        self.start_ppq = array("q")
+        self.end_ppq = array("q")
+        self.pitch = array("B")
+        self.velocity = array("B")
+        self.channel = array("B")
+        self.selected = array("B")
+        self.muted = array("B")
+
+    def __len__(self) -> int:
+        return len(self.start_ppq)
+
+    def __getitem__(self, index: int) -> Dict[str, int]:
+        return {column: getattr(self, column)[index] for column in self.COLUMNS}
+
+    def __iter__(self) -> Iterator[Dict[str, int]]:
+        return (self[i] for i in range(len(self)))
+
+
+class MidiCCs:
+    """Control changes as parallel columns, in position order"""
+
+    COLUMNS = ("ppq", "controller", "value", "channel", "selected", "muted", "shape")
+
+    def __init__(self):
+        self.ppq = array("q")
+        self.controller = array("B")
+        self.value = array("B")
+        self.channel = array("B")
+        self.selected = array("B")
+        self.muted = array("B")
+        self.shape = array("B")
+
+    def __len__(self) -> int:
+        return len(self.ppq)
+
+    def __getitem__(self, index: int) -> Dict[str, int]:
+        return {column: getattr(self, column)[index] for column in self.COLUMNS}
+
+
+class DecodedMidi:
+    """Everything in one MIDI_GetAllEvts buffer"""
+
+    def __init__(self):
+        self.notes = MidiNotes()
+        self.ccs = MidiCCs()
+        self.other: List[Tuple[int, int, bytes]] = []  # (ppq, flags, message)
+        self.events = 0
+        self.end_ppq = 0  # position of the last event (end of the source)
+        self.hash: Optional[str] = None  # MIDI_GetHash (notes only) when read from a take
+
+
+def _iter_events(buffer: bytes) -> Iterator[Tuple[int, int, bytes]]:
+    """(offset, flags, message) per event, for buffers of any shape"""
+    unpack = _EVENT_HEADER.unpack_from
+    view = memoryview(buffer)
+    pos, size = 0, len(buffer)
+    while pos + 9 <= size:
+        offset, flags, length = unpack(buffer, pos)
+        pos += 9
+        yield offset, flags, bytes(view[pos:pos + length])
+        pos += length
+
+
+def _event_rows(buffer: bytes) -> List[Tuple[Any, ...]]:
+    """
+    (offset, flags, length, status, data1, data2) per event.
+
+    When every message is 3 bytes (notes and CCs only, the usual case) the
+    whole buffer is unpacked in one C-level pass. Otherwise longer
+    messages come back as (offset, flags, length, None, message, None).
+    """
+    if len(buffer) % _SHORT_EVENT.size == 0:
+        rows = list(_SHORT_EVENT.iter_unpack(buffer))
+        if all(row[2] == 3 for row in rows):
+            return rows
+    rows = []
+    for offset, flags, message in _iter_events(buffer):
+        if len(message) == 3:
+            rows.append((offset, flags, 3, message[0], message[1], message[2]))
+        else:
+            rows.append((offset, flags, len(message), None, message, None))
+    return rows
+
+
+def decode_midi(buffer: bytes) -> DecodedMidi:
+    """
+    Decode a packed MIDI_GetAllEvts buffer.
+
+    Note-offs (and note-ons with velocity 0) close the oldest open note of
+    the same channel and pitch, like REAPER. Notes still open at the end
+    last until the final event.
+    """
+    decoded = DecodedMidi()
+    notes, ccs = decoded.notes, decoded.ccs
+    open_notes: Dict[int, Deque[int]] = {}
+    unterminated = []
+
+    rows = _event_rows(buffer)
+    positions = accumulate(row[0] for row in rows)
+    start_ppq, end_ppq = notes.start_ppq, notes.end_ppq
+    ppq = 0
+    for ppq, (_, flags, _length, status, data1, data2) in zip(positions, rows):
+        if status is None:
+            if data1:
+                decoded.other.append((ppq, flags, data1))
+            continue
+        kind, channel = status & 0xF0, status & 0x0F
+        if kind == NOTE_ON and data2 > 0:
+            open_notes.setdefault(channel << 7 | data1, deque()).append(len(start_ppq))
+            start_ppq.append(ppq)
+            end_ppq.append(-1)
+            notes.pitch.append(data1)
+            notes.velocity.append(data2)
+            notes.channel.append(channel)
+            notes.selected.append(flags & FLAG_SELECTED)
+            notes.muted.append(flags & FLAG_MUTED and 1)
+        elif kind == NOTE_OFF or kind == NOTE_ON:
+            pending = open_notes.get(channel << 7 | data1)
+            if pending:
+                end_ppq[pending.popleft()] = ppq
+        elif kind == CONTROL_CHANGE:
+            ccs.ppq.append(ppq)
+            ccs.controller.append(data1)
+            ccs.value.append(data2)
+            ccs.channel.append(channel)
+            ccs.selected.append(flags & FLAG_SELECTED)
+            ccs.muted.append(flags & FLAG_MUTED and 1)
+            ccs.shape.append(flags >> 4)
+        else:
+            decoded.other.append((ppq, flags, bytes((status, data1, data2))))
+
+    decoded.events = len(rows)
+    decoded.end_ppq = ppq
+    for pending in open_notes.values():
+        unterminated.extend(pending)
+    for index in unterminated:
+        end_ppq[index] = max(decoded.end_ppq, start_ppq[index])
+    return decoded
+
+
+async def read_midi_events(bridge, item_index: int, take_index: int) -> DecodedMidi:
+    """Stream a take's MIDI_GetAllEvts buffer from the bridge and decode it"""
+    stream = stream_result(bridge, "GetAllMIDIEventsFromItemTake", [item_index, take_index])
+    data = await stream.collect()
+    if isinstance(data, str):
+        # A buffer that happens to be valid UTF-8 is sent as text
+        data = data.encode("utf-8")
+    decoded = decode_midi(data)
+    decoded.hash = stream.meta.get("hash")
+    return decoded
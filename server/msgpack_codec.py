@@ -0,0 +1,181 @@
+"""
+MessagePack encoding for the socket transport
+
+A compact binary alternative to JSON frames (see transport.py). Uses the
+`msgpack` package when it is installed and a small pure-Python codec
+otherwise; both produce the subset of MessagePack that mcp_bridge.lua
+understands (nil, bool, int, float64, str, bin, array, map).
+"""
+
+import struct
+from typing import Any, List, Tuple
+
+try:
+    import msgpack as _msgpack
+except ImportError:  # optional dependency
+    _msgpack = None
+
+
+def _pack(value: Any, out: List[bytes]):
+    if value is None:
+        out.append(b"\xc0")
+    elif value is True:
+        out.append(b"\xc3")
+    elif value is False:
+        out.append(b"\xc2")
+    elif isinstance(value, int):
+        if 0 <= value < 0x80:
+            out.append(struct.pack("B", value))
+        elif -32 <= value < 0:
+            out.append(struct.pack("b", value))
+        elif 0 <= value < 0x100:
+            out.append(struct.pack(">BB", 0xcc, value))
+        elif 0 <= value < 0x10000:
+            out.append(struct.pack(">BH", 0xcd, value))
+        elif 0 <= value < 0x100000000:
+            out.append(struct.pack(">BI", 0xce, value))
+        elif value >= 0:
+            out.append(struct.pack(">BQ", 0xcf, value))
+        elif value >= -0x80:
+            out.append(struct.pack(">Bb", 0xd0, value))
+        elif value >= -0x8000:
+            out.append(struct.pack(">Bh", 0xd1, value))
+        elif value >= -0x80000000:
+            out.append(struct.pack(">Bi", 0xd2, value))
+        else:
+            out.append(struct.pack(">Bq", 0xd3, value))
+    elif isinstance(value, float):
+        out.append(struct.pack(">Bd", 0xcb, value))
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        n = len(data)
+        if n < 32:
+            out.append(struct.pack("B", 0xa0 | n))
+        elif n < 0x100:
+            out.append(struct.pack(">BB", 0xd9, n))
+        elif n < 0x10000:
+            out.append(struct.pack(">BH", 0xda, n))
+        else:
+            out.append(struct.pack(">BI", 0xdb, n))
+        out.append(data)
+    elif isinstance(value, (bytes, bytearray)):
+        n = len(value)
+        if n < 0x100:
+            out.append(struct.pack(">BB", 0xc4, n))
+        elif n < 0x10000:
+            out.append(struct.pack(">BH", 0xc5, n))
+        else:
+            out.append(struct.pack(">BI", 0xc6, n))
+        out.append(bytes(value))
+    elif isinstance(value, (list, tuple)):
+        n = len(value)
+        if n < 16:
+            out.append(struct.pack("B", 0x90 | n))
+        elif n < 0x10000:
+            out.append(struct.pack(">BH", 0xdc, n))
+        else:
+            out.append(struct.pack(">BI", 0xdd, n))
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        n = len(value)
+        if n < 16:
+            out.append(struct.pack("B", 0x80 | n))
+        elif n < 0x10000:
+            out.append(struct.pack(">BH", 0xde, n))
+        else:
+            out.append(struct.pack(">BI", 0xdf, n))
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    else:
+        raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+
+# tag -> (struct format, size) for fixed-size values
+_FIXED = {
+    0xca: (">f", 4), 0xcb: (">d", 8),
+    0xcc: (">B", 1), 0xcd: (">H", 2), 0xce: (">I", 4), 0xcf: (">Q", 8),
+    0xd0: (">b", 1), 0xd1: (">h", 2), 0xd2: (">i", 4), 0xd3: (">q", 8),
+}
+# tag -> (length format, length size, is_text)
+_SIZED = {
+    0xc4: (">B", 1, False), 0xc5: (">H", 2, False), 0xc6: (">I", 4, False),
+    0xd9: (">B", 1, True), 0xda: (">H", 2, True), 0xdb: (">I", 4, True),
+}
+
+
+def _unpack(data: bytes, pos: int) -> Tuple[Any, int]:
+    tag = data[pos]
+    pos += 1
+    if tag < 0x80:
+        return tag, pos
+    if tag >= 0xe0:
+        return tag - 0x100, pos
+    if tag < 0x90:
+        return _unpack_map(data, pos, tag & 0x0f)
+    if tag < 0xa0:
+        return _unpack_array(data, pos, tag & 0x0f)
+    if tag < 0xc0:
+        n = tag & 0x1f
+        return data[pos:pos + n].decode("utf-8"), pos + n
+    if tag == 0xc0:
+        return None, pos
+    if tag == 0xc2:
+        return False, pos
+    if tag == 0xc3:
+        return True, pos
+    if tag in _FIXED:
+        fmt, size = _FIXED[tag]
+        return struct.unpack_from(fmt, data, pos)[0], pos + size
+    if tag in _SIZED:
+        fmt, size, is_text = _SIZED[tag]
+        n = struct.unpack_from(fmt, data, pos)[0]
+        pos += size
+        chunk = data[pos:pos + n]
+        return (chunk.decode("utf-8") if is_text else bytes(chunk)), pos + n
+    if tag in (0xdc, 0xdd):
+        fmt, size = (">H", 2) if tag == 0xdc else (">I", 4)
+        return _unpack_array(data, pos + size, struct.unpack_from(fmt, data, pos)[0])
+    if tag in (0xde, 0xdf):
+        fmt, size = (">H", 2) if tag == 0xde else (">I", 4)
+        return _unpack_map(data, pos + size, struct.unpack_from(fmt, data, pos)[0])
+    raise ValueError(f"Unsupported MessagePack type 0x{tag:02x}")
+
+
+def _unpack_array(data: bytes, pos: int, n: int) -> Tuple[list, int]:
+    items = []
+    for _ in range(n):
+        item, pos = _unpack(data, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(data: bytes, pos: int, n: int) -> Tuple[dict, int]:
+    result = {}
+    for _ in range(n):
+        key, pos = _unpack(data, pos)
+        result[key], pos = _unpack(data, pos)
+    return result, pos
+
+
+def packb(value: Any) -> bytes:
+    """Encode a value as MessagePack"""
+    if _msgpack is not None:
+        return _msgpack.packb(value, use_bin_type=True)
+    out: List[bytes] = []
+    _pack(value, out)
+    return b"".join(out)
+
+
+def unpackb(data: bytes) -> Any:
+    """Decode one MessagePack value"""
+    if _msgpack is not None:
+        return _msgpack.unpackb(data, raw=False, strict_map_key=False)
+    try:
+        value, pos = _unpack(data, 0)
+    except (IndexError, struct.error) as e:
+        raise ValueError(f"Truncated MessagePack data: {e}") from e
+    if pos != len(data):
+        raise ValueError("Trailing data after MessagePack value")
+    return value
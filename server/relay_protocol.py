@@ -0,0 +1,178 @@
+"""
+Framing for messages on the relay WebSocket
+
+The original protocol sends every message as its own uncompressed JSON
+text frame. During authentication the client now offers protocol features
+and the relay picks the ones it supports; a relay that does not answer
+with a "protocol" object keeps getting exactly the original frames.
+
+- batch:       several messages in one frame, {"type": "batch", "messages": [...]}
+- compression: payloads of at least `compress_threshold` bytes are
+               compressed with zstd (if the `zstandard` package is
+               installed) or deflate and sent as binary frames
+- binary:      every message goes out as a binary frame, MessagePack
+               encoded when the relay accepts it
+
+Binary frames start with one flag byte: the high nibble is the framing
+version, bits 0-1 the compression (0 none, 1 deflate, 2 zstd) and bit 2
+set for MessagePack instead of UTF-8 JSON. Text frames are always plain
+JSON, so the relay can tell the two apart by frame type alone.
+
+Configured from the environment:
+
+    MCP_RELAY_PROTOCOL=legacy              offer nothing, original frames only
+    MCP_RELAY_COMPRESSION=zstd,deflate     compression offered, in preference order
+    MCP_RELAY_COMPRESS_THRESHOLD=1024      minimum payload size to compress
+"""
+
+import json
+import os
+import zlib
+from typing import Any, Dict, List, Optional, Union
+
+from . import msgpack_codec
+
+try:
+    import zstandard as _zstd
+except ImportError:  # optional dependency
+    _zstd = None
+
+FRAMING_VERSION = 1
+
+COMPRESSION_IDS = {None: 0, "deflate": 1, "zstd": 2}
+COMPRESSION_NAMES = {v: k for k, v in COMPRESSION_IDS.items()}
+FLAG_MSGPACK = 0x04
+
+Frame = Union[str, bytes]
+
+
+class RelayProtocolError(Exception):
+    """A frame that cannot be decoded"""
+
+
+def available_compression() -> List[str]:
+    return ["zstd", "deflate"] if _zstd is not None else ["deflate"]
+
+
+def _compress(data: bytes, method: str) -> bytes:
+    if method == "zstd":
+        return _zstd.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data, 6)
+
+
+def _decompress(data: bytes, method: str) -> bytes:
+    if method == "zstd":
+        if _zstd is None:
+            raise RelayProtocolError("zstd frame received but zstandard is not installed")
+        return _zstd.ZstdDecompressor().decompressobj().decompress(data)
+    return zlib.decompress(data)
+
+
+class RelayProtocol:
+    """Encodes outgoing messages into frames and decodes incoming frames"""
+
+    def __init__(self, batch: bool = False, compression: Optional[str] = None,
+                 binary: bool = False, msgpack: bool = False,
+                 compress_threshold: int = 1024, max_batch: int = 64):
+        if compression not in COMPRESSION_IDS:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.batch = batch
+        self.compression = compression
+        self.binary = binary
+        self.msgpack = msgpack
+        self.compress_threshold = compress_threshold
+        self.max_batch = max(1, max_batch)
+
+    @staticmethod
+    def offer() -> Optional[Dict[str, Any]]:
+        """Features the client supports, sent with the auth message"""
+        if os.environ.get("MCP_RELAY_PROTOCOL", "").lower() == "legacy":
+            return None
+        wanted = os.environ.get("MCP_RELAY_COMPRESSION", "zstd,deflate")
+        compression = [c.strip() for c in wanted.split(",")
+                       if c.strip() in available_compression()]
+        return {
+            "version": FRAMING_VERSION,
+            "batch": True,
+            "compression": compression,
+            "binary": True,
+            "codecs": ["json", "msgpack"],
+        }
+
+    @classmethod
+    def negotiate(cls, accepted: Optional[Dict[str, Any]]) -> "RelayProtocol":
+        """Protocol for the features the relay accepted (legacy when it sent none)"""
+        offer = cls.offer()
+        if not accepted or offer is None:
+            return cls()
+        compression = accepted.get("compression")
+        if compression not in offer["compression"]:
+            compression = None
+        return cls(
+            batch=bool(accepted.get("batch")),
+            compression=compression,
+            binary=bool(accepted.get("binary")),
+            msgpack=accepted.get("codec") == "msgpack",
+            compress_threshold=int(os.environ.get("MCP_RELAY_COMPRESS_THRESHOLD", "1024")),
+            max_batch=int(accepted.get("max_batch", 64)),
+        )
+
+    @property
+    def legacy(self) -> bool:
+        return not (self.batch or self.compression or self.binary)
+
+    # -- encoding -------------------------------------------------------------
+
+    def encode(self, messages: List[Dict[str, Any]]) -> List[Frame]:
+        """Frames carrying `messages`, batched when enabled"""
+        if not self.batch or len(messages) == 1:
+            return [self.encode_payload(message) for message in messages]
+        frames = []
+        for start in range(0, len(messages), self.max_batch):
+            chunk = messages[start:start + self.max_batch]
+            payload = chunk[0] if len(chunk) == 1 else {"type": "batch", "messages": chunk}
+            frames.append(self.encode_payload(payload))
+        return frames
+
+    def encode_payload(self, payload: Dict[str, Any]) -> Frame:
+        if self.binary and self.msgpack:
+            data, flags = msgpack_codec.packb(payload), FLAG_MSGPACK
+        else:
+            text = json.dumps(payload)
+            if not self.binary and (self.compression is None
+                                    or len(text) < self.compress_threshold):
+                return text
+            data, flags = text.encode("utf-8"), 0
+        compression = None
+        if self.compression and len(data) >= self.compress_threshold:
+            compression = self.compression
+            data = _compress(data, compression)
+        flags |= FRAMING_VERSION << 4 | COMPRESSION_IDS[compression]
+        return bytes([flags]) + data
+
+    # -- decoding -------------------------------------------------------------
+
+    @staticmethod
+    def decode(frame: Frame) -> List[Dict[str, Any]]:
+        """Messages carried by one frame (a batch frame yields several)"""
+        if isinstance(frame, str):
+            payload = json.loads(frame)
+        else:
+            if not frame:
+                raise RelayProtocolError("Empty binary frame")
+            flags = frame[0]
+            if flags >> 4 != FRAMING_VERSION:
+                raise RelayProtocolError(f"Unsupported framing version {flags >> 4}")
+            if flags & 0x03 not in COMPRESSION_NAMES:
+                raise RelayProtocolError(f"Unknown compression id {flags & 0x03}")
+            compression = COMPRESSION_NAMES[flags & 0x03]
+            data = frame[1:]
+            if compression:
+                data = _decompress(data, compression)
+            if flags & FLAG_MSGPACK:
+                payload = msgpack_codec.unpackb(data)
+            else:
+                payload = json.loads(data.decode("utf-8"))
+        if isinstance(payload, dict) and payload.get("type") == "batch":
+            return list(payload.get("messages") or [])
+        return [payload]
@@ -0,0 +1,196 @@
+"""
+Scheduler for commands arriving from the MCP relay
+
+The relay can deliver bursts of commands faster than REAPER's defer loop
+answers them. Starting a task per command lets hundreds of bridge calls
+race and time out together, so relay commands go through CommandScheduler:
+
+- At most `max_in_flight` commands execute at once.
+- Mutating commands run one at a time per session, in arrival order, so a
+  client's "create track" always lands before its "rename track".
+  Sessions take turns, so one busy session cannot starve the others.
+- Cheap read-only and health commands use a priority lane: they skip the
+  session queues, are started before waiting mutating commands, and may use
+  `priority_slots` extra slots so they stay responsive under load. A read
+  whose session still has a mutating command queued or running waits in the
+  session queue instead, so a client always reads its own writes.
+- Once `max_queue` mutating commands are waiting, new ones are rejected at
+  once and the relay gets an explicit overload response instead of a late
+  timeout. Up to `max_priority_queue` priority commands wait outside that
+  limit, so health checks still get through an overloaded queue; beyond it
+  they queue like mutating commands.
+
+Configured from the environment:
+
+    MCP_RELAY_MAX_IN_FLIGHT=4   concurrent commands (4)
+    MCP_RELAY_MAX_QUEUE=64      waiting commands before rejecting (64)
+    MCP_RELAY_MAX_PRIORITY_QUEUE=16  priority commands waiting outside that limit (16)
+"""
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Tool names that only read state; anything else is treated as mutating
+READ_ONLY_PREFIXES = ("get_", "list_", "count_", "is_", "has_", "dsl_list_", "dsl_get_",
+                      "Get", "Count", "Enum")
+HEALTH_METHODS = {"ping", "health", "get_server_metrics", "list_capabilities"}
+
+DEFAULT_SESSION = "default"
+
+
+def is_priority_command(method: Optional[str]) -> bool:
+    """Whether a command may use the read-only/health priority lane"""
+    if not method:
+        return False
+    return method in HEALTH_METHODS or method.startswith(READ_ONLY_PREFIXES)
+
+
+class SchedulerOverloaded(Exception):
+    """Raised by submit() when the queue is full"""
+
+    def __init__(self, queued: int, retry_after: float):
+        super().__init__(f"Server overloaded: {queued} commands waiting, "
+                         f"retry in {retry_after:g}s")
+        self.queued = queued
+        self.retry_after = retry_after
+
+
+class _Job:
+    __slots__ = ("command", "session", "priority", "fast")
+
+    def __init__(self, command: Dict[str, Any], session: str, priority: bool):
+        self.command = command
+        self.session = session
+        self.priority = priority
+        self.fast = False  # runs in the priority lane rather than its session queue
+
+
+class CommandScheduler:
+    """Bounded, per-session ordered execution of relay commands"""
+
+    def __init__(self, execute: Callable[[Dict[str, Any]], Awaitable[Any]],
+                 max_in_flight: int = 4, max_queue: int = 64, priority_slots: int = 1,
+                 max_priority_queue: int = 16, retry_after: float = 1.0):
+        self.execute = execute
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max_queue
+        self.max_priority_queue = max_priority_queue
+        self.priority_slots = priority_slots
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.queued = 0
+        self.queued_priority = 0
+        self.completed = 0
+        self.rejected = 0
+        self.peak_queued = 0
+        self._priority: Deque[_Job] = deque()
+        self._sessions: "OrderedDict[str, Deque[_Job]]" = OrderedDict()
+        self._ready: Deque[str] = deque()  # sessions with work and nothing running
+        self._busy: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    @classmethod
+    def from_env(cls, execute: Callable[[Dict[str, Any]], Awaitable[Any]]) -> "CommandScheduler":
+        return cls(
+            execute,
+            max_in_flight=int(os.environ.get("MCP_RELAY_MAX_IN_FLIGHT", "4")),
+            max_queue=int(os.environ.get("MCP_RELAY_MAX_QUEUE", "64")),
+            max_priority_queue=int(os.environ.get("MCP_RELAY_MAX_PRIORITY_QUEUE", "16")),
+        )
+
+    def submit(self, command: Dict[str, Any]):
+        """
+        Queue a relay command ({"method", "params", "request_id", "session_id"?}).
+
+        Raises SchedulerOverloaded instead of queueing when the queue is full.
+        """
+        session = str(command.get("session_id") or DEFAULT_SESSION)
+        job = _Job(command, session, is_priority_command(command.get("method"))
+                   and self.queued_priority < self.max_priority_queue)
+        if not job.priority and self.queued - self.queued_priority >= self.max_queue:
+            self.rejected += 1
+            raise SchedulerOverloaded(self.queued, self.retry_after)
+
+        self.queued += 1
+        self.peak_queued = max(self.peak_queued, self.queued)
+        if job.priority:
+            self.queued_priority += 1
+        # Reads may only overtake when the session has no earlier mutation pending
+        job.fast = job.priority and session not in self._sessions and session not in self._busy
+        if job.fast:
+            self._priority.append(job)
+        else:
+            pending = self._sessions.setdefault(session, deque())
+            pending.append(job)
+            if len(pending) == 1 and session not in self._busy:
+                self._ready.append(session)
+        self._dispatch()
+
+    def _next_job(self) -> Optional[_Job]:
+        if self._priority and self.in_flight < self.max_in_flight + self.priority_slots:
+            return self._priority.popleft()
+        if self._ready and self.in_flight < self.max_in_flight:
+            session = self._ready.popleft()
+            pending = self._sessions[session]
+            job = pending.popleft()
+            if not pending:
+                del self._sessions[session]
+            self._busy.add(session)
+            return job
+        return None
+
+    def _dispatch(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            self.queued -= 1
+            if job.priority:
+                self.queued_priority -= 1
+            self.in_flight += 1
+            task = asyncio.ensure_future(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: _Job):
+        try:
+            await self.execute(job.command)
+        except Exception as e:
+            logger.error(f"Relay command {job.command.get('method')} failed: {e}")
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            if not job.fast:
+                self._busy.discard(job.session)
+                if job.session in self._sessions:
+                    self._ready.append(job.session)
+            self._dispatch()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "max_priority_queue": self.max_priority_queue,
+        }
+
+    async def close(self):
+        """Cancel running commands and drop the waiting ones"""
+        self._priority.clear()
+        self._sessions.clear()
+        self._ready.clear()
+        self.queued = 0
+        self.queued_priority = 0
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,161 @@
+"""
+Streamed bridge results
+
+Large results (MIDI_GetAllEvts buffers, state chunks, GetAllItems) used to
+come back as one response: encoded in Lua, written as one file, read and
+parsed whole here. stream_result() instead asks the bridge to keep the
+result (StreamOpen in mcp_bridge.lua) and reads it page by page:
+
+    async with stream_result(bridge, "GetAllItems", field="items") as stream:
+        async for page in stream:      # lists of items
+            ...
+
+    chunk = await stream_result(bridge, "GetTrackStateChunk",
+                                [track, "", 0, False], item=1).collect()
+
+Pages of strings are str, or bytes when the bridge had to send them as
+base64 (binary data such as MIDI event buffers). stream.meta holds the rest
+of the call's response. A bridge script without streaming support gets
+the plain call, yielded as a single page.
+"""
+
+import base64
+from typing import Any, Dict, List, Optional, Union
+
+Page = Union[str, bytes, List[Any]]
+
+
+class StreamError(Exception):
+    """The streamed call failed or the stream broke off"""
+
+
+class ResultStream:
+    """Async iterator over the pages of one streamed bridge result"""
+
+    def __init__(self, bridge, func: str, args: Optional[List[Any]] = None,
+                 field: str = "ret", item: Optional[int] = None,
+                 page_size: Optional[int] = None):
+        self.bridge = bridge
+        self.func = func
+        self.args = list(args or [])
+        self.field = field
+        self.item = item
+        self.page_size = page_size
+        self.meta: Optional[Dict[str, Any]] = None  # the call's response minus the field
+        self.kind: Optional[str] = None  # "bytes" or "items"
+        self.total: Optional[int] = None
+        self.pages = 0
+        self._cursor = None
+        self._offset = 0
+        self._base64 = False
+        self._fallback: Optional[Page] = None
+        self._done = False
+
+    async def open(self) -> Dict[str, Any]:
+        """Run the call; returns its response without the streamed field"""
+        if self.meta is not None:
+            return self.meta
+        options = {"field": self.field}
+        if self.item is not None:
+            options["item"] = self.item
+        if self.page_size:
+            options["page_size"] = self.page_size
+        response = await self.bridge.call_lua("StreamOpen", [self.func, self.args, options])
+
+        if "Unknown function: StreamOpen" in str(response.get("error", "")):
+            # Older bridge script: one plain call, yielded as a single page
+            response = await self.bridge.call_lua(self.func, self.args)
+            self._check(response)
+            value = response.pop(self.field, None)
+            if self.item is not None and isinstance(value, list):
+                value = value[self.item] if self.item < len(value) else None
+            self._fallback = value if isinstance(value, (str, list)) else []
+            self.kind = "bytes" if isinstance(self._fallback, str) else "items"
+            self.total = len(self._fallback)
+            self.meta = response
+            return response
+
+        self._check(response)
+        self._cursor = response.pop("cursor")
+        self.kind = response.pop("kind")
+        self.total = response.pop("total")
+        self._base64 = response.pop("encoding", None) == "base64"
+        self.meta = response
+        return response
+
+    def _check(self, response: Dict[str, Any]):
+        if not response.get("ok"):
+            raise StreamError(f"{self.func} failed: {response.get('error', 'Unknown error')}")
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Page:
+        if self.meta is None:
+            await self.open()
+        if self._done:
+            raise StopAsyncIteration
+        if self._fallback is not None:
+            self._done = True
+            self.pages += 1
+            return self._fallback
+        if self._offset >= self.total:
+            self._done = True
+            raise StopAsyncIteration
+
+        response = await self.bridge.call_lua("StreamRead", [self._cursor, self._offset])
+        if not response.get("ok"):
+            self._done = True
+            raise StreamError(f"Reading {self.func} failed at {self._offset}/{self.total}: "
+                              f"{response.get('error', 'Unknown error')}")
+        data = response.get("data")
+        if self.kind == "items":
+            # An empty Lua table is encoded as {}
+            data = data if isinstance(data, list) else []
+        elif self._base64:
+            data = base64.b64decode(data or "")
+        else:
+            data = data or ""
+        self._offset = response.get("next", self._offset + len(data))
+        self._done = bool(response.get("done"))
+        self.pages += 1
+        return data
+
+    async def close(self):
+        """Release the result in the bridge if it was not read to the end"""
+        if self._cursor is not None and not self._done:
+            self._done = True
+            await self.bridge.call_lua("StreamClose", [self._cursor])
+
+    async def __aenter__(self) -> "ResultStream":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def collect(self) -> Page:
+        """Read every page and join them (str, bytes or list)"""
+        pages = [page async for page in self]
+        if self.kind == "items":
+            return [item for page in pages for item in page]
+        if self._base64:
+            return b"".join(pages)
+        return "".join(pages)
+
+
+def stream_result(bridge, func: str, args: Optional[List[Any]] = None, field: str = "ret",
+                  item: Optional[int] = None, page_size: Optional[int] = None) -> ResultStream:
+    """
+    Stream one field of a bridge call's response.
+
+    Args:
+        bridge: Anything with call_lua (ReaperFileBridge, a test bridge)
+        func: Bridge function to call
+        args: Its arguments
+        field: Response field to stream ("ret", "items", ...)
+        item: Index into a multi-value return, e.g. 1 for the chunk of
+            GetTrackStateChunk's [retval, chunk]
+        page_size: Bytes or items per page (bridge default when None)
+    """
+    return ResultStream(bridge, func, args, field=field, item=item, page_size=page_size)
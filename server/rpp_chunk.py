@@ -0,0 +1,419 @@
+"""
+REAPER state chunks (RPP text) as a lossless tree, with a structural diff
+and a minimal apply
+
+A track chunk is a few hundred to many thousand lines of RPP text: plain
+lines ("NAME Bass", "PT 1.5 0.7 0") and nested sub-chunks ("<ITEM" ...
+">"). parse_chunk() turns it into ChunkNode trees whose text() is the
+original text byte for byte, so a chunk can be edited in memory and
+written back without disturbing anything that was not touched:
+
+    old = await read_track_chunk(bridge, 0)
+    new = old.copy()
+    for env in new.walk():
+        if env.tag == "VOLENV2":
+            ...edit its PT lines...
+    await apply_track_chunk(bridge, 0, old, new)
+
+apply_track_chunk() compares the trees. When only items (IGUID) and
+envelopes (EGUID) changed, just those sub-chunks are sent to the bridge
+(SetTrackSubChunks: SetItemStateChunk / SetEnvelopeStateChunk on the
+matching objects). Anything else (track lines, FX, added or removed
+sub-chunks) falls back to one SetTrackStateChunk with the whole chunk.
+Setting a whole track chunk re-creates the track's FX, so the sub-chunk
+path is both smaller and much cheaper for REAPER.
+
+diff_chunks() reports what changed between two trees, for display and
+tests.
+"""
+
+import difflib
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from .result_stream import StreamError, stream_result
+
+# Line holding the GUID that identifies a sub-chunk, by tag
+GUID_KEYS = {"ITEM": "IGUID", "TRACK": "TRACKID"}
+GUID_FALLBACK_KEYS = ("EGUID", "FXID", "GUID")
+
+_TOKEN = re.compile(r'"[^"]*"|\'[^\']*\'|`[^`]*`|\S+')
+
+Child = Union[str, "ChunkNode"]
+
+
+class ChunkError(Exception):
+    """A chunk could not be parsed, read or written"""
+
+
+def split_tokens(line: str) -> List[str]:
+    """Tokens of an RPP line, quotes removed ("a b" 'c' `d` are single tokens)"""
+    tokens = []
+    for token in _TOKEN.findall(line):
+        if len(token) >= 2 and token[0] in "\"'`" and token[-1] == token[0]:
+            token = token[1:-1]
+        tokens.append(token)
+    return tokens
+
+
+def format_token(value: Any) -> str:
+    """One value as an RPP token, quoted when needed"""
+    if isinstance(value, float):
+        return f"{value:.14g}"
+    text = str(value)
+    if text and not any(c.isspace() for c in text) and text[0] not in "\"'`":
+        return text
+    for quote in "\"'`":
+        if quote not in text:
+            return f"{quote}{text}{quote}"
+    return '"' + text.replace('"', "'") + '"'
+
+
+class ChunkNode:
+    """One <TAG ... > block: its opening line, children (lines and blocks) and closing line"""
+
+    __slots__ = ("open_line", "close_line", "children", "tail")
+
+    def __init__(self, open_line: str, children: Optional[List[Child]] = None,
+                 close_line: str = ">"):
+        self.open_line = open_line
+        self.children: List[Child] = children if children is not None else []
+        self.close_line = close_line
+        self.tail = ""  # text after the closing line (root only)
+
+    def __repr__(self) -> str:
+        return f"<ChunkNode {self.open_line.strip()!r} ({len(self.children)} children)>"
+
+    @property
+    def tag(self) -> str:
+        parts = self.open_line.strip()[1:].split(None, 1)
+        return parts[0] if parts else ""
+
+    @property
+    def header(self) -> List[str]:
+        """Tokens after the tag on the opening line"""
+        return split_tokens(self.open_line.strip()[1:])[1:]
+
+    @property
+    def indent(self) -> str:
+        """Indentation used for this block's own lines"""
+        for child in self.children:
+            line = child if isinstance(child, str) else child.open_line
+            if line.strip():
+                return line[:len(line) - len(line.lstrip())]
+        return self.open_line[:len(self.open_line) - len(self.open_line.lstrip())] + "  "
+
+    # -- navigation -------------------------------------------------------------
+
+    def chunks(self, tag: Optional[str] = None) -> Iterator["ChunkNode"]:
+        """Direct sub-chunks, optionally only those with `tag`"""
+        for child in self.children:
+            if not isinstance(child, str) and (tag is None or child.tag == tag):
+                yield child
+
+    def find(self, tag: str) -> Optional["ChunkNode"]:
+        return next(self.chunks(tag), None)
+
+    def walk(self) -> Iterator["ChunkNode"]:
+        """This chunk and every sub-chunk, depth first"""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed([c for c in node.children if not isinstance(c, str)]))
+
+    def lines(self, key: Optional[str] = None) -> Iterator[Tuple[int, List[str]]]:
+        """(child index, tokens) of the direct plain lines, optionally only those starting with `key`"""
+        for index, child in enumerate(self.children):
+            if isinstance(child, str) and (key is None or child.lstrip().startswith(key)):
+                tokens = split_tokens(child)
+                if tokens and (key is None or tokens[0] == key):
+                    yield index, tokens
+
+    def values(self, key: str) -> Optional[List[str]]:
+        """Tokens after `key` on its first line, or None"""
+        for _, tokens in self.lines(key):
+            return tokens[1:]
+        return None
+
+    def set_values(self, key: str, *values: Any):
+        """Replace the first `key` line (appended when missing)"""
+        line = " ".join([key] + [format_token(v) for v in values])
+        for index, _ in self.lines(key):
+            self.children[index] = self.indent + line
+            return
+        self.children.append(self.indent + line)
+
+    def set_line(self, index: int, tokens: List[Any]):
+        """Rewrite the plain line at child `index`, keeping its indentation"""
+        old = self.children[index]
+        indent = old[:len(old) - len(old.lstrip())]
+        self.children[index] = indent + " ".join(format_token(t) for t in tokens)
+
+    @property
+    def guid(self) -> Optional[str]:
+        key = GUID_KEYS.get(self.tag)
+        for candidate in ((key,) if key else GUID_FALLBACK_KEYS):
+            values = self.values(candidate)
+            if values:
+                return values[0]
+        if self.tag == "TRACK" and self.header:
+            return self.header[0]
+        return None
+
+    @property
+    def identity(self) -> Tuple[str, Optional[str]]:
+        """What makes two sub-chunks 'the same' across edits: tag and GUID"""
+        return self.tag, self.guid
+
+    @property
+    def patch_kind(self) -> Optional[str]:
+        """ITEM or ENV when this sub-chunk can be set on its own, else None"""
+        if self.tag == "ITEM" and self.values("IGUID"):
+            return "ITEM"
+        if self.tag != "ITEM" and self.values("EGUID"):
+            return "ENV"
+        return None
+
+    # -- output -----------------------------------------------------------------
+
+    def _emit(self, out: List[str]):
+        out.append(self.open_line)
+        for child in self.children:
+            if isinstance(child, str):
+                out.append(child)
+            else:
+                child._emit(out)
+        out.append(self.close_line)
+
+    def text(self) -> str:
+        out: List[str] = []
+        self._emit(out)
+        return "\n".join(out) + self.tail
+
+    def copy(self) -> "ChunkNode":
+        node = ChunkNode(self.open_line,
+                         [c if isinstance(c, str) else c.copy() for c in self.children],
+                         self.close_line)
+        node.tail = self.tail
+        return node
+
+
+def parse_chunk(text: str) -> ChunkNode:
+    """Parse a state chunk; parse_chunk(text).text() == text"""
+    lines = text.split("\n")
+    stack: List[ChunkNode] = []
+    root: Optional[ChunkNode] = None
+    for number, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith("<"):
+            node = ChunkNode(line)
+            if stack:
+                stack[-1].children.append(node)
+            elif root is None and number == 0:
+                root = node
+            else:
+                raise ChunkError(f"Text outside the chunk at line {number + 1}")
+            stack.append(node)
+        elif stripped == ">" and stack:
+            node = stack.pop()
+            node.close_line = line
+            if not stack:
+                if number + 1 < len(lines):
+                    root.tail = "\n" + "\n".join(lines[number + 1:])
+                    if root.tail.strip():
+                        raise ChunkError(f"Text after the chunk at line {number + 2}")
+                return root
+        elif stack:
+            stack[-1].children.append(line)
+        else:
+            raise ChunkError(f"Chunk must start with '<', got {line[:40]!r}")
+    if root is None:
+        raise ChunkError("Empty chunk")
+    raise ChunkError(f"Unterminated <{stack[-1].tag}")
+
+
+# -- diff ---------------------------------------------------------------------
+
+@dataclass
+class ChunkChange:
+    """One difference between two chunk trees"""
+    path: Tuple[str, ...]  # tags (with GUID when known) from the root to the parent
+    kind: str  # "line", "added", "removed" or "header"
+    old: Optional[str] = None  # line text, or the removed sub-chunk's opening line
+    new: Optional[str] = None
+
+    def __str__(self) -> str:
+        where = "/".join(self.path)
+        if self.kind == "added":
+            return f"{where}: + {self.new.strip()}"
+        if self.kind == "removed":
+            return f"{where}: - {self.old.strip()}"
+        return f"{where}: {(self.old or '').strip()} -> {(self.new or '').strip()}"
+
+
+def _signature(child: Child) -> Tuple[Any, ...]:
+    return ("line", child) if isinstance(child, str) else ("chunk",) + child.identity
+
+
+def _label(node: ChunkNode) -> str:
+    guid = node.guid
+    return f"{node.tag} {guid}" if guid and node.tag != "TRACK" else node.tag
+
+
+def diff_chunks(old: ChunkNode, new: ChunkNode) -> List[ChunkChange]:
+    """Structural differences; sub-chunks are matched by tag and GUID"""
+    changes: List[ChunkChange] = []
+    _diff(old, new, (_label(new),), changes)
+    return changes
+
+
+def _diff(old: ChunkNode, new: ChunkNode, path: Tuple[str, ...], changes: List[ChunkChange]):
+    if old.open_line != new.open_line:
+        changes.append(ChunkChange(path, "header", old.open_line, new.open_line))
+    a, b = old.children, new.children
+    sig_a, sig_b = [_signature(c) for c in a], [_signature(c) for c in b]
+    if len(a) == len(b) and all(x[0] == y[0] and (x[0] == "line" or x == y)
+                                for x, y in zip(sig_a, sig_b)):
+        # Same shape (the usual in-place edit): compare position by position
+        opcodes = [("equal" if x == y else "replace", i, i + 1, i, i + 1)
+                   for i, (x, y) in enumerate(zip(sig_a, sig_b))]
+    else:
+        opcodes = difflib.SequenceMatcher(None, sig_a, sig_b, autojunk=False).get_opcodes()
+    for op, i1, i2, j1, j2 in opcodes:
+        if op == "equal":
+            for x, y in zip(a[i1:i2], b[j1:j2]):
+                if not isinstance(x, str) and x.text() != y.text():
+                    _diff(x, y, path + (_label(y),), changes)
+            continue
+        old_part, new_part = a[i1:i2], b[j1:j2]
+        old_lines = [c for c in old_part if isinstance(c, str)]
+        new_lines = [c for c in new_part if isinstance(c, str)]
+        for k in range(max(len(old_lines), len(new_lines))):
+            changes.append(ChunkChange(path, "line",
+                                       old_lines[k] if k < len(old_lines) else None,
+                                       new_lines[k] if k < len(new_lines) else None))
+        for c in old_part:
+            if not isinstance(c, str):
+                changes.append(ChunkChange(path, "removed", old=c.open_line))
+        for c in new_part:
+            if not isinstance(c, str):
+                changes.append(ChunkChange(path, "added", new=c.open_line))
+
+
+def plan_patches(old: ChunkNode, new: ChunkNode) -> Optional[List[ChunkNode]]:
+    """
+    Sub-chunks of `new` that can be set on their own to turn `old` into `new`.
+
+    Returns [] when nothing changed and None when the whole chunk has to be
+    set (a change outside items and envelopes, or sub-chunks added/removed).
+    """
+    patches: List[ChunkNode] = []
+    return patches if _plan(old, new, patches) else None
+
+
+def _plan(old: ChunkNode, new: ChunkNode, patches: List[ChunkNode]) -> bool:
+    if old.open_line != new.open_line or len(old.children) != len(new.children):
+        return False
+    for a, b in zip(old.children, new.children):
+        if isinstance(a, str) or isinstance(b, str):
+            if a != b:
+                return False
+            continue
+        if a.identity != b.identity:
+            return False
+        if a.text() == b.text():
+            continue
+        if b.patch_kind:
+            patches.append(b)
+        elif not _plan(a, b, patches):
+            return False
+    return True
+
+
+# -- bridge -------------------------------------------------------------------
+
+async def _track_handle(bridge, track_index: int):
+    result = await bridge.call_lua("GetTrack", [0, track_index])
+    if not result.get("ok") or not result.get("ret"):
+        raise ChunkError(f"Failed to find track at index {track_index}")
+    return result["ret"]
+
+
+async def read_track_chunk(bridge, track_index: int) -> ChunkNode:
+    """Stream a track's state chunk from the bridge and parse it"""
+    handle = await _track_handle(bridge, track_index)
+    try:
+        text = await stream_result(bridge, "GetTrackStateChunk",
+                                   [handle, "", False], item=1).collect()
+    except StreamError as e:
+        raise ChunkError(str(e)) from e
+    if not text:
+        raise ChunkError("Failed to get track state chunk")
+    return parse_chunk(text)
+
+
+async def apply_track_chunk(bridge, track_index: int, old: Optional[ChunkNode],
+                            new: Union[ChunkNode, str], undo: bool = True) -> Dict[str, Any]:
+    """
+    Make the track's chunk `new`, given that it is currently `old`.
+
+    With old=None (current chunk unknown) or `new` as unparsed text the
+    whole chunk is set. `undo` is REAPER's isundo flag, passed to
+    SetTrackStateChunk or to each item/envelope setter alike. Returns
+    {"mode": "unchanged" | "patched" | "whole", "sub_chunks": n}.
+    """
+    if old is None or isinstance(new, str):
+        patches = None
+    else:
+        patches = plan_patches(old, new)
+    if patches == []:
+        return {"mode": "unchanged", "sub_chunks": 0}
+    if patches:
+        payload = [{"kind": p.patch_kind, "guid": p.guid, "chunk": p.text()} for p in patches]
+        result = await bridge.call_lua("SetTrackSubChunks", [track_index, payload, undo])
+        if result.get("ok"):
+            return {"mode": "patched", "sub_chunks": len(patches)}
+        # An older bridge script, or an item/envelope the bridge could not
+        # match: set the whole chunk instead
+
+    handle = await _track_handle(bridge, track_index)
+    text = new if isinstance(new, str) else new.text()
+    result = await bridge.call_lua("SetTrackStateChunk", [handle, text, undo])
+    if not result.get("ok") or result.get("ret") is False:
+        raise ChunkError(f"Failed to set track state chunk: {result.get('error', 'REAPER refused it')}")
+    return {"mode": "whole", "sub_chunks": 0}
+
+
+async def edit_track_chunk(bridge, track_index: int, edit: Callable[[ChunkNode], Any],
+                           undo: bool = True) -> Dict[str, Any]:
+    """Read a track's chunk, run `edit` on a copy of its tree and write back only what changed"""
+    old = await read_track_chunk(bridge, track_index)
+    new = old.copy()
+    edit(new)
+    result = await apply_track_chunk(bridge, track_index, old, new, undo)
+    result["changes"] = diff_chunks(old, new)
+    return result
+
+
+async def set_track_chunk(bridge, track_index: int, text: str, undo: bool = True) -> Dict[str, Any]:
+    """
+    Set a track's chunk from text, sending only the changed items and
+    envelopes when the current chunk can be read and both parse.
+
+    Finding the changes costs one read of the current chunk, which is
+    skipped when `text` has no item or envelope that could be sent alone.
+    """
+    try:
+        new = parse_chunk(text)
+    except ChunkError:
+        # Let REAPER judge text we cannot parse
+        return await apply_track_chunk(bridge, track_index, None, text, undo)
+    if not any(node.patch_kind for node in new.walk() if node is not new):
+        return await apply_track_chunk(bridge, track_index, None, new, undo)
+    try:
+        old: Optional[ChunkNode] = await read_track_chunk(bridge, track_index)
+    except ChunkError:
+        old = None  # current state unreadable: no diff, set the whole chunk
+    return await apply_track_chunk(bridge, track_index, old, new, undo)
@@ -0,0 +1,253 @@
+"""
+In-process tempo map for time / quarter-note / measure conversions
+
+Every TimeMap_* conversion used to be a bridge round trip, so quantizing a
+few hundred positions meant a few hundred calls. TempoMap holds the
+project's tempo and time signature markers and converts locally:
+
+    tempo = await current_tempo_map(bridge)
+    qn = tempo.time_to_qn(12.5)
+    snapped = tempo.snap_times(item_positions, grid_qn=0.25)
+    measure, beat = tempo.time_to_beats(30.0)
+
+The markers are fetched with one GetTempoMap call and kept in the DSL
+project snapshot, so the map is rebuilt only when REAPER's project state
+change count moves. An unchanged project costs one change count probe per
+tool call, however many positions are converted.
+
+Model (matching REAPER):
+
+- Tempo is in quarter notes per minute. A marker with linear tempo ramps
+  linearly in time to the next marker's tempo; otherwise the tempo holds
+  until the next marker. Before the first marker the project tempo
+  applies.
+- A marker with a time signature (num > 0) that differs from the current
+  one starts a new measure. Beats are counted in the signature's
+  denominator (an eighth in 6/8).
+- Measures and beats are 0-based, as in the TimeMap API.
+"""
+
+import math
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .dsl.snapshot import get_snapshot, invalidate_snapshot, load_tempo_map
+
+DEFAULT_BPM = 120.0  # REAPER's default for a new project
+DEFAULT_TIME_SIG = (4, 4)
+
+
+class TempoMapError(Exception):
+    """The tempo map could not be read from REAPER"""
+
+
+class TempoMap:
+    """Tempo segments (by time) and time signature segments (by QN) of one project"""
+
+    def __init__(self, markers: List[Dict[str, Any]], default_bpm: float = DEFAULT_BPM,
+                 default_num: int = DEFAULT_TIME_SIG[0]):
+        self.markers = sorted(markers, key=lambda m: m["time"])
+
+        # Tempo segments: start time, start QN, tempo at start and ramp (BPM per second)
+        self._times: List[float] = []
+        self._qns: List[float] = []
+        self._bpms: List[float] = []
+        self._ramps: List[float] = []
+        if not self.markers or self.markers[0]["time"] > 0:
+            self._add_segment(0.0, float(default_bpm or DEFAULT_BPM))
+        for i, marker in enumerate(self.markers):
+            bpm = float(marker["bpm"])
+            next_marker = self.markers[i + 1] if i + 1 < len(self.markers) else None
+            ramp = 0.0
+            if marker.get("linear") and next_marker and next_marker["time"] > marker["time"]:
+                ramp = (float(next_marker["bpm"]) - bpm) / (next_marker["time"] - marker["time"])
+            self._add_segment(float(marker["time"]), bpm, ramp)
+
+        # Time signature segments: start QN, first measure, beats before it,
+        # numerator, denominator
+        num = int(default_num) if default_num and default_num > 0 else DEFAULT_TIME_SIG[0]
+        self._sig_qns: List[float] = [0.0]
+        self._sig_measures: List[int] = [0]
+        self._sig_beats: List[float] = [0.0]
+        self._sigs: List[Tuple[int, int]] = [(num, DEFAULT_TIME_SIG[1])]
+        for marker in self.markers:
+            sig = (int(marker.get("num") or 0), int(marker.get("denom") or 0))
+            if sig[0] <= 0 or sig[1] <= 0 or sig == self._sigs[-1]:
+                continue
+            qn = self.time_to_qn(marker["time"])
+            if qn <= self._sig_qns[-1] + 1e-9:
+                self._sigs[-1] = sig
+                continue
+            bars = (qn - self._sig_qns[-1]) / self._measure_qn(self._sigs[-1])
+            self._sig_beats.append(self._sig_beats[-1]
+                                   + (qn - self._sig_qns[-1]) * self._sigs[-1][1] / 4.0)
+            self._sig_qns.append(qn)
+            self._sig_measures.append(self._sig_measures[-1] + math.ceil(bars - 1e-9))
+            self._sigs.append(sig)
+
+    def _add_segment(self, time: float, bpm: float, ramp: float = 0.0):
+        if self._times:
+            if time <= self._times[-1]:
+                # Two markers at the same time: the later one wins
+                self._bpms[-1], self._ramps[-1] = bpm, ramp
+                return
+            qn = self._qns[-1] + self._qn_in_segment(len(self._times) - 1, time - self._times[-1])
+        else:
+            qn = 0.0
+        self._times.append(time)
+        self._qns.append(qn)
+        self._bpms.append(bpm)
+        self._ramps.append(ramp)
+
+    def _qn_in_segment(self, i: int, dt: float) -> float:
+        ramp = self._ramps[i] if dt > 0 else 0.0
+        return (self._bpms[i] * dt + 0.5 * ramp * dt * dt) / 60.0
+
+    @staticmethod
+    def _measure_qn(sig: Tuple[int, int]) -> float:
+        return sig[0] * 4.0 / sig[1]
+
+    # -- time <-> quarter notes ------------------------------------------------
+
+    def time_to_qn(self, time: float) -> float:
+        """Quarter notes from the project start at `time` seconds"""
+        i = max(bisect_right(self._times, time) - 1, 0)
+        return self._qns[i] + self._qn_in_segment(i, time - self._times[i])
+
+    def qn_to_time(self, qn: float) -> float:
+        """Seconds at `qn` quarter notes from the project start"""
+        i = max(bisect_right(self._qns, qn) - 1, 0)
+        dq = qn - self._qns[i]
+        bpm, ramp = self._bpms[i], self._ramps[i]
+        if ramp == 0.0 or dq <= 0:
+            return self._times[i] + dq * 60.0 / bpm
+        # Solve bpm*dt + ramp*dt^2/2 = 60*dq for dt
+        return self._times[i] + (math.sqrt(bpm * bpm + 120.0 * ramp * dq) - bpm) / ramp
+
+    def times_to_qn(self, times: Iterable[float]) -> List[float]:
+        """time_to_qn() for many positions"""
+        return [self.time_to_qn(t) for t in times]
+
+    def qns_to_time(self, qns: Iterable[float]) -> List[float]:
+        """qn_to_time() for many positions"""
+        return [self.qn_to_time(q) for q in qns]
+
+    # -- tempo and time signature ---------------------------------------------
+
+    def tempo_at(self, time: float) -> float:
+        """Tempo (quarter notes per minute) at `time`, inside ramps too"""
+        i = max(bisect_right(self._times, time) - 1, 0)
+        return self._bpms[i] + self._ramps[i] * max(time - self._times[i], 0.0)
+
+    def time_sig_at_qn(self, qn: float) -> Tuple[int, int]:
+        return self._sigs[max(bisect_right(self._sig_qns, qn) - 1, 0)]
+
+    def time_sig_at(self, time: float) -> Tuple[int, int]:
+        """(numerator, denominator) at `time`"""
+        return self.time_sig_at_qn(self.time_to_qn(time))
+
+    def divided_tempo_at(self, time: float) -> float:
+        """Tempo in beats of the time signature (twice the QN tempo in /8)"""
+        return self.tempo_at(time) * self.time_sig_at(time)[1] / 4.0
+
+    def next_change_time(self, time: float) -> Optional[float]:
+        """Time of the first tempo/time signature marker after `time`"""
+        i = bisect_right(self._times, time)
+        return self._times[i] if i < len(self._times) else None
+
+    # -- measures and beats ---------------------------------------------------
+
+    def qn_to_measure(self, qn: float) -> Dict[str, Any]:
+        """Measure holding `qn`: index, beat in it, its QN range and time signature"""
+        s = max(bisect_right(self._sig_qns, qn) - 1, 0)
+        sig = self._sigs[s]
+        length = self._measure_qn(sig)
+        bars = math.floor((qn - self._sig_qns[s]) / length + 1e-9)
+        start = self._sig_qns[s] + bars * length
+        return {
+            "measure": self._sig_measures[s] + bars,
+            "beat": max(qn - start, 0.0) * sig[1] / 4.0,
+            "start_qn": start,
+            "end_qn": start + length,
+            "num": sig[0],
+            "denom": sig[1],
+        }
+
+    def measure_to_qn(self, measure: int, beats: float = 0.0) -> float:
+        """QN of `beats` (time signature beats) into `measure`"""
+        s = max(bisect_right(self._sig_measures, measure) - 1, 0)
+        sig = self._sigs[s]
+        return (self._sig_qns[s] + (measure - self._sig_measures[s]) * self._measure_qn(sig)
+                + beats * 4.0 / sig[1])
+
+    def beats_to_qn(self, beats: float) -> float:
+        """QN of a beat count from the project start (beats of each time signature)"""
+        s = max(bisect_right(self._sig_beats, beats) - 1, 0)
+        return self._sig_qns[s] + (beats - self._sig_beats[s]) * 4.0 / self._sigs[s][1]
+
+    def time_to_beats(self, time: float) -> Tuple[int, float]:
+        """(measure, beat in measure) at `time`"""
+        info = self.qn_to_measure(self.time_to_qn(time))
+        return info["measure"], info["beat"]
+
+    def beats_to_time(self, measure: int, beats: float = 0.0) -> float:
+        return self.qn_to_time(self.measure_to_qn(measure, beats))
+
+    def bars_duration(self, bars: float, start_time: float = 0.0) -> float:
+        """Seconds from `start_time` to the same beat `bars` measures later"""
+        info = self.qn_to_measure(self.time_to_qn(start_time))
+        whole = int(math.floor(bars))
+        end_qn = self.measure_to_qn(info["measure"] + whole, info["beat"])
+        if bars > whole:
+            end_qn += (bars - whole) * self._measure_qn(self.time_sig_at_qn(end_qn))
+        return self.qn_to_time(end_qn) - start_time
+
+    # -- grid -----------------------------------------------------------------
+
+    def snap_qn(self, qn: float, grid_qn: float) -> float:
+        return round(qn / grid_qn) * grid_qn
+
+    def snap_times(self, times: Iterable[float], grid_qn: float) -> List[float]:
+        """Each position moved to the nearest grid line (`grid_qn` quarter notes apart)"""
+        if grid_qn <= 0:
+            raise ValueError(f"grid_qn must be positive, got {grid_qn}")
+        return [self.qn_to_time(self.snap_qn(self.time_to_qn(t), grid_qn)) for t in times]
+
+
+async def fetch_tempo_map(bridge) -> TempoMap:
+    """Read every marker from REAPER (one GetTempoMap call) and build the map"""
+    result = await bridge.call_lua("GetTempoMap", [])
+    if result.get("ok"):
+        markers = result.get("markers")
+        # An empty Lua table is encoded as {}
+        markers = markers if isinstance(markers, list) else []
+        return TempoMap(markers, result.get("bpm") or DEFAULT_BPM,
+                        result.get("num") or DEFAULT_TIME_SIG[0])
+    if "Unknown function" not in str(result.get("error", "")):
+        raise TempoMapError(result.get("error", "Unknown error"))
+
+    # Older bridge script: markers in one batch, project tempo separately
+    markers = await load_tempo_map(bridge)
+    project = await bridge.call_lua("GetProjectTimeSignature2", [0])
+    ret = project.get("ret") if project.get("ok") else None
+    if isinstance(ret, list) and len(ret) >= 2:
+        return TempoMap(markers, ret[0], ret[1])
+    return TempoMap(markers)
+
+
+async def current_tempo_map(bridge) -> TempoMap:
+    """The project's tempo map, rebuilt only when the project has changed"""
+    snapshot = await get_snapshot(bridge)
+    return await snapshot.section("tempo_engine", lambda: fetch_tempo_map(bridge))
+
+
+async def edit_tempo_map(bridge, func_name: str, args: List[Any]) -> Dict[str, Any]:
+    """
+    Run a tempo/time signature edit (SetTempoTimeSigMarker, ...) and drop the
+    cached map. Such edits make no undo point, so the change count alone may
+    not show them.
+    """
+    try:
+        return await bridge.call_lua(func_name, args)
+    finally:
+        invalidate_snapshot()
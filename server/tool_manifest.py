@@ -0,0 +1,245 @@
+"""
+Cached tool schemas for fast registration
+
+Registering a tool makes FastMCP inspect the function and build a Pydantic
+argument model plus its JSON schema; for the full profile that is over a
+second of start-up, and enable_capability pays it again mid-session.
+
+ToolManifest stores the generated schema, description and context argument
+of every registered tool in a JSON file. Entries are grouped by module and
+keyed by a hash of the module's source, so editing a tool module only
+invalidates its own tools; a different manifest format, mcp or pydantic
+version discards the whole file. On a hit the tool is registered straight
+from the manifest and its argument model is only built on its first call.
+
+The manifest builds Tool objects itself, so it depends on FastMCP
+internals (func_metadata and the Tool fields of recent mcp releases). With
+an mcp that lacks them MANIFEST_SUPPORTED is False and the server keeps
+FastMCP's stock ToolManager.
+
+Configured from the environment:
+
+    REAPER_MCP_TOOL_CACHE=path   manifest file (~/.cache/reaper-mcp/tool_manifest.json)
+    REAPER_MCP_TOOL_CACHE=0      disable the cache
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sys
+from functools import cached_property
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from mcp.server.fastmcp.tools.base import Tool
+from mcp.server.fastmcp.tools.tool_manager import ToolManager
+
+try:
+    from mcp.server.fastmcp.utilities.func_metadata import func_metadata
+except ImportError:  # pragma: no cover - depends on the installed mcp
+    func_metadata = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FORMAT = 1
+
+# Tool fields set by build_tool() and the add_tool() options it forwards
+_TOOL_FIELDS = {"title", "icons", "meta", "annotations", "context_kwarg", "fn_metadata"}
+
+MANIFEST_SUPPORTED = func_metadata is not None and _TOOL_FIELDS <= set(Tool.model_fields)
+
+
+def _is_async_callable(fn: Callable) -> bool:
+    while isinstance(fn, functools.partial):
+        fn = fn.func
+    return inspect.iscoroutinefunction(fn) or (
+        callable(fn) and inspect.iscoroutinefunction(getattr(fn, "__call__", None)))
+
+
+def _package_version(name: str) -> str:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def _environment_key() -> Dict[str, Any]:
+    """What the generated schemas depend on besides the tool source"""
+    return {
+        "format": MANIFEST_FORMAT,
+        "python": "%d.%d" % sys.version_info[:2],
+        "mcp": _package_version("mcp"),
+        "pydantic": _package_version("pydantic"),
+    }
+
+
+class CachedTool(Tool):
+    """Tool registered from the manifest; its argument model is built on first call"""
+
+    cached_output_schema: Optional[Dict[str, Any]] = None
+
+    @cached_property
+    def output_schema(self) -> Optional[Dict[str, Any]]:
+        if self.fn_metadata is None:
+            return self.cached_output_schema
+        return self.fn_metadata.output_schema
+
+    async def run(self, arguments, context=None, convert_result=False):
+        if self.fn_metadata is None:
+            skip = [self.context_kwarg] if self.context_kwarg is not None else []
+            self.fn_metadata = func_metadata(self.fn, skip_names=skip)
+        return await super().run(arguments, context=context, convert_result=convert_result)
+
+
+class ToolManifest:
+    """Tool schemas by module, persisted as JSON"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self.hits = 0
+        self.misses = 0
+        self._modules: Dict[str, Dict[str, Any]] = {}
+        self._hashes: Dict[str, Optional[str]] = {}
+        self._dirty = False
+        self._load()
+
+    @classmethod
+    def from_env(cls) -> "ToolManifest":
+        value = os.environ.get("REAPER_MCP_TOOL_CACHE", "")
+        if value.lower() in ("0", "false", "no", "off"):
+            return cls(None)
+        if not MANIFEST_SUPPORTED:
+            logger.info(f"Tool manifest needs a newer mcp (have {_package_version('mcp')}); disabled")
+            return cls(None)
+        if value:
+            return cls(Path(value))
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+        return cls(Path(cache_home) / "reaper-mcp" / "tool_manifest.json")
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def _load(self):
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError) as e:
+            logger.debug(f"Ignoring unreadable tool manifest: {e}")
+            return
+        if data.get("environment") != _environment_key():
+            logger.info("Tool manifest is from another mcp/pydantic version; rebuilding")
+            self._dirty = True
+            return
+        self._modules = data.get("modules", {})
+
+    def module_hash(self, module_name: str) -> Optional[str]:
+        """Hash of a loaded module's source file (None if it has none)"""
+        if module_name not in self._hashes:
+            digest = None
+            module = sys.modules.get(module_name)
+            source = getattr(module, "__file__", None)
+            if source and source.endswith(".py"):
+                try:
+                    digest = hashlib.sha256(Path(source).read_bytes()).hexdigest()[:16]
+                except OSError:
+                    pass
+            self._hashes[module_name] = digest
+        return self._hashes[module_name]
+
+    def lookup(self, fn: Callable, name: str) -> Optional[Dict[str, Any]]:
+        """Cached entry for a tool function, if its module is unchanged"""
+        module = self._modules.get(fn.__module__)
+        if module is None or module.get("hash") != self.module_hash(fn.__module__):
+            return None
+        return module["tools"].get(name)
+
+    def store(self, fn: Callable, tool: Tool):
+        digest = self.module_hash(fn.__module__)
+        if digest is None:
+            return
+        module = self._modules.get(fn.__module__)
+        if module is None or module.get("hash") != digest:
+            module = self._modules[fn.__module__] = {"hash": digest, "tools": {}}
+        module["tools"][tool.name] = {
+            "description": tool.description,
+            "parameters": tool.parameters,
+            "output_schema": tool.output_schema,
+            "context_kwarg": tool.context_kwarg,
+        }
+        self._dirty = True
+
+    def build_tool(self, fn: Callable, name: Optional[str] = None,
+                   description: Optional[str] = None) -> Tool:
+        """A Tool for `fn`, from the manifest when possible"""
+        name = name or fn.__name__
+        entry = self.lookup(fn, name) if self.enabled else None
+        if entry is None:
+            self.misses += 1
+            tool = Tool.from_function(fn, name=name, description=description)
+            if self.enabled:
+                self.store(fn, tool)
+            return tool
+        self.hits += 1
+        return CachedTool.model_construct(
+            fn=fn,
+            name=name,
+            title=None,
+            description=description or entry["description"],
+            parameters=entry["parameters"],
+            fn_metadata=None,
+            is_async=_is_async_callable(fn),
+            context_kwarg=entry["context_kwarg"],
+            annotations=None,
+            icons=None,
+            meta=None,
+            cached_output_schema=entry["output_schema"],
+        )
+
+    def save(self):
+        """Write the manifest if tools were added since it was loaded"""
+        if self.path is None or not self._dirty:
+            return
+        data = {"environment": _environment_key(), "modules": self._modules}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data, separators=(",", ":")))
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.debug(f"Failed to write tool manifest: {e}")
+
+
+class ManifestToolManager(ToolManager):
+    """ToolManager that builds plain tools through a ToolManifest"""
+
+    def __init__(self, manifest: ToolManifest, warn_on_duplicate_tools: bool = True):
+        super().__init__(warn_on_duplicate_tools=warn_on_duplicate_tools)
+        self.manifest = manifest
+
+    def add_tool(self, fn, name=None, title=None, description=None, annotations=None,
+                 icons=None, meta=None, structured_output=None) -> Tool:
+        if any(option is not None for option in
+               (title, annotations, icons, meta, structured_output)):
+            return super().add_tool(fn, name=name, title=title, description=description,
+                                    annotations=annotations, icons=icons, meta=meta,
+                                    structured_output=structured_output)
+        existing = self._tools.get(name or fn.__name__)
+        if existing:
+            if self.warn_on_duplicate_tools:
+                logger.warning(f"Tool already exists: {existing.name}")
+            return existing
+        tool = self.manifest.build_tool(fn, name, description)
+        self._tools[tool.name] = tool
+        return tool
+
+    def list_tools(self):
+        # Tools added by enable_capability are persisted on the next tools/list
+        self.manifest.save()
+        return super().list_tools()
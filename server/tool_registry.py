@@ -7,10 +7,44 @@ reducing boilerplate code in the main server file.
 
 import inspect
 import asyncio
-from typing import Callable, Dict, List, Any, get_type_hints
+import importlib
+from typing import Callable, Dict, List, Any, Optional, get_type_hints
 from functools import wraps
 
 
+class LazyRegister:
+    """
+    Reference to a register_X_tools function that imports its module on first use.
+    
+    Calling it with the MCP instance behaves like the function itself, so it
+    can stand in for one in CATEGORY_REGISTRY without importing every tool
+    module at server startup.
+    """
+    
+    def __init__(self, module: str, func_name: str, package: Optional[str] = None):
+        self.module = module
+        self.func_name = func_name
+        self.package = package
+        self._func: Optional[Callable] = None
+    
+    @property
+    def loaded(self) -> bool:
+        return self._func is not None
+    
+    def resolve(self) -> Callable:
+        """Import the module (once) and return the register function"""
+        if self._func is None:
+            module = importlib.import_module(self.module, self.package)
+            self._func = getattr(module, self.func_name)
+        return self._func
+    
+    def __call__(self, mcp) -> int:
+        return self.resolve()(mcp)
+    
+    def __repr__(self) -> str:
+        return f"LazyRegister({self.module!r}, {self.func_name!r})"
+
+
 class ToolRegistry:
     """Helper class to manage tool registration for MCP"""
     
@@ -1,7 +1,8 @@
 """Advanced MIDI generation and manipulation tools."""
 
 from typing import Dict, Any, List, Optional, Tuple
-from .bridge_sync import ReaperBridge
+from .bridge_sync import ReaperBridge, sync_tool
+from ..midi_events import MidiEventBuffer, beats_to_ppq, bridge_args
 
 
 def create_new_midi_item(track_index: int, start_time: float, end_time: float,
@@ -390,6 +391,16 @@ def insert_midi_note_extended(take_handle: Any, pitch: int, velocity: int,
     }
 
 
+def _write_events(take_handle: Any, events: MidiEventBuffer, undo: str) -> int:
+    """Append packed events to a take in one bridge call; returns notes written"""
+    if not len(events):
+        return 0
+    packed, options = bridge_args(events, undo=undo)
+    response = ReaperBridge.call_lua("SetAllMIDIEventsFromItemTake",
+                                     [take_handle, 0, packed, options])
+    return events.notes if response.get("ok") else 0
+
+
 def generate_chord_progression(take_handle: Any, progression: List[Dict[str, Any]],
                              start_beat: float = 0.0) -> Dict[str, Any]:
     """Generate a chord progression in a MIDI take.
@@ -415,7 +426,7 @@ def generate_chord_progression(take_handle: Any, progression: List[Dict[str, Any
         "sus4": [0, 5, 7]
     }
     
-    notes_created = 0
+    events = MidiEventBuffer()
     current_beat = start_beat
     
     for chord in progression:
@@ -426,7 +437,7 @@ def generate_chord_progression(take_handle: Any, progression: List[Dict[str, Any
         
         intervals = chord_types.get(chord_type, chord_types["major"])
         
-        # Insert each note of the chord
+        # Add each note of the chord
         for interval in intervals:
             pitch = root + interval
             
@@ -436,22 +447,13 @@ def generate_chord_progression(take_handle: Any, progression: List[Dict[str, Any
             while pitch < 0:
                 pitch += 12
             
-            result = insert_midi_note_extended(
-                take_handle, pitch, velocity,
-                current_beat, duration
-            )
-            
-            if result["success"]:
-                notes_created += 1
+            events.add_note(beats_to_ppq(current_beat), beats_to_ppq(current_beat + duration),
+                            pitch, velocity)
         
         current_beat += duration
     
-    # Sort notes after insertion
-    sort_request = {
-        "action": "MIDI_Sort",
-        "take": take_handle
-    }
-    ReaperBridge.send_request(sort_request)
+    # Write every chord in one bridge call (sorted once, one undo point)
+    notes_created = _write_events(take_handle, events, "Generate chord progression")
     
     return {
         "success": notes_created > 0,
@@ -488,7 +490,6 @@ def generate_scale_run(take_handle: Any, scale_type: str, root: int,
     }
     
     intervals = scales.get(scale_type, scales["major"])
-    notes_created = 0
     current_beat = start_beat
     
     # Generate scale notes
@@ -505,18 +506,15 @@ def generate_scale_run(take_handle: Any, scale_type: str, root: int,
     elif direction == "both":
         notes = notes + notes[-2::-1]  # Up then down, skip repeated top note
     
-    # Insert notes
+    # Add notes
+    events = MidiEventBuffer()
     for pitch in notes:
-        result = insert_midi_note_extended(
-            take_handle, pitch, 80,
-            current_beat, note_duration
-        )
-        
-        if result["success"]:
-            notes_created += 1
-        
+        events.add_note(beats_to_ppq(current_beat), beats_to_ppq(current_beat + note_duration),
+                        pitch, 80)
         current_beat += note_duration
     
+    notes_created = _write_events(take_handle, events, "Generate scale run")
+    
     return {
         "success": notes_created > 0,
         "notes_created": notes_created,
@@ -528,15 +526,6 @@ def generate_scale_run(take_handle: Any, scale_type: str, root: int,
 
 def register_advanced_midi_tools(mcp):
     """Register advanced MIDI generation tools with MCP server."""
-    from functools import wraps
-    
-    # Helper to wrap sync functions for async
-    def async_wrapper(func):
-        @wraps(func)
-        async def wrapper(**kwargs):
-            return func(**kwargs)
-        return wrapper
-    
     # Register all advanced MIDI tools
     tool_functions = [
         ("create_new_midi_item", create_new_midi_item),
@@ -560,7 +549,7 @@ def register_advanced_midi_tools(mcp):
             mcp.tool(
                 name=tool_name,
                 description=tool_def["description"]
-            )(async_wrapper(tool_func))
+            )(sync_tool(tool_func))
     
     return len(tool_functions)
 
@@ -6,7 +6,7 @@ to understand project structure, content, and patterns.
 """
 
 from typing import List, Dict, Any
-from ..bridge import bridge
+from ..bridge import bridge, batch_ref
 
 
 # ============================================================================
@@ -167,20 +167,23 @@ async def analyze_item_overlaps() -> str:
     overlaps = []
     items_data = []
     
-    # Collect all items with their positions
+    # Collect all items with their positions in one batch. Each item handle
+    # is reused by the property lookups that follow it.
+    calls = []
     for i in range(item_count):
-        item_result = await bridge.call_lua("GetMediaItem", [0, i])
-        if not item_result.get("ok"):
-            continue
-        
-        item = item_result.get("ret")
-        
-        # Get position and length
-        pos_result = await bridge.call_lua("GetMediaItemInfo_Value", [item, "D_POSITION"])
-        length_result = await bridge.call_lua("GetMediaItemInfo_Value", [item, "D_LENGTH"])
-        track_result = await bridge.call_lua("GetMediaItem_Track", [item])
-        
-        if pos_result.get("ok") and length_result.get("ok") and track_result.get("ok"):
+        base = len(calls)
+        calls += [
+            ("GetMediaItem", [0, i]),
+            ("GetMediaItemInfo_Value", [batch_ref(base), "D_POSITION"]),
+            ("GetMediaItemInfo_Value", [batch_ref(base), "D_LENGTH"]),
+            ("GetMediaItem_Track", [batch_ref(base)]),
+        ]
+    results = await bridge.call_batch(calls)
+    
+    for i in range(item_count):
+        item_result, pos_result, length_result, track_result = results[4 * i:4 * i + 4]
+        if (item_result.get("ok") and pos_result.get("ok") and
+                length_result.get("ok") and track_result.get("ok")):
             pos = pos_result.get("ret", 0)
             length = length_result.get("ret", 0)
             track = track_result.get("ret")
@@ -218,7 +218,8 @@ async def get_audio_device_info(name: str, attribute: str) -> str:
     result = await bridge.call_lua("GetAudioDeviceInfo", [name, attribute])
     
     if result.get("ok"):
-        value = result.get("ret", "")
+        ret = result.get("ret", [])
+        value = ret[1] if isinstance(ret, list) and len(ret) >= 2 and ret[0] else ""
         if value:
             return f"Audio device {name} - {attribute}: {value}"
         else:
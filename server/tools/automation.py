@@ -253,7 +253,8 @@ async def get_envelope_name(track_index: int, envelope_index: int) -> str:
     result = await bridge.call_lua("GetEnvelopeName", [envelope_handle])
     
     if result.get("ok"):
-        name = result.get("ret", "")
+        ret = result.get("ret", [])
+        name = ret[1] if isinstance(ret, list) and len(ret) >= 2 else ""
         return f"Envelope {envelope_index}: {name}"
     else:
         raise Exception(f"Failed to get envelope name: {result.get('error', 'Unknown error')}")
@@ -291,7 +292,10 @@ async def get_fx_envelope(track_index: int, fx_index: int, param_index: int) ->
         if envelope_handle:
             # Get envelope name for info
             name_result = await bridge.call_lua("GetEnvelopeName", [envelope_handle])
-            env_name = name_result.get("ret", "") if name_result.get("ok") else "Unknown"
+            env_name = "Unknown"
+            if name_result.get("ok"):
+                ret = name_result.get("ret", [])
+                env_name = ret[1] if isinstance(ret, list) and len(ret) >= 2 else ""
             return f"Found FX parameter envelope: {env_name}"
         else:
             return f"No envelope for FX {fx_index} parameter {param_index}"
@@ -331,7 +335,10 @@ async def get_selected_envelope(project_index: int = 0) -> str:
         if envelope_handle:
             # Get envelope name
             name_result = await bridge.call_lua("GetEnvelopeName", [envelope_handle])
-            env_name = name_result.get("ret", "") if name_result.get("ok") else "Unknown"
+            env_name = "Unknown"
+            if name_result.get("ok"):
+                ret = name_result.get("ret", [])
+                env_name = ret[1] if isinstance(ret, list) and len(ret) >= 2 else ""
             return f"Selected envelope: {env_name}"
         else:
             return "No envelope selected"
@@ -349,7 +356,10 @@ async def get_track_envelope(track_index: int, envelope_index: int) -> str:
         if envelope_handle:
             # Get envelope name
             name_result = await bridge.call_lua("GetEnvelopeName", [envelope_handle])
-            env_name = name_result.get("ret", "") if name_result.get("ok") else "Unknown"
+            env_name = "Unknown"
+            if name_result.get("ok"):
+                ret = name_result.get("ret", [])
+                env_name = ret[1] if isinstance(ret, list) and len(ret) >= 2 else ""
             return f"Track {track_index} envelope {envelope_index}: {env_name}"
         else:
             return f"No envelope at index {envelope_index} on track {track_index}"
@@ -1,7 +1,7 @@
 """Track bouncing and rendering tools for music production workflows."""
 
 from typing import Dict, Any, List, Optional, Tuple
-from .bridge_sync import ReaperBridge
+from .bridge_sync import ReaperBridge, sync_tool
 
 
 def bounce_track_in_place(track_index: int, tail_length: float = 0.0, 
@@ -770,15 +770,6 @@ def apply_render_settings(settings: Dict[str, Any]) -> None:
 
 def register_bounce_render_tools(mcp):
     """Register bounce and render tools with MCP server."""
-    from functools import wraps
-    
-    # Helper to wrap sync functions for async
-    def async_wrapper(func):
-        @wraps(func)
-        async def wrapper(**kwargs):
-            return func(**kwargs)
-        return wrapper
-    
     # Register all bounce/render tools
     tool_functions = [
         ("bounce_track_in_place", bounce_track_in_place),
@@ -801,7 +792,7 @@ def register_bounce_render_tools(mcp):
             mcp.tool(
                 name=tool_name,
                 description=tool_def["description"]
-            )(async_wrapper(tool_func))
+            )(sync_tool(tool_func))
     
     return len(tool_functions)
 
@@ -1,9 +1,65 @@
-"""Synchronous bridge wrapper for tools that need sync API calls."""
+"""Synchronous bridge wrapper for tools that need sync API calls.
+
+Sync tools are registered through sync_tool(), which runs them on a
+dedicated executor thread. Their ReaperBridge calls are handed back to the
+server's event loop with run_coroutine_threadsafe, so a slow tool blocks
+only its own worker thread while the loop keeps serving other clients.
+"""
 
 import asyncio
-from typing import Dict, Any
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
 from ..bridge import bridge
 
+# Worker threads for sync tools; the bridge itself still runs on the loop
+SYNC_TOOL_WORKERS = 4
+_executor = ThreadPoolExecutor(max_workers=SYNC_TOOL_WORKERS,
+                               thread_name_prefix="reaper-sync-tool")
+
+# Event loop of the server, visible to code running inside sync_tool()
+_server_loop: contextvars.ContextVar[Optional[asyncio.AbstractEventLoop]] = \
+    contextvars.ContextVar("reaper_server_loop", default=None)
+
+
+def _run_on_loop(make_coro: Callable[[], Awaitable[Any]]) -> Any:
+    """Run a bridge coroutine to completion from synchronous code."""
+    loop = _server_loop.get()
+    if loop is not None and loop.is_running():
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            raise RuntimeError("Sync bridge call made on the event loop thread; "
+                               "register the tool with sync_tool()")
+        return asyncio.run_coroutine_threadsafe(make_coro(), loop).result()
+    
+    # No server loop (scripts, tests): drive a private loop
+    return asyncio.run(make_coro())
+
+
+async def run_sync_tool(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Await a synchronous tool function on the sync tool executor."""
+    loop = asyncio.get_running_loop()
+    _server_loop.set(loop)
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await loop.run_in_executor(_executor, call)
+
+
+def sync_tool(func: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
+    """Wrap a synchronous tool function as an async MCP tool.
+    
+    Tool modules register sync functions with mcp.tool(...)(sync_tool(func)),
+    so they run on the sync tool executor rather than the event loop.
+    """
+    @functools.wraps(func)
+    async def wrapper(**kwargs):
+        return await run_sync_tool(func, **kwargs)
+    return wrapper
+
 
 class ReaperBridge:
     """Synchronous wrapper for the async bridge."""
@@ -90,10 +146,8 @@ class ReaperBridge:
             ]
         
         # Run the async call synchronously
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
         try:
-            result = loop.run_until_complete(bridge.call_lua(action, args))
+            result = _run_on_loop(lambda: bridge.call_lua(action, args))
             
             # Transform the result to match expected format
             response = {"result": True}
@@ -128,5 +182,37 @@ class ReaperBridge:
             
         except Exception as e:
             return {"result": False, "error": str(e)}
-        finally:
-            loop.close()
\ No newline at end of file
+    
+    @staticmethod
+    def send_batch(calls: List[Tuple[str, Optional[List[Any]]]],
+                   stop_on_error: bool = False) -> List[Dict[str, Any]]:
+        """Run several ReaScript calls in one bridge round trip.
+        
+        Args:
+            calls: (function name, positional args) pairs; args may contain
+                batch_ref() placeholders pointing at earlier calls
+            stop_on_error: Skip remaining calls after the first failure
+            
+        Returns:
+            Raw bridge responses ({"ok": ..., "ret": ...}), one per call
+        """
+        try:
+            return _run_on_loop(lambda: bridge.call_batch(calls, stop_on_error))
+        except Exception as e:
+            return [{"ok": False, "error": str(e)} for _ in calls]
+    
+    @staticmethod
+    def call_lua(func_name: str, args: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """Make one bridge call with positional args and return its raw response.
+        
+        Args:
+            func_name: Bridge (Lua) function name
+            args: Positional arguments
+            
+        Returns:
+            Raw bridge response ({"ok": ..., "ret": ...})
+        """
+        try:
+            return _run_on_loop(lambda: bridge.call_lua(func_name, args or []))
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
@@ -1,7 +1,8 @@
 """Bus routing and mixing workflow tools."""
 
 from typing import Dict, Any, List, Optional, Tuple
-from .bridge_sync import ReaperBridge
+from .bridge_sync import ReaperBridge, sync_tool
+from ..bridge import batch_ref
 
 
 def create_bus_track(name: str, position: Optional[int] = None, 
@@ -596,96 +597,67 @@ def analyze_routing_matrix() -> Dict[str, Any]:
     # Get track count
     count_request = {"action": "CountTracks", "proj": 0}
     count_response = ReaperBridge.send_request(count_request)
-    track_count = count_response.get("count", 0)
+    track_count = count_response.get("ret", count_response.get("count", 0)) or 0
     
-    routing_info = []
+    # Fetch every track's name, master send and send/receive counts in one batch
+    per_track = 5
+    calls = []
+    for i in range(track_count):
+        track = batch_ref(len(calls))
+        calls += [
+            ("GetTrack", [0, i]),
+            ("GetSetMediaTrackInfo_String", [track, "P_NAME", "", False]),
+            ("GetMediaTrackInfo_Value", [track, "B_MAINSEND"]),
+            ("GetTrackNumSends", [track, 0]),  # Regular sends
+            ("GetTrackNumSends", [track, -1]),  # Receives
+        ]
+    results = ReaperBridge.send_batch(calls)
     
+    routing_info = []
     for i in range(track_count):
-        # Get track info
-        track_request = {"action": "GetTrack", "proj": 0, "trackidx": i}
-        track_response = ReaperBridge.send_request(track_request)
+        track_result, name_result, master_result, sends_result, receives_result = \
+            results[per_track * i:per_track * (i + 1)]
+        if not track_result.get("ok"):
+            continue
         
-        if track_response.get("result"):
-            track_handle = track_response.get("track")
-            
-            # Get track name
-            name_request = {
-                "action": "GetSetMediaTrackInfo_String",
-                "track": track_handle,
-                "parmname": "P_NAME",
-                "stringNeedBig": False,
-                "setnewvalue": False
-            }
-            name_response = ReaperBridge.send_request(name_request)
-            track_name = name_response.get("str", f"Track {i+1}")
-            
-            # Check master send
-            master_request = {
-                "action": "GetMediaTrackInfo_Value",
-                "track": track_handle,
-                "parmname": "B_MAINSEND"
-            }
-            master_response = ReaperBridge.send_request(master_request)
-            has_master_send = master_response.get("value", 1) > 0
-            
-            # Get send count
-            send_count_request = {
-                "action": "GetTrackNumSends",
-                "tr": track_handle,
-                "category": 0  # Regular sends
-            }
-            send_count_response = ReaperBridge.send_request(send_count_request)
-            num_sends = send_count_response.get("count", 0)
-            
-            # Get receive count
-            receive_count_request = {
-                "action": "GetTrackNumSends",
-                "tr": track_handle,
-                "category": -1  # Receives
-            }
-            receive_count_response = ReaperBridge.send_request(receive_count_request)
-            num_receives = receive_count_response.get("count", 0)
-            
-            track_info = {
-                "index": i,
-                "name": track_name,
-                "has_master_send": has_master_send,
-                "num_sends": num_sends,
-                "num_receives": num_receives,
-                "sends": [],
-                "receives": []
-            }
-            
-            # Get send details
-            for s in range(num_sends):
-                dest_request = {
-                    "action": "GetTrackSendInfo_Value",
-                    "tr": track_handle,
-                    "category": 0,
-                    "sendidx": s,
-                    "parmname": "P_DESTTRACK"
-                }
-                dest_response = ReaperBridge.send_request(dest_request)
-                
-                # Get destination track name
-                dest_handle = dest_response.get("value")
-                if dest_handle:
-                    dest_name_request = {
-                        "action": "GetSetMediaTrackInfo_String",
-                        "track": dest_handle,
-                        "parmname": "P_NAME",
-                        "stringNeedBig": False,
-                        "setnewvalue": False
-                    }
-                    dest_name_response = ReaperBridge.send_request(dest_name_request)
-                    dest_name = dest_name_response.get("str", "Unknown")
-                    
-                    track_info["sends"].append({
-                        "index": s,
-                        "destination": dest_name
-                    })
-            
-            routing_info.append(track_info)
+        track_name = name_result.get("ret") or f"Track {i+1}"
+        has_master_send = (master_result.get("ret", 1) or 0) > 0
+        num_sends = int(sends_result.get("ret", 0) or 0) if sends_result.get("ok") else 0
+        num_receives = int(receives_result.get("ret", 0) or 0) if receives_result.get("ok") else 0
+        
+        routing_info.append({
+            "index": i,
+            "name": track_name,
+            "has_master_send": has_master_send,
+            "num_sends": num_sends,
+            "num_receives": num_receives,
+            "sends": [],
+            "receives": []
+        })
+    
+    # Resolve every send destination name in a second batch
+    calls = []
+    send_slots = []
+    for track_info in routing_info:
+        if not track_info["num_sends"]:
+            continue
+        track = batch_ref(len(calls))
+        calls.append(("GetTrack", [0, track_info["index"]]))
+        for s in range(track_info["num_sends"]):
+            dest = batch_ref(len(calls))
+            calls.append(("GetTrackSendInfo_Value", [track, 0, s, "P_DESTTRACK"]))
+            calls.append(("GetSetMediaTrackInfo_String", [dest, "P_NAME", "", False]))
+            send_slots.append((track_info, s, len(calls) - 1))
+    
+    if calls:
+        results = ReaperBridge.send_batch(calls)
+        for track_info, s, name_index in send_slots:
+            dest_result, name_result = results[name_index - 1], results[name_index]
+            if dest_result.get("ok") and dest_result.get("ret"):
+                track_info["sends"].append({
+                    "index": s,
+                    "destination": name_result.get("ret") or "Unknown"
+                })
     
     return {
         "success": True,
@@ -696,15 +668,6 @@ def analyze_routing_matrix() -> Dict[str, Any]:
 
 def register_bus_routing_tools(mcp):
     """Register bus routing tools with MCP server."""
-    from functools import wraps
-    
-    # Helper to wrap sync functions for async
-    def async_wrapper(func):
-        @wraps(func)
-        async def wrapper(**kwargs):
-            return func(**kwargs)
-        return wrapper
-    
     # Register all bus routing tools
     tool_functions = [
         ("create_bus_track", create_bus_track),
@@ -725,7 +688,7 @@ def register_bus_routing_tools(mcp):
             mcp.tool(
                 name=tool_name,
                 description=tool_def["description"]
-            )(async_wrapper(tool_func))
+            )(sync_tool(tool_func))
     
     return len(tool_functions)
 
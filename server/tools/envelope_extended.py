@@ -7,6 +7,8 @@ including advanced point manipulation, state management, and formatting.
 
 from typing import Optional, Tuple, List, Any, Dict
 from ..bridge import bridge
+from ..result_stream import StreamError, stream_result
+from ..rpp_chunk import ChunkError, parse_chunk
 
 
 # ============================================================================
@@ -245,7 +247,8 @@ async def get_envelope_name(track_index: int, envelope_index: int) -> str:
     result = await bridge.call_lua("GetEnvelopeName", [env_handle, "", 256])
     
     if result.get("ok"):
-        name = result.get("ret", "")
+        ret = result.get("ret", [])
+        name = ret[1] if isinstance(ret, list) and len(ret) >= 2 else ""
         if name:
             return f"Envelope name: {name}"
         else:
@@ -302,7 +305,8 @@ async def envelope_get_parent_track(track_index: int, envelope_index: int) -> st
     result = await bridge.call_lua("Envelope_GetParentTrack", [env_handle])
     
     if result.get("ok"):
-        parent_track = result.get("ret")
+        ret = result.get("ret")
+        parent_track = ret[0] if isinstance(ret, list) and ret else ret
         if parent_track:
             # Get track name
             name_result = await bridge.call_lua("GetTrackName", [parent_track, "", 256])
@@ -341,7 +345,8 @@ async def envelope_get_parent_take(item_index: int, take_index: int, envelope_in
     result = await bridge.call_lua("Envelope_GetParentTake", [env_handle])
     
     if result.get("ok"):
-        parent_take = result.get("ret")
+        ret = result.get("ret")
+        parent_take = ret[0] if isinstance(ret, list) and ret else ret
         if parent_take:
             # Get take name
             name_result = await bridge.call_lua("GetTakeName", [parent_take])
@@ -370,7 +375,10 @@ async def get_track_envelope_by_chunk_name(track_index: int, chunk_name: str) ->
         if envelope:
             # Get envelope name
             name_result = await bridge.call_lua("GetEnvelopeName", [envelope, "", 256])
-            env_name = name_result.get("ret", "Unnamed") if name_result.get("ok") else "Unknown"
+            env_name = "Unknown"
+            if name_result.get("ok"):
+                ret = name_result.get("ret", [])
+                env_name = ret[1] if isinstance(ret, list) and len(ret) >= 2 and ret[1] else "Unnamed"
             return f"Found envelope '{env_name}' with chunk name '{chunk_name}'"
         else:
             return f"No envelope found with chunk name '{chunk_name}'"
@@ -379,7 +387,7 @@ async def get_track_envelope_by_chunk_name(track_index: int, chunk_name: str) ->
 
 
 # ============================================================================
-# Envelope State Management (4 tools)
+# Envelope State Management (5 tools)
 # ============================================================================
 
 async def get_envelope_state_chunk(track_index: int, envelope_index: int, is_undo: bool = False) -> str:
@@ -398,23 +406,22 @@ async def get_envelope_state_chunk(track_index: int, envelope_index: int, is_und
     
     env_handle = env_result.get("ret")
     
-    # Get state chunk
-    result = await bridge.call_lua("GetEnvelopeStateChunk", [env_handle, "", 65536, is_undo])
-    
-    if result.get("ok"):
-        ret = result.get("ret", [])
-        if isinstance(ret, list) and len(ret) >= 2:
-            success, chunk = ret[:2]
-            if success and chunk:
-                # Return first 200 chars of chunk
-                preview = chunk[:200] + "..." if len(chunk) > 200 else chunk
-                return f"Envelope state chunk ({len(chunk)} chars): {preview}"
-            else:
+    # Only the first page is needed for the preview
+    try:
+        async with stream_result(bridge, "GetEnvelopeStateChunk",
+                                 [env_handle, "", 65536, is_undo], item=1) as stream:
+            if not stream.total:
                 return "Failed to get envelope state chunk"
-        else:
-            return "Invalid envelope state chunk response"
-    else:
-        raise Exception(f"Failed to get envelope state chunk: {result.get('error', 'Unknown error')}")
+            first = await stream.__anext__()
+    except StreamError as e:
+        raise Exception(f"Failed to get envelope state chunk: {e}")
+    
+    # Base64 pages arrive as bytes
+    if isinstance(first, bytes):
+        first = first.decode("utf-8", "replace")
+    # Return first 200 chars of chunk
+    preview = first[:200] + "..." if stream.total > 200 else first
+    return f"Envelope state chunk ({stream.total} chars): {preview}"
 
 
 async def set_envelope_state_chunk(track_index: int, envelope_index: int, 
@@ -447,6 +454,52 @@ async def set_envelope_state_chunk(track_index: int, envelope_index: int,
         raise Exception(f"Failed to set envelope state chunk: {result.get('error', 'Unknown error')}")
 
 
+async def scale_envelope_points(track_index: int, envelope_index: int, factor: float = 1.0,
+                                offset: float = 0.0, start_time: float = 0.0,
+                                end_time: Optional[float] = None) -> str:
+    """Scale and offset envelope point values in a time range (one chunk read, one write)"""
+    # Get track
+    track_result = await bridge.call_lua("GetTrack", [0, track_index])
+    if not track_result.get("ok") or not track_result.get("ret"):
+        raise Exception(f"Failed to find track at index {track_index}")
+    
+    track_handle = track_result.get("ret")
+    
+    # Get envelope
+    env_result = await bridge.call_lua("GetTrackEnvelope", [track_handle, envelope_index])
+    if not env_result.get("ok") or not env_result.get("ret"):
+        raise Exception(f"Failed to find envelope at index {envelope_index}")
+    
+    env_handle = env_result.get("ret")
+    
+    # Edit every PT line in memory instead of a SetEnvelopePoint call per point
+    try:
+        text = await stream_result(bridge, "GetEnvelopeStateChunk",
+                                   [env_handle, "", False], item=1).collect()
+        envelope = parse_chunk(text)
+    except (StreamError, ChunkError) as e:
+        raise Exception(f"Failed to read envelope state chunk: {e}")
+    
+    scaled = 0
+    for index, tokens in list(envelope.lines("PT")):
+        time, value = float(tokens[1]), float(tokens[2])
+        if time < start_time or (end_time is not None and time > end_time):
+            continue
+        tokens[2] = value * factor + offset
+        envelope.set_line(index, tokens)
+        scaled += 1
+    
+    if not scaled:
+        return "No envelope points in range"
+    
+    result = await bridge.call_lua("SetEnvelopeStateChunk", [env_handle, envelope.text(), False])
+    
+    if result.get("ok") and result.get("ret", True):
+        return f"Scaled {scaled} envelope points"
+    else:
+        raise Exception(f"Failed to set envelope state chunk: {result.get('error', 'Unknown error')}")
+
+
 async def get_set_envelope_info_string(track_index: int, envelope_index: int,
                                      param_name: str, value: str = "", set_value: bool = False) -> str:
     """Get or set envelope string parameter"""
@@ -468,7 +521,8 @@ async def get_set_envelope_info_string(track_index: int, envelope_index: int,
     result = await bridge.call_lua("GetSetEnvelopeInfo_String", [env_handle, param_name, value, set_value])
     
     if result.get("ok"):
-        ret_value = result.get("ret", "")
+        ret = result.get("ret", [])
+        ret_value = ret[1] if isinstance(ret, list) and len(ret) >= 2 else ""
         if set_value:
             return f"Set envelope {param_name} to: {value}"
         else:
@@ -686,6 +740,7 @@ def register_envelope_extended_tools(mcp) -> int:
         # Envelope State Management
         (get_envelope_state_chunk, "Get envelope state chunk"),
         (set_envelope_state_chunk, "Set envelope state chunk"),
+        (scale_envelope_points, "Scale and offset envelope point values in a time range"),
         (get_set_envelope_info_string, "Get or set envelope string parameter"),
         (get_set_envelope_state, "Get or set complete envelope state"),
         
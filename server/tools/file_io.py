@@ -243,9 +243,9 @@ async def get_user_inputs(title: str, num_inputs: int, captions: str, initial_va
     result = await bridge.call_lua("GetUserInputs", [title, num_inputs, captions, initial_values])
     
     if result.get("ok"):
-        success = result.get("ret", False)
-        if success:
-            values = result.get("values", "")
+        ret = result.get("ret", [])
+        if isinstance(ret, list) and len(ret) >= 2 and ret[0]:
+            values = ret[1]
             return f"User input: {values}"
         else:
             return "User cancelled input dialog"
@@ -1,7 +1,7 @@
 """Groove and quantization tools for generative music creation."""
 
 from typing import Dict, Any, List, Optional, Tuple
-from .bridge_sync import ReaperBridge
+from .bridge_sync import ReaperBridge, sync_tool
 import random
 import math
 
@@ -658,15 +658,6 @@ def detect_tempo_from_selection() -> Dict[str, Any]:
 
 def register_groove_quantization_tools(mcp):
     """Register groove and quantization tools with MCP server."""
-    from functools import wraps
-    
-    # Helper to wrap sync functions for async
-    def async_wrapper(func):
-        @wraps(func)
-        async def wrapper(**kwargs):
-            return func(**kwargs)
-        return wrapper
-    
     # Register all groove/quantization tools
     tool_functions = [
         ("quantize_items_to_grid", quantize_items_to_grid),
@@ -687,7 +678,7 @@ def register_groove_quantization_tools(mcp):
             mcp.tool(
                 name=tool_name,
                 description=tool_def["description"]
-            )(async_wrapper(tool_func))
+            )(sync_tool(tool_func))
     
     return len(tool_functions)
 
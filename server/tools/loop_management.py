@@ -1,7 +1,7 @@
 """Loop and time selection management tools for generative music creation."""
 
 from typing import Dict, Any, List, Optional, Tuple
-from .bridge_sync import ReaperBridge
+from .bridge_sync import ReaperBridge, sync_tool
 
 
 def get_time_selection() -> Dict[str, Any]:
@@ -457,15 +457,6 @@ def remove_time_selection() -> Dict[str, Any]:
 
 def register_loop_management_tools(mcp):
     """Register loop management tools with MCP server."""
-    from functools import wraps
-    
-    # Helper to wrap sync functions for async
-    def async_wrapper(func):
-        @wraps(func)
-        async def wrapper(**kwargs):
-            return func(**kwargs)
-        return wrapper
-    
     # Register all loop management tools
     tool_functions = [
         ("get_time_selection", get_time_selection),
@@ -493,7 +484,7 @@ def register_loop_management_tools(mcp):
             mcp.tool(
                 name=tool_name,
                 description=tool_def["description"]
-            )(async_wrapper(tool_func))
+            )(sync_tool(tool_func))
     
     return len(tool_functions)
 
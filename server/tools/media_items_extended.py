@@ -66,7 +66,8 @@ async def get_set_media_item_info_string(item_index: int, param_name: str, value
         if set_value:
             return f"Set item {param_name} to: {value}"
         else:
-            info_value = result.get("ret", "")
+            ret = result.get("ret", [])
+            info_value = ret[1] if isinstance(ret, list) and len(ret) >= 2 and ret[0] else ""
             return f"Item {param_name}: {info_value if info_value else '(not set)'}"
     else:
         raise Exception(f"Failed to get/set item string info: {result.get('error', 'Unknown error')}")
@@ -250,7 +251,8 @@ async def get_set_media_item_take_info_string(item_index: int, take_index: int,
         if set_value:
             return f"Set take {param_name} to: {value}"
         else:
-            info_value = result.get("ret", "")
+            ret = result.get("ret", [])
+            info_value = ret[1] if isinstance(ret, list) and len(ret) >= 2 and ret[0] else ""
             return f"Take {param_name}: {info_value if info_value else '(not set)'}"
     else:
         raise Exception(f"Failed to get/set take string info: {result.get('error', 'Unknown error')}")
@@ -6,6 +6,8 @@ This module contains tools for MIDI operations.
 
 from typing import Optional, List
 from ..bridge import bridge
+from ..midi_events import read_midi_events
+from ..result_stream import StreamError
 
 
 # ============================================================================
@@ -254,18 +256,22 @@ async def midi_select_all(item_index: int = 0, take_index: int = 0) -> str:
 
 async def midi_get_all_events(item_index: int = 0, take_index: int = 0) -> str:
     """Get all MIDI events from a take"""
-    # Note: MIDI_GetAllEvts returns binary data that cannot be easily transferred via JSON
-    # For now, we'll just count the events instead
-    result = await bridge.call_lua("GetItemTakeAndCountMIDI", [item_index, take_index])
-    
-    if result.get("ok"):
-        notes = result.get("notes", 0)
-        ccs = result.get("cc", 0)
-        text_events = result.get("text", 0)
-        total_events = notes + ccs + text_events
-        return f"MIDI events data: {total_events} total events (notes={notes}, CCs={ccs}, text={text_events})"
-    else:
-        raise Exception(f"Failed to get MIDI events: {result.get('error', 'Unknown error')}")
+    # The whole MIDI_GetAllEvts buffer, streamed and decoded in one go
+    try:
+        midi = await read_midi_events(bridge, item_index, take_index)
+    except StreamError as e:
+        raise Exception(f"Failed to get MIDI events: {e}")
+    
+    notes = len(midi.notes)
+    ccs = len(midi.ccs)
+    other = len(midi.other)
+    summary = (f"MIDI events data: {notes + ccs + other} total events "
+               f"(notes={notes}, CCs={ccs}, other={other})")
+    if notes:
+        pitches = midi.notes.pitch
+        summary += (f", pitch range {min(pitches)}-{max(pitches)}, "
+                    f"notes from ppq {midi.notes.start_ppq[0]} to {max(midi.notes.end_ppq)}")
+    return summary
 
 
 async def midi_get_scale(item_index: int = 0, take_index: int = 0) -> str:
@@ -319,7 +325,8 @@ async def get_midi_input_name(input_index: int) -> str:
     
     if result.get("ok"):
         # The function returns success and the name as a string
-        name = result.get("ret", "Unknown")
+        ret = result.get("ret", [])
+        name = ret[1] if isinstance(ret, list) and len(ret) >= 2 and ret[0] else "Unknown"
         return f"MIDI input {input_index}: {name}"
     else:
         raise Exception(f"Failed to get MIDI input name: {result.get('error', 'Unknown error')}")
@@ -331,7 +338,8 @@ async def get_midi_output_name(output_index: int) -> str:
     
     if result.get("ok"):
         # The function returns success and the name as a string
-        name = result.get("ret", "Unknown")
+        ret = result.get("ret", [])
+        name = ret[1] if isinstance(ret, list) and len(ret) >= 2 and ret[0] else "Unknown"
         return f"MIDI output {output_index}: {name}"
     else:
         raise Exception(f"Failed to get MIDI output name: {result.get('error', 'Unknown error')}")
@@ -7,127 +7,66 @@ and generation - particularly useful for AI agents creating musical content.
 
 from typing import List, Dict, Any, Optional, Tuple
 from ..bridge import bridge
+from ..midi_events import PPQ_PER_QUARTER, MidiEventBuffer, write_midi_events
+from ..midi_analysis import MidiAnalysisError, TakeAnalysis, midi_analysis, note_name
 
 
 # ============================================================================
 # MIDI Pattern Analysis
 # ============================================================================
 
+async def _analysis(item_index: int, take_index: int) -> TakeAnalysis:
+    """Cached analysis of a take; only a hash probe while the take is unchanged"""
+    try:
+        return await midi_analysis.get(bridge, item_index, take_index)
+    except MidiAnalysisError as e:
+        raise Exception(f"Failed to analyze take {take_index} of item {item_index}: {e}")
+
+
 async def analyze_midi_pattern(item_index: int, take_index: int) -> str:
     """Analyze patterns in MIDI data (rhythm, melody, harmony)"""
-    # Use the combined bridge function
-    result = await bridge.call_lua("AnalyzeMIDIPattern", [item_index, take_index])
-    
-    if result.get("ok"):
-        analysis = result.get("analysis")
-        if analysis:
-            return analysis
-        else:
-            notes_analyzed = result.get("notes_analyzed", 0)
-            pitch_range = result.get("pitch_range", 0)
-            pattern_type = result.get("pattern_type", "unknown")
-            avg_velocity = result.get("avg_velocity", 0)
-            
-            return (f"MIDI pattern analysis:\n"
-                    f"  Notes analyzed: {notes_analyzed}\n"
-                    f"  Pitch range: {pitch_range} semitones\n"
-                    f"  Pattern type: {pattern_type}\n"
-                    f"  Average velocity: {avg_velocity:.0f}")
-    else:
-        raise Exception(f"Failed to analyze MIDI pattern: {result.get('error', 'Unknown error')}")
+    analysis = await _analysis(item_index, take_index)
+    pattern = analysis.pattern
+    
+    if not pattern["notes_analyzed"]:
+        return "No notes to analyze"
+    
+    return (f"MIDI pattern analysis:\n"
+            f"  Notes analyzed: {pattern['notes_analyzed']}\n"
+            f"  Pitch range: {pattern['pitch_range']} semitones "
+            f"({note_name(pattern['lowest'])}-{note_name(pattern['highest'])})\n"
+            f"  Pattern type: {pattern['pattern_type']}\n"
+            f"  Average velocity: {pattern['avg_velocity']:.0f}\n"
+            f"  Key: {analysis.key['key']}")
 
 
 async def detect_midi_chord_progressions(item_index: int, take_index: int) -> str:
     """Detect chord progressions in MIDI data"""
-    # Use the combined bridge function
-    result = await bridge.call_lua("DetectMIDIChordProgressions", [item_index, take_index])
+    analysis = await _analysis(item_index, take_index)
+    chords = analysis.chords
     
-    if result.get("ok"):
-        progression = result.get("progression")
-        if progression:
-            return progression
-        else:
-            chords_detected = result.get("chords_detected", 0)
-            notes_analyzed = result.get("notes_analyzed", 0)
-            chord_list = result.get("chord_list", [])
-            
-            if chord_list:
-                return f"Detected chord progression:\n" + " → ".join(chord_list[:8])
-            else:
-                return f"Analyzed {notes_analyzed} notes, found {chords_detected} chords but no clear progression"
-    else:
-        raise Exception(f"Failed to detect chord progressions: {result.get('error', 'Unknown error')}")
+    if not chords:
+        return f"Analyzed {len(analysis.notes)} notes, no clear chord progression detected"
+    
+    names = [chord["name"] for chord in chords[:16]]
+    more = f" (+{len(chords) - 16} more)" if len(chords) > 16 else ""
+    return f"Detected chord progression:\n" + " → ".join(names) + more
 
 
 async def analyze_midi_rhythm_pattern(item_index: int, take_index: int) -> str:
     """Analyze rhythmic patterns in MIDI"""
-    # Get take
-    take_result = await bridge.call_lua("GetTake", [item_index, take_index])
-    if not take_result.get("ok") or not take_result.get("ret"):
-        raise Exception(f"Failed to get take {take_index} from item {item_index}")
-    
-    take = take_result.get("ret")
-    
-    # Get tempo for PPQ conversion
-    tempo_result = await bridge.call_lua("Master_GetTempo", [])
-    tempo = tempo_result.get("ret", 120) if tempo_result.get("ok") else 120
-    
-    # Get notes
-    count_result = await bridge.call_lua("MIDI_CountEvts", [take])
-    if not count_result.get("ok"):
-        return "Failed to count MIDI events"
-    
-    notes = count_result.get("notes", 0)
-    
-    # Collect note timings
-    note_times = []
-    for i in range(min(notes, 100)):  # Analyze up to 100 notes
-        note_result = await bridge.call_lua("MIDI_GetNote", [take, i])
-        if note_result.get("ok"):
-            start_ppq = note_result.get("startppqpos", 0)
-            note_times.append(start_ppq)
+    rhythm = (await _analysis(item_index, take_index)).rhythm
     
-    if len(note_times) < 2:
+    if rhythm["onsets"] < 2:
         return "Not enough notes for rhythm analysis"
     
-    # Calculate intervals
-    intervals = []
-    for i in range(1, len(note_times)):
-        intervals.append(note_times[i] - note_times[i-1])
-    
-    # Find common intervals (rhythm pattern)
-    ppq_per_quarter = 960  # Standard MIDI PPQ
-    
-    # Categorize intervals
-    rhythm_types = {
-        "16th": 0,
-        "8th": 0,
-        "quarter": 0,
-        "half": 0,
-        "whole": 0
-    }
-    
-    for interval in intervals:
-        if interval < ppq_per_quarter * 0.3:
-            rhythm_types["16th"] += 1
-        elif interval < ppq_per_quarter * 0.6:
-            rhythm_types["8th"] += 1
-        elif interval < ppq_per_quarter * 1.5:
-            rhythm_types["quarter"] += 1
-        elif interval < ppq_per_quarter * 3:
-            rhythm_types["half"] += 1
-        else:
-            rhythm_types["whole"] += 1
-    
-    # Find dominant rhythm
-    dominant = max(rhythm_types.items(), key=lambda x: x[1])
-    
+    bins = rhythm["bins"]
     return (f"Rhythm pattern analysis:\n"
-            f"  Notes analyzed: {len(note_times)}\n"
-            f"  Dominant rhythm: {dominant[0]} notes\n"
-            f"  16th notes: {rhythm_types['16th']}\n"
-            f"  8th notes: {rhythm_types['8th']}\n"
-            f"  Quarter notes: {rhythm_types['quarter']}")
+            f"  Notes analyzed: {rhythm['notes']} ({rhythm['onsets']} onsets)\n"
+            f"  Dominant rhythm: {rhythm['dominant']} notes\n"
+            f"  16th notes: {bins['16th']}\n"
+            f"  8th notes: {bins['8th']}\n"
+            f"  Quarter notes: {bins['quarter']}")
 
 
 # ============================================================================
@@ -138,13 +77,6 @@ async def generate_midi_scale(item_index: int, take_index: int,
                             root_note: int, scale_type: str, 
                             octaves: int = 1, note_length: float = 0.25) -> str:
     """Generate a musical scale in MIDI"""
-    # Get take
-    take_result = await bridge.call_lua("GetTake", [item_index, take_index])
-    if not take_result.get("ok") or not take_result.get("ret"):
-        raise Exception(f"Failed to get take {take_index} from item {item_index}")
-    
-    take = take_result.get("ret")
-    
     # Define scale intervals
     scales = {
         "major": [0, 2, 4, 5, 7, 9, 11],
@@ -161,9 +93,8 @@ async def generate_midi_scale(item_index: int, take_index: int,
     intervals = scales[scale_type]
     
     # Generate notes
-    ppq_per_quarter = 960
+    events = MidiEventBuffer()
     current_pos = 0
-    notes_added = 0
     
     for octave in range(octaves):
         for interval in intervals:
@@ -171,26 +102,17 @@ async def generate_midi_scale(item_index: int, take_index: int,
             if pitch > 127:  # MIDI pitch limit
                 break
             
-            # Insert note
-            result = await bridge.call_lua("MIDI_InsertNote", [
-                take,
-                False,  # selected
-                False,  # muted
-                current_pos,  # startppqpos
-                current_pos + (note_length * ppq_per_quarter),  # endppqpos
-                0,  # channel
-                pitch,
-                80,  # velocity
-                False  # noSort
-            ])
-            
-            if result.get("ok"):
-                notes_added += 1
-            
-            current_pos += note_length * ppq_per_quarter
-    
-    # Sort notes
-    await bridge.call_lua("MIDI_Sort", [take])
+            events.add_note(current_pos, current_pos + note_length * PPQ_PER_QUARTER,
+                            pitch, velocity=80)
+            current_pos += note_length * PPQ_PER_QUARTER
+    
+    # Write all notes in one bridge call
+    result = await write_midi_events(bridge, item_index, take_index, events,
+                                     undo="Generate MIDI scale")
+    if not result.get("ok"):
+        raise Exception(f"Failed to write scale to take {take_index} of item {item_index}: "
+                        f"{result.get('error', 'Unknown error')}")
+    notes_added = events.notes
     
     note_names = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
     root_name = note_names[root_note % 12]
@@ -216,13 +138,6 @@ async def generate_midi_chord_sequence(item_index: int, take_index: int,
 async def generate_midi_drum_pattern(item_index: int, take_index: int,
                                    pattern: str, bars: int = 4) -> str:
     """Generate a drum pattern in MIDI"""
-    # Get take
-    take_result = await bridge.call_lua("GetTake", [item_index, take_index])
-    if not take_result.get("ok") or not take_result.get("ret"):
-        raise Exception(f"Failed to get take {take_index} from item {item_index}")
-    
-    take = take_result.get("ret")
-    
     # GM drum map
     drums = {
         "kick": 36,
@@ -259,37 +174,28 @@ async def generate_midi_drum_pattern(item_index: int, take_index: int,
         return f"Unknown pattern. Available: {', '.join(patterns.keys())}"
     
     selected_pattern = patterns[pattern]
-    ppq_per_quarter = 960
-    notes_added = 0
+    events = MidiEventBuffer()
     
     # Generate pattern for specified bars
     for bar in range(bars):
-        bar_offset = bar * 4 * ppq_per_quarter  # 4 quarters per bar
+        bar_offset = bar * 4 * PPQ_PER_QUARTER  # 4 quarters per bar
         
         for drum, positions in selected_pattern.items():
             if drum in drums:
                 pitch = drums[drum]
                 
                 for pos in positions:
-                    ppq_pos = int(bar_offset + pos * ppq_per_quarter)
-                    
-                    result = await bridge.call_lua("MIDI_InsertNote", [
-                        take,
-                        False,  # selected
-                        False,  # muted
-                        ppq_pos,  # startppqpos
-                        ppq_pos + 100,  # endppqpos (short for drums)
-                        9,  # channel 10 for drums
-                        pitch,
-                        100,  # velocity
-                        False  # noSort
-                    ])
-                    
-                    if result.get("ok"):
-                        notes_added += 1
-    
-    # Sort notes
-    await bridge.call_lua("MIDI_Sort", [take])
+                    ppq_pos = int(bar_offset + pos * PPQ_PER_QUARTER)
+                    # Short notes on channel 10 (index 9) for drums
+                    events.add_note(ppq_pos, ppq_pos + 100, pitch, velocity=100, channel=9)
+    
+    # Write the whole pattern in one bridge call
+    result = await write_midi_events(bridge, item_index, take_index, events,
+                                     undo="Generate MIDI drum pattern")
+    if not result.get("ok"):
+        raise Exception(f"Failed to write drum pattern to take {take_index} of item {item_index}: "
+                        f"{result.get('error', 'Unknown error')}")
+    notes_added = events.notes
     
     return f"Generated {pattern} drum pattern: {notes_added} notes over {bars} bars"
 
@@ -362,51 +268,32 @@ async def humanize_midi_timing(item_index: int, take_index: int,
 
 async def get_midi_note_distribution(item_index: int, take_index: int) -> str:
     """Get distribution of notes across pitch range"""
-    # Use the combined bridge function
-    result = await bridge.call_lua("GetMIDINoteDistribution", [item_index, take_index])
-    
-    if result.get("ok"):
-        notes_total = result.get("notes_total", 0)
-        distribution = result.get("distribution", [])
-        avg_velocity = result.get("avg_velocity", 0)
-        
-        if not distribution:
-            return "No notes found"
-        
-        note_names = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
-        
-        dist_lines = []
-        for item in distribution[:10]:  # Top 10
-            pitch = item.get("pitch", 60)
-            count = item.get("count", 0)
-            note_name = note_names[pitch % 12]
-            octave = pitch // 12 - 1
-            percentage = (count / notes_total) * 100 if notes_total > 0 else 0
-            dist_lines.append(f"  {note_name}{octave}: {count} ({percentage:.1f}%)")
-        
-        return (f"MIDI note distribution ({notes_total} total notes):\n" + 
-                "\n".join(dist_lines) + 
-                f"\n  Average velocity: {avg_velocity:.0f}")
-    else:
-        raise Exception(f"Failed to get MIDI note distribution: {result.get('error', 'Unknown error')}")
+    result = (await _analysis(item_index, take_index)).distribution
+    notes_total = result["notes_total"]
+    distribution = result["distribution"]
+    
+    if not distribution:
+        return "No notes found"
+    
+    dist_lines = []
+    for item in distribution[:10]:  # Top 10
+        count = item["count"]
+        percentage = (count / notes_total) * 100 if notes_total > 0 else 0
+        dist_lines.append(f"  {note_name(item['pitch'])}: {count} ({percentage:.1f}%)")
+    
+    return (f"MIDI note distribution ({notes_total} total notes):\n" + 
+            "\n".join(dist_lines) + 
+            f"\n  Average velocity: {result['avg_velocity']:.0f}")
 
 
 async def detect_midi_key_signature(item_index: int, take_index: int) -> str:
     """Attempt to detect the key signature of MIDI content"""
-    # Use the combined bridge function
-    result = await bridge.call_lua("DetectMIDIKeySignature", [item_index, take_index])
+    key = (await _analysis(item_index, take_index)).key
     
-    if result.get("ok"):
-        key = result.get("key", "Unknown")
-        confidence = result.get("confidence", 0)
-        notes_analyzed = result.get("notes_analyzed", 0)
-        
-        if notes_analyzed == 0:
-            return "No notes found to analyze"
-        
-        return f"Detected key: {key} (confidence: {confidence:.0f}%)"
-    else:
-        raise Exception(f"Failed to detect key signature: {result.get('error', 'Unknown error')}")
+    if key["notes_analyzed"] == 0:
+        return "No notes found to analyze"
+    
+    return f"Detected key: {key['key']} (confidence: {max(key['confidence'], 0):.0f}%)"
 
 
 # ============================================================================
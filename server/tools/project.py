@@ -6,6 +6,7 @@ This module contains tools for managing REAPER projects.
 
 from typing import Optional
 from ..bridge import bridge
+from ..tempo_map import edit_tempo_map
 
 
 # ============================================================================
@@ -96,7 +97,9 @@ async def enum_projects() -> str:
         # Get all open projects
         while True:
             proj_result = await bridge.call_lua("EnumProjects", [index])
-            if not proj_result.get("ok") or not proj_result.get("ret"):
+            ret = proj_result.get("ret")
+            project = ret[0] if isinstance(ret, list) and ret else ret
+            if not proj_result.get("ok") or not project:
                 break
                 
             # Get project name
@@ -200,7 +203,7 @@ async def set_project_tempo(tempo: float, position: Optional[float] = None) -> s
         pos_result = await bridge.call_lua("GetCursorPosition", [])
         position = pos_result.get("ret", 0.0) if pos_result.get("ok") else 0.0
     
-    result = await bridge.call_lua("SetTempoTimeSigMarker", [0, -1, position, -1, -1, tempo, 0, 0, True])
+    result = await edit_tempo_map(bridge, "SetTempoTimeSigMarker", [0, -1, position, -1, -1, tempo, 0, 0, True])
     
     if result.get("ok"):
         return f"Set project tempo to {tempo:.2f} BPM"
@@ -235,7 +238,7 @@ async def set_project_time_signature(numerator: int, denominator: int, position:
         pos_result = await bridge.call_lua("GetCursorPosition", [])
         position = pos_result.get("ret", 0.0) if pos_result.get("ok") else 0.0
     
-    result = await bridge.call_lua("SetTempoTimeSigMarker", [0, -1, position, -1, -1, -1, numerator, denominator, False])
+    result = await edit_tempo_map(bridge, "SetTempoTimeSigMarker", [0, -1, position, -1, -1, -1, numerator, denominator, False])
     
     if result.get("ok"):
         return f"Set time signature to {numerator}/{denominator}"
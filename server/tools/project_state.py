@@ -7,6 +7,8 @@ and extended state management.
 
 from typing import Optional, Any
 from ..bridge import bridge
+from ..result_stream import StreamError, stream_result
+from ..rpp_chunk import ChunkError, diff_chunks, parse_chunk, plan_patches, read_track_chunk, set_track_chunk
 
 
 # ============================================================================
@@ -336,7 +338,7 @@ async def get_all_project_play_states(project_index: int = 0) -> str:
 
 
 # ============================================================================
-# State Chunk Operations (6 tools)
+# State Chunk Operations (7 tools)
 # ============================================================================
 
 async def get_track_state_chunk(track_index: int, flags: int = 0) -> str:
@@ -348,44 +350,52 @@ async def get_track_state_chunk(track_index: int, flags: int = 0) -> str:
     
     track_handle = track_result.get("ret")
     
-    # Get state chunk
-    result = await bridge.call_lua("GetTrackStateChunk", [track_handle, "", 65536, False])
-    
-    if result.get("ok"):
-        ret = result.get("ret", [])
-        if isinstance(ret, list) and len(ret) >= 2:
-            retval, chunk = ret[:2]
-            if retval:
-                lines = chunk.split('\n')
-                return f"Track state chunk ({len(lines)} lines)"
-            else:
-                return "Failed to get track state chunk"
-        else:
-            return "Failed to get track state chunk"
-    else:
-        raise Exception(f"Failed to get track state chunk: {result.get('error', 'Unknown error')}")
+    # Stream the chunk and count its lines page by page
+    stream = stream_result(bridge, "GetTrackStateChunk", [track_handle, "", 65536, False], item=1)
+    try:
+        # Base64 pages arrive as bytes
+        newlines = sum([page.count(b"\n" if isinstance(page, bytes) else "\n")
+                        async for page in stream])
+    except StreamError as e:
+        raise Exception(f"Failed to get track state chunk: {e}")
+    if not stream.total:
+        return "Failed to get track state chunk"
+    return f"Track state chunk ({newlines + 1} lines)"
 
 
 async def set_track_state_chunk(track_index: int, chunk: str, undo: bool = True) -> str:
-    """Set track state chunk (restore configuration from text)"""
-    # Get track
-    track_result = await bridge.call_lua("GetTrack", [0, track_index])
-    if not track_result.get("ok") or not track_result.get("ret"):
-        raise Exception(f"Failed to find track at index {track_index}")
-    
-    track_handle = track_result.get("ret")
-    
-    # Set state chunk
-    result = await bridge.call_lua("SetTrackStateChunk", [track_handle, chunk, undo])
-    
-    if result.get("ok"):
-        success = result.get("ret", False)
-        if success:
-            return f"Set track state chunk"
-        else:
-            return "Failed to set track state chunk"
-    else:
-        raise Exception(f"Failed to set track state chunk: {result.get('error', 'Unknown error')}")
+    """Set track state chunk (reads the current chunk first, then sends only changed items/envelopes when possible)"""
+    try:
+        result = await set_track_chunk(bridge, track_index, chunk, undo)
+    except ChunkError as e:
+        raise Exception(f"Failed to set track state chunk: {e}")
+    
+    if result["mode"] == "unchanged":
+        return "Track state chunk unchanged"
+    if result["mode"] == "patched":
+        return f"Set track state chunk ({result['sub_chunks']} changed items/envelopes)"
+    return "Set track state chunk"
+
+
+async def diff_track_state_chunk(track_index: int, chunk: str, max_changes: int = 50) -> str:
+    """Compare a state chunk with the track's current chunk without applying it"""
+    try:
+        new = parse_chunk(chunk)
+        old = await read_track_chunk(bridge, track_index)
+    except ChunkError as e:
+        raise Exception(f"Failed to compare track state chunk: {e}")
+    
+    changes = diff_chunks(old, new)
+    if not changes:
+        return "Track state chunk unchanged"
+    
+    patches = plan_patches(old, new)
+    apply_mode = (f"{len(patches)} items/envelopes would be set" if patches
+                  else "the whole chunk would be set")
+    lines = [f"  {change}" for change in changes[:max_changes]]
+    if len(changes) > max_changes:
+        lines.append(f"  ... {len(changes) - max_changes} more")
+    return f"{len(changes)} changes ({apply_mode}):\n" + "\n".join(lines)
 
 
 async def get_item_state_chunk(item_index: int, flags: int = 0) -> str:
@@ -453,22 +463,17 @@ async def get_envelope_state_chunk(track_index: int, envelope_name: str, flags:
     
     env_handle = env_result.get("ret")
     
-    # Get state chunk
-    result = await bridge.call_lua("GetEnvelopeStateChunk", [env_handle, "", 65536, False])
-    
-    if result.get("ok"):
-        ret = result.get("ret", [])
-        if isinstance(ret, list) and len(ret) >= 2:
-            retval, chunk = ret[:2]
-            if retval:
-                lines = chunk.split('\n')
-                return f"Envelope state chunk ({len(lines)} lines)"
-            else:
-                return "Failed to get envelope state chunk"
-        else:
-            return "Failed to get envelope state chunk"
-    else:
-        raise Exception(f"Failed to get envelope state chunk: {result.get('error', 'Unknown error')}")
+    # Stream the chunk and count its lines page by page
+    stream = stream_result(bridge, "GetEnvelopeStateChunk", [env_handle, "", 65536, False], item=1)
+    try:
+        # Base64 pages arrive as bytes
+        newlines = sum([page.count(b"\n" if isinstance(page, bytes) else "\n")
+                        async for page in stream])
+    except StreamError as e:
+        raise Exception(f"Failed to get envelope state chunk: {e}")
+    if not stream.total:
+        return "Failed to get envelope state chunk"
+    return f"Envelope state chunk ({newlines + 1} lines)"
 
 
 async def set_envelope_state_chunk(track_index: int, envelope_name: str, chunk: str, undo: bool = True) -> str:
@@ -538,6 +543,7 @@ def register_project_state_tools(mcp) -> int:
         # State Chunk Operations
         (get_track_state_chunk, "Get track state chunk (configuration as text)"),
         (set_track_state_chunk, "Set track state chunk (restore configuration from text)"),
+        (diff_track_state_chunk, "Compare a state chunk with the track's current chunk"),
         (get_item_state_chunk, "Get media item state chunk"),
         (set_item_state_chunk, "Set media item state chunk"),
         (get_envelope_state_chunk, "Get envelope state chunk"),
@@ -7,6 +7,7 @@ analyzing song structure, sections, and navigation points.
 
 from typing import Optional, Tuple
 from ..bridge import bridge
+from ..tempo_map import edit_tempo_map
 
 
 # ============================================================================
@@ -233,7 +234,7 @@ async def add_tempo_time_sig_marker(position: float, bpm: float, time_sig_num: i
 
 async def delete_tempo_time_sig_marker(marker_index: int) -> str:
     """Delete a tempo/time signature marker"""
-    result = await bridge.call_lua("DeleteTempoTimeSigMarker", [0, marker_index])
+    result = await edit_tempo_map(bridge, "DeleteTempoTimeSigMarker", [0, marker_index])
     
     if result.get("ok"):
         success = result.get("ret", False)
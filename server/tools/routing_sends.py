@@ -192,7 +192,8 @@ async def get_set_track_send_info_string(track_index: int, category: int, send_i
             category_name = ["Send", "Receive", "Hardware output"][category]
             return f"Set {category_name} {send_index} {param_name} to: {value}"
         else:
-            info_value = result.get("ret", "")
+            ret = result.get("ret", [])
+            info_value = ret[1] if isinstance(ret, list) and len(ret) >= 2 and ret[0] else ""
             category_name = ["Send", "Receive", "Hardware output"][category]
             return f"{category_name} {send_index} {param_name}: {info_value if info_value else '(not set)'}"
     else:
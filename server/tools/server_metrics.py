@@ -0,0 +1,47 @@
+"""
+Server metrics tool for REAPER MCP
+
+Always registered regardless of profile: reports which MCP tools and which
+bridge (Lua) functions are hot, slow or failing in the current session.
+"""
+
+import json
+
+from ..bridge import bridge
+from ..metrics import server_metrics
+from ..midi_analysis import midi_analysis
+
+SORT_KEYS = ("count", "errors", "timeouts", "p50_ms", "p95_ms", "p99_ms", "max_ms",
+             "bytes_sent", "bytes_received")
+
+
+async def get_server_metrics(top: int = 20, sort_by: str = "count", reset: bool = False) -> str:
+    """Call counts, errors and latency percentiles per MCP tool and per bridge function"""
+    if sort_by not in SORT_KEYS:
+        raise Exception(f"sort_by must be one of: {', '.join(SORT_KEYS)}")
+
+    report = server_metrics.snapshot(top=top, sort_by=sort_by)
+    report["bridge_round_trip"] = bridge.get_latency_stats()
+    report["transport"] = getattr(bridge.transport, "name", type(bridge.transport).__name__)
+    report["bridge_health"] = bridge.liveness.snapshot()
+    report["circuit"] = bridge.breaker.snapshot()
+    report["learned_timeouts"] = bridge.timeouts.snapshot()
+    report["midi_analysis_cache"] = midi_analysis.stats()
+    if reset:
+        server_metrics.reset()
+        bridge.latency.reset()
+    return json.dumps(report, indent=2)
+
+
+def register_server_metrics_tools(mcp) -> int:
+    """Register the server metrics tool with the MCP instance"""
+    mcp.tool(
+        name="get_server_metrics",
+        description=(
+            "Server performance metrics: calls, errors, timeouts, bytes and p50/p95/p99 "
+            "latency per MCP tool and per REAPER bridge function. sort_by: count, errors, "
+            "timeouts, p50_ms, p95_ms, p99_ms, max_ms, bytes_sent or bytes_received. "
+            "reset=true clears the counters after reporting."
+        )
+    )(get_server_metrics)
+    return 1
@@ -1,7 +1,7 @@
 """Tempo and time management tools for music production."""
 
 from typing import Dict, Any, List, Optional, Tuple
-from .bridge_sync import ReaperBridge
+from .bridge_sync import ReaperBridge, sync_tool
 
 
 def get_master_tempo() -> Dict[str, Any]:
@@ -386,15 +386,6 @@ def parse_time_string(time_string: str) -> Dict[str, Any]:
 
 def register_tempo_time_tools(mcp):
     """Register tempo and time management tools with MCP server."""
-    from functools import wraps
-    
-    # Helper to wrap sync functions for async
-    def async_wrapper(func):
-        @wraps(func)
-        async def wrapper(**kwargs):
-            return func(**kwargs)
-        return wrapper
-    
     # Register all tempo/time tools
     tool_functions = [
         ("get_master_tempo", get_master_tempo),
@@ -421,7 +412,7 @@ def register_tempo_time_tools(mcp):
             mcp.tool(
                 name=tool_name,
                 description=tool_def["description"]
-            )(async_wrapper(tool_func))
+            )(sync_tool(tool_func))
     
     return len(tool_functions)
 
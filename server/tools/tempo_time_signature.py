@@ -7,6 +7,15 @@ and musical time calculations in REAPER projects.
 
 from typing import Optional, Tuple, List
 from ..bridge import bridge
+from ..tempo_map import TempoMap, TempoMapError, current_tempo_map, edit_tempo_map
+
+
+async def _tempo_map() -> TempoMap:
+    """Local tempo map for conversions; one change count probe while the project is unchanged"""
+    try:
+        return await current_tempo_map(bridge)
+    except TempoMapError as e:
+        raise Exception(f"Failed to read tempo map: {e}")
 
 
 # ============================================================================
@@ -42,7 +51,7 @@ async def set_project_tempo(tempo: float, position: Optional[float] = None) -> s
         position = cursor_result.get("ret", 0.0)
     
     # Set tempo using tempo/time signature marker
-    result = await bridge.call_lua("SetTempoTimeSigMarker", [
+    result = await edit_tempo_map(bridge, "SetTempoTimeSigMarker", [
         0,      # project
         -1,     # marker index (-1 = insert new)
         position,
@@ -66,13 +75,8 @@ async def set_project_tempo(tempo: float, position: Optional[float] = None) -> s
 
 async def get_tempo_at_time(time: float) -> str:
     """Get tempo at specific time position"""
-    result = await bridge.call_lua("TimeMap_GetDividedBpmAtTime", [time])
-    
-    if result.get("ok"):
-        bpm = result.get("ret", 120.0)
-        return f"Tempo at {time:.3f} seconds: {bpm:.2f} BPM"
-    else:
-        raise Exception(f"Failed to get tempo at time: {result.get('error', 'Unknown error')}")
+    bpm = (await _tempo_map()).divided_tempo_at(time)
+    return f"Tempo at {time:.3f} seconds: {bpm:.2f} BPM"
 
 
 async def count_tempo_markers() -> str:
@@ -108,7 +112,7 @@ async def get_tempo_marker_info(index: int) -> str:
 
 async def delete_tempo_marker(index: int) -> str:
     """Delete a tempo/time signature marker"""
-    result = await bridge.call_lua("DeleteTempoTimeSigMarker", [0, index])
+    result = await edit_tempo_map(bridge, "DeleteTempoTimeSigMarker", [0, index])
     
     if result.get("ok"):
         success = result.get("ret", False)
@@ -155,30 +159,11 @@ async def update_timeline_for_tempo_changes() -> str:
 
 async def get_time_signature_at_time(time: float) -> str:
     """Get time signature at specific time"""
-    # Find tempo marker at time
-    find_result = await bridge.call_lua("FindTempoTimeSigMarker", [0, time])
-    if not find_result.get("ok"):
-        raise Exception("Failed to find tempo marker")
-    
-    index = find_result.get("ret", -1)
-    if index < 0:
-        return "No time signature defined at this position (using project default)"
-    
-    # Get marker info
-    result = await bridge.call_lua("GetTempoTimeSigMarker", [0, index])
-    
-    if result.get("ok"):
-        ret = result.get("ret", [])
-        if isinstance(ret, list) and len(ret) >= 7:
-            retval, timepos, measurepos, beatpos, bpm, timesig_num, timesig_denom = ret[:7]
-            if retval:
-                return f"Time signature at {time:.3f} seconds: {timesig_num}/{timesig_denom}"
-            else:
-                return "Failed to get time signature"
-        else:
-            return "Invalid time signature data"
-    else:
-        raise Exception(f"Failed to get time signature: {result.get('error', 'Unknown error')}")
+    tempo_map = await _tempo_map()
+    num, denom = tempo_map.time_sig_at(time)
+    if not any(m["time"] <= time and m.get("num") for m in tempo_map.markers):
+        return f"Time signature at {time:.3f} seconds: {num}/{denom} (project default)"
+    return f"Time signature at {time:.3f} seconds: {num}/{denom}"
 
 
 async def set_time_signature(numerator: int, denominator: int, position: Optional[float] = None) -> str:
@@ -198,7 +183,7 @@ async def set_time_signature(numerator: int, denominator: int, position: Optiona
     tempo = tempo_result.get("ret", 120.0)
     
     # Set time signature using tempo/time signature marker
-    result = await bridge.call_lua("SetTempoTimeSigMarker", [
+    result = await edit_tempo_map(bridge, "SetTempoTimeSigMarker", [
         0,      # project
         -1,     # marker index (-1 = insert new)
         position,
@@ -224,7 +209,7 @@ async def add_tempo_time_sig_change(position: float, tempo: float,
                                    numerator: int, denominator: int, 
                                    linear_tempo: bool = False) -> str:
     """Add tempo and time signature change at position"""
-    result = await bridge.call_lua("SetTempoTimeSigMarker", [
+    result = await edit_tempo_map(bridge, "SetTempoTimeSigMarker", [
         0,      # project
         -1,     # marker index (-1 = insert new)
         position,
@@ -250,87 +235,29 @@ async def add_tempo_time_sig_change(position: float, tempo: float,
 
 async def get_measure_info(measure_index: int) -> str:
     """Get information about a specific measure"""
-    # Get measure info
-    result = await bridge.call_lua("TimeMap_GetMeasureInfo", [0, measure_index])
+    if measure_index < 0:
+        return f"No measure at index {measure_index}"
     
-    if result.get("ok"):
-        ret = result.get("ret", [])
-        if isinstance(ret, list) and len(ret) >= 5:
-            retval, qn_start, qn_end, timesig_num, timesig_denom = ret[:5]
-            if retval >= 0:
-                # Convert QN to time
-                time_start_result = await bridge.call_lua("TimeMap2_QNToTime", [0, qn_start])
-                time_end_result = await bridge.call_lua("TimeMap2_QNToTime", [0, qn_end])
-                
-                if time_start_result.get("ok") and time_end_result.get("ok"):
-                    time_start = time_start_result.get("ret", 0.0)
-                    time_end = time_end_result.get("ret", 0.0)
-                    duration = time_end - time_start
-                    
-                    return (f"Measure {measure_index}: {timesig_num}/{timesig_denom} time, "
-                           f"starts at {time_start:.3f}s, duration {duration:.3f}s")
-                else:
-                    return f"Measure {measure_index}: {timesig_num}/{timesig_denom} time"
-            else:
-                return f"No measure at index {measure_index}"
-        else:
-            return "Failed to get measure info"
-    else:
-        raise Exception(f"Failed to get measure info: {result.get('error', 'Unknown error')}")
+    tempo_map = await _tempo_map()
+    qn_start = tempo_map.measure_to_qn(measure_index)
+    info = tempo_map.qn_to_measure(qn_start)
+    time_start = tempo_map.qn_to_time(info["start_qn"])
+    duration = tempo_map.qn_to_time(info["end_qn"]) - time_start
+    
+    return (f"Measure {measure_index}: {info['num']}/{info['denom']} time, "
+           f"starts at {time_start:.3f}s, duration {duration:.3f}s")
 
 
 async def beats_to_time(beats: float, measures: int = 0) -> str:
     """Convert beats (and measures) to time position"""
-    # Calculate total quarter notes
-    # First get time signature at start
-    timesig_result = await bridge.call_lua("TimeMap_GetMeasureInfo", [0, measures])
-    if timesig_result.get("ok") and isinstance(timesig_result.get("ret"), list):
-        ret = timesig_result.get("ret")
-        if len(ret) >= 5:
-            _, qn_start, _, timesig_num, timesig_denom = ret[:5]
-            
-            # Calculate quarter notes for the beats
-            qn_per_beat = 4.0 / timesig_denom
-            total_qn = qn_start + (beats * qn_per_beat)
-            
-            # Convert to time
-            result = await bridge.call_lua("TimeMap2_QNToTime", [0, total_qn])
-            
-            if result.get("ok"):
-                time = result.get("ret", 0.0)
-                return f"{measures} measures + {beats:.2f} beats = {time:.3f} seconds"
-            else:
-                raise Exception("Failed to convert QN to time")
-        else:
-            raise Exception("Invalid measure data")
-    else:
-        raise Exception("Failed to get measure info")
+    time = (await _tempo_map()).beats_to_time(measures, beats)
+    return f"{measures} measures + {beats:.2f} beats = {time:.3f} seconds"
 
 
 async def time_to_beats(time: float) -> str:
     """Convert time position to beats and measures"""
-    # Convert time to QN
-    qn_result = await bridge.call_lua("TimeMap2_timeToQN", [time])
-    if not qn_result.get("ok"):
-        raise Exception("Failed to convert time to QN")
-    
-    qn = qn_result.get("ret", 0.0)
-    
-    # Get measure and beat info
-    result = await bridge.call_lua("TimeMap_QNToMeasures", [0, qn])
-    
-    if result.get("ok"):
-        ret = result.get("ret", [])
-        if isinstance(ret, list) and len(ret) >= 2:
-            retval, measures, cml, fullbeats, cdenom = ret[:5] if len(ret) >= 5 else ret + [0, 0, 0]
-            if retval >= 0:
-                return f"{time:.3f} seconds = Measure {measures+1}, Beat {fullbeats+1:.2f}"
-            else:
-                return f"Failed to calculate measures/beats for {time:.3f} seconds"
-        else:
-            return "Invalid beat calculation data"
-    else:
-        raise Exception(f"Failed to convert time to beats: {result.get('error', 'Unknown error')}")
+    measure, beat = (await _tempo_map()).time_to_beats(time)
+    return f"{time:.3f} seconds = Measure {measure+1}, Beat {beat+1:.2f}"
 
 
 # ============================================================================
@@ -339,72 +266,26 @@ async def time_to_beats(time: float) -> str:
 
 async def quarter_notes_to_time(quarter_notes: float) -> str:
     """Convert quarter note position to time"""
-    result = await bridge.call_lua("TimeMap2_QNToTime", [0, quarter_notes])
-    
-    if result.get("ok"):
-        time = result.get("ret", 0.0)
-        return f"{quarter_notes:.3f} quarter notes = {time:.3f} seconds"
-    else:
-        raise Exception(f"Failed to convert QN to time: {result.get('error', 'Unknown error')}")
+    time = (await _tempo_map()).qn_to_time(quarter_notes)
+    return f"{quarter_notes:.3f} quarter notes = {time:.3f} seconds"
 
 
 async def time_to_quarter_notes(time: float) -> str:
     """Convert time to quarter note position"""
-    result = await bridge.call_lua("TimeMap2_timeToQN", [time])
-    
-    if result.get("ok"):
-        qn = result.get("ret", 0.0)
-        return f"{time:.3f} seconds = {qn:.3f} quarter notes"
-    else:
-        raise Exception(f"Failed to convert time to QN: {result.get('error', 'Unknown error')}")
+    qn = (await _tempo_map()).time_to_qn(time)
+    return f"{time:.3f} seconds = {qn:.3f} quarter notes"
 
 
 async def calculate_beat_time(beat: float, measure: int = 0) -> str:
     """Calculate time position of a specific beat in a measure"""
-    # Get measure info
-    measure_result = await bridge.call_lua("TimeMap_GetMeasureInfo", [0, measure])
-    if not measure_result.get("ok"):
-        raise Exception("Failed to get measure info")
-    
-    ret = measure_result.get("ret", [])
-    if not isinstance(ret, list) or len(ret) < 5:
-        raise Exception("Invalid measure data")
-    
-    _, qn_start, _, timesig_num, timesig_denom = ret[:5]
-    
-    # Calculate quarter notes for the beat
-    qn_per_beat = 4.0 / timesig_denom
-    beat_qn = qn_start + ((beat - 1) * qn_per_beat)  # beat is 1-based
-    
-    # Convert to time
-    result = await bridge.call_lua("TimeMap2_QNToTime", [0, beat_qn])
-    
-    if result.get("ok"):
-        time = result.get("ret", 0.0)
-        return f"Measure {measure+1}, Beat {beat} = {time:.3f} seconds"
-    else:
-        raise Exception(f"Failed to calculate beat time: {result.get('error', 'Unknown error')}")
+    time = (await _tempo_map()).beats_to_time(measure, beat - 1)  # beat is 1-based
+    return f"Measure {measure+1}, Beat {beat} = {time:.3f} seconds"
 
 
 async def get_measure_from_beat(beat_position: float) -> str:
-    """Get measure number from absolute beat position"""
-    # Assuming 4/4 time for simplicity (would need to iterate through tempo map for accuracy)
-    qn = beat_position - 1.0  # Convert to 0-based quarter notes
-    
-    result = await bridge.call_lua("TimeMap_QNToMeasures", [0, qn])
-    
-    if result.get("ok"):
-        ret = result.get("ret", [])
-        if isinstance(ret, list) and len(ret) >= 2:
-            retval, measures = ret[:2]
-            if retval >= 0:
-                return f"Beat {beat_position:.2f} is in measure {measures + 1}"
-            else:
-                return f"Failed to calculate measure for beat {beat_position}"
-        else:
-            return "Invalid measure data"
-    else:
-        raise Exception(f"Failed to get measure from beat: {result.get('error', 'Unknown error')}")
+    """Get measure number from absolute beat position (1-based quarter notes)"""
+    info = (await _tempo_map()).qn_to_measure(beat_position - 1.0)
+    return f"Beat {beat_position:.2f} is in measure {info['measure'] + 1}"
 
 
 async def align_time_to_grid(time: float, grid_division: str = "1/4") -> str:
@@ -420,25 +301,8 @@ async def align_time_to_grid(time: float, grid_division: str = "1/4") -> str:
     }
     
     grid_qn = grid_map.get(grid_division, 0.25) * 4.0  # Convert to quarter notes
-    
-    # Convert time to QN
-    qn_result = await bridge.call_lua("TimeMap2_timeToQN", [time])
-    if not qn_result.get("ok"):
-        raise Exception("Failed to convert time to QN")
-    
-    qn = qn_result.get("ret", 0.0)
-    
-    # Align to grid
-    aligned_qn = round(qn / grid_qn) * grid_qn
-    
-    # Convert back to time
-    result = await bridge.call_lua("TimeMap2_QNToTime", [0, aligned_qn])
-    
-    if result.get("ok"):
-        aligned_time = result.get("ret", 0.0)
-        return f"Aligned {time:.3f}s to {grid_division} grid: {aligned_time:.3f}s"
-    else:
-        raise Exception(f"Failed to align to grid: {result.get('error', 'Unknown error')}")
+    aligned_time = (await _tempo_map()).snap_times([time], grid_qn)[0]
+    return f"Aligned {time:.3f}s to {grid_division} grid: {aligned_time:.3f}s"
 
 
 async def get_loop_time_range() -> str:
@@ -451,34 +315,16 @@ async def get_loop_time_range() -> str:
             start_time, end_time = ret[:2]
             
             # Convert to musical time
-            start_qn_result = await bridge.call_lua("TimeMap2_timeToQN", [start_time])
-            end_qn_result = await bridge.call_lua("TimeMap2_timeToQN", [end_time])
+            tempo_map = await _tempo_map()
+            start_qn, end_qn = tempo_map.times_to_qn([start_time, end_time])
+            duration_qn = end_qn - start_qn
+            start = tempo_map.qn_to_measure(start_qn)
+            end = tempo_map.qn_to_measure(end_qn)
             
-            if start_qn_result.get("ok") and end_qn_result.get("ok"):
-                start_qn = start_qn_result.get("ret", 0.0)
-                end_qn = end_qn_result.get("ret", 0.0)
-                duration_qn = end_qn - start_qn
-                
-                # Get measure info
-                start_measure_result = await bridge.call_lua("TimeMap_QNToMeasures", [0, start_qn])
-                end_measure_result = await bridge.call_lua("TimeMap_QNToMeasures", [0, end_qn])
-                
-                if start_measure_result.get("ok") and end_measure_result.get("ok"):
-                    start_ret = start_measure_result.get("ret", [])
-                    end_ret = end_measure_result.get("ret", [])
-                    
-                    if len(start_ret) >= 4 and len(end_ret) >= 4:
-                        _, start_measure, _, start_beat = start_ret[:4]
-                        _, end_measure, _, end_beat = end_ret[:4]
-                        
-                        return (f"Loop: {start_time:.3f}s to {end_time:.3f}s "
-                               f"(Measure {start_measure+1}.{start_beat+1:.1f} to "
-                               f"Measure {end_measure+1}.{end_beat+1:.1f}, "
-                               f"{duration_qn:.2f} quarter notes)")
-                
-                return f"Loop: {start_time:.3f}s to {end_time:.3f}s ({duration_qn:.2f} quarter notes)"
-            else:
-                return f"Loop: {start_time:.3f}s to {end_time:.3f}s"
+            return (f"Loop: {start_time:.3f}s to {end_time:.3f}s "
+                   f"(Measure {start['measure']+1}.{start['beat']+1:.1f} to "
+                   f"Measure {end['measure']+1}.{end['beat']+1:.1f}, "
+                   f"{duration_qn:.2f} quarter notes)")
         else:
             return "No time selection/loop"
     else:
@@ -487,37 +333,9 @@ async def get_loop_time_range() -> str:
 
 async def set_loop_to_measures(start_measure: int, end_measure: int) -> str:
     """Set loop points to specific measures"""
-    # Get start measure info
-    start_result = await bridge.call_lua("TimeMap_GetMeasureInfo", [0, start_measure])
-    if not start_result.get("ok"):
-        raise Exception("Failed to get start measure info")
-    
-    start_ret = start_result.get("ret", [])
-    if not isinstance(start_ret, list) or len(start_ret) < 2:
-        raise Exception("Invalid start measure data")
-    
-    _, start_qn = start_ret[:2]
-    
-    # Get end measure info
-    end_result = await bridge.call_lua("TimeMap_GetMeasureInfo", [0, end_measure])
-    if not end_result.get("ok"):
-        raise Exception("Failed to get end measure info")
-    
-    end_ret = end_result.get("ret", [])
-    if not isinstance(end_ret, list) or len(end_ret) < 2:
-        raise Exception("Invalid end measure data")
-    
-    _, end_qn = end_ret[:2]
-    
-    # Convert to time
-    start_time_result = await bridge.call_lua("TimeMap2_QNToTime", [0, start_qn])
-    end_time_result = await bridge.call_lua("TimeMap2_QNToTime", [0, end_qn])
-    
-    if not (start_time_result.get("ok") and end_time_result.get("ok")):
-        raise Exception("Failed to convert measures to time")
-    
-    start_time = start_time_result.get("ret", 0.0)
-    end_time = end_time_result.get("ret", 0.0)
+    tempo_map = await _tempo_map()
+    start_time = tempo_map.beats_to_time(start_measure)
+    end_time = tempo_map.beats_to_time(end_measure)
     
     # Set loop
     result = await bridge.call_lua("GetSet_LoopTimeRange", [True, True, start_time, end_time, False])
@@ -563,22 +381,8 @@ async def calculate_tempo_from_selection() -> str:
 
 async def get_tempo_map_points(start_time: float = 0.0, end_time: float = 300.0) -> str:
     """Get all tempo changes in time range"""
-    # Count tempo markers
-    count_result = await bridge.call_lua("CountTempoTimeSigMarkers", [0])
-    if not count_result.get("ok"):
-        raise Exception("Failed to count tempo markers")
-    
-    count = count_result.get("ret", 0)
-    tempo_points = []
-    
-    for i in range(count):
-        marker_result = await bridge.call_lua("GetTempoTimeSigMarker", [0, i])
-        if marker_result.get("ok"):
-            ret = marker_result.get("ret", [])
-            if isinstance(ret, list) and len(ret) >= 5:
-                retval, timepos, measurepos, beatpos, bpm = ret[:5]
-                if retval and start_time <= timepos <= end_time:
-                    tempo_points.append((timepos, bpm, measurepos))
+    tempo_points = [(m["time"], m["bpm"], m["measure"]) for m in (await _tempo_map()).markers
+                    if start_time <= m["time"] <= end_time]
     
     if tempo_points:
         result = "Tempo map points:\n"
@@ -604,7 +408,7 @@ async def smooth_tempo_transition(start_time: float, end_time: float,
         time = start_time + (i * time_step)
         bpm = start_bpm + (i * bpm_step)
         
-        result = await bridge.call_lua("SetTempoTimeSigMarker", [
+        result = await edit_tempo_map(bridge, "SetTempoTimeSigMarker", [
             0,      # project
             -1,     # marker index (-1 = insert new)
             time,
@@ -646,7 +450,7 @@ async def clear_tempo_map(start_time: float = 0.0, end_time: Optional[float] = N
                 retval, timepos = ret[:2]
                 if retval and start_time <= timepos <= end_time:
                     # Delete this marker
-                    del_result = await bridge.call_lua("DeleteTempoTimeSigMarker", [0, i])
+                    del_result = await edit_tempo_map(bridge, "DeleteTempoTimeSigMarker", [0, i])
                     if del_result.get("ok") and del_result.get("ret"):
                         deleted += 1
     
@@ -655,29 +459,18 @@ async def clear_tempo_map(start_time: float = 0.0, end_time: Optional[float] = N
 
 async def export_tempo_map() -> str:
     """Export tempo map as text"""
-    # Count tempo markers
-    count_result = await bridge.call_lua("CountTempoTimeSigMarkers", [0])
-    if not count_result.get("ok"):
-        raise Exception("Failed to count tempo markers")
-    
-    count = count_result.get("ret", 0)
-    if count == 0:
+    markers = (await _tempo_map()).markers
+    if not markers:
         return "No tempo markers in project"
     
     tempo_map = "Tempo Map Export:\n"
     tempo_map += "Time (s) | Measure | Beat | BPM | Time Sig | Type\n"
     tempo_map += "-" * 50 + "\n"
     
-    for i in range(count):
-        marker_result = await bridge.call_lua("GetTempoTimeSigMarker", [0, i])
-        if marker_result.get("ok"):
-            ret = marker_result.get("ret", [])
-            if isinstance(ret, list) and len(ret) >= 8:
-                retval, timepos, measurepos, beatpos, bpm, timesig_num, timesig_denom, lineartempo = ret[:8]
-                if retval:
-                    tempo_type = "Linear" if lineartempo else "Jump"
-                    tempo_map += (f"{timepos:8.3f} | {measurepos:7d} | {beatpos:4.1f} | "
-                                 f"{bpm:6.2f} | {timesig_num:2d}/{timesig_denom:<2d} | {tempo_type}\n")
+    for m in markers:
+        tempo_type = "Linear" if m["linear"] else "Jump"
+        tempo_map += (f"{m['time']:8.3f} | {int(m['measure']):7d} | {m['beat']:4.1f} | "
+                     f"{m['bpm']:6.2f} | {int(m['num']):2d}/{int(m['denom']):<2d} | {tempo_type}\n")
     
     return tempo_map.rstrip()
 
@@ -7,6 +7,15 @@ tempo markers, time mapping, and beat/time conversions.
 
 from typing import Optional, Tuple, List, Any, Dict
 from ..bridge import bridge
+from ..tempo_map import TempoMap, TempoMapError, current_tempo_map, edit_tempo_map
+
+
+async def _tempo_map() -> TempoMap:
+    """Local tempo map for conversions; one change count probe while the project is unchanged"""
+    try:
+        return await current_tempo_map(bridge)
+    except TempoMapError as e:
+        raise Exception(f"Failed to read tempo map: {e}")
 
 
 # ============================================================================
@@ -16,8 +25,8 @@ from ..bridge import bridge
 async def add_tempo_time_sig_marker(time: float, bpm: float, time_sig_num: int, 
                                   time_sig_denom: int, linear_tempo: bool = False) -> str:
     """Add tempo/time signature marker"""
-    result = await bridge.call_lua("AddTempoTimeSigMarker", 
-                                 [0, time, bpm, time_sig_num, time_sig_denom, linear_tempo])
+    result = await edit_tempo_map(bridge, "AddTempoTimeSigMarker", 
+                                        [0, time, bpm, time_sig_num, time_sig_denom, linear_tempo])
     
     if result.get("ok"):
         success = result.get("ret", False)
@@ -31,7 +40,7 @@ async def add_tempo_time_sig_marker(time: float, bpm: float, time_sig_num: int,
 
 async def delete_tempo_time_sig_marker(marker_index: int) -> str:
     """Delete tempo/time signature marker"""
-    result = await bridge.call_lua("DeleteTempoTimeSigMarker", [0, marker_index])
+    result = await edit_tempo_map(bridge, "DeleteTempoTimeSigMarker", [0, marker_index])
     
     if result.get("ok"):
         success = result.get("ret", False)
@@ -81,9 +90,9 @@ async def set_tempo_time_sig_marker(marker_index: int, time: Optional[float] = N
     linear_tempo = linear_tempo if linear_tempo is not None else False
     
     # Set marker
-    result = await bridge.call_lua("SetTempoTimeSigMarker", 
-                                 [0, marker_index, time, measure_start, beat_start, 
-                                  bpm, time_sig_num, time_sig_denom, linear_tempo])
+    result = await edit_tempo_map(bridge, "SetTempoTimeSigMarker", 
+                                        [0, marker_index, time, measure_start, beat_start, 
+                                         bpm, time_sig_num, time_sig_denom, linear_tempo])
     
     if result.get("ok"):
         success = result.get("ret", False)
@@ -102,7 +111,8 @@ async def get_tempo_match_play_rate(source_time: float, srcstart: float, srclen:
                                  [source_time, srcstart, srclen, targetstart])
     
     if result.get("ok"):
-        play_rate = result.get("ret", 1.0)
+        ret = result.get("ret", [])
+        play_rate = ret[1] if isinstance(ret, list) and len(ret) >= 2 else 1.0
         percentage = (play_rate - 1.0) * 100
         sign = "+" if percentage >= 0 else ""
         return f"Tempo match play rate: {play_rate:.4f} ({sign}{percentage:.1f}%)"
@@ -127,83 +137,50 @@ async def count_tempo_time_sig_markers() -> str:
 
 async def time_map2_beats_to_time(beats: float, measure: Optional[int] = None) -> str:
     """Convert beats to time using TimeMap2"""
-    result = await bridge.call_lua("TimeMap2_beatsToTime", [0, beats, measure])
-    
-    if result.get("ok"):
-        time = result.get("ret", 0.0)
-        if measure is not None:
-            return f"{beats:.3f} beats (from measure {measure}) = {time:.3f} seconds"
-        else:
-            return f"{beats:.3f} beats = {time:.3f} seconds"
+    tempo_map = await _tempo_map()
+    if measure is not None:
+        time = tempo_map.beats_to_time(measure, beats)
+        return f"{beats:.3f} beats (from measure {measure}) = {time:.3f} seconds"
     else:
-        raise Exception(f"Failed to convert beats to time: {result.get('error', 'Unknown error')}")
+        time = tempo_map.qn_to_time(tempo_map.beats_to_qn(beats))
+        return f"{beats:.3f} beats = {time:.3f} seconds"
 
 
 async def time_map2_time_to_beats(time: float) -> str:
     """Convert time to beats using TimeMap2"""
-    result = await bridge.call_lua("TimeMap2_timeToBeats", [0, time])
-    
-    if result.get("ok"):
-        ret = result.get("ret", [])
-        if isinstance(ret, list) and len(ret) >= 3:
-            beats, measures, cml = ret[:3]
-            return f"{time:.3f}s = {beats:.3f} beats (measure {measures+1}, {cml:.3f} beats in measure)"
-        else:
-            return f"Failed to convert {time:.3f}s to beats"
-    else:
-        raise Exception(f"Failed to convert time to beats: {result.get('error', 'Unknown error')}")
+    tempo_map = await _tempo_map()
+    info = tempo_map.qn_to_measure(tempo_map.time_to_qn(time))
+    return (f"{time:.3f}s = {info['beat']:.3f} beats "
+            f"(measure {info['measure']+1}, {info['num']:.3f} beats in measure)")
 
 
 async def time_map2_get_divided_bpm_at_time(time: float) -> str:
     """Get divided BPM at time using TimeMap2"""
-    result = await bridge.call_lua("TimeMap2_GetDividedBpmAtTime", [0, time])
-    
-    if result.get("ok"):
-        ret = result.get("ret", [])
-        if isinstance(ret, list) and len(ret) >= 3:
-            bpm, num, denom = ret[:3]
-            return f"BPM at {time:.3f}s: {bpm:.2f} ({num}/{denom} time signature)"
-        else:
-            return f"Failed to get BPM at {time:.3f}s"
-    else:
-        raise Exception(f"Failed to get divided BPM: {result.get('error', 'Unknown error')}")
+    tempo_map = await _tempo_map()
+    num, denom = tempo_map.time_sig_at(time)
+    return f"BPM at {time:.3f}s: {tempo_map.divided_tempo_at(time):.2f} ({num}/{denom} time signature)"
 
 
 async def time_map2_get_next_change_time(time: float) -> str:
     """Get next tempo change time using TimeMap2"""
-    result = await bridge.call_lua("TimeMap2_GetNextChangeTime", [0, time])
-    
-    if result.get("ok"):
-        next_time = result.get("ret", -1.0)
-        if next_time >= 0:
-            delta = next_time - time
-            return f"Next tempo change after {time:.3f}s: at {next_time:.3f}s (+{delta:.3f}s)"
-        else:
-            return f"No tempo changes after {time:.3f}s"
+    next_time = (await _tempo_map()).next_change_time(time)
+    if next_time is not None:
+        delta = next_time - time
+        return f"Next tempo change after {time:.3f}s: at {next_time:.3f}s (+{delta:.3f}s)"
     else:
-        raise Exception(f"Failed to get next change time: {result.get('error', 'Unknown error')}")
+        return f"No tempo changes after {time:.3f}s"
 
 
 async def time_map2_qn_to_time(qn: float) -> str:
     """Convert quarter notes to time using TimeMap2"""
-    result = await bridge.call_lua("TimeMap2_QNToTime", [0, qn])
-    
-    if result.get("ok"):
-        time = result.get("ret", 0.0)
-        return f"{qn:.3f} quarter notes = {time:.3f} seconds"
-    else:
-        raise Exception(f"Failed to convert QN to time: {result.get('error', 'Unknown error')}")
+    time = (await _tempo_map()).qn_to_time(qn)
+    return f"{qn:.3f} quarter notes = {time:.3f} seconds"
 
 
 async def time_map2_time_to_qn(time: float) -> str:
     """Convert time to quarter notes using TimeMap2"""
-    result = await bridge.call_lua("TimeMap2_timeToQN", [0, time])
-    
-    if result.get("ok"):
-        qn = result.get("ret", 0.0)
-        return f"{time:.3f} seconds = {qn:.3f} quarter notes"
-    else:
-        raise Exception(f"Failed to convert time to QN: {result.get('error', 'Unknown error')}")
+    qn = (await _tempo_map()).time_to_qn(time)
+    return f"{time:.3f} seconds = {qn:.3f} quarter notes"
 
 
 # ============================================================================
@@ -212,28 +189,15 @@ async def time_map2_time_to_qn(time: float) -> str:
 
 async def time_map_get_time_sig_at_time(time: float) -> str:
     """Get time signature at time"""
-    result = await bridge.call_lua("TimeMap_GetTimeSigAtTime", [0, time])
-    
-    if result.get("ok"):
-        ret = result.get("ret", [])
-        if isinstance(ret, list) and len(ret) >= 3:
-            num, denom, tempo = ret[:3]
-            return f"Time signature at {time:.3f}s: {num}/{denom} ({tempo:.2f} BPM)"
-        else:
-            return f"Failed to get time signature at {time:.3f}s"
-    else:
-        raise Exception(f"Failed to get time signature: {result.get('error', 'Unknown error')}")
+    tempo_map = await _tempo_map()
+    num, denom = tempo_map.time_sig_at(time)
+    return f"Time signature at {time:.3f}s: {num}/{denom} ({tempo_map.tempo_at(time):.2f} BPM)"
 
 
 async def time_map_qn_to_time(qn: float) -> str:
     """Convert quarter notes to time"""
-    result = await bridge.call_lua("TimeMap_QNToTime", [qn])
-    
-    if result.get("ok"):
-        time = result.get("ret", 0.0)
-        return f"{qn:.3f} quarter notes = {time:.3f} seconds"
-    else:
-        raise Exception(f"Failed to convert QN to time: {result.get('error', 'Unknown error')}")
+    time = (await _tempo_map()).qn_to_time(qn)
+    return f"{qn:.3f} quarter notes = {time:.3f} seconds"
 
 
 async def time_map_qn_to_time_abs(qn: float) -> str:
@@ -249,13 +213,8 @@ async def time_map_qn_to_time_abs(qn: float) -> str:
 
 async def time_map_time_to_qn(time: float) -> str:
     """Convert time to quarter notes"""
-    result = await bridge.call_lua("TimeMap_timeToQN", [time])
-    
-    if result.get("ok"):
-        qn = result.get("ret", 0.0)
-        return f"{time:.3f} seconds = {qn:.3f} quarter notes"
-    else:
-        raise Exception(f"Failed to convert time to QN: {result.get('error', 'Unknown error')}")
+    qn = (await _tempo_map()).time_to_qn(time)
+    return f"{time:.3f} seconds = {qn:.3f} quarter notes"
 
 
 async def time_map_time_to_qn_abs(time: float) -> str:
@@ -271,48 +230,25 @@ async def time_map_time_to_qn_abs(time: float) -> str:
 
 async def time_map_qn_to_measures(qn: float) -> str:
     """Convert quarter notes to measures"""
-    result = await bridge.call_lua("TimeMap_QNToMeasures", [0, qn])
-    
-    if result.get("ok"):
-        ret = result.get("ret", [])
-        if isinstance(ret, list) and len(ret) >= 3:
-            measures, qn_start, qn_end = ret[:3]
-            return f"{qn:.3f} QN = measure {measures+1} (QN range: {qn_start:.3f}-{qn_end:.3f})"
-        else:
-            return f"Failed to convert {qn:.3f} QN to measures"
-    else:
-        raise Exception(f"Failed to convert QN to measures: {result.get('error', 'Unknown error')}")
+    info = (await _tempo_map()).qn_to_measure(qn)
+    return (f"{qn:.3f} QN = measure {info['measure']+1} "
+            f"(QN range: {info['start_qn']:.3f}-{info['end_qn']:.3f})")
 
 
 async def time_map_get_measure_info(time: float) -> str:
     """Get measure information at time position"""
-    result = await bridge.call_lua("TimeMap_GetMeasureInfo", [0, time])
-    
-    if result.get("ok"):
-        ret = result.get("ret", [])
-        if isinstance(ret, list) and len(ret) >= 4:
-            measure, measure_start_qn, measure_end_qn, measure_start_time = ret[:4]
-            length_qn = measure_end_qn - measure_start_qn
-            return f"Time {time:.3f}s is in measure {measure+1} (starts at {measure_start_time:.3f}s, {length_qn:.3f} QN long)"
-        else:
-            return f"Failed to get measure info at {time:.3f}s"
-    else:
-        raise Exception(f"Failed to get measure info: {result.get('error', 'Unknown error')}")
+    tempo_map = await _tempo_map()
+    info = tempo_map.qn_to_measure(tempo_map.time_to_qn(time))
+    measure_start_time = tempo_map.qn_to_time(info["start_qn"])
+    length_qn = info["end_qn"] - info["start_qn"]
+    return f"Time {time:.3f}s is in measure {info['measure']+1} (starts at {measure_start_time:.3f}s, {length_qn:.3f} QN long)"
 
 
 async def time_map_get_divided_bpm_at_time(time: float) -> str:
     """Get divided BPM at time"""
-    result = await bridge.call_lua("TimeMap_GetDividedBpmAtTime", [time])
-    
-    if result.get("ok"):
-        ret = result.get("ret", [])
-        if isinstance(ret, list) and len(ret) >= 3:
-            bpm, num, denom = ret[:3]
-            return f"BPM at {time:.3f}s: {bpm:.2f} ({num}/{denom} time signature)"
-        else:
-            return f"Failed to get BPM at {time:.3f}s"
-    else:
-        raise Exception(f"Failed to get divided BPM: {result.get('error', 'Unknown error')}")
+    tempo_map = await _tempo_map()
+    num, denom = tempo_map.time_sig_at(time)
+    return f"BPM at {time:.3f}s: {tempo_map.divided_tempo_at(time):.2f} ({num}/{denom} time signature)"
 
 
 async def time_map_cur_frame_rate() -> str:
@@ -351,7 +287,7 @@ async def time_map_get_metronome_pattern(time: float) -> str:
 
 async def edit_tempo_time_sig_marker(marker_index: int) -> str:
     """Open edit dialog for tempo/time signature marker"""
-    result = await bridge.call_lua("EditTempoTimeSigMarker", [0, marker_index])
+    result = await edit_tempo_map(bridge, "EditTempoTimeSigMarker", [0, marker_index])
     
     if result.get("ok"):
         success = result.get("ret", False)
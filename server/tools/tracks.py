@@ -7,6 +7,8 @@ Organized into logical groups for better maintainability.
 
 from typing import Optional, Tuple
 from ..bridge import bridge
+from ..result_stream import StreamError, stream_result
+from ..rpp_chunk import ChunkError, set_track_chunk
 import math
 
 
@@ -909,29 +911,26 @@ async def get_track_state_chunk(track_index: int = 0) -> str:
     
     track_handle = track_result.get("ret")
     
-    # Get state chunk
-    result = await bridge.call_lua("GetTrackStateChunk", [track_handle, "", 0])
-    if result.get("ok") and result.get("chunk"):
-        return result.get("chunk", "")
+    # Get state chunk (streamed; chunks with many items or FX get large)
+    try:
+        chunk = await stream_result(bridge, "GetTrackStateChunk",
+                                    [track_handle, "", False], item=1).collect()
+    except StreamError:
+        chunk = ""
+    if chunk:
+        return chunk
     
     raise Exception("Failed to get track state chunk")
 
 
 async def set_track_state_chunk(track_index: int, chunk: str) -> str:
     """Set the state chunk of a track"""
-    # Get track
-    track_result = await bridge.call_lua("GetTrack", [0, track_index])
-    if not track_result.get("ok") or not track_result.get("ret"):
-        raise Exception(f"Failed to find track at index {track_index}")
-    
-    track_handle = track_result.get("ret")
-    
-    # Set state chunk
-    result = await bridge.call_lua("SetTrackStateChunk", [track_handle, chunk, 0])
-    if result.get("ok"):
-        return "Successfully set track state chunk"
-    
-    raise Exception("Failed to set track state chunk")
+    # Changed items and envelopes are set on their own; other edits set the whole chunk
+    try:
+        await set_track_chunk(bridge, track_index, chunk, undo=False)
+    except ChunkError as e:
+        raise Exception(f"Failed to set track state chunk: {e}")
+    return "Successfully set track state chunk"
 
 
 async def get_track_midi_note_name(track_index: int, pitch: int, channel: int = 0) -> str:
@@ -201,7 +201,8 @@ async def get_take_video_fx_count(item_index: int, take_index: int) -> str:
     for i in range(fx_count):
         name_result = await bridge.call_lua("TakeFX_GetFXName", [take, i])
         if name_result.get("ok"):
-            fx_name = name_result.get("ret", "")
+            ret = name_result.get("ret", [])
+            fx_name = ret[1] if isinstance(ret, list) and len(ret) >= 2 else ""
             if "video" in fx_name.lower() or "vfx" in fx_name.lower():
                 video_fx_count += 1
     
@@ -0,0 +1,238 @@
+"""
+ReaScript call tracing
+
+Replaces the synchronous per-call log appends in the bridge. Recording a
+call only appends a small event to an in-memory ring buffer and a pending
+queue; a background thread serialises pending events and appends them to
+the log file in batches, so tracing costs the event loop microseconds
+instead of two file opens per call.
+
+- Sampling: a tool invocation (span) is kept or dropped as a whole;
+  failed calls are always kept.
+- Truncation: args and responses are cut to a maximum JSON length.
+- Spans: tool invocations group their bridge calls through a context
+  variable, so concurrent tools never see each other's calls.
+
+Configured from the environment:
+
+    REASCRIPT_LOGGING=1              enable tracing
+    REASCRIPT_LOG_FILE=path          JSON lines output (/tmp/reascript_calls.jsonl)
+    REASCRIPT_TRACE_SAMPLE=0.1       fraction of spans/calls to keep (1.0)
+    REASCRIPT_TRACE_MAX_PAYLOAD=512  max characters per args/response field
+"""
+
+import atexit
+import contextvars
+import functools
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOG_FILE = '/tmp/reascript_calls.jsonl'
+
+
+class Span:
+    """One tool invocation; the bridge calls made inside it share its id"""
+
+    __slots__ = ("name", "span_id", "sampled", "start", "calls", "errors")
+
+    def __init__(self, name: str, span_id: int, sampled: bool):
+        self.name = name
+        self.span_id = span_id
+        self.sampled = sampled
+        self.start = time.time()
+        self.calls = 0
+        self.errors = 0
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = \
+    contextvars.ContextVar("reascript_trace_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """Span of the tool running in this context, if any"""
+    return _current_span.get()
+
+
+def _truncate(value: Any, limit: int) -> Any:
+    """JSON-encode a value, cutting it to `limit` characters"""
+    try:
+        text = json.dumps(value, default=str)
+    except (TypeError, ValueError, RuntimeError):
+        return "<unserialisable>"
+    if len(text) <= limit:
+        return value
+    return text[:limit] + f"...<{len(text) - limit} more>"
+
+
+class Tracer:
+    """Ring buffer of recent call events plus a batched background log writer"""
+
+    def __init__(self, log_file: Optional[Path] = None, enabled: bool = False,
+                 sample_rate: float = 1.0, max_payload: int = 512,
+                 buffer_size: int = 1000, flush_interval: float = 0.5,
+                 max_pending: int = 10000):
+        self.log_file = Path(log_file or DEFAULT_LOG_FILE)
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.max_payload = max_payload
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self.dropped = 0  # events lost because the writer fell behind
+        self.written = 0
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._span_ids = itertools.count(1)
+        self._wake = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        return cls(
+            log_file=Path(os.environ.get('REASCRIPT_LOG_FILE', DEFAULT_LOG_FILE)),
+            enabled=os.environ.get('REASCRIPT_LOGGING', '').lower() in ('1', 'true', 'yes'),
+            sample_rate=float(os.environ.get('REASCRIPT_TRACE_SAMPLE', '1.0')),
+            max_payload=int(os.environ.get('REASCRIPT_TRACE_MAX_PAYLOAD', '512')),
+        )
+
+    def _sample(self) -> bool:
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    # -- spans ----------------------------------------------------------------
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Optional[Span]]:
+        """Group the bridge calls made inside the block under one span"""
+        if not self.enabled:
+            yield None
+            return
+        span = Span(name, next(self._span_ids), self._sample())
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+            if span.sampled or span.errors:
+                self._emit({
+                    "timestamp": time.time(),
+                    "type": "span",
+                    "dsl_tool": name,
+                    "span_id": span.span_id,
+                    "calls": span.calls,
+                    "errors": span.errors,
+                    "duration_ms": (time.time() - span.start) * 1000,
+                })
+
+    def traced(self, func: Callable) -> Callable:
+        """Decorator running an async tool function inside a span"""
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with self.span(func.__name__):
+                return await func(*args, **kwargs)
+        return wrapper
+
+    # -- calls ----------------------------------------------------------------
+
+    def record_call(self, request_id: int, func_name: str, args: List[Any],
+                    response: Dict[str, Any], duration: float, kind: str = "response"):
+        """Record one finished bridge call (kind: response, timeout or error)"""
+        if not self.enabled:
+            return
+        span = _current_span.get()
+        failed = kind != "response" or not response.get("ok", False)
+        if span is not None:
+            span.calls += 1
+            span.errors += failed
+            sampled = span.sampled
+        else:
+            sampled = self._sample()
+        if not sampled and not failed:
+            return
+        self._emit({
+            "timestamp": time.time(),
+            "request_id": request_id,
+            "type": kind,
+            "function": func_name,
+            "args": args,
+            "response": response,
+            "duration_ms": duration * 1000,
+            "success": not failed,
+            "dsl_tool": span.name if span else "unknown",
+            "span_id": span.span_id if span else None,
+        })
+
+    def _emit(self, event: Dict[str, Any]):
+        self.recent.append(event)
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append(event)
+        if self._writer is None:
+            self._start_writer()
+
+    # -- writer ---------------------------------------------------------------
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is not None or self._closed:
+                return
+            self._writer = threading.Thread(target=self._run_writer, name="reascript-trace",
+                                            daemon=True)
+            self._writer.start()
+
+    def _run_writer(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _serialise(self, event: Dict[str, Any]) -> str:
+        event = dict(event)
+        for field in ("args", "response"):
+            if field in event:
+                event[field] = _truncate(event[field], self.max_payload)
+        try:
+            return json.dumps(event, default=str)
+        except (TypeError, ValueError, RuntimeError):
+            return json.dumps({k: v for k, v in event.items() if k not in ("args", "response")})
+
+    def flush(self):
+        """Write all pending events with a single append"""
+        with self._flush_lock:
+            lines = []
+            while self._pending:
+                lines.append(self._serialise(self._pending.popleft()))
+            if not lines:
+                return
+            try:
+                with open(self.log_file, 'a') as f:
+                    f.write('\n'.join(lines) + '\n')
+                self.written += len(lines)
+            except OSError as e:
+                logger.debug(f"Failed to write ReaScript trace: {e}")
+
+    def close(self):
+        """Stop the writer thread and write what is still pending"""
+        self._closed = True
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join(timeout=2.0)
+        self.flush()
+
+
+# Shared by the bridge and the tool registration code
+tracer = Tracer.from_env()
+atexit.register(tracer.close)
@@ -0,0 +1,459 @@
+"""
+Transports between the Python server and mcp_bridge.lua
+
+Two interchangeable transports sit behind ReaperFileBridge.call_lua:
+
+- FileTransport: the original request_N.json / response_N.json exchange
+  through BRIDGE_DIR. File ids grow without bound; a handshake on first use
+  clears leftovers of earlier sessions and resumes above the last id the
+  bridge has answered. Each session handshakes under its own id (above
+  HANDSHAKE_ID_BASE), and each request first claims its id with an
+  exclusive request_N.claim file, so servers sharing BRIDGE_DIR never write
+  the same request file.
+- SocketTransport: a persistent loopback TCP connection carrying
+  length-prefixed frames (4-byte big-endian length + payload). Payloads are
+  UTF-8 JSON, or MessagePack when the top bit of the length is set.
+
+Strings that are not valid UTF-8 arrive as bytes: base64 under a
+{"__base64": ...} marker in JSON, the bin type in MessagePack.
+
+Select one with REAPER_MCP_TRANSPORT=file|socket. The socket address comes
+from REAPER_MCP_SOCKET ("host:port"; the bridge listens on TCP only), the
+socket payload encoding from REAPER_MCP_CODEC=json|msgpack.
+"""
+
+import asyncio
+import base64
+import contextvars
+import json
+import logging
+import os
+import struct
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .file_watch import InotifyWatcher, wait_for_file
+from .metrics import count_io
+from . import msgpack_codec
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_ADDRESS = "127.0.0.1:9877"
+
+# Frame header: payload length as unsigned 32-bit big-endian; the top bit
+# marks a MessagePack payload
+FRAME_HEADER = struct.Struct(">I")
+MSGPACK_FLAG = 0x80000000
+MAX_FRAME_SIZE = 256 * 1024 * 1024
+
+CODECS = ("json", "msgpack")
+
+# Handshake file ids live above every request id; the bridge does not count
+# them as answered requests
+HANDSHAKE_ID_BASE = 1 << 40
+
+
+def _decode_binary(obj: Dict[str, Any]) -> Any:
+    """json object_hook turning the bridge's {"__base64": ...} marker into bytes"""
+    if len(obj) == 1 and "__base64" in obj:
+        return base64.b64decode(obj["__base64"])
+    return obj
+
+
+def decode_json(payload: bytes) -> Any:
+    """Decode a JSON payload written by the bridge"""
+    return json.loads(payload, object_hook=_decode_binary)
+
+
+def encode_payload(message: Dict[str, Any], codec: str = "json") -> bytes:
+    """Serialise a message body with the given codec"""
+    if codec == "msgpack":
+        return msgpack_codec.packb(message)
+    return json.dumps(message).encode("utf-8")
+
+
+def decode_payload(payload: bytes, msgpack: bool = False) -> Any:
+    """Decode a frame body (JSON unless `msgpack`)"""
+    if msgpack:
+        return msgpack_codec.unpackb(payload)
+    return decode_json(payload)
+
+
+def encode_frame(message: Dict[str, Any], codec: str = "json") -> bytes:
+    """Serialise a message as one length-prefixed frame"""
+    payload = encode_payload(message, codec)
+    flag = MSGPACK_FLAG if codec == "msgpack" else 0
+    return FRAME_HEADER.pack(len(payload) | flag) + payload
+
+
+async def read_frame_sized(reader: asyncio.StreamReader) -> Tuple[Dict[str, Any], int]:
+    """Read one length-prefixed frame; returns the decoded payload and the frame size"""
+    header = await reader.readexactly(FRAME_HEADER.size)
+    (length,) = FRAME_HEADER.unpack(header)
+    msgpack = bool(length & MSGPACK_FLAG)
+    length &= ~MSGPACK_FLAG
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame too large: {length} bytes")
+    payload = await reader.readexactly(length)
+    return decode_payload(payload, msgpack), FRAME_HEADER.size + length
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Dict[str, Any]:
+    """Read one length-prefixed frame and decode its payload"""
+    message, _ = await read_frame_sized(reader)
+    return message
+
+
+def parse_socket_address(address: str) -> Tuple[str, int]:
+    """Parse "host:port" into (host, port)"""
+    if address.startswith("unix:"):
+        raise ValueError(f"Unix sockets are not supported by the bridge: {address!r}")
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid socket address: {address!r}")
+    return host, int(port)
+
+
+class FileTransport:
+    """Request/response files in the bridge directory"""
+
+    name = "file"
+
+    # Request/response files older than this belong to a dead session
+    STALE_FILE_AGE = 30.0
+    HANDSHAKE_TIMEOUT = 2.0
+
+    def __init__(self, bridge_dir: Path):
+        self.bridge_dir = Path(bridge_dir)
+        self.session = uuid.uuid4().hex[:12]
+        self.handshake_id = HANDSHAKE_ID_BASE + int(self.session[:8], 16)
+        # One inotify watcher per event loop (a new asyncio.run, the sync
+        # tool fallback loop); None where inotify could not be started
+        self._watchers: Dict[asyncio.AbstractEventLoop, Optional[InotifyWatcher]] = {}
+        self._last_id = 0
+        self._handshake_task: Optional[asyncio.Task] = None
+
+    @property
+    def last_id(self) -> int:
+        """Id of the most recent request file"""
+        return self._last_id
+
+    def _get_watcher(self) -> Optional[InotifyWatcher]:
+        """Return the inotify watcher bound to the running loop, if any"""
+        if not InotifyWatcher.supported():
+            return None
+        loop = asyncio.get_running_loop()
+        if loop not in self._watchers:
+            # Release the watchers of loops that have gone away
+            for old_loop in [l for l in self._watchers if l.is_closed()]:
+                watcher = self._watchers.pop(old_loop)
+                if watcher is not None:
+                    watcher.close()
+            watcher = InotifyWatcher(self.bridge_dir)
+            self._watchers[loop] = watcher if watcher.start(loop) else None
+        return self._watchers[loop]
+
+    def discard_stale_files(self, max_age: Optional[float] = None) -> int:
+        """Delete request/response files left behind by earlier sessions"""
+        max_age = self.STALE_FILE_AGE if max_age is None else max_age
+        cutoff = time.time() - max_age
+        removed = 0
+        for pattern in ("request_*.json", "response_*.json", "*.json.tmp", "request_*.claim"):
+            for path in self.bridge_dir.glob(pattern):
+                try:
+                    if path.stat().st_mtime <= cutoff:
+                        path.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        if removed:
+            logger.info(f"Removed {removed} stale bridge files from {self.bridge_dir}")
+        return removed
+
+    async def _handshake(self):
+        """Resynchronise ids with the bridge after a (re)start of either side"""
+        self.discard_stale_files()
+        request = {"id": self.handshake_id, "func": "BridgeHandshake",
+                   "args": [self.session, self._last_id]}
+        response = await self._exchange(request, self.HANDSHAKE_TIMEOUT)
+        if response is None:
+            logger.warning("No handshake answer from the bridge; continuing without it")
+            return
+        last_id = response.get("last_id")
+        # Older bridge scripts answer "Unknown function"; ids still work there
+        if isinstance(last_id, (int, float)) and last_id > self._last_id:
+            self._last_id = int(last_id)
+
+    async def _ensure_handshake(self):
+        loop = asyncio.get_running_loop()
+        task = self._handshake_task
+        if task is None or (not task.done() and task.get_loop() is not loop):
+            # Fresh context: handshake traffic is not billed to the triggering call
+            task = self._handshake_task = contextvars.Context().run(
+                loop.create_task, self._handshake())
+        if not task.done():
+            await asyncio.shield(task)
+
+    async def _read_response(self, response_file: Path, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait for the response file and parse it; None on timeout"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        watcher = self._get_watcher()
+
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            if not await wait_for_file(response_file, remaining, watcher):
+                return None
+            try:
+                with open(response_file, 'rb') as f:
+                    data = f.read()
+                response = decode_json(data)
+                count_io(received=len(data))
+                return response
+            except (json.JSONDecodeError, UnicodeDecodeError, FileNotFoundError):
+                # File might be partially written, wait a bit
+                await asyncio.sleep(0.001)
+
+    async def _exchange(self, request_data: Dict[str, Any], timeout: float) -> Optional[Dict[str, Any]]:
+        request_id = request_data["id"]
+        request_file = self.bridge_dir / f"request_{request_id}.json"
+        response_file = self.bridge_dir / f"response_{request_id}.json"
+
+        # Write under a temporary name so the bridge never reads half a request
+        tmp_file = self.bridge_dir / f"request_{request_id}.json.tmp"
+        data = json.dumps(request_data).encode("utf-8")
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_file, request_file)
+        count_io(sent=len(data))
+
+        try:
+            response = await self._read_response(response_file, timeout)
+        finally:
+            request_file.unlink(missing_ok=True)
+        if response is not None:
+            response_file.unlink(missing_ok=True)
+        return response
+
+    async def request(self, request_data: Dict[str, Any], timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Send one request; returns the response or None on timeout.
+
+        File ids are the transport's own, so they stay unique across restarts.
+        request_data["id"] is rewritten in place, so the caller logs the id of
+        the file on disk.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        await self._ensure_handshake()
+
+        # Another server on the same directory may hold the next id: skip it
+        self._last_id += 1
+        while not self._claim(self._last_id):
+            self._last_id += 1
+        request_data["id"] = self._last_id
+        try:
+            return await self._exchange(request_data, max(0.0, deadline - loop.time()))
+        finally:
+            (self.bridge_dir / f"request_{request_data['id']}.claim").unlink(missing_ok=True)
+
+    def _claim(self, request_id: int) -> bool:
+        """Reserve a file id until its response is read; False if already taken"""
+        try:
+            fd = os.open(self.bridge_dir / f"request_{request_id}.claim",
+                         os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        os.close(fd)
+        return True
+
+    async def close(self):
+        for watcher in self._watchers.values():
+            if watcher is not None:
+                watcher.close()
+        self._watchers.clear()
+
+
+class SocketTransport:
+    """
+    Persistent socket connection to the bridge with length-prefixed frames.
+
+    Requests are pipelined: every caller gets a future keyed by request id,
+    frames submitted in the same event loop iteration are written together,
+    and a single reader task matches responses back to their futures. Many
+    concurrent calls (e.g. from asyncio.gather) are therefore answered in
+    one or two bridge ticks. Callers drain the writer only after their frame
+    has been written, and fail at once if the connection is lost first.
+    """
+
+    name = "socket"
+
+    # Seconds between reconnect attempts while the bridge is unreachable
+    RECONNECT_INTERVAL = 5.0
+
+    def __init__(self, address: str, fallback: Optional[FileTransport] = None,
+                 max_in_flight: int = 256, codec: str = "json"):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown bridge codec: {codec!r}")
+        self.address = address
+        self.codec = codec
+        self.host, self.port = parse_socket_address(address)
+        self.fallback = fallback
+        self.max_in_flight = max_in_flight
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[Any, asyncio.Future] = {}
+        self._outbox: list = []
+        self._flushed: Optional[asyncio.Future] = None  # done once the outbox is written or dropped
+        self._next_attempt = 0.0
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    @property
+    def in_flight(self) -> int:
+        """Requests sent but not yet answered"""
+        return len(self._pending)
+
+    def _bind_loop(self):
+        # Streams, locks and futures belong to one event loop; start over on a new one
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._connect_lock = asyncio.Lock()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._reader = self._writer = self._reader_task = None
+            self._pending = {}
+            self._outbox = []
+            self._flushed = None
+
+    async def _connect(self, timeout: float) -> bool:
+        async with self._connect_lock:
+            if self.connected:
+                return True
+            if time.monotonic() < self._next_attempt:
+                return False
+            try:
+                opener = asyncio.open_connection(self.host, self.port)
+                self._reader, self._writer = await asyncio.wait_for(opener, timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                self._next_attempt = time.monotonic() + self.RECONNECT_INTERVAL
+                logger.warning(f"Bridge socket {self.address} unavailable: {e}")
+                return False
+            self._reader_task = asyncio.create_task(self._read_responses(self._reader))
+            logger.info(f"Connected to bridge socket {self.address}")
+            return True
+
+    def _drop_connection(self, error: Optional[Exception] = None):
+        error = error or ConnectionError("Bridge socket closed")
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+        if self._reader_task is not None and self._reader_task is not asyncio.current_task():
+            self._reader_task.cancel()
+        self._reader_task = None
+        self._outbox = []
+        flushed, self._flushed = self._flushed, None
+        if flushed is not None and not flushed.done():
+            flushed.set_result(None)  # its callers find their futures failed below
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def _read_responses(self, reader: asyncio.StreamReader):
+        """Demultiplex response frames to the futures waiting on them"""
+        try:
+            while True:
+                response, size = await read_frame_sized(reader)
+                future = self._pending.pop(response.pop("id", None), None)
+                # No future means the caller already timed out; drop the late answer
+                if future is not None and not future.done():
+                    future.set_result((response, size))
+        except asyncio.CancelledError:
+            raise
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            logger.warning(f"Bridge socket connection lost: {e}")
+            self._drop_connection(ConnectionError(f"Bridge socket error: {e}"))
+
+    def _flush_outbox(self):
+        """Write every frame queued during this loop iteration in one call"""
+        if not self._outbox:
+            return
+        if not self.connected:
+            # Fail the waiting callers now rather than at their timeout
+            self._drop_connection(ConnectionError("Bridge socket closed before the request was sent"))
+            return
+        frames, self._outbox = self._outbox, []
+        flushed, self._flushed = self._flushed, None
+        self._writer.write(b"".join(frames))
+        flushed.set_result(None)
+
+    async def request(self, request_data: Dict[str, Any], timeout: float) -> Optional[Dict[str, Any]]:
+        """Send one request; returns the response or None on timeout"""
+        self._bind_loop()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        if not await self._connect(min(timeout, 1.0)):
+            if self.fallback is not None:
+                return await self.fallback.request(request_data, max(0.0, deadline - loop.time()))
+            raise ConnectionError(f"Bridge socket {self.address} unavailable")
+
+        async with self._slots:
+            if not self.connected:
+                raise ConnectionError("Bridge socket closed")
+            request_id = request_data["id"]
+            future = loop.create_future()
+            self._pending[request_id] = future
+            if not self._outbox:
+                self._flushed = loop.create_future()
+                loop.call_soon(self._flush_outbox)
+            flushed = self._flushed
+            frame = encode_frame(request_data, self.codec)
+            self._outbox.append(frame)
+            count_io(sent=len(frame))
+            try:
+                # Drain only once this frame is in the write buffer
+                await flushed
+                if self.connected:
+                    await self._writer.drain()
+                response, size = await asyncio.wait_for(future, max(0.0, deadline - loop.time()))
+                count_io(received=size)
+                return response
+            except asyncio.TimeoutError:
+                return None
+            except OSError as e:
+                self._drop_connection(ConnectionError(f"Bridge socket error: {e}"))
+                raise ConnectionError(f"Bridge socket error: {e}") from e
+            finally:
+                self._pending.pop(request_id, None)
+
+    async def close(self):
+        if self._loop is not None:
+            self._drop_connection()
+        if self.fallback is not None:
+            await self.fallback.close()
+
+
+def create_transport(bridge_dir: Path, kind: Optional[str] = None,
+                     address: Optional[str] = None, codec: Optional[str] = None):
+    """Build the transport selected by arguments or environment"""
+    kind = (kind or os.environ.get("REAPER_MCP_TRANSPORT", "file")).lower()
+    file_transport = FileTransport(bridge_dir)
+    if kind == "file":
+        return file_transport
+    if kind == "socket":
+        address = address or os.environ.get("REAPER_MCP_SOCKET", DEFAULT_SOCKET_ADDRESS)
+        codec = (codec or os.environ.get("REAPER_MCP_CODEC", "json")).lower()
+        return SocketTransport(address, fallback=file_transport, codec=codec)
+    raise ValueError(f"Unknown bridge transport: {kind!r}")
@@ -12,12 +12,17 @@ from datetime import datetime
 import websockets
 from websockets.client import WebSocketClientProtocol
 
+from .bridge import bridge
+from .relay_protocol import RelayProtocol, RelayProtocolError
+from .relay_scheduler import CommandScheduler, SchedulerOverloaded
+
 logger = logging.getLogger(__name__)
 
 class MCPWebSocketClient:
     """WebSocket client that connects MCP server to the relay"""
     
-    def __init__(self, relay_url: str, auth_token: str, command_handler: Callable):
+    def __init__(self, relay_url: str, auth_token: str, command_handler: Callable,
+                 liveness=None):
         self.relay_url = relay_url
         self.auth_token = auth_token
         self.command_handler = command_handler
@@ -29,8 +34,21 @@ class MCPWebSocketClient:
         self._running = False
         self.connection_attempts = 0
         self.last_connected = None
-        self.health_check_interval = 60.0  # Check REAPER health every minute
+        self.health_check_interval = 60.0  # Report REAPER health every minute
         self._health_task = None
+        # BridgeLiveness whose transitions are published as bridge_health events
+        self.liveness = liveness
+        # Bounds concurrent commands and keeps each session's commands in order
+        self.scheduler = CommandScheduler.from_env(self._handle_command)
+        # Framing agreed with the relay at authentication (see relay_protocol.py)
+        self.protocol = RelayProtocol()
+        self.permessage_deflate = os.environ.get("MCP_RELAY_DEFLATE", "1").lower() not in ("0", "false", "no")
+        self.batch_delay = float(os.environ.get("MCP_RELAY_BATCH_DELAY", "0.002"))
+        self._outbox: list = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self.messages_sent = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
         
     async def connect(self):
         """Connect to the relay server"""
@@ -45,7 +63,8 @@ class MCPWebSocketClient:
                 async with websockets.connect(
                     self.relay_url,
                     ping_interval=20,  # Send WebSocket pings every 20s
-                    ping_timeout=10    # Wait 10s for pong
+                    ping_timeout=10,   # Wait 10s for pong
+                    compression="deflate" if self.permessage_deflate else None
                 ) as websocket:
                     self.websocket = websocket
                     
@@ -60,11 +79,16 @@ class MCPWebSocketClient:
                     # Start monitoring tasks
                     ping_task = asyncio.create_task(self._ping_loop())
                     health_task = asyncio.create_task(self._health_check_loop())
+                    if self.liveness is not None:
+                        self.liveness.add_listener(self._on_health_change)
+                        self.liveness.start()
                     
                     try:
                         # Handle messages
                         await self._handle_messages()
                     finally:
+                        if self.liveness is not None:
+                            self.liveness.remove_listener(self._on_health_change)
                         ping_task.cancel()
                         health_task.cancel()
                         await asyncio.gather(ping_task, health_task, return_exceptions=True)
@@ -89,10 +113,15 @@ class MCPWebSocketClient:
     async def _authenticate(self):
         """Authenticate with the relay server"""
         logger.info("Authenticating...")
-        await self.websocket.send(json.dumps({
+        auth = {
             "type": "auth",
             "token": self.auth_token
-        }))
+        }
+        offer = RelayProtocol.offer()
+        if offer:
+            auth["protocol"] = offer
+        self.protocol = RelayProtocol()
+        await self.websocket.send(json.dumps(auth))
         
         # Wait for auth response
         response = await self.websocket.recv()
@@ -100,7 +129,11 @@ class MCPWebSocketClient:
         
         if data.get("type") == "auth_success":
             self.connected = True
+            self.protocol = RelayProtocol.negotiate(data.get("protocol"))
             logger.info(f"Authenticated successfully as user {data.get('user_id')}")
+            if not self.protocol.legacy:
+                logger.info(f"Relay protocol: batch={self.protocol.batch} "
+                            f"compression={self.protocol.compression} binary={self.protocol.binary}")
         else:
             raise Exception(f"Authentication failed: {data.get('error')}")
             
@@ -108,22 +141,30 @@ class MCPWebSocketClient:
         """Handle incoming messages from relay"""
         async for message in self.websocket:
             try:
-                data = json.loads(message)
-                message_type = data.get("type")
-                
-                if message_type == "command":
-                    # Handle command from relay
-                    asyncio.create_task(self._handle_command(data))
-                elif message_type == "pong":
-                    # Pong response to our ping
-                    pass
-                else:
-                    logger.warning(f"Unknown message type: {message_type}")
-                    
-            except json.JSONDecodeError:
-                logger.error(f"Invalid JSON: {message}")
+                for data in self.protocol.decode(message):
+                    await self._handle_message(data)
+            except (json.JSONDecodeError, RelayProtocolError):
+                logger.error(f"Invalid frame: {message[:200]!r}")
             except Exception as e:
                 logger.error(f"Error handling message: {e}")
+    
+    async def _handle_message(self, data: Dict[str, Any]):
+        """Handle one decoded message from the relay"""
+        message_type = data.get("type")
+        
+        if message_type == "command":
+            # Queue command from relay; reject at once when overloaded
+            try:
+                self.scheduler.submit(data)
+            except SchedulerOverloaded as e:
+                logger.warning(f"Rejecting {data.get('method')}: {e}")
+                await self.send_response(data.get("request_id"), error=str(e),
+                                         overloaded=True, retry_after=e.retry_after)
+        elif message_type == "pong":
+            # Pong response to our ping
+            pass
+        else:
+            logger.warning(f"Unknown message type: {message_type}")
                 
     async def _handle_command(self, command_data: Dict[str, Any]):
         """Handle command from relay"""
@@ -145,7 +186,8 @@ class MCPWebSocketClient:
             # Send error response
             await self.send_response(request_id, error=str(e))
             
-    async def send_response(self, request_id: str, result: Any = None, error: str = None):
+    async def send_response(self, request_id: str, result: Any = None, error: str = None,
+                            overloaded: bool = False, retry_after: Optional[float] = None):
         """Send response back to relay"""
         response = {
             "type": "response",
@@ -156,27 +198,62 @@ class MCPWebSocketClient:
             response["error"] = error
         else:
             response["result"] = result
+        if overloaded:
+            # The command was not executed; the relay may retry it
+            response["overloaded"] = True
+            response["retry_after"] = retry_after
             
-        if self.websocket and self.connected:
-            await self.websocket.send(json.dumps(response))
+        await self.send_message(response)
             
     async def send_event(self, event_type: str, data: Dict[str, Any]):
         """Send event to relay"""
-        if self.websocket and self.connected:
-            await self.websocket.send(json.dumps({
-                "type": "event",
-                "event_type": event_type,
-                "data": data,
-                "timestamp": datetime.utcnow().isoformat()
-            }))
+        await self.send_message({
+            "type": "event",
+            "event_type": event_type,
+            "data": data,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+    
+    async def send_message(self, message: Dict[str, Any]):
+        """Send a message, batched with others sent within batch_delay when agreed"""
+        if not (self.websocket and self.connected):
+            return
+        if not self.protocol.batch:
+            await self._write(self.protocol.encode([message]), 1)
+            return
+        self._outbox.append(message)
+        if len(self._outbox) >= self.protocol.max_batch:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+    
+    async def _flush_later(self):
+        await asyncio.sleep(self.batch_delay)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Send error: {e}")
+    
+    async def flush(self):
+        """Send the messages waiting to be batched"""
+        messages, self._outbox = self._outbox, []
+        if messages and self.websocket and self.connected:
+            await self._write(self.protocol.encode(messages), len(messages))
+    
+    async def _write(self, frames: list, message_count: int):
+        for frame in frames:
+            await self.websocket.send(frame)
+            self.bytes_sent += len(frame) if isinstance(frame, bytes) else len(frame.encode("utf-8"))
+        self.frames_sent += len(frames)
+        self.messages_sent += message_count
             
     async def _ping_loop(self):
         """Send periodic pings to keep connection alive"""
         while self.connected:
             try:
                 await asyncio.sleep(self.ping_interval)
-                if self.websocket and self.connected:
-                    await self.websocket.send(json.dumps({"type": "ping"}))
+                await self.send_message({"type": "ping"})
             except Exception as e:
                 logger.error(f"Ping error: {e}")
                 break
@@ -184,6 +261,16 @@ class MCPWebSocketClient:
     async def disconnect(self):
         """Disconnect from relay"""
         self._running = False
+        await self.scheduler.close()
+        if self.liveness is not None:
+            await self.liveness.stop()
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.debug(f"Could not send pending messages: {e}")
         if self.websocket:
             await self.websocket.close()
             
@@ -191,8 +278,15 @@ class MCPWebSocketClient:
         """Check if connected to relay"""
         return self.connected
         
+    async def _on_health_change(self, event: Dict[str, Any]):
+        """Publish a bridge up/down transition as soon as it happens"""
+        try:
+            await self.send_event("bridge_health", event)
+        except Exception as e:
+            logger.error(f"Could not send health event: {e}")
+    
     async def _health_check_loop(self):
-        """Periodically check REAPER health"""
+        """Periodically report connection and REAPER health"""
         while self.connected:
             try:
                 await asyncio.sleep(self.health_check_interval)
@@ -204,16 +298,12 @@ class MCPWebSocketClient:
                     "connection_attempts": self.connection_attempts
                 }
                 
-                # Try a simple REAPER command to verify bridge is working
-                try:
-                    # This will test the bridge connection
-                    result = await self.command_handler("CountTracks", {})
-                    health_info["reaper_connected"] = True
-                    health_info["reaper_test_result"] = result
-                except Exception as e:
-                    health_info["reaper_connected"] = False
-                    health_info["reaper_error"] = str(e)
-                    logger.warning(f"REAPER health check failed: {e}")
+                # REAPER state comes from the liveness monitor, which tracks
+                # normal traffic and probes only when the bridge is idle
+                if self.liveness is not None:
+                    bridge_health = self.liveness.snapshot()
+                    health_info["reaper_connected"] = bridge_health["state"] == "up"
+                    health_info["bridge"] = bridge_health
                 
                 # Send health event to relay
                 await self.send_event("health_status", health_info)
@@ -223,13 +313,23 @@ class MCPWebSocketClient:
                 break
 
 
+def _tool_result(result: Any) -> Any:
+    """JSON-friendly value of FastMCP.call_tool's content blocks"""
+    content = result[0] if isinstance(result, tuple) else result
+    texts = [block.text for block in content if getattr(block, "text", None) is not None]
+    if len(texts) == len(content):
+        return texts[0] if len(texts) == 1 else texts
+    return [block.model_dump(mode="json") for block in content]
+
+
 # Integration with MCP server
-async def create_relay_client(mcp_server_instance) -> MCPWebSocketClient:
+async def create_relay_client(relay_url: Optional[str], auth_token: Optional[str],
+                              mcp_server_instance) -> MCPWebSocketClient:
     """Create and configure relay client for MCP server"""
     
-    # Get configuration from environment
-    relay_url = os.environ.get("MCP_RELAY_URL", "ws://localhost:8765/mcp")
-    auth_token = os.environ.get("MCP_AUTH_TOKEN", "")
+    # Fall back to the environment
+    relay_url = relay_url or os.environ.get("MCP_RELAY_URL", "ws://localhost:8765/mcp")
+    auth_token = auth_token or os.environ.get("MCP_AUTH_TOKEN", "")
     
     if not auth_token:
         logger.warning("No MCP_AUTH_TOKEN set - relay connection disabled")
@@ -237,17 +337,12 @@ async def create_relay_client(mcp_server_instance) -> MCPWebSocketClient:
         
     # Create command handler that bridges to MCP
     async def handle_command(method: str, params: Dict[str, Any]) -> Any:
-        # This will call the appropriate MCP tool
-        tool_func = mcp_server_instance.get_tool(method)
-        if not tool_func:
-            raise Exception(f"Unknown method: {method}")
-            
-        # Execute the tool
-        result = await tool_func(**params)
-        return result
+        # Unknown tools raise ToolError, which becomes an error response
+        result = await mcp_server_instance.call_tool(method, params or {})
+        return _tool_result(result)
         
     # Create client
-    client = MCPWebSocketClient(relay_url, auth_token, handle_command)
+    client = MCPWebSocketClient(relay_url, auth_token, handle_command, liveness=bridge.liveness)
     
     # Start connection in background
     asyncio.create_task(client.connect())
@@ -0,0 +1,5 @@
+"""
+In-process stand-ins for REAPER and the relay, shared by tests/ and benchmarks/
+
+Needs the dev extra (`pip install -e .[dev]`) for lupa.
+"""
@@ -0,0 +1,677 @@
+"""
+Pure-Python stand-in for mcp_bridge.lua
+
+FakeReaper emulates the Lua dispatcher closely enough to exercise the bridge
+transports without a running REAPER:
+
+- dispatch() mirrors dispatch() in mcp_bridge.lua: known functions fill in
+  the response table, anything else answers "Unknown function: <name>".
+- SocketBridgeServer speaks the length-prefixed frame protocol.
+- FileBridgeServer answers request_N.json files from a bridge directory.
+- LocalBridge calls FakeReaper in-process, for code that only needs a bridge.
+- make_project() builds a representative project (tracks, FX, items,
+  sends, markers, tempo map) for the benchmarks in benchmarks/.
+
+Both servers emulate REAPER's defer loop: requests are collected and served
+on a periodic tick rather than instantly.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from server.bridge import _resolve_refs
+from server.transport import FRAME_HEADER, MSGPACK_FLAG, decode_payload, encode_payload
+
+DEFAULT_TICK = 0.001
+
+
+class Pointer(dict):
+    """A ReaScript object handle; JSON-encodes like userdata in mcp_bridge.lua"""
+
+    def __init__(self, kind: str, target: Dict[str, Any]):
+        super().__init__(__ptr=f"{kind}: 0x{id(target):016X}")
+        self.target = target
+
+
+def new_track(name: str = "", fx: Optional[List[str]] = None, **props) -> Dict[str, Any]:
+    """Track record with every field the fake project knows about"""
+    track = {
+        "name": name,
+        "fx": list(fx or []),
+        "volume": 1.0,
+        "pan": 0.0,
+        "mute": False,
+        "solo": 0,
+        "main_send": True,
+        "role": None,
+        "items": [],     # {position, length, takes: [{name, midi}], active_take}
+        "sends": [],     # destination track records
+        "receives": [],  # source track records
+    }
+    track.update(props)
+    return track
+
+
+def new_item(position: float, length: float, name: str = "", midi: bool = True) -> Dict[str, Any]:
+    """Media item with one active take"""
+    return {"position": position, "length": length, "active_take": 0,
+            "takes": [{"name": name, "midi": midi}]}
+
+
+class FakeReaper:
+    """
+    In-memory REAPER project answering bridge requests.
+
+    The project is plain data: `tracks` (see new_track), `markers`
+    ({name, position, end, is_region}), `tempo_markers` ({time, measure,
+    beat, bpm, num, denom, linear}) and `fx_params` (plugin name ->
+    parameter names). Tracks given as partial dicts are completed with
+    defaults on first use. Every edit bumps `change_count`, like REAPER's
+    project state change count.
+    """
+
+    def __init__(self, supports_batch: bool = True, supports_streams: bool = True):
+        self.tracks: List[Dict[str, Any]] = []
+        self.master: Dict[str, Any] = new_track("MASTER", main_send=False)
+        self.calls: List[str] = []
+        self.requests = 0  # bridge round trips (a batch counts once)
+        self.supports_batch = supports_batch
+        self.supports_streams = supports_streams
+        self.streams: Dict[int, Dict[str, Any]] = {}
+        self._next_stream = 0
+        self.last_request_id = 0
+        self.markers: List[Dict[str, Any]] = []
+        self.tempo_markers: List[Dict[str, Any]] = []
+        self.tempo = 120.0
+        self.fx_params: Dict[str, List[str]] = {}  # plugin name -> parameter names
+        self.change_count = 1  # GetProjectStateChangeCount
+        self._next_guid = 0
+        self.handlers: Dict[str, Callable[..., Dict[str, Any]]] = {
+            "GetAppVersion": lambda *a: {"ok": True, "ret": "7.0/fake"},
+            "CountTracks": lambda *a: {"ok": True, "ret": len(self.tracks)},
+            "GetTrackCount": lambda *a: {"ok": True, "ret": len(self.tracks)},
+            "GetProjectStateChangeCount": lambda *a: {"ok": True, "ret": self.change_count},
+            "InsertTrackAtIndex": self._insert_track,
+            "GetTrack": self._get_track,
+            "GetMasterTrack": lambda *a: {"ok": True, "ret": Pointer("MediaTrack", self.master)},
+            "GetTrackName": self._get_track_name,
+            "SetTrackName": self._set_track_name,
+            "GetTrackInfo": self._get_track_info,
+            "GetAllTracksInfo": self._get_all_tracks_info,
+            "GetSetMediaTrackInfo_String": self._get_set_track_string,
+            "GetMediaTrackInfo_Value": self._get_track_value,
+            "SetMediaTrackInfo_Value": self._set_track_value,
+            "GetTrackVolume": lambda i: self._index_value(i, "volume"),
+            "SetTrackVolume": lambda i, v: self._set_index_value(i, "volume", float(v)),
+            "GetTrackPan": lambda i: self._index_value(i, "pan"),
+            "SetTrackPan": lambda i, v: self._set_index_value(i, "pan", float(v)),
+            "SetTrackMute": lambda i, v: self._set_index_value(i, "mute", bool(v)),
+            "SetTrackSolo": lambda i, v: self._set_index_value(i, "solo", 1 if v else 0),
+            "CreateTrackSend": self._create_track_send,
+            "GetTrackNumSends": self._get_track_num_sends,
+            "GetTrackSendInfo_Value": self._get_track_send_info,
+            "CountMediaItems": lambda *a: {"ok": True, "ret": sum(
+                len(self._complete(t)["items"]) for t in self.tracks)},
+            "GetAllItems": self._get_all_items,
+            "GetTrackItems": self._get_track_items,
+            "GetFXParamNames": self._get_fx_param_names,
+            "TrackFX_AddByName": self._add_fx,
+            "TrackFX_Delete": self._delete_fx,
+            "TrackFX_GetCount": lambda t: {"ok": True, "ret": len(self._track_arg(t)["fx"])},
+            "TrackFX_GetFXName": self._get_fx_name,
+            "GetTrackStateChunk": self._get_track_state_chunk,
+            "CountProjectMarkers": self._count_project_markers,
+            "EnumProjectMarkers": self._enum_project_markers,
+            "GetTempo": lambda *a: {"ok": True, "ret": self.tempo},
+            "Master_GetTempo": lambda *a: {"ok": True, "ret": self.tempo},
+            "CountTempoTimeSigMarkers": lambda *a: {"ok": True, "ret": len(self.tempo_markers)},
+            "GetTempoTimeSigMarker": self._get_tempo_marker,
+            "SetTempoTimeSigMarker": self._set_tempo_marker,
+            "DeleteTempoTimeSigMarker": self._delete_tempo_marker,
+            "GetTempoMap": lambda *a: {"ok": True, "markers": [dict(m) for m in self.tempo_markers],
+                                       "bpm": self.tempo, "num": 4},
+            "GetProjectTimeSignature2": lambda *a: {"ok": True, "ret": [self.tempo, 4]},
+            "Sleep": self._sleep,
+        }
+
+    def add_track(self, name: str, fx: Optional[List[str]] = None, **props) -> int:
+        """Append a track (like the user adding one in REAPER); returns its index"""
+        self.tracks.append(new_track(name, fx, **props))
+        self.change_count += 1
+        return len(self.tracks) - 1
+
+    def add_send(self, src: int, dest: int):
+        """Route track `src` to track `dest`"""
+        source, target = self._complete(self.tracks[src]), self._complete(self.tracks[dest])
+        source["sends"].append(target)
+        target["receives"].append(source)
+        self.change_count += 1
+
+    def add_tempo_marker(self, time: float, bpm: float, num: int = 4, denom: int = 4,
+                         linear: bool = False):
+        """Tempo/time signature marker; measure and beat follow from earlier markers"""
+        prev = self.tempo_markers[-1] if self.tempo_markers else \
+            {"time": 0.0, "measure": 0, "beat": 0.0, "bpm": self.tempo, "num": 4}
+        beats = prev["beat"] + (time - prev["time"]) * prev["bpm"] / 60.0
+        bars, beat = divmod(beats, prev["num"])
+        measure = prev["measure"] + int(bars)
+        self.tempo_markers.append({"time": time, "measure": int(measure), "beat": beat,
+                                   "bpm": bpm, "num": num, "denom": denom, "linear": linear})
+        self.change_count += 1
+
+    def dispatch(self, fname: str, args: List[Any]) -> Dict[str, Any]:
+        """Execute one call and return its response table"""
+        self.calls.append(fname)
+        handler = self.handlers.get(fname)
+        if handler is None:
+            return {"ok": False, "error": f"Unknown function: {fname}"}
+        try:
+            return handler(*args)
+        except Exception as e:
+            return {"ok": False, "error": f"Error calling {fname}: {e}"}
+
+    def execute_request(self, payload: bytes, msgpack: bool = False):
+        """Decode a raw request and dispatch it, like execute_request() in Lua"""
+        try:
+            request = decode_payload(payload, msgpack)
+        except ValueError as e:
+            return {"ok": False, "error": f"Bridge error: {e}"}, None
+        if not isinstance(request, dict) or "func" not in request:
+            return {"ok": False, "error": "Invalid request"}, None
+        args = request.get("args") or []
+        request_id = request.get("id")
+        if isinstance(request_id, int) and request["func"] != "BridgeHandshake":
+            self.last_request_id = max(self.last_request_id, request_id)
+        if request["func"] == "BridgeHandshake":
+            return {"ok": True, "last_id": self.last_request_id, "session": args[0]}, request_id
+        self.requests += 1
+        if request["func"] == "Batch" and self.supports_batch:
+            return self.run_batch(*args), request_id
+        if request["func"] in self.STREAM_FUNCTIONS and self.supports_streams:
+            return getattr(self, self.STREAM_FUNCTIONS[request["func"]])(*args), request_id
+        return self.dispatch(request["func"], args), request_id
+
+    def run_batch(self, calls, options=None) -> Dict[str, Any]:
+        """Mirror of run_batch() in mcp_bridge.lua"""
+        options = options or {}
+        results = []
+        failed_at = None
+        for call in calls:
+            if failed_at is not None and options.get("stop_on_error"):
+                response = {"ok": False, "error": f"Skipped: call #{failed_at} failed"}
+            else:
+                try:
+                    args = _resolve_refs(call.get("args") or [], results)
+                except (IndexError, KeyError, TypeError) as e:
+                    response = {"ok": False, "error": f"Bridge error: {e}"}
+                else:
+                    response = self.dispatch(call["func"], args)
+            if not response.get("ok") and failed_at is None:
+                failed_at = len(results)
+            results.append(response)
+        return {"ok": True, "results": results, "count": len(results)}
+
+    # -- streamed results (mirror of StreamOpen/StreamRead in mcp_bridge.lua) --
+
+    STREAM_FUNCTIONS = {"StreamOpen": "stream_open", "StreamRead": "stream_read",
+                        "StreamClose": "stream_close"}
+
+    def stream_open(self, func, args=None, options=None) -> Dict[str, Any]:
+        options = options or {}
+        response = self.dispatch(func, list(args or []))
+        if not response.get("ok"):
+            return response
+        response = dict(response)
+        field = options.get("field", "ret")
+        value = response.pop(field, None)
+        if options.get("item") is not None and isinstance(value, list):
+            value = value[options["item"]]
+        if isinstance(value, (str, bytes)):
+            kind = "bytes"
+        elif isinstance(value, list):
+            kind = "items"
+        else:
+            return {"ok": False, "error": f"{func} returned no {field} to stream"}
+        self._next_stream += 1
+        binary = isinstance(value, bytes)
+        response.update(cursor=self._next_stream, kind=kind, total=len(value))
+        if binary:
+            response["encoding"] = "base64"
+        if value:
+            page_size = options.get("page_size") or (65536 if kind == "bytes" else 256)
+            self.streams[self._next_stream] = {"value": value, "page_size": page_size,
+                                               "binary": binary}
+        return response
+
+    def stream_read(self, cursor, offset=0, count=None) -> Dict[str, Any]:
+        stream = self.streams.get(cursor)
+        if stream is None:
+            return {"ok": False, "error": f"Unknown or expired stream: {cursor}"}
+        value = stream["value"]
+        stop = min(len(value), offset + (count or stream["page_size"]))
+        data = value[offset:stop]
+        if stream["binary"]:
+            data = base64.b64encode(data).decode("ascii")
+        done = stop >= len(value)
+        if done:
+            del self.streams[cursor]
+        return {"ok": True, "data": data, "offset": offset, "next": stop, "done": done}
+
+    def stream_close(self, cursor) -> Dict[str, Any]:
+        return {"ok": True, "ret": self.streams.pop(cursor, None) is not None}
+
+    # -- project model ------------------------------------------------------
+
+    def _complete(self, track: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill in defaults for tracks assigned as partial dicts"""
+        for key, value in new_track().items():
+            track.setdefault(key, value)
+        if "guid" not in track:
+            self._next_guid += 1
+            track["guid"] = f"{{FAKE-TRACK-{self._next_guid}}}"
+        return track
+
+    def _track_at(self, index) -> Optional[Dict[str, Any]]:
+        if isinstance(index, int) and 0 <= index < len(self.tracks):
+            return self._complete(self.tracks[index])
+        return None
+
+    def _track_arg(self, arg) -> Dict[str, Any]:
+        """Resolve a track argument the way the Lua dispatcher does"""
+        if isinstance(arg, Pointer):
+            return arg.target
+        if isinstance(arg, dict) and "__ptr" in arg:
+            raise ValueError("Cannot use track pointer from previous call - use track index instead")
+        if arg == -1:
+            return self.master
+        track = self._track_at(arg)
+        if track is None:
+            raise ValueError(f"Track not found at index {arg}")
+        return track
+
+    def _index_of(self, track: Dict[str, Any]) -> int:
+        return next((i for i, t in enumerate(self.tracks) if t is track), -1)
+
+    # -- handlers -----------------------------------------------------------
+
+    def _insert_track(self, index, want_defaults=True):
+        index = max(0, min(int(index), len(self.tracks)))
+        self.tracks.insert(index, new_track())
+        self.change_count += 1
+        return {"ok": True}
+
+    def _get_track(self, proj, index):
+        track = self._track_at(index)
+        return {"ok": True, "ret": Pointer("MediaTrack", track)} if track else {"ok": True}
+
+    def _get_track_name(self, index):
+        track = self._track_at(index)
+        if track is None:
+            return {"ok": False, "error": "Track not found"}
+        return {"ok": True, "ret": track["name"] or f"Track {index + 1}"}
+
+    def _set_track_name(self, index, name):
+        track = self._track_at(index)
+        if track is None:
+            return {"ok": False, "error": "Track not found"}
+        track["name"] = name
+        self.change_count += 1
+        return {"ok": True}
+
+    def _track_info(self, index):
+        track = self._complete(self.tracks[index])
+        takes = [item["takes"][item["active_take"]] for item in track["items"] if item["takes"]]
+        return {
+            "guid": track["guid"],
+            "name": track["name"] or f"Track {index + 1}",
+            "has_midi": any(take["midi"] for take in takes),
+            "has_audio": any(not take["midi"] for take in takes),
+            "fx_names": list(track["fx"]),
+            "role": track["role"],
+            "muted": bool(track["mute"]),
+            "soloed": track["solo"] > 0
+        }
+
+    def _get_track_info(self, index):
+        if self._track_at(index) is None:
+            return {"ok": False, "error": "Track not found"}
+        return {"ok": True, "info": self._track_info(index)}
+
+    def _get_all_tracks_info(self):
+        return {"ok": True, "tracks": [dict(self._track_info(i), index=i)
+                                       for i in range(len(self.tracks))]}
+
+    _TRACK_VALUES = {"D_VOL": "volume", "D_PAN": "pan", "B_MUTE": "mute",
+                     "I_SOLO": "solo", "B_MAINSEND": "main_send"}
+
+    def _get_track_value(self, track, parm):
+        track = self._track_arg(track)
+        if parm == "IP_TRACKNUMBER":
+            return {"ok": True, "ret": self._index_of(track) + 1}
+        key = self._TRACK_VALUES.get(parm)
+        value = track.get(key, 0.0) if key else 0.0
+        return {"ok": True, "ret": float(value)}
+
+    def _set_track_value(self, track, parm, value):
+        track = self._track_arg(track)
+        key = self._TRACK_VALUES.get(parm)
+        if key:
+            track[key] = value
+            self.change_count += 1
+        return {"ok": True}
+
+    def _get_set_track_string(self, track, parm, value="", set_value=False):
+        track = self._track_arg(track)
+        key = {"P_NAME": "name", "GUID": "guid", "P_EXT:role": "role"}.get(parm)
+        if key is None:
+            return {"ok": False, "ret": ""}
+        if set_value:
+            track[key] = value
+            self.change_count += 1
+        return {"ok": True, "ret": track.get(key) or ""}
+
+    def _add_fx(self, track, name, _rec_fx=False, _instantiate=-1):
+        fx = self._track_arg(track)["fx"]
+        fx.append(name)
+        self.change_count += 1
+        return {"ok": True, "ret": len(fx) - 1}
+
+    def _delete_fx(self, track, fx_index):
+        fx = self._track_arg(track)["fx"]
+        if not 0 <= fx_index < len(fx):
+            return {"ok": False, "error": "FX not found"}
+        del fx[fx_index]
+        self.change_count += 1
+        return {"ok": True, "ret": True}
+
+    def _get_fx_name(self, track, fx_index, _buf="", _size=256):
+        fx = self._track_arg(track)["fx"]
+        if not 0 <= fx_index < len(fx):
+            return {"ok": False, "error": "Failed to get FX name"}
+        return {"ok": True, "ret": fx[fx_index]}
+
+    def _index_value(self, index, key):
+        track = self._track_at(index)
+        if track is None:
+            return {"ok": False, "error": "Track not found"}
+        return {"ok": True, "ret": track[key]}
+
+    def _set_index_value(self, index, key, value):
+        track = self._track_at(index)
+        if track is None:
+            return {"ok": False, "error": "Track not found"}
+        track[key] = value
+        self.change_count += 1
+        return {"ok": True}
+
+    def _create_track_send(self, src, dest):
+        source = self._track_arg(src)
+        self.add_send(self._index_of(source), self._index_of(self._track_arg(dest)))
+        return {"ok": True, "ret": len(source["sends"]) - 1}
+
+    def _get_track_num_sends(self, track, category):
+        track = self._track_arg(track)
+        routes = {0: "sends", -1: "receives"}.get(int(category))
+        return {"ok": True, "ret": len(track[routes]) if routes else 0}
+
+    def _get_track_send_info(self, track, category, send_index, parm):
+        routes = self._track_arg(track)["receives" if category < 0 else "sends"]
+        if not 0 <= send_index < len(routes):
+            return {"ok": True, "ret": 0.0}
+        if parm in ("P_DESTTRACK", "P_SRCTRACK"):
+            other = routes[send_index] if (parm == "P_DESTTRACK") == (category >= 0) \
+                else self._track_arg(track)
+            return {"ok": True, "ret": Pointer("MediaTrack", other)}
+        return {"ok": True, "ret": 1.0 if parm == "D_VOL" else 0.0}
+
+    def _item_list(self, track_index):
+        items = []
+        for i, item in enumerate(self._complete(self.tracks[track_index])["items"]):
+            take = item["takes"][item["active_take"]] if item["takes"] else None
+            items.append({"index": i, "track_index": track_index,
+                          "position": item["position"], "length": item["length"],
+                          "name": take["name"] if take else "",
+                          "is_midi": bool(take and take["midi"])})
+        return items
+
+    def _get_all_items(self):
+        return {"ok": True, "items": [item for t in range(len(self.tracks))
+                                      for item in self._item_list(t)]}
+
+    def _get_track_items(self, track_index):
+        if self._track_at(track_index) is None:
+            return {"ok": False, "error": "Track not found"}
+        return {"ok": True, "items": self._item_list(track_index)}
+
+    def _get_track_state_chunk(self, track, _buf="", _size=0, _undo=False):
+        track = self._track_arg(track)
+        chunk = track.get("chunk") or f'<TRACK\nNAME "{track["name"]}"\n>'
+        return {"ok": True, "ret": [True, chunk]}
+
+    def _get_fx_param_names(self, track_index, fx_index, known_guid=None):
+        if self._track_at(track_index) is None:
+            return {"ok": False, "error": "Track not found"}
+        fx = self.tracks[track_index].get("fx", [])
+        if not 0 <= fx_index < len(fx):
+            return {"ok": False, "error": "FX not found"}
+        guid = f"{{FAKE-FX-{track_index}-{fx_index}}}"
+        response = {"ok": True, "guid": guid, "fx_name": fx[fx_index]}
+        if known_guid == guid:
+            return dict(response, unchanged=True)
+        return dict(response, names=list(self.fx_params.get(fx[fx_index], [])))
+
+    def _count_project_markers(self, proj=0):
+        regions = sum(1 for m in self.markers if m.get("is_region"))
+        return {"ok": True, "ret": [len(self.markers) - regions, regions]}
+
+    def _enum_project_markers(self, index):
+        if not 0 <= index < len(self.markers):
+            return {"ok": True, "ret": []}
+        m = self.markers[index]
+        return {"ok": True, "ret": [index + 1, m.get("is_region", False), m["position"],
+                                    m.get("end", 0.0), m["name"], index + 1]}
+
+    def _get_tempo_marker(self, proj, index):
+        if not 0 <= index < len(self.tempo_markers):
+            return {"ok": True, "ret": [False, 0.0, 0, 0.0, 0.0, 0, 0, False]}
+        m = self.tempo_markers[index]
+        return {"ok": True, "ret": [True, m["time"], m["measure"], m["beat"], m["bpm"],
+                                    m["num"], m["denom"], m["linear"]]}
+
+    def _set_tempo_marker(self, proj, index, time, _measure, _beat, bpm, num, denom, linear):
+        if index >= 0:
+            return {"ok": True, "ret": False}  # only inserts are modelled
+        prev = self.tempo_markers[-1] if self.tempo_markers else {"num": 4, "denom": 4}
+        self.add_tempo_marker(time, bpm, num or prev["num"], denom or prev["denom"], bool(linear))
+        return {"ok": True, "ret": True}
+
+    def _delete_tempo_marker(self, proj, index):
+        if not 0 <= index < len(self.tempo_markers):
+            return {"ok": True, "ret": False}
+        del self.tempo_markers[index]
+        self.change_count += 1
+        return {"ok": True, "ret": True}
+
+    def _sleep(self, seconds):
+        # Simulates a slow ReaScript call (blocks the "UI thread")
+        time.sleep(seconds)
+        return {"ok": True}
+
+
+ROLE_NAMES = ["Kick", "Snare", "Hats", "Bass", "Piano", "Pad", "Lead Synth", "Vocal",
+              "Guitar", "Strings"]
+BENCH_FX = ["VST: ReaEQ (Cockos)", "VST: ReaComp (Cockos)", "VST3i: Big Synth (Vendor)"]
+
+
+def make_project(track_count: int, items_per_track: int = 4, bus_every: int = 8,
+                 tempo_changes: int = 16, markers: int = 8) -> FakeReaper:
+    """
+    A representative project: named tracks with FX and MIDI/audio items,
+    every `bus_every`-th track a bus receiving the tracks before it, plus
+    markers, regions and a tempo map.
+    """
+    reaper = FakeReaper()
+    for i in range(track_count):
+        if bus_every and i % bus_every == bus_every - 1:
+            reaper.add_track(f"Bus {i // bus_every + 1}", fx=BENCH_FX[:2])
+            for src in range(i - bus_every + 1, i):
+                reaper.add_send(src, i)
+            continue
+        name = ROLE_NAMES[i % len(ROLE_NAMES)]
+        if i >= len(ROLE_NAMES):
+            name = f"{name} {i // len(ROLE_NAMES) + 1}"
+        track = reaper.tracks[reaper.add_track(name, fx=BENCH_FX[i % 3:i % 3 + 2])]
+        midi = i % 3 != 0
+        track["items"] = [new_item(j * 8.0, 8.0, f"{name} {j + 1}", midi)
+                          for j in range(items_per_track)]
+    reaper.fx_params[BENCH_FX[2]] = [f"Osc {o} {p}" for o in (1, 2, 3)
+                                     for p in ("Level", "Pitch", "Fine", "Shape")] + \
+        ["Filter Cutoff", "Filter Resonance", "Amp Attack", "Amp Release"]
+
+    for i in range(tempo_changes):
+        reaper.add_tempo_marker(i * 16.0, 90.0 + (i * 7) % 60, 3 if i % 4 == 3 else 4, 4,
+                                linear=i % 2 == 1)
+    for i in range(markers):
+        reaper.markers.append({"name": f"Section {i + 1}", "position": i * 32.0,
+                               "end": i * 32.0 + 16.0, "is_region": i % 2 == 1})
+    return reaper
+
+
+class SocketBridgeServer:
+    """Serves the socket transport protocol on TCP"""
+
+    def __init__(self, reaper: Optional[FakeReaper] = None, tick: float = DEFAULT_TICK,
+                 max_per_tick: int = 64):
+        self.reaper = reaper or FakeReaper()
+        self.tick = tick
+        self.max_per_tick = max_per_tick
+        self.frames_received = 0
+        self.busy_ticks = 0  # ticks that served at least one request
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._pending: List[tuple] = []
+        self._tick_task: Optional[asyncio.Task] = None
+        self.address = None
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        port = self._server.sockets[0].getsockname()[1]
+        self.address = f"{host}:{port}"
+        self._tick_task = asyncio.create_task(self._tick_loop())
+        return self.address
+
+    async def stop(self):
+        if self._tick_task:
+            self._tick_task.cancel()
+            await asyncio.gather(self._tick_task, return_exceptions=True)
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                header = await reader.readexactly(FRAME_HEADER.size)
+                (length,) = FRAME_HEADER.unpack(header)
+                payload = await reader.readexactly(length & ~MSGPACK_FLAG)
+                self.frames_received += 1
+                self._pending.append((payload, bool(length & MSGPACK_FLAG), writer))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _serve_pending(self):
+        """One defer tick: answer up to max_per_tick queued requests"""
+        pending = self._pending[:self.max_per_tick]
+        self._pending = self._pending[self.max_per_tick:]
+        if pending:
+            self.busy_ticks += 1
+        for payload, msgpack, writer in pending:
+            response, request_id = self.reaper.execute_request(payload, msgpack)
+            response = dict(response, id=request_id)
+            data = encode_payload(response, "msgpack" if msgpack else "json")
+            flag = MSGPACK_FLAG if msgpack else 0
+            if not writer.is_closing():
+                writer.write(FRAME_HEADER.pack(len(data) | flag) + data)
+
+    async def _tick_loop(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            self._serve_pending()
+
+
+class FileBridgeServer:
+    """Answers request_N.json files in a directory from a background thread"""
+
+    def __init__(self, bridge_dir: Path, reaper: Optional[FakeReaper] = None,
+                 tick: float = DEFAULT_TICK):
+        self.bridge_dir = Path(bridge_dir)
+        self.reaper = reaper or FakeReaper()
+        self.tick = tick
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _serve_pending(self):
+        for request_file in sorted(self.bridge_dir.glob("request_*.json")):
+            try:
+                payload = request_file.read_bytes()
+                json.loads(payload)
+            except (FileNotFoundError, ValueError):
+                # Missing or still being written; retry on the next tick
+                continue
+            response, request_id = self.reaper.execute_request(payload)
+            if request_id is not None:
+                target = self.bridge_dir / f"response_{request_id}.json"
+                tmp = target.with_suffix(".tmp")
+                tmp.write_text(json.dumps(response))
+                os.replace(tmp, target)
+            request_file.unlink(missing_ok=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._serve_pending()
+            time.sleep(self.tick)
+
+
+class LocalTransport:
+    """Transport answering from a FakeReaper without files or sockets"""
+
+    def __init__(self, reaper: Optional[FakeReaper] = None):
+        self.reaper = reaper or FakeReaper()
+
+    async def request(self, request: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        await asyncio.sleep(0)
+        response, _ = self.reaper.execute_request(json.dumps(request))
+        return response
+
+
+class LocalBridge:
+    """In-process stand-in for ReaperFileBridge: requests go straight to a FakeReaper"""
+
+    def __init__(self, reaper: Optional[FakeReaper] = None):
+        self.reaper = reaper or FakeReaper()
+
+    async def call_lua(self, func_name: str, args: Optional[List[Any]] = None,
+                       timeout: float = 5.0) -> Dict[str, Any]:
+        request = json.dumps({"id": 0, "func": func_name, "args": args or []})
+        response, _ = self.reaper.execute_request(request)
+        return json.loads(json.dumps(response))
+
+    async def call_batch(self, calls, stop_on_error: bool = False) -> List[Dict[str, Any]]:
+        payload = [{"func": func, "args": list(args or [])} for func, args in calls]
+        response = await self.call_lua("Batch", [payload, {"stop_on_error": stop_on_error}])
+        return response["results"]
@@ -0,0 +1,74 @@
+"""
+Local stand-in for the MCP relay service
+
+Accepts one MCPWebSocketClient, answers its auth message (optionally
+accepting protocol features, see server/relay_protocol.py), sends it
+commands and records every frame it gets back, so tests and benchmarks
+can measure frames and payload bytes per message.
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+
+import websockets
+
+from server.relay_protocol import RelayProtocol
+
+
+class FakeRelay:
+    """WebSocket server playing the relay side of the protocol"""
+
+    def __init__(self, accept: Optional[Dict[str, Any]] = None):
+        self.accept = accept  # protocol features to accept; None keeps legacy frames
+        self.offer: Optional[Dict[str, Any]] = None
+        self.frames = 0
+        self.bytes_received = 0
+        self.messages: List[Dict[str, Any]] = []
+        self._connection = None
+        self._connected = asyncio.Event()
+        self._changed = asyncio.Event()
+        self._server = None
+
+    async def start(self) -> str:
+        self._server = await websockets.serve(self._handle, "127.0.0.1", 0, compression=None)
+        port = next(iter(self._server.sockets)).getsockname()[1]
+        return f"ws://127.0.0.1:{port}/mcp"
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, connection, *_):
+        auth = json.loads(await connection.recv())
+        self.offer = auth.get("protocol")
+        reply = {"type": "auth_success", "user_id": "test"}
+        if self.offer and self.accept:
+            reply["protocol"] = self.accept
+        await connection.send(json.dumps(reply))
+        self._connection = connection
+        self._connected.set()
+        try:
+            async for frame in connection:
+                self.frames += 1
+                self.bytes_received += len(frame) if isinstance(frame, bytes) else len(frame.encode())
+                self.messages.extend(RelayProtocol.decode(frame))
+                self._changed.set()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def send_commands(self, commands: List[Dict[str, Any]]):
+        await asyncio.wait_for(self._connected.wait(), 5.0)
+        for command in commands:
+            await self._connection.send(json.dumps(dict(command, type="command")))
+
+    def responses(self) -> List[Dict[str, Any]]:
+        return [m for m in self.messages if m.get("type") == "response"]
+
+    async def wait_for_responses(self, count: int, timeout: float = 10.0):
+        async def wait():
+            while len(self.responses()) < count:
+                self._changed.clear()
+                await self._changed.wait()
+        await asyncio.wait_for(wait(), timeout)
+        return self.responses()
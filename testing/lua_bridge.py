@@ -0,0 +1,85 @@
+"""
+Run the real lua/mcp_bridge.lua inside Python (via lupa) against a stub
+`reaper` API, so Lua-side dispatcher changes can be tested without REAPER.
+
+Tests using this module should call pytest.importorskip("lupa") first.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from lupa.lua54 import LuaRuntime
+
+BRIDGE_SCRIPT = Path(__file__).resolve().parent.parent / "lua" / "mcp_bridge.lua"
+
+
+class LuaBridgeHarness:
+    """Loads mcp_bridge.lua once; each tick() runs one pass of its defer loop"""
+
+    def __init__(self, resource_dir: Path, api: Optional[Dict[str, Callable]] = None,
+                 encoding: Optional[str] = "utf-8"):
+        self.resource_dir = Path(resource_dir)
+        self.bridge_dir = self.resource_dir / "Scripts" / "mcp_bridge_data"
+        self.console: List[str] = []
+        self.next_id = 1
+        self._listing: List[str] = []
+
+        # encoding=None exchanges Lua strings as bytes (for binary payloads)
+        self.lua = LuaRuntime(unpack_returned_tuples=True, encoding=encoding)
+        reaper = self.lua.table()
+        reaper.GetResourcePath = lambda: os.fsencode(self.resource_dir) if encoding is None \
+            else str(self.resource_dir)
+        reaper.RecursiveCreateDirectory = self._mkdir
+        reaper.ShowConsoleMsg = self.console.append
+        reaper.defer = lambda fn: None
+        reaper.EnumerateFiles = self._enumerate_files
+        for name, fn in (api or {}).items():
+            setattr(reaper, name, fn)
+        self.reaper = reaper
+        self.lua.globals().reaper = reaper
+        self.lua.execute(BRIDGE_SCRIPT.read_bytes() if encoding is None
+                         else BRIDGE_SCRIPT.read_text())
+
+    @staticmethod
+    def _mkdir(path, _flags=0):
+        os.makedirs(path, exist_ok=True)
+        return 1
+
+    def _enumerate_files(self, path, index):
+        # Like REAPER, serve a cached listing that index -1 refreshes
+        if index < 0 or not self._listing:
+            self._listing = sorted(os.listdir(path)) if os.path.isdir(path) else []
+            if index < 0:
+                return None
+        return self._listing[index] if index < len(self._listing) else None
+
+    def tick(self):
+        """Run main() once, like one REAPER defer cycle"""
+        self.lua.globals().main()
+
+    def submit(self, func: str, args: Optional[List[Any]] = None,
+               request_id: Optional[int] = None) -> int:
+        """Drop a request file and return its id"""
+        if request_id is None:
+            request_id = self.next_id
+        self.next_id = max(self.next_id, request_id) + 1
+        request = {"id": request_id, "func": func, "args": args or []}
+        (self.bridge_dir / f"request_{request_id}.json").write_text(json.dumps(request))
+        return request_id
+
+    def response(self, request_id: int) -> Optional[Dict[str, Any]]:
+        """Read (and remove) the response for a request, if written"""
+        path = self.bridge_dir / f"response_{request_id}.json"
+        if not path.exists():
+            return None
+        data = json.loads(path.read_text())
+        path.unlink()
+        return data
+
+    def call(self, func: str, args: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """Submit one request, run a tick and return the response"""
+        request_id = self.submit(func, args)
+        self.tick()
+        return self.response(request_id)
@@ -0,0 +1,114 @@
+"""Test batch RPC: call_batch on the Python side and Batch in mcp_bridge.lua (no REAPER needed)"""
+import pytest
+
+from server.bridge import ReaperFileBridge, batch_ref
+from server.transport import SocketTransport
+from testing.fake_reaper import FakeReaper, SocketBridgeServer
+
+
+class Track:
+    def __init__(self, name, volume):
+        self.name = name
+        self.volume = volume
+
+
+@pytest.fixture
+def lua_bridge(tmp_path):
+    pytest.importorskip("lupa")
+    from testing.lua_bridge import LuaBridgeHarness
+
+    tracks = [Track("Kick", 1.0), Track("Bass", 0.5)]
+    api = {
+        "CountTracks": lambda proj: len(tracks),
+        "GetTrack": lambda proj, idx: tracks[idx] if 0 <= idx < len(tracks) else None,
+        "GetMediaTrackInfo_Value": lambda track, parm: track.volume,
+        "GetTrackName": lambda track: (True, track.name),
+        "GetTempoTimeSigMarker": lambda proj, idx: (True, 2.0, 1, 0.0, 90.0, 3, 4, False),
+        "EnumProjects": lambda idx: (None, None),
+    }
+    return LuaBridgeHarness(tmp_path, api)
+
+
+def test_lua_batch_passes_handles_between_calls(lua_bridge):
+    """Handles returned inside a batch are usable by later calls of the same batch"""
+    response = lua_bridge.call("Batch", [[
+        {"func": "GetTrack", "args": [0, 1]},
+        {"func": "GetTrackName", "args": [batch_ref(0)]},
+        {"func": "GetMediaTrackInfo_Value", "args": [batch_ref(0), "D_VOL"]},
+    ]])
+    assert response["ok"]
+    results = response["results"]
+    assert len(results) == 3
+    assert "__ptr" in results[0]["ret"]
+    assert results[1] == {"ok": True, "ret": "Bass"}
+    assert results[2] == {"ok": True, "ret": 0.5}
+
+
+def test_lua_batch_stop_on_error(lua_bridge):
+    """stop_on_error skips the calls after the first failure"""
+    response = lua_bridge.call("Batch", [[
+        {"func": "CountTracks", "args": [0]},
+        {"func": "NoSuchFunction", "args": []},
+        {"func": "CountTracks", "args": [0]},
+    ], {"stop_on_error": True}])
+    results = response["results"]
+    assert results[0] == {"ok": True, "ret": 2}
+    assert results[1]["error"] == "Unknown function: NoSuchFunction"
+    assert results[2] == {"ok": False, "error": "Skipped: call #1 failed"}
+
+
+def test_lua_generic_call_returns_all_values(lua_bridge):
+    """Multi-value ReaScript functions come back as a list"""
+    response = lua_bridge.call("GetTempoTimeSigMarker", [0, 0])
+    assert response == {"ok": True, "ret": [True, 2.0, 1, 0.0, 90.0, 3, 4, False]}
+
+
+def test_lua_generic_call_keeps_nil_values_in_place(lua_bridge):
+    """Trailing nil return values keep their slots instead of being dropped"""
+    response = lua_bridge.call("EnumProjects", [5])
+    assert response == {"ok": True, "ret": [None, None]}
+
+
+@pytest.mark.asyncio
+async def test_call_batch_single_round_trip(tmp_path):
+    """call_batch sends one frame for the whole batch"""
+    reaper = FakeReaper()
+    reaper.tracks = [{"name": "Drums"}, {"name": "Keys"}]
+    server = SocketBridgeServer(reaper)
+    address = await server.start_tcp()
+    bridge = ReaperFileBridge(tmp_path, transport=SocketTransport(address))
+    try:
+        results = await bridge.call_batch([
+            ("CountTracks", [0]),
+            ("GetTrackName", [0]),
+            ("GetTrackName", [1]),
+            ("GetTrackName", [batch_ref(0)]),  # index 2 -> not found
+        ])
+        assert [r.get("ret") for r in results] == [2, "Drums", "Keys", None]
+        assert results[3]["ok"] is False
+        assert server.frames_received == 1
+        assert await bridge.call_batch([]) == []
+    finally:
+        await bridge.transport.close()
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_call_batch_falls_back_without_bridge_support(tmp_path):
+    """Against an older bridge the batch runs call by call, resolving references locally"""
+    reaper = FakeReaper(supports_batch=False)
+    reaper.tracks = [{"name": "Drums"}, {"name": "Keys"}]
+    server = SocketBridgeServer(reaper)
+    address = await server.start_tcp()
+    bridge = ReaperFileBridge(tmp_path, transport=SocketTransport(address))
+    try:
+        results = await bridge.call_batch([
+            ("GetTrackCount", []),
+            ("GetTrackName", [batch_ref(0)]),
+        ])
+        assert results[0] == {"ok": True, "ret": 2}
+        assert results[1]["ok"] is False  # index 2 does not exist
+        assert reaper.calls == ["Batch", "GetTrackCount", "GetTrackName"]
+    finally:
+        await bridge.transport.close()
+        await server.stop()
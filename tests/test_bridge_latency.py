@@ -0,0 +1,118 @@
+"""Test response waiting and latency histograms of the file bridge (no REAPER needed)"""
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from server.bridge import ReaperFileBridge
+from server.file_watch import InotifyWatcher, wait_for_file
+from server.metrics import LatencyHistogram
+from server.transport import FileTransport
+
+
+class EchoResponder:
+    """Answers request_N.json files the way mcp_bridge.lua does"""
+
+    def __init__(self, bridge_dir, delay=0.0):
+        self.bridge_dir = bridge_dir
+        self.delay = delay
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            for request_file in self.bridge_dir.glob("request_*.json"):
+                try:
+                    request = json.loads(request_file.read_text())
+                except (ValueError, FileNotFoundError):
+                    continue
+                time.sleep(self.delay)
+                response_file = self.bridge_dir / f"response_{request['id']}.json"
+                response_file.write_text(json.dumps({"ok": True, "ret": request["func"]}))
+                request_file.unlink(missing_ok=True)
+            time.sleep(0.0005)
+
+
+def test_histogram_percentiles():
+    """Percentiles land in the right bucket"""
+    hist = LatencyHistogram()
+    for _ in range(98):
+        hist.record(0.001)
+    hist.record(0.5)
+    hist.record(0.5)
+
+    stats = hist.snapshot()
+    assert stats["count"] == 100
+    assert 0.9 <= stats["p50_ms"] <= 1.3
+    assert 400 <= stats["p99_ms"] <= 500
+    assert stats["max_ms"] == pytest.approx(500)
+
+
+@pytest.mark.asyncio
+async def test_wait_for_file_polling(tmp_path):
+    """Polling fallback notices a file written shortly after the wait starts"""
+    target = tmp_path / "response_1.json"
+    asyncio.get_running_loop().call_later(0.02, target.write_text, "{}")
+    assert await wait_for_file(target, 1.0)
+    assert not await wait_for_file(tmp_path / "missing.json", 0.01)
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not InotifyWatcher.supported(), reason="inotify not available")
+async def test_wait_for_file_inotify(tmp_path):
+    """inotify waiter wakes up when the file is closed"""
+    watcher = InotifyWatcher(tmp_path)
+    assert watcher.start(asyncio.get_running_loop())
+    try:
+        target = tmp_path / "response_7.json"
+        asyncio.get_running_loop().call_later(0.02, target.write_text, "{}")
+        start = time.perf_counter()
+        assert await wait_for_file(target, 1.0, watcher)
+        assert time.perf_counter() - start < 0.5
+        assert not await wait_for_file(tmp_path / "never.json", 0.01, watcher)
+    finally:
+        watcher.close()
+
+
+@pytest.mark.skipif(not InotifyWatcher.supported(), reason="inotify not available")
+def test_each_event_loop_gets_a_watcher(tmp_path):
+    """A new event loop (e.g. a second asyncio.run) is watched too, not polled"""
+    transport = FileTransport(tmp_path)
+
+    async def watcher_loop():
+        watcher = transport._get_watcher()
+        assert watcher is not None and watcher is transport._get_watcher()
+        return watcher, watcher._loop
+
+    first, first_loop = asyncio.run(watcher_loop())
+    second, second_loop = asyncio.run(watcher_loop())
+    assert second is not first and second_loop is not first_loop
+    # The closed loop's descriptor was released
+    assert first._fd < 0 and list(transport._watchers.values()) == [second]
+    asyncio.run(transport.close())
+    assert second._fd < 0
+
+
+@pytest.mark.asyncio
+async def test_call_lua_round_trip_is_fast(tmp_path):
+    """Round trips are no longer quantised to 100 ms"""
+    bridge = ReaperFileBridge(tmp_path)
+    with EchoResponder(tmp_path):
+        for _ in range(10):
+            result = await bridge.call_lua("GetPlayState", [])
+            assert result == {"ok": True, "ret": "GetPlayState"}
+
+    stats = bridge.get_latency_stats()
+    assert stats["count"] == 10
+    assert stats["p50_ms"] < 50
+    assert not list(tmp_path.glob("*.json"))
@@ -0,0 +1,130 @@
+"""Test the bridge liveness monitor (no REAPER needed)"""
+import asyncio
+import json
+
+import pytest
+
+from server.bridge import ReaperFileBridge
+from server.dsl.health_check import verify_dsl_installation
+from server.liveness import BridgeLiveness
+from server.websocket_client import MCPWebSocketClient
+from testing.fake_reaper import FakeReaper
+from testing.fake_relay import FakeRelay
+
+
+class SwitchableTransport:
+    """Answers from a FakeReaper, or times out at once while `down`"""
+
+    def __init__(self):
+        self.reaper = FakeReaper()
+        self.down = False
+        self.timeouts = []
+
+    async def request(self, request, timeout):
+        await asyncio.sleep(0)
+        self.timeouts.append(timeout)
+        if self.down:
+            return None
+        response, _ = self.reaper.execute_request(json.dumps(request))
+        return response
+
+
+@pytest.fixture
+def transport():
+    return SwitchableTransport()
+
+
+@pytest.fixture
+def bridge(transport):
+    return ReaperFileBridge(transport=transport)
+
+
+@pytest.mark.asyncio
+async def test_state_follows_normal_traffic(bridge, transport):
+    liveness = bridge.liveness
+    events = []
+    liveness.add_listener(lambda e: events.append((e["previous"], e["state"])))
+
+    await bridge.call_lua("CountTracks", [0])
+    await bridge.call_lua("NoSuchFunction", [])  # a Lua error still proves liveness
+    assert liveness.state == "up" and not liveness.needs_probe()
+
+    transport.down = True
+    await bridge.call_lua("CountTracks", [0])
+    assert liveness.state == "up"  # one timeout is not enough
+    await bridge.call_lua("CountTracks", [0])
+    transport.down = False
+    await bridge.call_lua("CountTracks", [0])
+
+    assert events == [("unknown", "up"), ("up", "down"), ("down", "up")]
+    assert liveness.probes == 0
+
+
+@pytest.mark.asyncio
+async def test_probes_only_when_idle(bridge, transport):
+    liveness = bridge.liveness
+    liveness.idle_interval = 0.05
+    await bridge.call_lua("CountTracks", [0])
+    task = liveness.start(check_interval=0.01)
+    try:
+        await asyncio.sleep(0.03)
+        assert liveness.probes == 0  # recent traffic answers for itself
+        await asyncio.sleep(0.1)
+        assert liveness.probes >= 1
+        assert transport.timeouts[-1] == liveness.probe_timeout
+
+        liveness.call_started()  # a real call in flight: never probe alongside it
+        probes = liveness.probes
+        await asyncio.sleep(0.1)
+        assert liveness.probes == probes
+    finally:
+        await liveness.stop()
+    assert task.done()
+
+
+@pytest.mark.asyncio
+async def test_probe_reports_its_own_call():
+    """A call answered while a failed probe is returning does not make the probe succeed"""
+    class SlowBridge:
+        async def call_lua(self, func_name, args=None, timeout=None):
+            liveness.call_started()
+            liveness.call_finished(func_name != "GetAppVersion")  # the probe times out
+            await asyncio.sleep(0.01 if func_name == "GetAppVersion" else 0)
+            return {}
+
+    liveness = BridgeLiveness(SlowBridge())
+    probed, _ = await asyncio.gather(liveness.probe(), liveness.bridge.call_lua("CountTracks"))
+    assert probed is False and liveness.last_answered is True
+
+
+@pytest.mark.asyncio
+async def test_dsl_check_skips_a_dead_bridge_after_one_short_probe(bridge, transport):
+    transport.down = True
+    await verify_dsl_installation(bridge, "dsl-production", ["DSL"])
+    assert transport.timeouts == [bridge.liveness.probe_timeout]
+
+
+@pytest.mark.asyncio
+async def test_relay_client_publishes_transitions(bridge, transport):
+    relay = FakeRelay()
+    url = await relay.start()
+
+    async def handler(method, params):
+        return await bridge.call_lua(method, [])
+
+    client = MCPWebSocketClient(url, "token", handler, liveness=bridge.liveness)
+    connect = asyncio.create_task(client.connect())
+    try:
+        await relay.send_commands([{"request_id": 1, "method": "CountTracks", "params": {}}])
+        await relay.wait_for_responses(1)
+        for _ in range(20):
+            if any(m.get("event_type") == "bridge_health" for m in relay.messages):
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await client.disconnect()
+        await asyncio.wait_for(connect, 5.0)
+        await relay.stop()
+
+    (event,) = [m for m in relay.messages if m.get("event_type") == "bridge_health"]
+    assert (event["data"]["previous"], event["data"]["state"]) == ("unknown", "up")
@@ -0,0 +1,128 @@
+"""Test the file request queue: unbounded ids and the restart handshake (no REAPER needed)"""
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from server.bridge import ReaperFileBridge
+from server.transport import FileTransport
+from testing.fake_reaper import FakeReaper, FileBridgeServer
+
+
+@pytest.fixture
+def lua_bridge(tmp_path):
+    pytest.importorskip("lupa")
+    from testing.lua_bridge import LuaBridgeHarness
+
+    return LuaBridgeHarness(tmp_path, {"GetPlayState": lambda: 0})
+
+
+def test_lua_serves_ids_beyond_1000(lua_bridge):
+    """Request ids are not capped; pending files are served in id order"""
+    ids = [lua_bridge.submit("GetPlayState", [], request_id=i) for i in (250000, 999, 1001)]
+    lua_bridge.tick()
+    for request_id in ids:
+        assert lua_bridge.response(request_id) == {"ok": True, "ret": 0}
+    assert not list(lua_bridge.bridge_dir.glob("request_*"))
+
+
+def test_lua_ignores_temporary_request_files(lua_bridge):
+    """A request still being written (request_N.json.tmp) is left alone"""
+    tmp_file = lua_bridge.bridge_dir / "request_5.json.tmp"
+    tmp_file.write_text('{"id": 5, "func": "GetPl')
+    lua_bridge.tick()
+    assert tmp_file.exists()
+    assert lua_bridge.response(5) is None
+
+
+def test_lua_handshake_reports_last_id(lua_bridge):
+    """The handshake answers with the highest id the bridge has served"""
+    lua_bridge.submit("GetPlayState", [], request_id=4321)
+    lua_bridge.tick()
+    response = lua_bridge.call("BridgeHandshake", ["abc", 10])
+    assert response["ok"]
+    assert response["last_id"] >= 4321
+    assert response["session"] == "abc"
+
+
+@pytest.mark.asyncio
+async def test_restarted_server_resumes_above_bridge_ids(tmp_path):
+    """A new server process continues above ids answered for the old one"""
+    reaper = FakeReaper()
+    with FileBridgeServer(tmp_path, reaper):
+        first = FileTransport(tmp_path)
+        for _ in range(3):
+            await ReaperFileBridge(tmp_path, transport=first).call_lua("CountTracks", [0])
+        assert first.last_id == 3
+
+        # Fresh transport, as after a server restart: its counter starts at 0
+        second = FileTransport(tmp_path)
+        result = await ReaperFileBridge(tmp_path, transport=second).call_lua("CountTracks", [0])
+    assert result == {"ok": True, "ret": 0}
+    assert second.last_id == 4
+    await first.close()
+    await second.close()
+
+
+@pytest.mark.asyncio
+async def test_servers_sharing_a_directory_handshake_apart(tmp_path):
+    """Each session handshakes under its own file id, outside the request ids"""
+    reaper = FakeReaper()
+    first, second = FileTransport(tmp_path), FileTransport(tmp_path)
+    assert first.handshake_id != second.handshake_id
+    with FileBridgeServer(tmp_path, reaper):
+        await asyncio.gather(first._handshake(), second._handshake())
+        request = {"id": 7, "func": "CountTracks", "args": [0]}
+        assert await first.request(request, 1.0) == {"ok": True, "ret": 0}
+    # The id is rewritten to the file id, which the bridge logs
+    assert request["id"] == first.last_id == 1
+    assert reaper.last_request_id == 1
+    await first.close()
+    await second.close()
+
+
+@pytest.mark.asyncio
+async def test_servers_sharing_a_directory_use_distinct_ids(tmp_path):
+    """Two servers whose counters agree still write different request files"""
+    reaper = FakeReaper()
+    reaper.handlers["GetTrackName"] = lambda name: {"ok": True, "ret": name}
+    first, second = FileTransport(tmp_path), FileTransport(tmp_path)
+    with FileBridgeServer(tmp_path, reaper):
+        await asyncio.gather(first._ensure_handshake(), second._ensure_handshake())
+    assert first.last_id == second.last_id
+
+    async def call(transport, name):
+        return await transport.request({"id": 0, "func": "GetTrackName", "args": [name]}, 2.0)
+
+    # Every request file is written before the bridge serves any of them
+    calls = asyncio.gather(*(call(first, f"a{i}") for i in range(5)),
+                           *(call(second, f"b{i}") for i in range(5)))
+    await asyncio.sleep(0.05)
+    assert len(list(tmp_path.glob("request_*.json"))) == 10
+    with FileBridgeServer(tmp_path, reaper):
+        results = await calls
+    assert [r["ret"] for r in results] == [f"a{i}" for i in range(5)] + [f"b{i}" for i in range(5)]
+    assert reaper.requests == 10
+    assert not list(tmp_path.glob("request_*"))
+    await first.close()
+    await second.close()
+
+
+@pytest.mark.asyncio
+async def test_handshake_discards_stale_files(tmp_path):
+    """Leftover files of a dead session are removed, fresh ones are kept"""
+    stale = tmp_path / "response_12.json"
+    stale.write_text(json.dumps({"ok": True, "ret": "stale"}))
+    old = time.time() - 3600
+    os.utime(stale, (old, old))
+    fresh = tmp_path / "request_99.json.tmp"
+    fresh.write_text("{}")
+
+    transport = FileTransport(tmp_path)
+    with FileBridgeServer(tmp_path, FakeReaper()):
+        await ReaperFileBridge(tmp_path, transport=transport).call_lua("CountTracks", [0])
+    assert not stale.exists()
+    assert fresh.exists()
+    await transport.close()
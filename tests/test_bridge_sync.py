@@ -0,0 +1,84 @@
+"""Test that synchronous tools run off the event loop (no REAPER needed)"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from server.tools import bridge_sync
+from server.tools.bridge_sync import ReaperBridge, sync_tool
+
+
+class SlowBridge:
+    """Async bridge whose calls take a while and record the loop they ran on"""
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.loops = []
+
+    async def call_lua(self, func_name, args=None):
+        self.loops.append(asyncio.get_running_loop())
+        await asyncio.sleep(self.delay)
+        return {"ok": True, "ret": len(args or [])}
+
+    async def call_batch(self, calls, stop_on_error=False):
+        return [await self.call_lua(func, args) for func, args in calls]
+
+
+@pytest.fixture
+def slow_bridge(monkeypatch):
+    slow = SlowBridge()
+    monkeypatch.setattr(bridge_sync, "bridge", slow)
+    return slow
+
+
+def slow_tool(calls: int = 3) -> dict:
+    """Synchronous tool making several bridge calls"""
+    responses = [ReaperBridge.send_request({"action": "CountTracks", "proj": 0})
+                 for _ in range(calls)]
+    return {"thread": threading.current_thread().name, "responses": responses}
+
+
+@pytest.mark.asyncio
+async def test_sync_tool_keeps_event_loop_responsive(slow_bridge):
+    """Other coroutines keep running while a slow sync tool works"""
+    ticks = 0
+
+    async def heartbeat():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    beat = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    result = await sync_tool(slow_tool)(calls=3)
+    elapsed = time.perf_counter() - start
+    beat.cancel()
+
+    assert result["thread"].startswith("reaper-sync-tool")
+    assert [r["ret"] for r in result["responses"]] == [1, 1, 1]
+    # The bridge calls ran on the server loop, not on throwaway loops
+    assert set(slow_bridge.loops) == {asyncio.get_running_loop()}
+    assert ticks >= int(elapsed / 0.01) // 2
+
+
+@pytest.mark.asyncio
+async def test_sync_tools_run_concurrently(slow_bridge):
+    """Two slow tools overlap instead of queueing behind each other"""
+    start = time.perf_counter()
+    await asyncio.gather(sync_tool(slow_tool)(calls=2), sync_tool(slow_tool)(calls=2))
+    assert time.perf_counter() - start < 0.35
+
+
+@pytest.mark.asyncio
+async def test_send_batch_uses_server_loop(slow_bridge):
+    results = await bridge_sync.run_sync_tool(
+        ReaperBridge.send_batch, [("GetTrack", [0, 0]), ("GetTrack", [0, 1])]
+    )
+    assert [r["ret"] for r in results] == [2, 2]
+
+
+def test_send_request_without_server_loop(slow_bridge):
+    """Outside the server (scripts), calls still work on a private loop"""
+    assert ReaperBridge.send_request({"action": "CountTracks", "proj": 0})["ret"] == 1
@@ -0,0 +1,104 @@
+"""Test per-function timeouts and the bridge circuit breaker (no REAPER needed)"""
+import asyncio
+import time
+
+import pytest
+
+from server.bridge import ReaperFileBridge
+from server.call_policy import CircuitBreaker, TimeoutPolicy, timeout_class
+from .test_bridge_liveness import SwitchableTransport
+
+
+@pytest.fixture
+def transport():
+    return SwitchableTransport()
+
+
+@pytest.fixture
+def bridge(transport):
+    bridge = ReaperFileBridge(transport=transport)
+    bridge.breaker = CircuitBreaker(failure_threshold=3, cooldown=0.05)
+    return bridge
+
+
+def test_timeout_classes_and_overrides():
+    assert timeout_class("GetPlayState") == "quick"
+    assert timeout_class("InsertTrackAtIndex") == "normal"
+    assert timeout_class("RenderProject") == "slow"
+    assert timeout_class("Main_OnCommand") == "slow"
+
+    policy = TimeoutPolicy(overrides={"slow": 120, "GetPlayState": 0.5})
+    assert policy.timeout_for("RenderProject") == 120
+    assert policy.timeout_for("GetPlayState") == 0.5
+    assert policy.timeout_for("InsertTrackAtIndex") == 5.0
+
+
+def test_overrides_from_env(monkeypatch):
+    monkeypatch.setenv("REAPER_MCP_TIMEOUTS", "quick=2, CalcMediaSrcLoudness=300")
+    policy = TimeoutPolicy.from_env()
+    assert policy.timeout_for("CountTracks") == 2
+    assert policy.timeout_for("CalcMediaSrcLoudness") == 300
+
+
+def test_learned_timeout_shrinks_and_resets():
+    policy = TimeoutPolicy(min_samples=20)
+    for _ in range(19):
+        policy.record("GetPlayState", 0.001)
+    assert policy.timeout_for("GetPlayState") == 3.0  # not enough samples yet
+
+    policy.record("GetPlayState", 0.001)
+    assert policy.timeout_for("GetPlayState") == policy.min_timeout
+
+    for _ in range(20):
+        policy.record("RenderProject", 30.0)
+    assert policy.timeout_for("RenderProject") == 60.0  # never above the class default
+
+    policy.record_timeout("GetPlayState")
+    assert policy.timeout_for("GetPlayState") == 3.0
+
+
+@pytest.mark.asyncio
+async def test_bridge_uses_policy_timeout(bridge, transport):
+    await bridge.call_lua("CountTracks", [0])
+    await bridge.call_lua("InsertTrackAtIndex", [0, True])
+    await bridge.call_lua("CountTracks", [0], timeout=9)
+    await bridge.call_batch([("CountTracks", [0]), ("RenderProject", [])])
+    assert transport.timeouts == [3.0, 5.0, 9, 60.0]
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast(bridge, transport):
+    transport.down = True
+    for _ in range(3):
+        response = await bridge.call_lua("CountTracks", [0])
+        assert "Timeout" in response["error"]
+    assert bridge.breaker.state == "open"
+
+    sent = len(transport.timeouts)
+    start = time.perf_counter()
+    response = await bridge.call_lua("CountTracks", [0])
+    assert time.perf_counter() - start < 0.01
+    assert not response["ok"] and "unavailable" in response["error"]
+    assert len(transport.timeouts) == sent  # nothing reached the transport
+    assert bridge.breaker.snapshot()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_recovers(bridge, transport):
+    transport.down = True
+    for _ in range(3):
+        await bridge.call_lua("CountTracks", [0])
+
+    # Still down after the cooldown: the probe fails and the cooldown doubles
+    await asyncio.sleep(0.06)
+    response = await bridge.call_lua("CountTracks", [0])
+    assert "unavailable" in response["error"]
+    assert transport.timeouts[-1] == bridge.liveness.probe_timeout
+    assert bridge.breaker.state == "open" and bridge.breaker.cooldown == 0.1
+
+    transport.down = False
+    await asyncio.sleep(0.11)
+    response = await bridge.call_lua("CountTracks", [0])
+    assert response["ok"] and response["ret"] == 0
+    assert bridge.breaker.state == "closed"
+    assert transport.timeouts[-2:] == [bridge.liveness.probe_timeout, 3.0]
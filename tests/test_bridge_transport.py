@@ -0,0 +1,171 @@
+"""Test the file and socket bridge transports against the Python stand-in (no REAPER needed)"""
+import asyncio
+
+import pytest
+
+from server.bridge import ReaperFileBridge
+from server.transport import FileTransport, SocketTransport, create_transport, parse_socket_address
+from testing.fake_reaper import FakeReaper, FileBridgeServer, SocketBridgeServer
+
+
+def test_parse_socket_address():
+    """Only TCP addresses are accepted: the bridge does not listen on Unix sockets"""
+    assert parse_socket_address("127.0.0.1:9877") == ("127.0.0.1", 9877)
+    with pytest.raises(ValueError, match="not supported"):
+        parse_socket_address("unix:/tmp/reaper.sock")
+    with pytest.raises(ValueError):
+        parse_socket_address("localhost")
+
+
+def test_transport_selected_from_environment(tmp_path, monkeypatch):
+    """REAPER_MCP_TRANSPORT picks the transport"""
+    monkeypatch.setenv("REAPER_MCP_TRANSPORT", "socket")
+    monkeypatch.setenv("REAPER_MCP_SOCKET", "127.0.0.1:1")
+    transport = create_transport(tmp_path)
+    assert isinstance(transport, SocketTransport)
+    assert isinstance(transport.fallback, FileTransport)
+
+    monkeypatch.setenv("REAPER_MCP_TRANSPORT", "file")
+    assert isinstance(create_transport(tmp_path), FileTransport)
+
+
+@pytest.mark.asyncio
+async def test_socket_transport_round_trip(tmp_path):
+    """call_lua works unchanged over a TCP socket"""
+    server = SocketBridgeServer()
+    address = await server.start_tcp()
+    bridge = ReaperFileBridge(tmp_path, transport=SocketTransport(address))
+    try:
+        assert (await bridge.call_lua("InsertTrackAtIndex", [0, True]))["ok"]
+        await bridge.call_lua("SetTrackName", [0, "Bass"])
+        result = await bridge.call_lua("GetTrackName", [0])
+        assert result == {"ok": True, "ret": "Bass"}
+
+        result = await bridge.call_lua("NoSuchFunction", [])
+        assert result == {"ok": False, "error": "Unknown function: NoSuchFunction"}
+        assert server.frames_received == 4
+        assert not list(tmp_path.iterdir())  # nothing touched the bridge directory
+    finally:
+        await bridge.transport.close()
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_socket_transport_msgpack_frames(tmp_path):
+    """REAPER_MCP_CODEC=msgpack sends flagged MessagePack frames and reads them back"""
+    server = SocketBridgeServer()
+    address = await server.start_tcp()
+    transport = create_transport(tmp_path, kind="socket", address=address, codec="msgpack")
+    bridge = ReaperFileBridge(tmp_path, transport=transport)
+    try:
+        await bridge.call_lua("InsertTrackAtIndex", [0, True])
+        await bridge.call_lua("SetTrackName", [0, "Grüße ♫"])
+        assert await bridge.call_lua("GetTrackName", [0]) == {"ok": True, "ret": "Grüße ♫"}
+    finally:
+        await transport.close()
+        await server.stop()
+
+    with pytest.raises(ValueError):
+        SocketTransport(address, codec="xml")
+
+
+@pytest.mark.asyncio
+async def test_socket_transport_falls_back_to_files(tmp_path):
+    """An unreachable socket degrades to the file protocol"""
+    reaper = FakeReaper()
+    transport = SocketTransport("127.0.0.1:1", fallback=FileTransport(tmp_path))
+    bridge = ReaperFileBridge(tmp_path, transport=transport)
+    with FileBridgeServer(tmp_path, reaper):
+        result = await bridge.call_lua("CountTracks", [0])
+    assert result == {"ok": True, "ret": 0}
+    assert reaper.calls == ["CountTracks"]
+    await transport.close()
+
+
+@pytest.mark.asyncio
+async def test_socket_transport_pipelines_concurrent_calls(tmp_path):
+    """Concurrent calls share bridge ticks and get their own responses back"""
+    reaper = FakeReaper()
+    reaper.tracks = [{"name": f"Track {i}"} for i in range(40)]
+    server = SocketBridgeServer(reaper, tick=0.05, max_per_tick=32)
+    address = await server.start_tcp()
+    bridge = ReaperFileBridge(tmp_path, transport=SocketTransport(address))
+    try:
+        results = await asyncio.gather(*(bridge.call_lua("GetTrackName", [i]) for i in range(40)))
+        assert [r["ret"] for r in results] == [f"Track {i}" for i in range(40)]
+        # 40 requests at 32 per tick: two ticks instead of forty round trips
+        assert server.busy_ticks == 2
+        assert bridge.transport.in_flight == 0
+    finally:
+        await bridge.transport.close()
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_socket_transport_drops_late_responses(tmp_path):
+    """A response arriving after its caller timed out does not confuse later calls"""
+    server = SocketBridgeServer(tick=0.05)
+    address = await server.start_tcp()
+    transport = SocketTransport(address)
+    try:
+        late = await transport.request({"id": 1, "func": "GetAppVersion", "args": []}, 0.001)
+        assert late is None
+        result = await transport.request({"id": 2, "func": "CountTracks", "args": [0]}, 1.0)
+        assert result == {"ok": True, "ret": 0}
+        assert transport.connected
+    finally:
+        await transport.close()
+        await server.stop()
+
+
+class RecordingWriter:
+    """Stream writer stand-in that answers every pending request on write"""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.events = []
+
+    def is_closing(self):
+        return False
+
+    def close(self):
+        pass
+
+    def write(self, data):
+        self.events.append("write")
+        futures = list(self.transport._pending.values())
+        asyncio.get_running_loop().call_soon(
+            lambda: [f.set_result(({"ok": True}, len(data))) for f in futures])
+
+    async def drain(self):
+        self.events.append("drain")
+
+
+@pytest.mark.asyncio
+async def test_socket_transport_drains_after_writing():
+    """drain() sees the caller's frame, so the write buffer applies back-pressure"""
+    transport = SocketTransport("127.0.0.1:1")
+    transport._bind_loop()
+    transport._writer = writer = RecordingWriter(transport)
+    assert await transport.request({"id": 1, "func": "CountTracks", "args": [0]}, 1.0) == {"ok": True}
+    assert writer.events == ["write", "drain"]
+
+
+@pytest.mark.asyncio
+async def test_socket_transport_fails_fast_on_disconnect(tmp_path):
+    """A frame that cannot be written fails its caller at once, not at its timeout"""
+    server = SocketBridgeServer()
+    address = await server.start_tcp()
+    transport = SocketTransport(address)
+    try:
+        assert await transport.request({"id": 1, "func": "CountTracks", "args": [0]}, 1.0)
+        call = asyncio.ensure_future(
+            transport.request({"id": 2, "func": "CountTracks", "args": [0]}, 30.0))
+        await asyncio.sleep(0)  # the frame is queued, the flush not yet run
+        transport._writer.close()
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(call, 1.0)
+        assert transport.in_flight == 0
+    finally:
+        await transport.close()
+        await server.stop()
@@ -0,0 +1,131 @@
+"""Test fuzzy name matching and the FX parameter-name cache (no REAPER needed)"""
+import pytest
+
+from server.dsl import resolvers
+from server.dsl.name_index import FXParamCache, NameIndex, fx_param_cache, similarity
+from server.dsl.tools import _find_fx_on_track, _fuzzy_match_param
+from server.dsl.snapshot import snapshot_cache
+from testing.fake_reaper import FakeReaper, LocalBridge
+
+SYNTH_PARAMS = [f"Osc {n} {p}" for n in range(1, 100) for p in ("Pitch", "Fine", "Level")]
+SYNTH_PARAMS += ["Filter Cutoff", "Filter Resonance", "Filter Env Amount", "Master Volume"]
+
+
+def test_exact_and_contained_names_rank_first():
+    index = NameIndex(["Dry/Wet", "Wet Mix", "Pre-Delay", "Room Size"])
+    assert index.best("room size") == (1.0, 3, "Room Size")
+    assert index.search("wet", k=2)[0][2] in ("Dry/Wet", "Wet Mix")
+    assert index.best("predelay")[2] == "Pre-Delay"
+
+
+def test_fuzzy_search_is_bounded_top_k():
+    index = NameIndex(SYNTH_PARAMS)
+    matches = index.search("cutof", k=3)
+    assert len(matches) <= 3
+    assert matches[0][2] == "Filter Cutoff"
+    assert index.best("xyzzy", min_score=0.4) is None
+
+
+def test_short_query_matches_inside_words():
+    index = NameIndex(["ReaEQ", "ReaComp"])
+    assert index.best("eq")[2] == "ReaEQ"
+
+
+def test_similarity_orders_close_names():
+    assert similarity("resonance", "resonanse") > similarity("resonance", "release")
+
+
+def test_typos_keep_difflib_scores():
+    """Trigrams only narrow the candidates; short typos still score like before"""
+    index = NameIndex(["Kick", "Snare", "Guitar", "Bass DI"])
+    assert index.best("kik") == (pytest.approx(resolvers.fuzzy_match_score("kik", "Kick")), 0, "Kick")
+    assert index.best("guitr", min_score=0.8)[2] == "Guitar"
+
+
+@pytest.mark.asyncio
+async def test_short_typos_resolve_tracks():
+    snapshot_cache.invalidate()
+    resolvers.reset_context()
+    reaper = FakeReaper()
+    for name in ("Kick", "Snare", "Guitar", "Bass DI"):
+        reaper.add_track(name)
+    bridge = LocalBridge(reaper)
+    assert (await resolvers.resolve_track(bridge, "kik")).name == "Kick"
+    assert (await resolvers.resolve_track(bridge, "guitr")).name == "Guitar"
+    snapshot_cache.invalidate()
+
+
+@pytest.fixture
+def bridge():
+    snapshot_cache.invalidate()
+    fx_param_cache.clear()
+    reaper = FakeReaper()
+    reaper.add_track("Lead", fx=["VST3i: Big Synth (Vendor)", "VST: ReaEQ (Cockos)"])
+    reaper.fx_params["VST3i: Big Synth (Vendor)"] = SYNTH_PARAMS
+    yield LocalBridge(reaper)
+    fx_param_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_param_names_are_fetched_once_per_fx(bridge):
+    """A 300-parameter synth costs one bridge call, then a GUID check"""
+    index = await _fuzzy_match_param(bridge, 0, 0, "cutoff")
+    assert SYNTH_PARAMS[index] == "Filter Cutoff"
+    assert bridge.reaper.calls == ["GetFXParamNames"]
+
+    assert SYNTH_PARAMS[await _fuzzy_match_param(bridge, 0, 0, "resonance")] == "Filter Resonance"
+    assert bridge.reaper.calls == ["GetFXParamNames", "GetFXParamNames"]
+
+
+@pytest.mark.asyncio
+async def test_param_cache_refetches_when_fx_changes(bridge):
+    """The cache key is plugin name + GUID; a different plugin gets its own list"""
+    cache = FXParamCache()
+    first = await cache.get(bridge, 0, 0)
+    assert await cache.get(bridge, 0, 0) is first
+
+    bridge.reaper.tracks[0]["fx"][0] = "VST: Other Synth"
+    bridge.reaper.fx_params["VST: Other Synth"] = ["Cutoff"]
+    second = await cache.get(bridge, 0, 0)
+    assert second is not first
+    assert second.names == ["Cutoff"]
+
+
+@pytest.mark.asyncio
+async def test_find_fx_uses_cached_track_info(bridge):
+    assert await _find_fx_on_track(bridge, 0, "eq") == 1
+    assert await _find_fx_on_track(bridge, 0, "big synth") == 0
+    assert "TrackFX_GetFXName" not in bridge.reaper.calls
+
+
+def test_lua_param_names_skip_known_guid(tmp_path):
+    pytest.importorskip("lupa")
+    from testing.lua_bridge import LuaBridgeHarness
+
+    params = ["Cutoff", "Resonance"]
+    api = {
+        "GetTrack": lambda proj, idx: "track" if idx == 0 else None,
+        "TrackFX_GetFXGUID": lambda track, fx: "{GUID-1}" if fx == 0 else None,
+        "TrackFX_GetFXName": lambda track, fx, buf: (True, "VST: Synth"),
+        "TrackFX_GetNumParams": lambda track, fx: len(params),
+        "TrackFX_GetParamName": lambda track, fx, i, buf: (True, params[i]),
+    }
+    harness = LuaBridgeHarness(tmp_path, api)
+    response = harness.call("GetFXParamNames", [0, 0])
+    assert response == {"ok": True, "guid": "{GUID-1}", "fx_name": "VST: Synth", "names": params}
+    response = harness.call("GetFXParamNames", [0, 0, "{GUID-1}"])
+    assert response["unchanged"] and "names" not in response
+    assert not harness.call("GetFXParamNames", [0, 3])["ok"]
+
+
+@pytest.mark.asyncio
+async def test_find_fx_falls_back_to_live_names(bridge):
+    """An FX missing from the cached track info is looked up in REAPER before giving up"""
+    bridge.reaper.handlers["GetProjectStateChangeCount"] = lambda *a: {"ok": True, "ret": 1}
+    assert await _find_fx_on_track(bridge, 0, "eq") == 1
+
+    # Added without moving the change count: the snapshot still lists two FX
+    bridge.reaper.tracks[0]["fx"].append("VST: ReaVerbate (Cockos)")
+    assert await _find_fx_on_track(bridge, 0, "reverb") == 2
+    assert "TrackFX_GetCount" in bridge.reaper.calls
+    assert await _find_fx_on_track(bridge, 0, "flanger") is None
@@ -0,0 +1,105 @@
+"""Test the project snapshot cache used by the DSL resolvers (no REAPER needed)"""
+import pytest
+
+from server.bridge import ReaperFileBridge
+from server.dsl import resolvers
+from server.dsl.snapshot import snapshot_cache
+from server.dsl.wrappers import track_create
+from testing.fake_reaper import FakeReaper, LocalBridge, LocalTransport
+
+
+@pytest.fixture
+def bridge():
+    snapshot_cache.invalidate()
+    resolvers.reset_context()
+    reaper = FakeReaper()
+    for name in ("Kick", "Snare", "Bass DI", "Piano"):
+        reaper.add_track(name)
+    yield LocalBridge(reaper)
+    snapshot_cache.invalidate()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_project_costs_one_probe(bridge):
+    """The second lookup only asks REAPER whether the project changed"""
+    track = await resolvers.resolve_track(bridge, "Bass DI")
+    assert track.index == 2
+
+    bridge.reaper.calls.clear()
+    track = await resolvers.resolve_track(bridge, "Piano")
+    assert track.index == 3
+    assert bridge.reaper.calls == ["GetProjectStateChangeCount"]
+
+
+@pytest.mark.asyncio
+async def test_project_change_refreshes_snapshot(bridge):
+    """A new change count drops the cached tracks"""
+    await resolvers.resolve_track(bridge, "Kick")
+    bridge.reaper.add_track("Strings")
+
+    track = await resolvers.resolve_track(bridge, "Strings")
+    assert track.index == 4
+    assert "GetAllTracksInfo" in bridge.reaper.calls[-6:]
+
+
+@pytest.mark.asyncio
+async def test_markers_come_from_snapshot(bridge):
+    """Marker and region lookups share one cached marker list"""
+    bridge.reaper.markers = [
+        {"name": "Verse", "position": 8.0},
+        {"name": "Chorus", "position": 16.0, "end": 32.0, "is_region": True},
+    ]
+    time_ref = await resolvers.resolve_time(bridge, {"region": "Chorus"})
+    assert (time_ref.start, time_ref.end) == (16.0, 32.0)
+
+    bridge.reaper.calls.clear()
+    time_ref = await resolvers.resolve_time(bridge, {"marker": "Verse"})
+    assert time_ref.start == 8.0
+    assert bridge.reaper.calls == ["GetProjectStateChangeCount"]
+
+    with pytest.raises(resolvers.ResolverError):
+        await resolvers.resolve_time(bridge, {"marker": "Outro"})
+
+
+@pytest.mark.asyncio
+async def test_track_resolution_is_one_bulk_call(bridge):
+    """Resolving by name fetches all tracks with a single GetAllTracksInfo"""
+    for i in range(1, 61):
+        bridge.reaper.add_track(f"Cello {i}")
+    track = await resolvers.resolve_track(bridge, "cello 42")
+    assert track.name == "Cello 42"
+    assert bridge.reaper.calls == ["GetProjectStateChangeCount", "GetAllTracksInfo"]
+
+
+@pytest.mark.asyncio
+async def test_track_pattern_matches_roles_and_plurals(bridge):
+    """Pattern lookups use the name/role index"""
+    bridge.reaper.add_track("Kit Room")
+    bridge.reaper.add_track("Cello")
+
+    drums = await resolvers.resolve_tracks_pattern(bridge, "all drums")
+    assert [t.name for t in drums] == ["Kick", "Snare", "Kit Room"]
+    cellos = await resolvers.resolve_tracks_pattern(bridge, "cellos")
+    assert [t.name for t in cellos] == ["Cello"]
+
+
+@pytest.mark.asyncio
+async def test_server_edits_refresh_snapshot_without_change_count(bridge):
+    """Edits made through the bridge drop the snapshot even if REAPER's count stays put"""
+    reaper = bridge.reaper
+    reaper.handlers["GetProjectStateChangeCount"] = lambda *a: {"ok": True, "ret": 1}
+    real_bridge = ReaperFileBridge(transport=LocalTransport(reaper))
+    await resolvers.resolve_track(real_bridge, "Kick")
+
+    result = await track_create(real_bridge, "Strings")
+    assert result.success
+    assert (await resolvers.resolve_track(real_bridge, "Strings")).index == 4
+
+    await real_bridge.call_lua("GetSetMediaTrackInfo_String", [4, "P_NAME", "Violins", True])
+    assert (await resolvers.resolve_track(real_bridge, "Violins")).index == 4
+
+    # Reads keep the snapshot
+    reaper.calls.clear()
+    await real_bridge.call_lua("GetTrackName", [0])
+    await resolvers.resolve_track(real_bridge, "Piano")
+    assert reaper.calls == ["GetTrackName", "GetProjectStateChangeCount"]
@@ -0,0 +1,60 @@
+"""Test the fake REAPER project model behind the benchmarks (no REAPER needed)"""
+import pytest
+
+from server.bridge import batch_ref
+from testing.fake_reaper import LocalBridge, make_project
+
+
+@pytest.fixture
+def bridge():
+    return LocalBridge(make_project(16))
+
+
+@pytest.mark.asyncio
+async def test_track_pointers_resolve_inside_a_batch(bridge):
+    """GetTrack handles feed later calls of the same batch, like userdata in Lua"""
+    track = batch_ref(0)
+    results = await bridge.call_batch([
+        ("GetTrack", [0, 7]),
+        ("GetSetMediaTrackInfo_String", [track, "P_NAME", "", False]),
+        ("GetTrackNumSends", [track, -1]),
+        ("GetTrackSendInfo_Value", [track, -1, 0, "P_SRCTRACK"]),
+        ("GetSetMediaTrackInfo_String", [batch_ref(3), "P_NAME", "", False]),
+    ])
+    assert results[1]["ret"] == "Bus 1"
+    assert results[2]["ret"] == 7
+    assert results[4]["ret"] == "Kick"
+    assert "__ptr" in results[0]["ret"]
+
+
+@pytest.mark.asyncio
+async def test_pointer_from_earlier_request_is_rejected(bridge):
+    """A handle only lives for one request, as in mcp_bridge.lua"""
+    track = (await bridge.call_lua("GetTrack", [0, 0]))["ret"]
+    result = await bridge.call_lua("GetMediaTrackInfo_Value", [track, "D_VOL"])
+    assert not result["ok"]
+    assert "previous call" in result["error"]
+
+
+@pytest.mark.asyncio
+async def test_edits_bump_change_count_and_show_in_track_info(bridge):
+    before = (await bridge.call_lua("GetProjectStateChangeCount", [0]))["ret"]
+    await bridge.call_lua("SetTrackVolume", [1, 0.5])
+    await bridge.call_lua("SetTrackMute", [1, True])
+    after = (await bridge.call_lua("GetProjectStateChangeCount", [0]))["ret"]
+    assert after == before + 2
+
+    info = (await bridge.call_lua("GetTrackInfo", [1]))["info"]
+    assert info["muted"] and info["has_midi"]
+    assert (await bridge.call_lua("GetTrackVolume", [1]))["ret"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_tempo_markers_count_measures(bridge):
+    count = (await bridge.call_lua("CountTempoTimeSigMarkers", [0]))["ret"]
+    assert count == 16
+    first, second = [(await bridge.call_lua("GetTempoTimeSigMarker", [0, i]))["ret"]
+                     for i in range(2)]
+    # 16 s at 90 BPM in 4/4 is 24 beats: six bars
+    assert first[:5] == [True, 0.0, 0, 0.0, 90.0]
+    assert second[1:4] == [16.0, 6, 0.0]
@@ -0,0 +1,51 @@
+"""Test that tool categories are imported only when registered (no REAPER needed)"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from mcp.server.fastmcp import FastMCP
+
+from server.tool_registry import LazyRegister
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, sys
+import server.app as app
+
+def tool_modules():
+    return sorted(m for m in sys.modules if m.startswith(("server.tools.", "server.dsl.tools")))
+
+before = tool_modules()
+app.register_tools_by_profile("minimal")
+after_profile = tool_modules()
+app.CATEGORY_REGISTRY["Markers"](app.mcp)
+print(json.dumps([before, after_profile, tool_modules()]))
+"""
+
+
+def test_lazy_register_imports_on_first_call():
+    register = LazyRegister(".tools.server_metrics", "register_server_metrics_tools",
+                            package="server")
+    assert not register.loaded
+    mcp = FastMCP("test")
+    assert register(mcp) == 1
+    assert register.loaded
+
+
+def test_app_imports_only_registered_categories(tmp_path):
+    env = dict(os.environ, REAPER_MCP_BRIDGE_DIR=str(tmp_path), REAPER_MCP_TOOL_CACHE="0")
+    output = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    before, after_profile, after_enable = json.loads(output.splitlines()[-1])
+
+    # Only the always-registered metrics tool (and the sync helper it uses)
+    assert "server.dsl.tools" not in before
+    assert not [m for m in before if m not in ("server.tools.server_metrics",
+                                               "server.tools.bridge_sync")]
+    assert {"server.tools.tracks", "server.tools.transport",
+            "server.tools.project"} <= set(after_profile)
+    assert "server.tools.markers" not in after_profile
+    assert "server.tools.markers" in after_enable
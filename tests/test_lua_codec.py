@@ -0,0 +1,143 @@
+"""Conformance and scaling tests for the JSON/MessagePack codec in mcp_bridge.lua
+
+The bridge script runs under an embedded Lua 5.4 interpreter (lupa), so no
+REAPER is needed; tests are skipped when lupa is not installed.
+"""
+import base64
+import json
+import math
+import os
+
+import pytest
+
+from server import msgpack_codec
+
+DOCUMENTS = [
+    {"id": 1, "func": "GetTrack", "args": [0, 3]},
+    {"nested": {"a": [1, [2, [3, [4, {"deep": True}]]]], "b": "end"}},
+    {"text": 'quote " backslash \\ slash / tab \t newline \n cr \r'},
+    {"unicode": "Grüße – ♫ 音楽 🎹", "control": "\x01\x1f"},
+    {"tricky": "commas, [brackets], {braces}: \"nested\" json-ish"},
+    {"numbers": [0, -1, 2 ** 40, -(2 ** 40), 0.1, -2.5e-7, 1.5e300, 123456.789012345]},
+    {"path": "C:\\Users\\me\\Music\\song.rpp"},
+    [1, "two", 3.0, False, {"x": "y"}],
+]
+
+
+@pytest.fixture(scope="module")
+def lua(tmp_path_factory):
+    pytest.importorskip("lupa")
+    from testing.lua_bridge import LuaBridgeHarness
+
+    # Strings cross as bytes, as MessagePack output is not valid UTF-8
+    harness = LuaBridgeHarness(tmp_path_factory.mktemp("codec"), encoding=None)
+    return harness.lua
+
+
+@pytest.fixture(scope="module")
+def codec(lua):
+    return lua.globals().MCP_CODEC
+
+
+def lua_json_roundtrip(codec, value):
+    return json.loads(codec.encode_json(codec.decode_json(json.dumps(value).encode())))
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_json_roundtrip(codec, document):
+    assert lua_json_roundtrip(codec, document) == document
+
+
+def test_json_ensure_ascii_escapes(codec):
+    """\\uXXXX escapes (Python's default output) decode to UTF-8, surrogates included"""
+    encoded = json.dumps({"name": "Café 🎸"}, ensure_ascii=True)
+    assert "\\u" in encoded
+    assert json.loads(codec.encode_json(codec.decode_json(encoded.encode()))) == {"name": "Café 🎸"}
+
+
+def test_json_floats_round_trip_exactly(codec):
+    values = [0.1, 1 / 3, math.pi, 1e-310, 2.0 ** 53 + 0.5]
+    assert lua_json_roundtrip(codec, values) == values
+
+
+def test_json_non_finite_numbers_become_null(codec):
+    lua = codec.encode_json
+    assert json.loads(lua(float("inf"))) is None
+
+
+@pytest.mark.parametrize("bad", ['{"a": }', '[1, 2', '{"a" 1}', '"unterminated', '[1] x'])
+def test_json_rejects_malformed_input(codec, bad):
+    from lupa.lua54 import LuaError
+
+    with pytest.raises(LuaError):
+        codec.decode_json(bad.encode())
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_msgpack_roundtrip(codec, document):
+    """Python MessagePack -> Lua -> Lua MessagePack -> Python"""
+    lua_value = codec.decode_msgpack(msgpack_codec.packb(document))
+    assert json.loads(codec.encode_json(lua_value)) == document
+    assert msgpack_codec.unpackb(codec.encode_msgpack(lua_value)) == document
+
+
+def test_python_msgpack_codec_roundtrip():
+    value = {"ints": [0, 127, 128, 255, 256, 65536, 2 ** 33, -1, -33, -129, -40000, -(2 ** 33)],
+             "floats": [0.5, -1e100], "text": "x" * 300, "blob": b"\x00\x01",
+             "list": list(range(20)), "map": {str(i): i for i in range(20)}}
+    assert msgpack_codec.unpackb(msgpack_codec.packb(value)) == value
+
+
+@pytest.mark.parametrize("length", [0, 1, 2, 3, 4, 5, 1000])
+def test_base64_matches_python(codec, length):
+    data = os.urandom(length)
+    encoded = codec.base64_encode(data)
+    assert encoded == base64.b64encode(data)
+    assert codec.base64_decode(encoded) == data
+
+
+def test_binary_strings_stay_valid_json(codec):
+    """Strings that are not UTF-8 go out base64-marked (JSON) or as bin (MessagePack)"""
+    from server.transport import decode_json
+
+    blob = bytes(range(256))
+    value = codec.decode_msgpack(msgpack_codec.packb({"blob": blob, "text": "Grüße"}))
+    encoded = codec.encode_json(value)
+    encoded.decode("utf-8")
+    assert json.loads(encoded)["blob"] == {"__base64": base64.b64encode(blob).decode()}
+    assert decode_json(encoded) == {"blob": blob, "text": "Grüße"}
+    assert msgpack_codec.unpackb(codec.encode_msgpack(value)) == {"blob": blob, "text": "Grüße"}
+
+
+# Runs fn(...) and returns the Lua/C function calls it made and the bytes
+# copied by string.sub and table.concat, the codec's only copying primitives
+COUNT_OPERATIONS = b"""
+return function(fn, ...)
+    local calls, copied = 0, 0
+    local sub, concat = string.sub, table.concat
+    string.sub = function(...) local s = sub(...); copied = copied + #s; return s end
+    table.concat = function(...) local s = concat(...); copied = copied + #s; return s end
+    debug.sethook(function() calls = calls + 1 end, "c")
+    fn(...)
+    debug.sethook()
+    string.sub, table.concat = sub, concat
+    return calls, copied
+end
+"""
+
+
+def _codec_operations(lua, codec, n):
+    payload = json.dumps({"events": [{"ppq": i * 0.5, "msg": "90 3c 7f", "sel": False}
+                                     for i in range(n)]}).encode()
+    count = lua.execute(COUNT_OPERATIONS)
+    decode_calls, decode_copied = count(codec.decode_json, payload)
+    encode_calls, encode_copied = count(codec.encode_json, codec.decode_json(payload))
+    return decode_calls + encode_calls, decode_copied + encode_copied
+
+
+def test_codec_scales_linearly(lua, codec):
+    """Four times the events costs four times the calls and copying, not sixteen"""
+    small_calls, small_copied = _codec_operations(lua, codec, 1000)
+    large_calls, large_copied = _codec_operations(lua, codec, 4000)
+    assert large_calls < 4.2 * small_calls
+    assert large_copied < 4.2 * small_copied
@@ -0,0 +1,92 @@
+"""Test whole-take MIDI analysis and its MIDI-hash cache (no REAPER needed)"""
+import time
+
+import pytest
+
+from server.midi_analysis import MidiAnalysisCache, detect_chords, detect_key
+from server.midi_events import MidiEventBuffer, decode_midi
+from server.tools import midi_advanced
+from .test_result_stream import HarnessBridge
+
+# I - vi - IV - V in C major, one bar (4 quarters) each
+PROGRESSION = [(60, 64, 67), (57, 60, 64), (53, 57, 60), (55, 59, 62)]
+
+
+def progression_buffer():
+    events = MidiEventBuffer()
+    for bar, chord in enumerate(PROGRESSION):
+        for pitch in chord:
+            events.add_note(bar * 3840, bar * 3840 + 3840, pitch)
+        events.add_note(bar * 3840, bar * 3840 + 960, chord[0] - 12)  # bass on the downbeat
+    return events.encode()
+
+
+def test_key_of_c_major_progression():
+    key = detect_key(decode_midi(progression_buffer()).notes)
+    assert key["key"] == "C major" and key["tonic"] == 0
+    assert key["notes_analyzed"] == 16 and key["confidence"] > 70
+
+    a_minor = MidiEventBuffer()
+    for step, pitch in enumerate([57, 59, 60, 62, 64, 65, 68, 69, 57, 64, 57]):
+        a_minor.add_note(step * 960, step * 960 + 960, pitch)
+    assert detect_key(decode_midi(a_minor.encode()).notes)["key"] == "A minor"
+
+
+def test_chords_merge_into_one_span_per_bar():
+    chords = detect_chords(decode_midi(progression_buffer()).notes)
+    assert [chord["name"] for chord in chords] == ["C major", "A minor", "F major", "G major"]
+    assert [(chord["start_ppq"], chord["end_ppq"]) for chord in chords] == \
+        [(0, 3840), (3840, 7680), (7680, 11520), (11520, 15360)]
+
+
+@pytest.fixture
+def lua_take(tmp_path):
+    pytest.importorskip("lupa")
+    from testing.lua_bridge import LuaBridgeHarness
+
+    take = {"buffer": progression_buffer(), "hash": "v1"}
+    api = {
+        "time_precise": time.monotonic,
+        "GetMediaItem": lambda proj, idx: "item",
+        "GetMediaItemTake": lambda item, idx: "take",
+        "MIDI_GetAllEvts": lambda take_, buf: (True, take["buffer"]),
+        "MIDI_GetHash": lambda take_, notes_only, buf: (True, take["hash"]),
+    }
+    return HarnessBridge(LuaBridgeHarness(tmp_path, api)), take
+
+
+@pytest.mark.asyncio
+async def test_unchanged_take_costs_one_hash_call(lua_take):
+    bridge, take = lua_take
+    cache = MidiAnalysisCache()
+
+    first = await cache.get(bridge, 0, 0)
+    assert first.key["key"] == "C major" and len(first.chords) == 4
+    bridge.calls.clear()
+
+    assert await cache.get(bridge, 0, 0) is first
+    assert bridge.calls == ["GetMIDIHashFromItemTake"]
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+    # Editing the take changes its hash, so the events are read again
+    events = MidiEventBuffer()
+    events.add_note(0, 960, 62)
+    take["buffer"], take["hash"] = events.encode(), "v2"
+    second = await cache.get(bridge, 0, 0)
+    assert second is not first and len(second.notes) == 1
+    assert "StreamOpen" in bridge.calls and cache.stats()["entries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_tools_share_one_analysis(lua_take, monkeypatch):
+    bridge, _ = lua_take
+    monkeypatch.setattr(midi_advanced, "bridge", bridge)
+    monkeypatch.setattr(midi_advanced, "midi_analysis", MidiAnalysisCache())
+
+    key = await midi_advanced.detect_midi_key_signature(0, 0)
+    assert key.startswith("Detected key: C major")
+    progression = await midi_advanced.detect_midi_chord_progressions(0, 0)
+    assert progression.endswith("C major → A minor → F major → G major")
+    distribution = await midi_advanced.get_midi_note_distribution(0, 0)
+    assert distribution.startswith("MIDI note distribution (16 total notes)")
+    assert bridge.calls.count("StreamOpen") == 1
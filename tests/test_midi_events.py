@@ -0,0 +1,206 @@
+"""Test packed MIDI event buffers: building, SetAllMIDIEventsFromItemTake and decoding (no REAPER needed)"""
+import base64
+import struct
+import time
+
+import pytest
+
+from server.midi_events import MidiEventBuffer, bridge_args, decode_midi, read_midi_events
+from server.tools import midi_advanced
+from .test_result_stream import HarnessBridge
+
+
+def unpack(buffer):
+    """(absolute ppq, flags, message) for every event of a packed buffer"""
+    events, pos, ppq = [], 0, 0
+    while pos < len(buffer):
+        offset, flags, length = struct.unpack_from("<iBi", buffer, pos)
+        pos += 9
+        ppq += offset
+        events.append((ppq, flags, buffer[pos:pos + length]))
+        pos += length
+    return events
+
+
+def test_notes_and_ccs_pack_in_position_order():
+    events = MidiEventBuffer()
+    events.add_note(960, 1920, 64, velocity=90, channel=1, selected=True)
+    events.add_note(0, 960, 60)
+    events.add_cc(480, 7, 100, shape=1)
+
+    assert unpack(events.encode()) == [
+        (0, 0, b"\x90\x3c\x64"),
+        (480, 0x10, b"\xb0\x07\x64"),
+        (960, 0, b"\x80\x3c\x00"),  # note-off before the note-on at the same tick
+        (960, 1, b"\x91\x40\x5a"),
+        (1920, 1, b"\x81\x40\x00"),
+    ]
+    assert events.notes == 2 and events.last_ppq == 1920
+    assert bridge_args(events)[1] == {"mode": "append", "last_ppq": 1920}
+
+
+def test_invalid_events_are_rejected():
+    events = MidiEventBuffer()
+    with pytest.raises(ValueError):
+        events.add_note(0, 100, 128)
+    with pytest.raises(ValueError):
+        events.add_note(0, 100, 60, channel=16)
+    with pytest.raises(ValueError):
+        events.add_note(100, 100, 60)
+    with pytest.raises(ValueError):
+        bridge_args(events, mode="merge")
+
+
+class Take:
+    def __init__(self, buffer=b""):
+        self.buffer = buffer
+        self.sorts = 0
+        self.undo_points = []
+
+
+@pytest.fixture
+def lua_take(tmp_path):
+    pytest.importorskip("lupa")
+    from testing.lua_bridge import LuaBridgeHarness
+
+    existing = MidiEventBuffer()
+    existing.add_note(0, 480, 48)
+    existing.add_event(3840, b"\xb0\x7b\x00")  # all-notes-off marking the source end
+    take = Take(existing.encode())
+
+    def set_all(take_, buffer):
+        take_.buffer = bytes(buffer)
+        return True
+
+    def sort(take_):
+        take_.sorts += 1
+
+    api = {
+        "GetMediaItem": lambda proj, idx: "item" if idx == 0 else None,
+        "GetMediaItemTake": lambda item, idx: take,
+        "GetMediaItemTake_Item": lambda take_: "item",
+        "MIDI_GetAllEvts": lambda take_, buf: (True, take_.buffer),
+        "MIDI_SetAllEvts": set_all,
+        "MIDI_Sort": sort,
+        "Undo_OnStateChange_Item": lambda proj, name, item: take.undo_points.append(name),
+    }
+    return LuaBridgeHarness(tmp_path, api, encoding=None), take
+
+
+def test_lua_appends_buffer_with_one_sort_and_undo_point(lua_take):
+    harness, take = lua_take
+    events = MidiEventBuffer()
+    for step in range(16):
+        events.add_note(step * 240, step * 240 + 120, 42, channel=9)
+    packed, options = bridge_args(events, undo="Hats")
+
+    response = harness.call("SetAllMIDIEventsFromItemTake", [0, 0, packed, options])
+    assert response["ok"]
+    assert take.sorts == 1 and take.undo_points == [b"Hats"]
+    written = unpack(take.buffer)
+    # New events, an empty event rewinding to 0, then the original events
+    assert written[:32] == unpack(events.encode())
+    assert written[32] == (0, 0, b"")
+    assert [e[0] for e in written[33:]] == [0, 480, 3840]
+
+
+def test_lua_replace_keeps_source_end(lua_take):
+    harness, take = lua_take
+    events = MidiEventBuffer()
+    events.add_note(0, 960, 72)
+    packed, options = bridge_args(events, mode="replace")
+
+    assert harness.call("SetAllMIDIEventsFromItemTake", [0, 0, packed, options])["ok"]
+    assert unpack(take.buffer) == [(0, 0, b"\x90\x48\x64"), (960, 0, b"\x80\x48\x00"),
+                                   (3840, 0, b"\xb0\x7b\x00")]
+    assert harness.call("SetAllMIDIEventsFromItemTake", [5, 0, packed, options])["error"] \
+        == "Failed to find take"
+
+
+class RecordingBridge:
+    def __init__(self):
+        self.calls = []
+
+    async def call_lua(self, func_name, args=None, timeout=None):
+        self.calls.append((func_name, args))
+        return {"ok": True, "ret": 0}
+
+
+@pytest.mark.asyncio
+async def test_drum_pattern_is_one_bridge_call(monkeypatch):
+    recording = RecordingBridge()
+    monkeypatch.setattr(midi_advanced, "bridge", recording)
+
+    result = await midi_advanced.generate_midi_drum_pattern(0, 0, "basic_rock", bars=16)
+    assert result == "Generated basic_rock drum pattern: 192 notes over 16 bars"
+    assert len(recording.calls) == 1
+    func, args = recording.calls[0]
+    assert func == "SetAllMIDIEventsFromItemTake" and args[:2] == [0, 0]
+    note_ons = [e for e in unpack(base64.b64decode(args[2])) if e[2][0] == 0x99]
+    assert len(note_ons) == 192
+
+
+def test_decode_pairs_notes_into_columns():
+    events = MidiEventBuffer()
+    events.add_note(0, 960, 60, velocity=90, selected=True)
+    events.add_note(480, 720, 60, velocity=70, channel=2)  # same pitch, other channel
+    events.add_note(480, 1440, 60, velocity=50, muted=True)  # overlaps the first note
+    events.add_cc(240, 64, 127, channel=1, shape=2)
+    buffer = events.encode() + struct.pack("<iBi3B", 0, 0, 3, 0x90, 67, 100)  # never ends
+
+    midi = decode_midi(buffer)
+    notes = midi.notes
+    assert list(notes.start_ppq) == [0, 480, 480, 1440]
+    # The first note-off of a pitch closes the oldest open note, like REAPER
+    assert list(notes.end_ppq) == [960, 720, 1440, 1440]
+    assert list(notes.channel) == [0, 2, 0, 0]
+    assert list(notes.velocity) == [90, 70, 50, 100]
+    assert list(notes.selected) == [1, 0, 0, 0] and list(notes.muted) == [0, 0, 1, 0]
+    assert midi.ccs[0] == {"ppq": 240, "controller": 64, "value": 127, "channel": 1,
+                           "selected": 0, "muted": 0, "shape": 2}
+    assert midi.end_ppq == 1440 and midi.events == 8
+
+
+def test_decode_handles_long_messages_and_zero_velocity_offs():
+    buffer = struct.pack("<iBi3B", 0, 0, 3, 0x90, 40, 80)
+    buffer += struct.pack("<iBi", 100, 0, 7) + b"\xff\x01lyric"
+    buffer += struct.pack("<iBi3B", 380, 0, 3, 0x90, 40, 0)  # note-on, velocity 0
+    buffer += struct.pack("<iBi2B", 0, 0, 2, 0xC0, 5)  # program change
+
+    midi = decode_midi(buffer)
+    assert midi.notes[0]["start_ppq"] == 0 and midi.notes[0]["end_ppq"] == 480
+    assert midi.other == [(100, 0, b"\xff\x01lyric"), (480, 0, b"\xc0\x05")]
+    assert decode_midi(b"").events == 0
+
+
+@pytest.fixture
+def lua_midi(tmp_path):
+    pytest.importorskip("lupa")
+    from testing.lua_bridge import LuaBridgeHarness
+
+    events = MidiEventBuffer()
+    for step in range(2000):
+        events.add_note(step * 240, step * 240 + 200, 36 + step % 24, velocity=90)
+    api = {
+        "time_precise": time.monotonic,
+        "GetMediaItem": lambda proj, idx: "item",
+        "GetMediaItemTake": lambda item, idx: "take",
+        "MIDI_GetAllEvts": lambda take, buf: (True, events.encode()),
+        "MIDI_GetHash": lambda take, notes_only, buf: (True, "2000-notes"),
+    }
+    return HarnessBridge(LuaBridgeHarness(tmp_path, api))
+
+
+@pytest.mark.asyncio
+async def test_whole_take_is_read_through_a_stream(lua_midi):
+    midi = await read_midi_events(lua_midi, 0, 0)
+    assert len(midi.notes) == 2000 and midi.notes.pitch[25] == 37
+    assert lua_midi.calls[0] == "StreamOpen" and "MIDI_GetNote" not in lua_midi.calls
+
+
+@pytest.mark.asyncio
+async def test_rhythm_analysis_covers_whole_take(lua_midi, monkeypatch):
+    monkeypatch.setattr(midi_advanced, "bridge", lua_midi)
+    report = await midi_advanced.analyze_midi_rhythm_pattern(0, 0)
+    assert "Notes analyzed: 2000 (2000 onsets)" in report
+    assert "Dominant rhythm: 16th notes" in report and "16th notes: 1999" in report
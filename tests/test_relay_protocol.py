@@ -0,0 +1,84 @@
+"""Test relay message batching, compression and binary framing (no REAPER needed)"""
+import asyncio
+import json
+
+import pytest
+
+from server.relay_protocol import RelayProtocol, RelayProtocolError
+from server.websocket_client import MCPWebSocketClient
+from testing.fake_relay import FakeRelay
+
+# A MIDI event dump as returned by the MIDI tools
+MIDI_DUMP = json.dumps({"events": [{"ppq": i * 240, "msg": [0x90, 36 + i % 24, 100]}
+                                   for i in range(400)]})
+
+
+def response(i, result="ok"):
+    return {"type": "response", "request_id": i, "result": result}
+
+
+def test_legacy_frames_are_plain_json_text():
+    protocol = RelayProtocol()
+    frames = protocol.encode([response(1), response(2, MIDI_DUMP)])
+    assert [json.loads(f)["request_id"] for f in frames] == [1, 2]
+
+
+@pytest.mark.parametrize("binary,msgpack", [(False, False), (True, False), (True, True)])
+def test_batched_compressed_frames_round_trip(binary, msgpack):
+    protocol = RelayProtocol(batch=True, compression="deflate", binary=binary, msgpack=msgpack)
+    messages = [response(i, MIDI_DUMP if i % 2 else "ok") for i in range(5)]
+    (frame,) = protocol.encode(messages)
+    assert isinstance(frame, bytes)
+    assert len(frame) < len(MIDI_DUMP)  # five results, compressed below one
+    assert RelayProtocol.decode(frame) == messages
+
+
+def test_small_messages_stay_uncompressed_text():
+    protocol = RelayProtocol(compression="deflate", compress_threshold=1024)
+    assert isinstance(protocol.encode_payload(response(1)), str)
+    assert isinstance(protocol.encode_payload(response(2, MIDI_DUMP)), bytes)
+
+
+def test_unknown_framing_version_is_rejected():
+    with pytest.raises(RelayProtocolError):
+        RelayProtocol.decode(b"\xf0{}")
+
+
+def test_relay_without_protocol_keeps_legacy_framing():
+    assert RelayProtocol.negotiate(None).legacy
+    assert RelayProtocol.negotiate({"batch": True, "compression": "brotli"}).compression is None
+
+
+async def run_session(accept, count=40):
+    """Frames and payload bytes the relay receives for `count` responses"""
+    relay = FakeRelay(accept=accept)
+    url = await relay.start()
+
+    async def handler(method, params):
+        await asyncio.sleep(0.001)
+        return MIDI_DUMP
+
+    client = MCPWebSocketClient(url, "token", handler)
+    connect = asyncio.create_task(client.connect())
+    try:
+        await relay.send_commands([{"request_id": i, "method": "get_midi_events", "params": {},
+                                    "session_id": "s"} for i in range(count)])
+        responses = await relay.wait_for_responses(count)
+    finally:
+        await client.disconnect()
+        await asyncio.wait_for(connect, 5.0)
+        await relay.stop()
+    assert sorted(r["request_id"] for r in responses) == list(range(count))
+    assert all(r["result"] == MIDI_DUMP for r in responses)
+    return relay
+
+
+@pytest.mark.asyncio
+async def test_batching_and_compression_cut_bytes_on_the_wire():
+    legacy = await run_session(accept=None)
+    assert legacy.offer["batch"] is True
+    compact = await run_session(accept={"batch": True, "compression": "deflate"})
+
+    assert legacy.frames == 40
+    assert compact.frames < legacy.frames
+    assert compact.bytes_received * 5 < legacy.bytes_received
@@ -0,0 +1,180 @@
+"""Test scheduling of relay commands (no REAPER needed)"""
+import asyncio
+import json
+
+import pytest
+
+from server.relay_scheduler import CommandScheduler, SchedulerOverloaded
+from server.websocket_client import MCPWebSocketClient
+
+
+class Recorder:
+    """Command executor that logs start/end and blocks until released"""
+
+    def __init__(self):
+        self.events = []
+        self.running = 0
+        self.peak = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, command):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.events.append(("start", command["request_id"]))
+        await self.release.wait()
+        self.events.append(("end", command["request_id"]))
+        self.running -= 1
+
+    def started(self):
+        return [rid for kind, rid in self.events if kind == "start"]
+
+
+def command(request_id, method="dsl_track_create", session="s1"):
+    return {"request_id": request_id, "method": method, "params": {}, "session_id": session}
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_in_flight_is_bounded_and_sessions_take_turns():
+    run = Recorder()
+    scheduler = CommandScheduler(run, max_in_flight=2)
+    for i in range(4):
+        scheduler.submit(command(f"a{i}", session="a"))
+        scheduler.submit(command(f"b{i}", session="b"))
+        scheduler.submit(command(f"c{i}", session="c"))
+    await settle()
+    # One mutating command per session, at most two overall
+    assert run.started() == ["a0", "b0"]
+    assert scheduler.stats()["queued"] == 10
+
+    run.release.set()
+    while scheduler.in_flight or scheduler.queued:
+        await asyncio.sleep(0)
+    assert run.peak == 2
+    starts = run.started()
+    for session in "abc":
+        assert [r for r in starts if r[0] == session] == [f"{session}{i}" for i in range(4)]
+    assert starts.index("c0") < starts.index("a1")  # c is not starved by a and b
+
+
+@pytest.mark.asyncio
+async def test_session_commands_never_overlap():
+    run = Recorder()
+    run.release.set()
+    scheduler = CommandScheduler(run, max_in_flight=8)
+    for i in range(5):
+        scheduler.submit(command(i))
+    while scheduler.in_flight or scheduler.queued:
+        await asyncio.sleep(0)
+    assert run.events == [(kind, i) for i in range(5) for kind in ("start", "end")]
+
+
+@pytest.mark.asyncio
+async def test_read_only_commands_use_the_priority_lane():
+    run = Recorder()
+    scheduler = CommandScheduler(run, max_in_flight=1, priority_slots=1)
+    scheduler.submit(command("write1", session="a"))
+    scheduler.submit(command("write2", session="b"))
+    scheduler.submit(command("health", method="get_server_metrics"))
+    scheduler.submit(command("read", method="dsl_list_tracks"))
+    await settle()
+    # The reserved slot runs one read while the writer holds the only normal slot
+    assert run.started() == ["write1", "health"]
+
+    run.release.set()
+    while scheduler.in_flight or scheduler.queued:
+        await asyncio.sleep(0)
+    assert run.started().index("read") < run.started().index("write2")
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects():
+    run = Recorder()
+    scheduler = CommandScheduler(run, max_in_flight=1, max_queue=2)
+    for i in range(3):
+        scheduler.submit(command(i))
+    with pytest.raises(SchedulerOverloaded) as excinfo:
+        scheduler.submit(command(3))
+    assert excinfo.value.queued == 2
+    assert scheduler.stats()["rejected"] == 1
+    await scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_reads_wait_for_their_sessions_writes():
+    run = Recorder()
+    scheduler = CommandScheduler(run, max_in_flight=2)
+    scheduler.submit(command("insert", method="insert_track", session="a"))
+    scheduler.submit(command("count", method="get_track_count", session="a"))
+    scheduler.submit(command("other", method="get_track_count", session="b"))
+    await settle()
+    # Session b has no pending write, so its read still takes the fast lane
+    assert run.started() == ["insert", "other"]
+
+    run.release.set()
+    while scheduler.in_flight or scheduler.queued:
+        await asyncio.sleep(0)
+    assert run.events.index(("end", "insert")) < run.events.index(("start", "count"))
+
+
+@pytest.mark.asyncio
+async def test_full_queue_still_accepts_health_checks():
+    run = Recorder()
+    scheduler = CommandScheduler(run, max_in_flight=1, max_queue=1, max_priority_queue=1)
+    scheduler.submit(command(0))
+    scheduler.submit(command(1))
+    with pytest.raises(SchedulerOverloaded):
+        scheduler.submit(command(2))
+    scheduler.submit(command("health", method="ping", session="monitor"))
+    scheduler.submit(command("status", method="get_server_metrics", session="monitor"))
+    with pytest.raises(SchedulerOverloaded):
+        scheduler.submit(command("more", method="ping", session="monitor"))
+    await settle()
+    assert run.started() == [0, "health"]
+    await scheduler.close()
+
+
+class FakeWebSocket:
+    def __init__(self, messages):
+        self.messages = [json.dumps(m) for m in messages]
+        self.sent = []
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for message in self.messages:
+            yield message
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+@pytest.mark.asyncio
+async def test_client_answers_overload_explicitly(monkeypatch):
+    monkeypatch.setenv("MCP_RELAY_MAX_IN_FLIGHT", "1")
+    monkeypatch.setenv("MCP_RELAY_MAX_QUEUE", "1")
+    release = asyncio.Event()
+
+    async def handler(method, params):
+        await release.wait()
+        return f"{method} done"
+
+    client = MCPWebSocketClient("ws://relay", "token", handler)
+    client.websocket = FakeWebSocket([dict(command(i), type="command") for i in range(3)])
+    client.connected = True
+    await client._handle_messages()
+
+    (rejected,) = client.websocket.sent
+    assert rejected["request_id"] == 2
+    assert rejected["overloaded"] is True and "overloaded" in rejected["error"]
+
+    release.set()
+    while client.scheduler.in_flight or client.scheduler.queued:
+        await asyncio.sleep(0)
+    assert [r["request_id"] for r in client.websocket.sent[1:]] == [0, 1]
+    assert client.websocket.sent[1]["result"] == "dsl_track_create done"
@@ -0,0 +1,118 @@
+"""Test streamed bridge results: StreamOpen/StreamRead in mcp_bridge.lua and ResultStream (no REAPER needed)"""
+import time
+
+import pytest
+
+from server.result_stream import StreamError, stream_result
+from server.tools import envelope_extended, project_state
+from testing.fake_reaper import FakeReaper, LocalBridge, make_project
+
+MIDI_BUFFER = bytes(range(256)) * 40 + b"\x00\xff\x80"
+
+
+@pytest.fixture
+def lua_bridge(tmp_path):
+    pytest.importorskip("lupa")
+    from testing.lua_bridge import LuaBridgeHarness
+
+    api = {
+        "time_precise": time.monotonic,
+        "MIDI_GetAllEvts": lambda take, buf: (True, MIDI_BUFFER),
+        "CF_GetClipboard": lambda buf: (True, "Tempo ♩ = 120 — " * 500),
+    }
+    return LuaBridgeHarness(tmp_path, api)
+
+
+class HarnessBridge:
+    """call_lua over the Lua harness, one defer tick per request"""
+
+    def __init__(self, harness):
+        self.harness = harness
+        self.calls = []
+
+    async def call_lua(self, func_name, args=None, timeout=None):
+        self.calls.append(func_name)
+        return self.harness.call(func_name, args)
+
+
+@pytest.mark.asyncio
+async def test_lua_streams_binary_buffer_in_pages(lua_bridge):
+    bridge = HarnessBridge(lua_bridge)
+    stream = stream_result(bridge, "MIDI_GetAllEvts", [0, ""], item=1, page_size=4096)
+    data = await stream.collect()
+    assert data == MIDI_BUFFER
+    assert stream.total == len(MIDI_BUFFER) and stream.pages == 3
+    assert bridge.calls == ["StreamOpen", "StreamRead", "StreamRead", "StreamRead"]
+    assert lua_bridge.call("StreamRead", [1, 0])["error"] == "Unknown or expired stream: 1"
+
+
+@pytest.mark.asyncio
+async def test_lua_text_pages_keep_utf8_sequences_whole(lua_bridge):
+    bridge = HarnessBridge(lua_bridge)
+    stream = stream_result(bridge, "CF_GetClipboard", [""], item=1, page_size=1000)
+    pages = [page async for page in stream]
+    assert len(pages) > 1 and all(isinstance(page, str) for page in pages)
+    assert "".join(pages) == "Tempo ♩ = 120 — " * 500
+
+
+@pytest.mark.asyncio
+async def test_lua_close_releases_stream(lua_bridge):
+    bridge = HarnessBridge(lua_bridge)
+    async with stream_result(bridge, "MIDI_GetAllEvts", [0, ""], item=1,
+                             page_size=1024) as stream:
+        first = await stream.__anext__()
+    assert first == MIDI_BUFFER[:1024]
+    assert bridge.calls[-1] == "StreamClose"
+    assert not lua_bridge.call("StreamRead", [stream._cursor, 1024])["ok"]
+
+    with pytest.raises(StreamError, match="Unknown function"):
+        await stream_result(bridge, "NoSuchFunction").collect()
+
+
+@pytest.mark.asyncio
+async def test_item_list_streams_in_pages():
+    reaper = make_project(20, items_per_track=5)
+    bridge = LocalBridge(reaper)
+    expected = (await bridge.call_lua("GetAllItems"))["items"]
+
+    stream = stream_result(bridge, "GetAllItems", field="items", page_size=32)
+    pages = [page async for page in stream]
+    assert len(expected) > 64 and all(len(page) == 32 for page in pages[:-1])
+    assert [item for page in pages for item in page] == expected
+    assert stream.meta == {"ok": True}
+    assert reaper.streams == {}
+
+
+@pytest.mark.asyncio
+async def test_bridge_without_streams_falls_back_to_one_call():
+    reaper = make_project(3, items_per_track=2)
+    reaper.supports_streams = False
+    bridge = LocalBridge(reaper)
+
+    stream = stream_result(bridge, "GetAllItems", field="items")
+    assert len(await stream.collect()) == 6
+    assert stream.pages == 1
+
+    chunk = await stream_result(bridge, "GetTrackStateChunk", [0, "", False], item=1).collect()
+    assert chunk.startswith("<TRACK")
+
+
+@pytest.mark.asyncio
+async def test_chunk_tools_read_base64_pages(monkeypatch):
+    """Chunks the bridge sent as base64 (not valid UTF-8) arrive as bytes pages"""
+    reaper = FakeReaper()
+    chunk = b"<VOLENV2\nNAME \xff\nPT 0 1 0\n>"
+    reaper.handlers.update({
+        "GetTrack": lambda proj, index: {"ok": True, "ret": {"__ptr": "track"}},
+        "GetTrackEnvelope": lambda track, index: {"ok": True, "ret": {"__ptr": "env"}},
+        "GetTrackEnvelopeByName": lambda track, name: {"ok": True, "ret": {"__ptr": "env"}},
+        "GetEnvelopeStateChunk": lambda *args: {"ok": True, "ret": [True, chunk]},
+    })
+    bridge = LocalBridge(reaper)
+    monkeypatch.setattr(envelope_extended, "bridge", bridge)
+    monkeypatch.setattr(project_state, "bridge", bridge)
+
+    assert await envelope_extended.get_envelope_state_chunk(0, 0) == \
+        "Envelope state chunk (26 chars): <VOLENV2\nNAME \ufffd\nPT 0 1 0\n>"
+    assert await project_state.get_envelope_state_chunk(0, "Volume") == \
+        "Envelope state chunk (4 lines)"
@@ -0,0 +1,209 @@
+"""Test the RPP chunk parser, differ and minimal apply (no REAPER needed)"""
+import pytest
+
+from server.rpp_chunk import (ChunkError, diff_chunks, parse_chunk, plan_patches,
+                              split_tokens)
+from server.tools import envelope_extended, project_state
+
+TRACK = """<TRACK {T1}
+  NAME "Lead Vox"
+  TRACKID {T1}
+  <VOLENV2
+    EGUID {E1}
+    ACT 1 -1
+    PT 0 1 0
+    PT 1.5 0.5 0
+  >
+  <FXCHAIN
+    <VST "VST: ReaEQ (Cockos)" reaeq.dll 0 "" 1919247729<56535452> ""
+      ZXE=
+    >
+    <PARMENV 0:0 0 1 0.5
+      EGUID {E2}
+      PT 0 0.2 0
+    >
+  >
+  <ITEM
+    POSITION 2
+    IGUID {I1}
+    <SOURCE MIDI
+      E 0 90 3c 60
+    >
+  >
+>
+"""
+
+
+def test_parse_is_lossless():
+    root = parse_chunk(TRACK)
+    assert root.text() == TRACK
+    assert [node.identity for node in root.walk()] == [
+        ("TRACK", "{T1}"), ("VOLENV2", "{E1}"), ("FXCHAIN", None), ("VST", None),
+        ("PARMENV", "{E2}"), ("ITEM", "{I1}"), ("SOURCE", None)]
+    assert root.values("NAME") == ["Lead Vox"]
+    assert root.find("FXCHAIN").find("VST").header[0] == "VST: ReaEQ (Cockos)"
+
+    crlf = TRACK.replace("\n", "\r\n")
+    assert parse_chunk(crlf).text() == crlf
+    assert split_tokens("NAME 'say \"hi\"' `x y` 3") == ["NAME", 'say "hi"', "x y", "3"]
+
+
+def test_malformed_chunks_are_rejected():
+    with pytest.raises(ChunkError, match="Unterminated <TRACK"):
+        parse_chunk("<TRACK\n<ITEM\n>")
+    with pytest.raises(ChunkError, match="must start"):
+        parse_chunk("NAME x\n<TRACK\n>")
+
+
+def test_item_and_envelope_edits_become_patches():
+    old = parse_chunk(TRACK)
+    new = old.copy()
+    parm = next(node for node in new.walk() if node.tag == "PARMENV")
+    for index, tokens in list(parm.lines("PT")):
+        parm.set_line(index, tokens[:2] + [float(tokens[2]) * 2] + tokens[3:])
+    new.find("ITEM").set_values("POSITION", 4.0)
+
+    assert [str(change) for change in diff_chunks(old, new)] == [
+        "TRACK/FXCHAIN/PARMENV {E2}: PT 0 0.2 0 -> PT 0 0.4 0",
+        "TRACK/ITEM {I1}: POSITION 2 -> POSITION 4",
+    ]
+    assert [patch.identity for patch in plan_patches(old, new)] == \
+        [("PARMENV", "{E2}"), ("ITEM", "{I1}")]
+    assert plan_patches(old, old.copy()) == []
+
+    # Track lines and added sub-chunks need the whole chunk
+    new.set_values("NAME", "Lead")
+    assert plan_patches(old, new) is None
+    added = parse_chunk(TRACK.replace("  <ITEM", "  <ITEM\n    IGUID {I2}\n  >\n  <ITEM", 1))
+    assert plan_patches(old, added) is None
+    assert [change.kind for change in diff_chunks(old, added)] == ["added"]
+
+
+class ChunkBridge:
+    """One track and one envelope; streams unsupported, so chunks come in one call"""
+
+    def __init__(self, chunk=TRACK, envelope=None, sub_chunks=True):
+        self.chunk = chunk
+        self.envelope = envelope
+        self.sub_chunks = sub_chunks
+        self.calls = []
+
+    async def call_lua(self, func_name, args=None, timeout=None):
+        self.calls.append(func_name)
+        if func_name in ("GetTrack", "GetTrackEnvelope"):
+            return {"ok": True, "ret": {"__ptr": func_name}}
+        if func_name == "GetTrackStateChunk":
+            return {"ok": True, "ret": [True, self.chunk]}
+        if func_name == "GetEnvelopeStateChunk":
+            return {"ok": True, "ret": [True, self.envelope]}
+        if func_name == "SetTrackSubChunks" and self.sub_chunks:
+            for patch in args[1]:
+                old = next(n for n in parse_chunk(self.chunk).walk() if n.guid == patch["guid"])
+                self.chunk = self.chunk.replace(old.text(), patch["chunk"])
+            return {"ok": True, "ret": len(args[1])}
+        if func_name == "SetTrackStateChunk":
+            self.chunk = args[1]
+            return {"ok": True, "ret": True}
+        if func_name == "SetEnvelopeStateChunk":
+            self.envelope = args[1]
+            return {"ok": True, "ret": True}
+        return {"ok": False, "error": f"Unknown function: {func_name}"}
+
+
+@pytest.mark.asyncio
+async def test_set_track_chunk_sends_only_changed_items(monkeypatch):
+    bridge = ChunkBridge()
+    monkeypatch.setattr(project_state, "bridge", bridge)
+    edited = TRACK.replace("POSITION 2", "POSITION 8")
+
+    assert await project_state.set_track_state_chunk(0, edited) == \
+        "Set track state chunk (1 changed items/envelopes)"
+    assert bridge.chunk == edited and "SetTrackStateChunk" not in bridge.calls
+    assert await project_state.set_track_state_chunk(0, edited) == "Track state chunk unchanged"
+
+    renamed = edited.replace("Lead Vox", "Lead")
+    report = await project_state.diff_track_state_chunk(0, renamed)
+    assert report.startswith("1 changes (the whole chunk would be set)")
+    assert await project_state.set_track_state_chunk(0, renamed) == "Set track state chunk"
+    assert bridge.calls[-1] == "SetTrackStateChunk" and bridge.chunk == renamed
+
+
+@pytest.mark.asyncio
+async def test_chunk_without_items_is_set_without_reading(monkeypatch):
+    bridge = ChunkBridge()
+    monkeypatch.setattr(project_state, "bridge", bridge)
+    bare = '<TRACK {T1}\n  NAME "Bare"\n  TRACKID {T1}\n>\n'
+
+    assert await project_state.set_track_state_chunk(0, bare, undo=False) == "Set track state chunk"
+    assert bridge.calls == ["GetTrack", "SetTrackStateChunk"] and bridge.chunk == bare
+
+
+@pytest.mark.asyncio
+async def test_old_bridge_gets_whole_chunk(monkeypatch):
+    bridge = ChunkBridge(sub_chunks=False)
+    monkeypatch.setattr(project_state, "bridge", bridge)
+    edited = TRACK.replace("PT 1.5 0.5 0", "PT 1.5 0.25 0")
+
+    assert await project_state.set_track_state_chunk(0, edited) == "Set track state chunk"
+    assert bridge.calls[-2:] == ["GetTrack", "SetTrackStateChunk"] and bridge.chunk == edited
+
+
+@pytest.mark.asyncio
+async def test_envelope_points_scale_in_one_write(monkeypatch):
+    points = "\n".join(f"PT {i * 0.25:g} 0.5 0" for i in range(200))
+    bridge = ChunkBridge(envelope=f"<VOLENV2\nEGUID {{E1}}\nACT 1 -1\n{points}\n>")
+    monkeypatch.setattr(envelope_extended, "bridge", bridge)
+
+    result = await envelope_extended.scale_envelope_points(0, 0, factor=1.5, start_time=10.0)
+    assert result == "Scaled 160 envelope points"
+    assert bridge.calls.count("SetEnvelopeStateChunk") == 1
+    values = [tokens[2] for _, tokens in parse_chunk(bridge.envelope).lines("PT")]
+    assert values[:40] == ["0.5"] * 40 and values[40:] == ["0.75"] * 160
+
+
+class Item:
+    def __init__(self, guid):
+        self.guid = guid
+        self.chunk = None
+
+
+class Envelope:
+    def __init__(self, guid):
+        self.chunk = f"<VOLENV2\nEGUID {guid}\n>"
+
+
+def test_lua_sets_sub_chunks_by_guid(tmp_path):
+    pytest.importorskip("lupa")
+    from testing.lua_bridge import LuaBridgeHarness
+
+    items, envelopes, undo_flags = [Item("{I1}"), Item("{I2}")], [Envelope("{E1}")], []
+
+    def set_chunk(target, chunk, isundo):
+        target.chunk = chunk
+        undo_flags.append(isundo)
+        return True
+
+    harness = LuaBridgeHarness(tmp_path, {
+        "GetTrack": lambda proj, idx: "track" if idx == 0 else None,
+        "CountTrackMediaItems": lambda track: len(items),
+        "GetTrackMediaItem": lambda track, i: items[i],
+        "GetSetMediaItemInfo_String": lambda item, key, value, set_: (True, item.guid),
+        "SetItemStateChunk": set_chunk,
+        "CountTrackEnvelopes": lambda track: len(envelopes),
+        "GetTrackEnvelope": lambda track, i: envelopes[i],
+        "GetEnvelopeStateChunk": lambda env, buf, isundo: (True, env.chunk),
+        "SetEnvelopeStateChunk": set_chunk,
+        "PreventUIRefresh": lambda n: None,
+        "UpdateArrange": lambda: None,
+    })
+    patches = [{"kind": "ITEM", "guid": "{I2}", "chunk": "<ITEM\nIGUID {I2}\n>"},
+               {"kind": "ENV", "guid": "{E1}", "chunk": "<VOLENV2\nEGUID {E1}\nPT 0 1 0\n>"}]
+
+    response = harness.call("SetTrackSubChunks", [0, patches, True])
+    # isundo reaches each setter, as it reaches SetTrackStateChunk on the whole-chunk path
+    assert response["ok"] and response["ret"] == 2 and undo_flags == [True, True]
+    assert items[0].chunk is None and items[1].chunk == "<ITEM\nIGUID {I2}\n>"
+    assert envelopes[0].chunk.endswith("PT 0 1 0\n>")
+
+    missing = harness.call("SetTrackSubChunks", [0, [dict(patches[0], guid="{I9}")], False])
+    assert missing["error"] == "Sub-chunk not found: {I9}"
@@ -0,0 +1,112 @@
+"""Test per-tool and per-function server metrics (no REAPER needed)"""
+import json
+
+import pytest
+from mcp.server.fastmcp.exceptions import ToolError
+
+from server import bridge as bridge_module
+from server.bridge import ReaperFileBridge
+from server.metered_mcp import MeteredFastMCP
+from server.metrics import ServerMetrics
+from server.transport import FileTransport, SocketTransport
+from testing.fake_reaper import FakeReaper, FileBridgeServer, SocketBridgeServer
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics = ServerMetrics()
+    monkeypatch.setattr(bridge_module, "server_metrics", metrics)
+    return metrics
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_and_errors_are_counted(metrics):
+    mcp = MeteredFastMCP("test", metrics=metrics)
+
+    @mcp.tool()
+    async def works() -> str:
+        return "ok"
+
+    @mcp.tool()
+    async def fails() -> str:
+        raise Exception("broken")
+
+    for _ in range(3):
+        await mcp.call_tool("works", {})
+    with pytest.raises(ToolError):
+        await mcp.call_tool("fails", {})
+
+    tools = {row["name"]: row for row in metrics.snapshot()["tools"]}
+    assert (tools["works"]["count"], tools["works"]["errors"]) == (3, 0)
+    assert (tools["fails"]["count"], tools["fails"]["errors"]) == (1, 1)
+    assert tools["works"]["p99_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_bridge_functions_count_bytes_over_sockets(tmp_path, metrics):
+    server = SocketBridgeServer()
+    address = await server.start_tcp()
+    bridge = ReaperFileBridge(tmp_path, transport=SocketTransport(address))
+    try:
+        await bridge.call_lua("InsertTrackAtIndex", [0, True])
+        await bridge.call_lua("GetTrackName", [0])
+        await bridge.call_lua("NoSuchFunction", [])
+        await bridge.call_batch([("CountTracks", [0]), ("GetTrackName", [0])])
+    finally:
+        await bridge.transport.close()
+        await server.stop()
+
+    functions = {row["name"]: row for row in metrics.snapshot()["functions"]}
+    assert functions["GetTrackName"]["count"] == 1
+    assert functions["GetTrackName"]["batched"] == 1
+    assert functions["CountTracks"] == dict(functions["CountTracks"], count=0, batched=1)
+    assert functions["NoSuchFunction"]["errors"] == 1
+    name = functions["GetTrackName"]
+    # Frames: 4-byte header plus the JSON request/response
+    assert name["bytes_sent"] > len('{"id": 2, "func": "GetTrackName", "args": [0]}')
+    assert name["bytes_received"] > len('{"ok": true, "ret": "Track 1"}')
+
+
+@pytest.mark.asyncio
+async def test_bridge_functions_count_bytes_over_files(tmp_path, metrics):
+    transport = FileTransport(tmp_path)
+    bridge = ReaperFileBridge(tmp_path, transport=transport)
+    with FileBridgeServer(tmp_path, FakeReaper()):
+        await bridge.call_lua("CountTracks", [0])
+    await transport.close()
+
+    (row,) = [r for r in metrics.snapshot()["functions"] if r["name"] == "CountTracks"]
+    assert row["bytes_received"] == len(json.dumps({"ok": True, "ret": 0}))
+    assert row["bytes_sent"] > 0
+
+
+def test_prometheus_text_file(tmp_path):
+    metrics = ServerMetrics(export_path=tmp_path / "metrics.prom", export_interval=0)
+    metrics.record_call("GetTrack", 0.002, sent=40, received=60)
+    metrics.record_call("GetTrack", 5.0, ok=False, timeout=True)
+    metrics.record_tool('dsl_"odd"', 0.01)
+
+    text = (tmp_path / "metrics.prom").read_text()
+    assert 'reaper_mcp_function_calls_total{function="GetTrack"} 2' in text
+    assert 'reaper_mcp_function_timeouts_total{function="GetTrack"} 1' in text
+    assert 'reaper_mcp_function_bytes_received_total{function="GetTrack"} 60' in text
+    assert 'reaper_mcp_tool_calls_total{tool="dsl_\\"odd\\""} 1' in text
+    assert 'reaper_mcp_tool_latency_seconds{tool="dsl_\\"odd\\"",quantile="0.99"}' in text
+
+
+@pytest.mark.asyncio
+async def test_get_server_metrics_tool(monkeypatch):
+    from server.tools import server_metrics as tool_module
+
+    metrics = ServerMetrics()
+    monkeypatch.setattr(tool_module, "server_metrics", metrics)
+    for _ in range(5):
+        metrics.record_call("CountTracks", 0.001)
+    metrics.record_call("GetTrack", 0.5)
+
+    report = json.loads(await tool_module.get_server_metrics(top=1, sort_by="p99_ms"))
+    assert [row["name"] for row in report["functions"]] == ["GetTrack"]
+
+    report = json.loads(await tool_module.get_server_metrics(reset=True))
+    assert [row["name"] for row in report["functions"]] == ["CountTracks", "GetTrack"]
+    assert metrics.snapshot()["functions"] == []
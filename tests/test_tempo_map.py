@@ -0,0 +1,133 @@
+"""Test the in-process tempo map and the tools converting through it (no REAPER needed)"""
+import pytest
+
+from server.dsl import resolvers
+from server.dsl.snapshot import snapshot_cache
+from server.tempo_map import TempoMap, current_tempo_map
+from server.tools import tempo_time_signature, time_tempo_extended
+from testing.fake_reaper import FakeReaper, LocalBridge
+
+
+def marker(time, bpm, num=4, denom=4, linear=False, measure=0, beat=0.0):
+    return {"time": time, "measure": measure, "beat": beat, "bpm": bpm,
+            "num": num, "denom": denom, "linear": linear}
+
+
+def test_constant_tempo_uses_project_defaults():
+    tempo_map = TempoMap([], default_bpm=90.0)
+    assert tempo_map.qn_to_time(3.0) == pytest.approx(2.0)
+    assert tempo_map.time_to_qn(-1.0) == pytest.approx(-1.5)
+    assert tempo_map.bars_duration(2, start_time=1.0) == pytest.approx(8 / 1.5)
+    assert tempo_map.next_change_time(0.0) is None
+
+
+def test_tempo_and_time_signature_changes():
+    # Two bars of 4/4 at 120, then 3/4 at 60 from 4 s (QN 8, measure 2)
+    tempo_map = TempoMap([marker(0.0, 120.0), marker(4.0, 60.0, num=3, measure=2)])
+    assert tempo_map.time_to_qn(5.0) == pytest.approx(9.0)
+    assert tempo_map.time_to_beats(5.0) == (2, pytest.approx(1.0))
+    assert tempo_map.time_sig_at(5.0) == (3, 4) and tempo_map.time_sig_at(3.9) == (4, 4)
+    assert tempo_map.beats_to_time(3) == pytest.approx(7.0)
+    assert tempo_map.beats_to_qn(10.0) == pytest.approx(10.0)
+    # From beat 2 of measure 1 (in 4/4) to beat 2 of measure 3 (in 3/4)
+    assert tempo_map.bars_duration(2, start_time=3.0) == pytest.approx(9.0 - 3.0)
+    assert tempo_map.next_change_time(0.0) == 4.0
+
+
+def test_linear_ramp_round_trips():
+    # 60 -> 120 BPM over 4 s covers (60 + 120) / 2 * 4 / 60 = 6 QN
+    tempo_map = TempoMap([marker(0.0, 60.0, linear=True), marker(4.0, 120.0)])
+    assert tempo_map.time_to_qn(4.0) == pytest.approx(6.0)
+    assert tempo_map.tempo_at(2.0) == pytest.approx(90.0)
+    times = [0.0, 0.5, 1.7, 3.99, 4.0, 9.25]
+    assert tempo_map.qns_to_time(tempo_map.times_to_qn(times)) == pytest.approx(times)
+    assert tempo_map.qn_to_time(8.0) == pytest.approx(5.0)
+
+
+def test_compound_meter_counts_eighths():
+    tempo_map = TempoMap([marker(0.0, 60.0, num=6, denom=8)])
+    assert tempo_map.divided_tempo_at(1.0) == pytest.approx(120.0)
+    info = tempo_map.qn_to_measure(4.5)
+    assert (info["measure"], info["beat"], info["start_qn"], info["end_qn"]) == (1, 3.0, 3.0, 6.0)
+    assert tempo_map.snap_times([1.1, 1.3], grid_qn=0.5) == pytest.approx([1.0, 1.5])
+
+
+@pytest.fixture
+def bridge(monkeypatch):
+    snapshot_cache.invalidate()
+    reaper = FakeReaper()
+    reaper.tempo = 100.0
+    reaper.add_tempo_marker(0.0, 120.0)
+    reaper.add_tempo_marker(8.0, 60.0, num=3)
+    bridge = LocalBridge(reaper)
+    monkeypatch.setattr(tempo_time_signature, "bridge", bridge)
+    monkeypatch.setattr(time_tempo_extended, "bridge", bridge)
+    yield bridge
+    snapshot_cache.invalidate()
+
+
+@pytest.mark.asyncio
+async def test_conversions_stay_local_until_project_changes(bridge):
+    calls = bridge.reaper.calls
+    assert await time_tempo_extended.time_map2_time_to_qn(9.0) == \
+        "9.000 seconds = 17.000 quarter notes"
+    calls.clear()
+    assert await tempo_time_signature.align_time_to_grid(8.6, "1/4") == \
+        "Aligned 8.600s to 1/4 grid: 9.000s"
+    assert await tempo_time_signature.time_to_beats(9.0) == "9.000 seconds = Measure 5, Beat 2.00"
+    assert calls == ["GetProjectStateChangeCount"] * 2
+
+    bridge.reaper.add_tempo_marker(10.0, 120.0, num=3)
+    assert await time_tempo_extended.time_map2_qn_to_time(20.0) == \
+        "20.000 quarter notes = 11.000 seconds"
+    assert calls.count("GetTempoMap") == 1
+
+
+@pytest.mark.asyncio
+async def test_tempo_edits_drop_the_cached_map(bridge):
+    """Setters refresh the map even when REAPER's change count does not move"""
+    bridge.reaper.handlers["GetProjectStateChangeCount"] = lambda *a: {"ok": True, "ret": 1}
+    assert await tempo_time_signature.time_to_beats(20.0) == "20.000 seconds = Measure 9, Beat 1.00"
+
+    assert await tempo_time_signature.set_project_tempo(120.0, 14.0) == \
+        "Set tempo to 120.00 BPM at 14.000 seconds"
+    assert await tempo_time_signature.time_to_beats(20.0) == "20.000 seconds = Measure 11, Beat 1.00"
+
+    assert await time_tempo_extended.delete_tempo_time_sig_marker(2) == \
+        "Deleted tempo/time signature marker at index 2"
+    assert await tempo_time_signature.time_to_beats(20.0) == "20.000 seconds = Measure 9, Beat 1.00"
+
+
+@pytest.mark.asyncio
+async def test_old_bridge_reads_markers_one_by_one(bridge):
+    del bridge.reaper.handlers["GetTempoMap"]
+    tempo_map = await current_tempo_map(bridge)
+    assert tempo_map.qn_to_time(17.0) == pytest.approx(9.0)
+    assert "GetProjectTimeSignature2" in bridge.reaper.calls
+    assert await tempo_time_signature.get_time_signature_at_time(9.0) == \
+        "Time signature at 9.000 seconds: 3/4"
+
+
+@pytest.mark.asyncio
+async def test_bars_follow_the_tempo_map(bridge):
+    resolvers.reset_context()
+    time_ref = await resolvers.resolve_time(bridge, {"bars": 2, "from": 8.0})
+    # Two bars of 3/4 at 60 BPM
+    assert (time_ref.start, time_ref.end) == (8.0, pytest.approx(14.0))
+
+
+def test_lua_returns_whole_tempo_map(tmp_path):
+    pytest.importorskip("lupa")
+    from testing.lua_bridge import LuaBridgeHarness
+
+    markers = [(0.0, 0, 0.0, 120.0, 4, 4, True), (4.0, 2, 0.0, 60.0, 3, 4, False)]
+    harness = LuaBridgeHarness(tmp_path, {
+        "CountTempoTimeSigMarkers": lambda proj: len(markers),
+        "GetTempoTimeSigMarker": lambda proj, i: (True,) + markers[i],
+        "GetProjectTimeSignature2": lambda proj: (110.0, 4),
+    })
+    response = harness.call("GetTempoMap", [])
+    assert response["ok"] and (response["bpm"], response["num"]) == (110.0, 4)
+    tempo_map = TempoMap(response["markers"], response["bpm"], response["num"])
+    assert tempo_map.time_to_qn(4.0) == pytest.approx(6.0)
+    assert tempo_map.time_sig_at(5.0) == (3, 4)
@@ -0,0 +1,94 @@
+"""Test the cached tool-schema manifest (no REAPER needed)"""
+import json
+
+import pytest
+from mcp.server.fastmcp.tools.tool_manager import ToolManager
+
+from server import metered_mcp, tool_manifest
+from server.metered_mcp import MeteredFastMCP
+from server.metrics import ServerMetrics
+from server.tool_manifest import CachedTool, ToolManifest
+
+
+def register(manifest):
+    mcp = MeteredFastMCP("test", metrics=ServerMetrics(), manifest=manifest)
+
+    @mcp.tool()
+    async def scale_volume(track: str, db: float = 0.0) -> str:
+        """Change a track's volume"""
+        return f"{track}: {db + 1:g}"
+
+    mcp.tool(name="renamed", description="Explicit description")(scale_volume)
+    return mcp
+
+
+async def tool_list(mcp):
+    return [tool.model_dump(mode="json") for tool in await mcp.list_tools()]
+
+
+@pytest.mark.asyncio
+async def test_second_start_registers_from_manifest(tmp_path):
+    path = tmp_path / "manifest.json"
+    first = register(ToolManifest(path))
+    expected = await tool_list(first)
+    assert first.manifest.misses == 2
+    assert path.exists()  # written by tools/list
+
+    manifest = ToolManifest(path)
+    second = register(manifest)
+    assert (manifest.hits, manifest.misses) == (2, 0)
+    assert isinstance(second._tool_manager.get_tool("scale_volume"), CachedTool)
+    assert await tool_list(second) == expected
+    assert expected[1]["description"] == "Explicit description"
+
+    # Arguments are still validated and coerced by the lazily built model
+    result = await second.call_tool("scale_volume", {"track": "Bass", "db": "2"})
+    assert result[0][0].text == "Bass: 3"
+
+
+@pytest.mark.asyncio
+async def test_changed_module_is_rebuilt(tmp_path):
+    path = tmp_path / "manifest.json"
+    register(ToolManifest(path)).manifest.save()
+
+    data = json.loads(path.read_text())
+    data["modules"][__name__]["hash"] = "stale"
+    path.write_text(json.dumps(data))
+
+    manifest = ToolManifest(path)
+    register(manifest)
+    assert (manifest.hits, manifest.misses) == (0, 2)
+
+
+def test_other_mcp_version_discards_manifest(tmp_path):
+    path = tmp_path / "manifest.json"
+    register(ToolManifest(path)).manifest.save()
+
+    data = json.loads(path.read_text())
+    data["environment"]["mcp"] = "0.0.1"
+    path.write_text(json.dumps(data))
+
+    manifest = ToolManifest(path)
+    register(manifest)
+    assert manifest.hits == 0
+    manifest.save()
+    assert json.loads(path.read_text())["environment"]["mcp"] != "0.0.1"
+
+
+def test_disabled_manifest_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.setenv("REAPER_MCP_TOOL_CACHE", "0")
+    manifest = ToolManifest.from_env()
+    register(manifest)
+    manifest.save()
+    assert not manifest.enabled and manifest.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_unsupported_mcp_keeps_stock_tool_manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(tool_manifest, "MANIFEST_SUPPORTED", False)
+    monkeypatch.setattr(metered_mcp, "MANIFEST_SUPPORTED", False)
+    monkeypatch.setenv("REAPER_MCP_TOOL_CACHE", str(tmp_path / "manifest.json"))
+    manifest = ToolManifest.from_env()
+    mcp = register(manifest)
+    assert not manifest.enabled and type(mcp._tool_manager) is ToolManager
+    assert [tool["name"] for tool in await tool_list(mcp)] == ["scale_volume", "renamed"]
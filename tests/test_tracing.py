@@ -0,0 +1,109 @@
+"""Test ReaScript call tracing (no REAPER needed)"""
+import asyncio
+import json
+
+import pytest
+
+from server import bridge as bridge_module
+from server.bridge import ReaperFileBridge
+from server.tracing import Tracer
+from testing.fake_reaper import FakeReaper, LocalTransport
+
+
+@pytest.fixture
+def tracer(tmp_path, monkeypatch):
+    tracer = Tracer(tmp_path / "calls.jsonl", enabled=True, flush_interval=60)
+    monkeypatch.setattr(bridge_module, "tracer", tracer)
+    yield tracer
+    tracer.close()
+
+
+@pytest.fixture
+def bridge():
+    reaper = FakeReaper()
+    reaper.add_track("Bass")
+    return ReaperFileBridge(transport=LocalTransport(reaper))
+
+
+def read_events(tracer):
+    tracer.close()
+    return [json.loads(line) for line in tracer.log_file.read_text().splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_calls_are_grouped_under_tool_spans(tracer, bridge):
+    """Concurrent tools each see only their own calls"""
+    async def dsl_a():
+        with tracer.span("dsl_a"):
+            await bridge.call_lua("CountTracks", [0])
+            await bridge.call_lua("GetTrackName", [0])
+
+    async def dsl_b():
+        with tracer.span("dsl_b"):
+            await bridge.call_lua("CountTracks", [0])
+
+    await asyncio.gather(dsl_a(), dsl_b())
+    events = read_events(tracer)
+
+    spans = {e["dsl_tool"]: e for e in events if e["type"] == "span"}
+    assert spans["dsl_a"]["calls"] == 2 and spans["dsl_b"]["calls"] == 1
+    calls = [e for e in events if e["type"] == "response"]
+    assert sorted(e["dsl_tool"] for e in calls) == ["dsl_a", "dsl_a", "dsl_b"]
+    for e in calls:
+        assert e["span_id"] == spans[e["dsl_tool"]]["span_id"]
+
+
+@pytest.mark.asyncio
+async def test_events_are_written_in_one_batch(tracer, bridge):
+    """Recording only buffers; the writer appends everything at once"""
+    for _ in range(20):
+        await bridge.call_lua("CountTracks", [0])
+    assert tracer.written == 0
+    assert len(tracer.recent) == 20
+
+    tracer.flush()
+    assert tracer.written == 20
+    assert len(tracer.log_file.read_text().splitlines()) == 20
+
+
+@pytest.mark.asyncio
+async def test_sampling_keeps_failures(tracer, bridge):
+    tracer.sample_rate = 0.0
+    with tracer.span("dsl_quiet"):
+        await bridge.call_lua("CountTracks", [0])
+    with tracer.span("dsl_broken"):
+        await bridge.call_lua("CountTracks", [0])
+        await bridge.call_lua("NoSuchFunction", [])
+
+    events = read_events(tracer)
+    assert [(e["type"], e.get("function")) for e in events] == \
+        [("response", "NoSuchFunction"), ("span", None)]
+    assert events[1]["dsl_tool"] == "dsl_broken"
+    assert events[1]["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_large_payloads_are_truncated(tracer, bridge):
+    tracer.max_payload = 40
+    await bridge.call_lua("SetTrackName", [0, "x" * 1000])
+
+    (event,) = read_events(tracer)
+    assert event["args"].startswith('[0, "xxx')
+    assert event["args"].endswith("more>")
+    assert len(event["args"]) < 60
+    assert event["response"] == {"ok": True}
+
+
+@pytest.mark.asyncio
+async def test_tracking_is_per_task(bridge):
+    """start_tracking() in one tool does not collect another tool's calls"""
+    async def tool(func, count):
+        bridge.start_tracking()
+        for _ in range(count):
+            await bridge.call_lua(func, [0])
+        return bridge.stop_tracking()
+
+    first, second = await asyncio.gather(tool("CountTracks", 3), tool("GetTrackName", 2))
+    assert [c["function"] for c in first] == ["CountTracks"] * 3
+    assert [c["function"] for c in second] == ["GetTrackName"] * 2
+    assert "response" not in first[0]